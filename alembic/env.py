@@ -31,12 +31,13 @@ from app.modules.inventory_management.models import (
     InventoryStock, InventoryReservation, InventoryTransaction
 )  # 库存管理模型
 from app.modules.order_management.models import (
-    Order, OrderItem, OrderStatusHistory
+    Order, OrderItem, OrderStatusHistory, OrderCounter, OrderOutboxEvent
 )  # 订单管理模型
 from app.modules.member_system.models import (
     MembershipLevel, Member, MembershipBenefit, PointTransaction, 
     MemberActivity, ActivityParticipation, BenefitUsage, SystemConfig
 )  # 会员系统模型
+from app.modules.payment_service.models import PaymentCallbackInbox  # 支付服务模型
 
 # 设置target_metadata为Base的metadata
 target_metadata = Base.metadata
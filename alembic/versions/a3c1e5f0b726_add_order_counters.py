@@ -0,0 +1,37 @@
+"""Add order_counters table for paginated order totals
+
+Revision ID: a3c1e5f0b726
+Revises: 348622d4f914
+Create Date: 2026-10-18 10:12:04.215310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c1e5f0b726'
+down_revision = '348622d4f914'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('order_counters',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='用户ID'),
+    sa.Column('status', sa.String(length=20), nullable=False, comment='订单状态'),
+    sa.Column('order_count', sa.Integer(), nullable=False, comment='订单数量'),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, comment='更新时间'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'status', name='uq_order_counters_user_status')
+    )
+    # 回填历史订单计数
+    op.execute(
+        "INSERT INTO order_counters (user_id, status, order_count, updated_at) "
+        "SELECT user_id, status, COUNT(id), CURRENT_TIMESTAMP FROM orders GROUP BY user_id, status"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('order_counters')
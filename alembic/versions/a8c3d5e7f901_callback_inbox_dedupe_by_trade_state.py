@@ -0,0 +1,33 @@
+"""Deduplicate payment callbacks per trade state and add retry backoff
+
+Revision ID: a8c3d5e7f901
+Revises: f2b6d8e04c13
+Create Date: 2026-10-19 10:12:44.581207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c3d5e7f901'
+down_revision = 'f2b6d8e04c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('payment_callback_inbox') as batch_op:
+        batch_op.add_column(sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+        batch_op.drop_constraint('uq_callback_provider_transaction', type_='unique')
+        batch_op.create_unique_constraint(
+            'uq_callback_provider_transaction_state', ['provider', 'transaction_id', 'trade_state']
+        )
+
+
+def downgrade() -> None:
+    # 同一交易存在多个状态的回调时，降级前需先清理重复记录
+    with op.batch_alter_table('payment_callback_inbox') as batch_op:
+        batch_op.drop_constraint('uq_callback_provider_transaction_state', type_='unique')
+        batch_op.create_unique_constraint('uq_callback_provider_transaction', ['provider', 'transaction_id'])
+        batch_op.drop_column('next_attempt_at')
@@ -0,0 +1,40 @@
+"""Add order_outbox_events table for transactional outbox
+
+Revision ID: b7d2f4a91c03
+Revises: a3c1e5f0b726
+Create Date: 2026-10-18 11:02:37.640118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f4a91c03'
+down_revision = 'a3c1e5f0b726'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('order_outbox_events',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('event_type', sa.String(length=50), nullable=False, comment='事件类型'),
+    sa.Column('order_id', sa.Integer(), nullable=False, comment='订单ID'),
+    sa.Column('payload', sa.JSON(), nullable=False, comment='事件数据'),
+    sa.Column('status', sa.String(length=20), nullable=False, comment='分发状态'),
+    sa.Column('attempts', sa.Integer(), nullable=False, comment='分发尝试次数'),
+    sa.Column('last_error', sa.Text(), nullable=True, comment='最近一次分发错误'),
+    sa.Column('available_at', sa.DateTime(), nullable=False, comment='可分发时间（重试退避）'),
+    sa.Column('created_at', sa.DateTime(), nullable=False, comment='创建时间'),
+    sa.Column('dispatched_at', sa.DateTime(), nullable=True, comment='分发完成时间'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_order_outbox_status_available', 'order_outbox_events', ['status', 'available_at'], unique=False)
+    op.create_index(op.f('ix_order_outbox_events_order_id'), 'order_outbox_events', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_outbox_events_order_id'), table_name='order_outbox_events')
+    op.drop_index('idx_order_outbox_status_available', table_name='order_outbox_events')
+    op.drop_table('order_outbox_events')
@@ -0,0 +1,42 @@
+"""Add payment_callback_inbox table for queued callback ingestion
+
+Revision ID: c4e8a2d61f57
+Revises: b7d2f4a91c03
+Create Date: 2026-10-18 14:26:09.318452
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2d61f57'
+down_revision = 'b7d2f4a91c03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('payment_callback_inbox',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('provider', sa.String(length=20), nullable=False),
+    sa.Column('transaction_id', sa.String(length=200), nullable=False),
+    sa.Column('out_trade_no', sa.String(length=100), nullable=False),
+    sa.Column('trade_state', sa.String(length=32), nullable=False),
+    sa.Column('raw_payload', sa.Text(), nullable=False),
+    sa.Column('client_ip', sa.String(length=45), nullable=True),
+    sa.Column('user_agent', sa.String(length=500), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('provider', 'transaction_id', name='uq_callback_provider_transaction')
+    )
+    op.create_index('idx_callback_status_id', 'payment_callback_inbox', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_callback_status_id', table_name='payment_callback_inbox')
+    op.drop_table('payment_callback_inbox')
@@ -0,0 +1,53 @@
+"""Make point ledger balance_after nullable and add monthly summary table
+
+Revision ID: d91f3b6c2a84
+Revises: c4e8a2d61f57
+Create Date: 2026-10-18 16:05:42.551803
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd91f3b6c2a84'
+down_revision = 'c4e8a2d61f57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # balance_after 已由初始迁移创建（BigInteger NOT NULL），此处只放宽为可空以匹配模型
+    op.alter_column('point_transactions', 'balance_after',
+               existing_type=sa.BigInteger(),
+               nullable=True,
+               comment='变动后可用积分余额',
+               existing_comment='交易后余额')
+    op.create_table('point_ledger_monthly_summaries',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='汇总记录ID'),
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='用户ID'),
+    sa.Column('period', sa.String(length=7), nullable=False, comment='汇总月份，格式YYYY-MM'),
+    sa.Column('earned_points', sa.Integer(), nullable=False, comment='当月获得积分'),
+    sa.Column('used_points', sa.Integer(), nullable=False, comment='当月使用积分'),
+    sa.Column('expired_points', sa.Integer(), nullable=False, comment='当月过期积分'),
+    sa.Column('adjusted_points', sa.Integer(), nullable=False, comment='当月其他变动积分（冻结/解冻等）净值'),
+    sa.Column('transaction_count', sa.Integer(), nullable=False, comment='被压缩的流水条数'),
+    sa.Column('closing_balance', sa.Integer(), nullable=True, comment='月末可用积分余额'),
+    sa.Column('last_transaction_id', sa.Integer(), nullable=False, comment='被压缩的最后一条流水ID'),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'period', name='uk_point_ledger_summaries_user_period')
+    )
+    op.create_index('idx_point_ledger_summaries_period', 'point_ledger_monthly_summaries', ['period'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_point_ledger_summaries_period', table_name='point_ledger_monthly_summaries')
+    op.drop_table('point_ledger_monthly_summaries')
+    op.alter_column('point_transactions', 'balance_after',
+               existing_type=sa.BigInteger(),
+               nullable=False,
+               comment='交易后余额',
+               existing_comment='变动后可用积分余额')
@@ -0,0 +1,126 @@
+"""Add member_points.total_expired for batch point expiry
+
+Revision ID: e5a7c3f19b20
+Revises: d91f3b6c2a84
+Create Date: 2026-10-18 17:12:08.204635
+
+迁移链与会员模块模型存在结构分歧：初始迁移创建的是旧版会员表
+（membership_levels、members 以及按 member_id 记账的 point_transactions），
+当前模型使用的 member_levels、member_profiles、member_points 从未由迁移创建，
+此前只存在于 create_all 建出的数据库中。
+
+本迁移在这三张表缺失时按当前模型补建（member_points 直接包含 total_expired），
+已存在时只补 total_expired 列。旧版会员表与 point_transactions 的结构差异不在此处理。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c3f19b20'
+down_revision = 'd91f3b6c2a84'
+branch_labels = None
+depends_on = None
+
+
+def _existing_tables() -> set:
+    # 离线生成SQL时无法检查库结构，按迁移链状态（会员表不存在）处理
+    if op.get_context().as_sql:
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _timestamp_columns() -> list:
+    return [
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    ]
+
+
+def _create_member_levels() -> None:
+    op.create_table('member_levels',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='等级ID'),
+    sa.Column('level_name', sa.String(length=50), nullable=False, comment='等级名称'),
+    sa.Column('min_points', sa.Integer(), nullable=False, comment='达到该等级所需最少积分'),
+    sa.Column('discount_rate', sa.DECIMAL(precision=4, scale=3), nullable=False, comment='折扣率，0.9表示9折'),
+    sa.Column('benefits', sa.JSON(), nullable=True, comment='等级权益配置JSON格式'),
+    *_timestamp_columns(),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('level_name', name='uk_member_levels_level_name')
+    )
+    op.create_index('idx_member_levels_min_points', 'member_levels', ['min_points'], unique=False)
+
+
+def _create_member_profiles() -> None:
+    op.create_table('member_profiles',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='会员ID'),
+    sa.Column('member_code', sa.String(length=20), nullable=False, comment='会员编号，如M202409170001'),
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='关联用户ID'),
+    sa.Column('level_id', sa.Integer(), nullable=False, comment='当前会员等级ID'),
+    sa.Column('total_spent', sa.DECIMAL(precision=15, scale=2), nullable=False, comment='累计消费金额'),
+    sa.Column('join_date', sa.Date(), nullable=False, comment='入会日期'),
+    sa.Column('last_active_at', sa.DateTime(), nullable=True, comment='最后活跃时间'),
+    sa.Column('birthday', sa.Date(), nullable=True, comment='生日'),
+    sa.Column('preferences', sa.JSON(), nullable=True, comment='偏好设置(通知、营销等)'),
+    sa.Column('status', sa.Integer(), nullable=False, comment='状态: 1=正常, 2=冻结, 3=注销'),
+    *_timestamp_columns(),
+    sa.CheckConstraint('total_spent >= 0', name='check_total_spent_non_negative'),
+    sa.ForeignKeyConstraint(['level_id'], ['member_levels.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('member_code', name='uk_member_profiles_member_code'),
+    sa.UniqueConstraint('user_id', name='uk_member_profiles_user_id')
+    )
+    op.create_index('fk_member_profiles_level_id', 'member_profiles', ['level_id'], unique=False)
+    op.create_index('fk_member_profiles_user_id', 'member_profiles', ['user_id'], unique=False)
+    op.create_index('idx_member_profiles_join_date', 'member_profiles', ['join_date'], unique=False)
+    op.create_index('idx_member_profiles_level_id', 'member_profiles', ['level_id'], unique=False)
+    op.create_index('idx_member_profiles_status', 'member_profiles', ['status'], unique=False)
+    op.create_index('idx_member_profiles_total_spent', 'member_profiles', ['total_spent'], unique=False)
+
+
+def _create_member_points() -> None:
+    op.create_table('member_points',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='积分记录ID'),
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='用户ID'),
+    sa.Column('level_id', sa.Integer(), nullable=False, comment='会员等级ID'),
+    sa.Column('current_points', sa.Integer(), nullable=False, comment='当前可用积分'),
+    sa.Column('total_earned', sa.Integer(), nullable=False, comment='历史累计获得积分'),
+    sa.Column('total_used', sa.Integer(), nullable=False, comment='历史累计使用积分'),
+    sa.Column('total_expired', sa.Integer(), server_default='0', nullable=False, comment='历史累计过期积分'),
+    *_timestamp_columns(),
+    sa.CheckConstraint('current_points >= 0', name='check_current_points_non_negative'),
+    sa.CheckConstraint('total_earned >= 0', name='check_total_earned_non_negative'),
+    sa.CheckConstraint('total_used >= 0', name='check_total_used_non_negative'),
+    sa.CheckConstraint('total_expired >= 0', name='check_total_expired_non_negative'),
+    sa.ForeignKeyConstraint(['level_id'], ['member_levels.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', name='uk_member_points_user_id')
+    )
+    op.create_index('fk_member_points_level_id', 'member_points', ['level_id'], unique=False)
+    op.create_index('fk_member_points_user_id', 'member_points', ['user_id'], unique=False)
+    op.create_index('idx_member_points_current_points', 'member_points', ['current_points'], unique=False)
+    op.create_index('idx_member_points_level_id', 'member_points', ['level_id'], unique=False)
+
+
+def upgrade() -> None:
+    existing = _existing_tables()
+    if 'member_levels' not in existing:
+        _create_member_levels()
+    if 'member_profiles' not in existing:
+        _create_member_profiles()
+    if 'member_points' not in existing:
+        _create_member_points()
+        return
+
+    with op.batch_alter_table('member_points') as batch_op:
+        batch_op.add_column(sa.Column('total_expired', sa.Integer(), server_default='0', nullable=False, comment='历史累计过期积分'))
+        batch_op.create_check_constraint('check_total_expired_non_negative', 'total_expired >= 0')
+
+
+def downgrade() -> None:
+    # 补建的会员表保留（上一版本不依赖其是否存在），只回退 total_expired
+    with op.batch_alter_table('member_points') as batch_op:
+        batch_op.drop_constraint('check_total_expired_non_negative', type_='check')
+        batch_op.drop_column('total_expired')
@@ -0,0 +1,41 @@
+"""Add member_level_change_events for batch re-leveling
+
+Revision ID: f2b6d8e04c13
+Revises: e5a7c3f19b20
+Create Date: 2026-10-18 18:20:37.913402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b6d8e04c13'
+down_revision = 'e5a7c3f19b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('member_level_change_events',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False, comment='事件ID'),
+    sa.Column('user_id', sa.Integer(), nullable=False, comment='用户ID'),
+    sa.Column('member_id', sa.Integer(), nullable=False, comment='会员ID'),
+    sa.Column('old_level_id', sa.Integer(), nullable=True, comment='原等级ID'),
+    sa.Column('new_level_id', sa.Integer(), nullable=False, comment='新等级ID'),
+    sa.Column('change_type', sa.String(length=20), nullable=False, comment='变更类型：upgrade/downgrade'),
+    sa.Column('trigger', sa.String(length=20), nullable=False, comment='触发方式：batch/manual'),
+    sa.Column('points_snapshot', sa.Integer(), nullable=True, comment='变更时的累计积分'),
+    sa.Column('created_at', sa.DateTime(), nullable=False, comment='创建时间'),
+    sa.ForeignKeyConstraint(['member_id'], ['member_profiles.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_member_level_events_created_at', 'member_level_change_events', ['created_at'], unique=False)
+    op.create_index('idx_member_level_events_user_id', 'member_level_change_events', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_member_level_events_user_id', table_name='member_level_change_events')
+    op.drop_index('idx_member_level_events_created_at', table_name='member_level_change_events')
+    op.drop_table('member_level_change_events')
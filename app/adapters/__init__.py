@@ -2,4 +2,18 @@
 第三方适配器包
 
 提供统一的第三方服务集成接口
-"""
\ No newline at end of file
+"""
+
+from .http_transport import (
+    CircuitOpenError,
+    PooledHttpTransport,
+    close_http_transport,
+    get_http_transport
+)
+
+__all__ = [
+    "CircuitOpenError",
+    "PooledHttpTransport",
+    "close_http_transport",
+    "get_http_transport"
+]
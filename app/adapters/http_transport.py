@@ -0,0 +1,264 @@
+"""
+共享出站HTTP传输层
+
+为所有第三方适配器提供统一的异步HTTP客户端：
+- httpx.AsyncClient 连接池（keep-alive，安装 h2 时启用 HTTP/2）
+- 按主机限制并发请求数
+- 连接/读取超时
+- 指数退避 + 随机抖动重试（仅幂等请求或显式声明幂等的请求）
+- 按主机熔断：连续失败达到阈值后短路请求，冷却后放行一个探测请求
+
+使用说明：
+- 获取共享实例：transport = get_http_transport()
+- 发送请求：response = await transport.request("POST", url, content=body, idempotent=True)
+- 应用关闭时：await close_http_transport()
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+import random
+import time
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class TransportConfig:
+    """出站HTTP传输配置（可通过环境变量覆盖）"""
+
+    CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.0"))
+    READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10.0"))
+    MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    KEEPALIVE_EXPIRY = 30.0
+    MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1"
+
+    # 重试
+    MAX_RETRIES = 2
+    BACKOFF_BASE = 0.2
+    BACKOFF_MAX = 5.0
+    RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+    # 熔断
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_RESET_TIMEOUT = 30.0
+
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class CircuitOpenError(Exception):
+    """目标主机熔断中，请求被短路"""
+
+
+class CircuitBreaker:
+    """
+    简单熔断器
+
+    closed：正常放行；连续失败达到阈值后进入 open。
+    open：直接拒绝，冷却时间结束后进入 half_open。
+    half_open：只放行一个探测请求，成功则关闭，失败（含取消等非网络异常）重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if self._clock() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = self._clock()
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """请求未得到结果（被取消或非网络异常）时释放探测名额：半开状态按失败处理重新打开"""
+        if self.state == self.HALF_OPEN and self._probe_in_flight:
+            self.record_failure()
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class PooledHttpTransport:
+    """共享的异步HTTP传输（连接池 + 重试 + 熔断）"""
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_retries: int = TransportConfig.MAX_RETRIES,
+        backoff_base: float = TransportConfig.BACKOFF_BASE,
+        backoff_max: float = TransportConfig.BACKOFF_MAX,
+        retry_status_codes: Iterable[int] = TransportConfig.RETRY_STATUS_CODES,
+        max_connections_per_host: int = TransportConfig.MAX_CONNECTIONS_PER_HOST,
+        breaker_failure_threshold: int = TransportConfig.BREAKER_FAILURE_THRESHOLD,
+        breaker_reset_timeout: float = TransportConfig.BREAKER_RESET_TIMEOUT
+    ):
+        """
+        Args:
+            transport: 底层传输（测试时可注入 httpx.MockTransport）
+            max_retries: 最大重试次数（不含首次请求）
+            backoff_base: 退避基数（秒）
+            backoff_max: 单次退避上限（秒）
+            retry_status_codes: 需要重试的HTTP状态码
+            max_connections_per_host: 每个主机的最大并发请求数
+            breaker_failure_threshold: 熔断连续失败阈值
+            breaker_reset_timeout: 熔断冷却时间（秒）
+        """
+        self._transport = transport
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.max_connections_per_host = max_connections_per_host
+        self.breaker_failure_threshold = breaker_failure_threshold
+        self.breaker_reset_timeout = breaker_reset_timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """底层连接池客户端（首次使用时创建）"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=TransportConfig.HTTP2_ENABLED and self._transport is None and _http2_available(),
+                timeout=httpx.Timeout(TransportConfig.READ_TIMEOUT, connect=TransportConfig.CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=TransportConfig.MAX_CONNECTIONS,
+                    max_keepalive_connections=TransportConfig.MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=TransportConfig.KEEPALIVE_EXPIRY
+                ),
+                transport=self._transport
+            )
+        return self._client
+
+    def get_breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(self.breaker_failure_threshold, self.breaker_reset_timeout)
+        return self._breakers[host]
+
+    def _get_semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self._host_semaphores[host]
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """全抖动指数退避"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        idempotent: Optional[bool] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        发送请求
+
+        Args:
+            method: HTTP方法
+            url: 完整URL
+            idempotent: 是否允许重试；默认按HTTP方法判断（POST默认不重试）
+            **kwargs: 透传给 httpx.AsyncClient.request
+
+        Returns:
+            httpx.Response: 最后一次响应（可重试状态码重试耗尽时原样返回）
+
+        Raises:
+            CircuitOpenError: 目标主机熔断中
+            httpx.HTTPError: 网络错误且重试耗尽
+        """
+        method = method.upper()
+        host = urlsplit(url).netloc
+        breaker = self.get_breaker(host)
+        retries = self.max_retries if (idempotent if idempotent is not None else method in IDEMPOTENT_METHODS) else 0
+
+        attempt = 0
+        while True:
+            if not breaker.allow_request():
+                raise CircuitOpenError(f"{host} 熔断中，请求被拒绝")
+
+            try:
+                async with self._get_semaphore(host):
+                    response = await self.client.request(method, url, **kwargs)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                breaker.record_failure()
+                if attempt >= retries:
+                    raise
+                logger.warning(f"出站请求失败，准备重试: {method} {url}, attempt={attempt + 1}, error={e}")
+            except BaseException:
+                # 取消或其他异常：释放半开探测名额，避免熔断器停留在半开状态拒绝全部请求
+                breaker.release_probe()
+                raise
+            else:
+                if response.status_code not in self.retry_status_codes:
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                if attempt >= retries:
+                    return response
+                await response.aclose()
+                logger.warning(f"出站请求返回 {response.status_code}，准备重试: {method} {url}")
+
+            await asyncio.sleep(self._backoff_delay(attempt))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        """关闭连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# 全局共享传输
+_http_transport: Optional[PooledHttpTransport] = None
+
+
+def get_http_transport() -> PooledHttpTransport:
+    """获取全局共享的出站HTTP传输"""
+    global _http_transport
+    if _http_transport is None:
+        _http_transport = PooledHttpTransport()
+    return _http_transport
+
+
+async def close_http_transport() -> None:
+    """关闭全局出站HTTP传输（应用关闭时调用）"""
+    global _http_transport
+    if _http_transport is not None:
+        await _http_transport.aclose()
+        _http_transport = None
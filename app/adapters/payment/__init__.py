@@ -7,9 +7,11 @@
 from .wechat_adapter import WechatPayAdapter
 from .alipay_adapter import AlipayAdapter
 from .config import PaymentConfig
+from .codec import WechatPayCodec
 
 __all__ = [
     "WechatPayAdapter",
     "AlipayAdapter", 
-    "PaymentConfig"
+    "PaymentConfig",
+    "WechatPayCodec"
 ]
\ No newline at end of file
@@ -6,16 +6,43 @@
 from typing import Dict, Any, Optional
 from decimal import Decimal
 
+from app.adapters.http_transport import PooledHttpTransport, get_http_transport
 from .config import PaymentConfig
 
 
 class AlipayAdapter:
     """支付宝支付适配器 - 预留实现"""
     
-    def __init__(self):
+    def __init__(self, transport: Optional[PooledHttpTransport] = None):
         self.app_id = PaymentConfig.ALIPAY_APP_ID
         self.private_key = PaymentConfig.ALIPAY_PRIVATE_KEY
         self.public_key = PaymentConfig.ALIPAY_PUBLIC_KEY
+        self.gateway_url = PaymentConfig.ALIPAY_GATEWAY_URL
+        self._transport = transport
+    
+    @property
+    def transport(self) -> PooledHttpTransport:
+        """出站HTTP传输（默认使用全局共享连接池）"""
+        return self._transport or get_http_transport()
+    
+    async def post_gateway(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        发送表单请求到支付宝网关
+        
+        注意：本适配器尚未实现 RSA2 签名，请求按原样发送、不带 sign 参数，
+        返回数据也不验签；支付宝网关会拒绝未签名的请求，本方法目前仅提供共享连接池与熔断的传输通道。
+        
+        Args:
+            params: 公共参数与业务参数（原样发送，不补充 sign）
+            
+        Returns:
+            dict: 网关返回的JSON数据
+        """
+        response = await self.transport.request(
+            "POST", self.gateway_url, idempotent=True, data=params
+        )
+        response.raise_for_status()
+        return response.json()
     
     def create_order(
         self, 
@@ -0,0 +1,109 @@
+"""
+微信支付请求编解码器
+
+提供签名、验签和报文序列化的统一实现：
+- HMAC-SHA256 的内外层填充哈希状态在初始化时计算，每次签名只复制已吸收密钥的哈希对象
+  （仅 sign_type=HMAC-SHA256 时使用；默认 MD5 签名与 WechatPayAdapter 均不经过该路径）
+- 待签名字符串和XML报文一次遍历拼接生成
+- 验签使用常量时间比较，避免时序侧信道
+"""
+import hashlib
+import hmac
+import json
+from typing import Any, Dict
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+SIGN_TYPE_MD5 = "MD5"
+SIGN_TYPE_HMAC_SHA256 = "HMAC-SHA256"
+
+_SHA256_BLOCK_SIZE = 64
+_TRANS_36 = bytes(x ^ 0x36 for x in range(256))
+_TRANS_5C = bytes(x ^ 0x5C for x in range(256))
+
+
+class WechatPayCodec:
+    """微信支付报文编解码器（线程安全，可在多个请求间共享）"""
+
+    def __init__(self, api_key: str, sign_type: str = SIGN_TYPE_MD5):
+        if sign_type not in (SIGN_TYPE_MD5, SIGN_TYPE_HMAC_SHA256):
+            raise ValueError(f"不支持的签名类型: {sign_type}")
+
+        self.sign_type = sign_type
+        key = api_key.encode("utf-8")
+        # MD5：密钥拼接在参数串末尾
+        self._key_suffix = b"&key=" + key
+        # HMAC-SHA256：预先吸收 key^ipad / key^opad（RFC 2104），签名时只复制哈希状态
+        if len(key) > _SHA256_BLOCK_SIZE:
+            key = hashlib.sha256(key).digest()
+        key = key.ljust(_SHA256_BLOCK_SIZE, b"\0")
+        self._inner_template = hashlib.sha256(key.translate(_TRANS_36))
+        self._outer_template = hashlib.sha256(key.translate(_TRANS_5C))
+
+    @staticmethod
+    def build_sign_string(params: Dict[str, Any]) -> bytes:
+        """生成待签名字符串（按键排序，排除 sign 字段和空值，不含密钥）"""
+        return "&".join([
+            f"{k}={v}" for k, v in sorted(params.items())
+            if k != "sign" and v is not None and v != ""
+        ]).encode("utf-8")
+
+    def sign(self, params: Dict[str, Any]) -> str:
+        """
+        生成签名
+
+        Args:
+            params: 请求参数（sign 字段会被忽略）
+
+        Returns:
+            str: 大写十六进制签名
+        """
+        payload = self.build_sign_string(params)
+        if self.sign_type == SIGN_TYPE_MD5:
+            return hashlib.md5(payload + self._key_suffix).hexdigest().upper()
+
+        inner = self._inner_template.copy()
+        inner.update(payload)
+        outer = self._outer_template.copy()
+        outer.update(inner.digest())
+        return outer.hexdigest().upper()
+
+    def verify(self, params: Dict[str, Any], signature: str) -> bool:
+        """常量时间比较验证签名"""
+        if not signature:
+            return False
+        expected = self.sign(params)
+        return hmac.compare_digest(expected.encode("ascii"), signature.upper().encode("ascii", "ignore"))
+
+    @staticmethod
+    def to_xml(params: Dict[str, Any]) -> str:
+        """一次拼接生成XML报文，仅对包含特殊字符的值做XML转义"""
+        parts = ["<xml>"]
+        for k, v in params.items():
+            if v is None:
+                continue
+            value = v if type(v) is str else str(v)
+            if "&" in value or "<" in value or ">" in value:
+                value = escape(value)
+            parts.append(f"<{k}>{value}</{k}>")
+        parts.append("</xml>")
+        return "".join(parts)
+
+    @staticmethod
+    def from_xml(xml_data) -> Dict[str, str]:
+        """解析微信返回的XML报文为字典"""
+        root = ElementTree.fromstring(xml_data)
+        return {child.tag: (child.text or "") for child in root}
+
+    @staticmethod
+    def to_json(params: Dict[str, Any]) -> bytes:
+        """序列化JSON请求体（安装 orjson 时使用 orjson）"""
+        if orjson is not None:
+            return orjson.dumps(params, default=str)
+        return json.dumps(params, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
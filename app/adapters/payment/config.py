@@ -12,11 +12,13 @@ class PaymentConfig:
     WECHAT_MCH_ID = "your_mch_id"
     WECHAT_API_KEY = "your_api_key"
     WECHAT_NOTIFY_URL = "https://your-domain.com/api/payments/callback/wechat"
+    WECHAT_API_BASE_URL = "https://api.mch.weixin.qq.com"
     
     # 支付宝配置（预留）
     ALIPAY_APP_ID = "your_alipay_app_id"
     ALIPAY_PRIVATE_KEY = "your_alipay_private_key"
     ALIPAY_PUBLIC_KEY = "your_alipay_public_key"
+    ALIPAY_GATEWAY_URL = "https://openapi.alipay.com/gateway.do"
     
     # 支付超时时间（分钟）
     PAYMENT_TIMEOUT = 30
\ No newline at end of file
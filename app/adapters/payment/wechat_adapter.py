@@ -3,23 +3,32 @@
 
 提供微信支付服务的统一接口
 """
-import hashlib
 import time
 import uuid
 from typing import Dict, Any, Optional
 from decimal import Decimal
 
+from app.adapters.http_transport import PooledHttpTransport, get_http_transport
+from .codec import WechatPayCodec
 from .config import PaymentConfig
 
 
 class WechatPayAdapter:
     """微信支付适配器 - V1.0 Mini-MVP实现"""
     
-    def __init__(self):
+    def __init__(self, transport: Optional[PooledHttpTransport] = None):
         self.app_id = PaymentConfig.WECHAT_APPID
         self.mch_id = PaymentConfig.WECHAT_MCH_ID
         self.api_key = PaymentConfig.WECHAT_API_KEY
         self.notify_url = PaymentConfig.WECHAT_NOTIFY_URL
+        self.api_base_url = PaymentConfig.WECHAT_API_BASE_URL
+        self.codec = WechatPayCodec(self.api_key)
+        self._transport = transport
+    
+    @property
+    def transport(self) -> PooledHttpTransport:
+        """出站HTTP传输（默认使用全局共享连接池）"""
+        return self._transport or get_http_transport()
     
     def create_unified_order(
         self, 
@@ -39,6 +48,9 @@ class WechatPayAdapter:
             
         Returns:
             微信支付参数字典
+        
+        注意：当前为开发桩，参数签名后直接返回模拟的下单结果，不访问微信支付网关。
+        真实下单走 post_xml（异步、共享连接池与熔断），本方法为同步接口，调用方未迁移前不经过网关。
         """
         # 转换金额为分
         total_fee = int(amount * 100)
@@ -62,16 +74,6 @@ class WechatPayAdapter:
         # 生成签名
         params['sign'] = self._generate_sign(params)
         
-        # 发送请求到微信
-        xml_data = self._dict_to_xml(params)
-        
-        # TODO: 实现真实的微信API调用
-        # response = requests.post(
-        #     'https://api.mch.weixin.qq.com/pay/unifiedorder',
-        #     data=xml_data,
-        #     headers={'Content-Type': 'application/xml'}
-        # )
-        
         # V1.0 Mock响应用于开发测试
         mock_response = {
             'return_code': 'SUCCESS',
@@ -94,13 +96,43 @@ class WechatPayAdapter:
         Returns:
             bool: 签名是否有效
         """
-        # 生成本地签名
-        local_sign = self._generate_sign(data)
-        return local_sign == signature
+        return self.codec.verify(data, signature)
+    
+    async def post_xml(self, path: str, params: Dict[str, Any]) -> Dict[str, str]:
+        """
+        签名并发送XML请求到微信支付网关，校验返回签名
+        
+        Args:
+            path: 接口路径，如 /pay/unifiedorder
+            params: 请求参数（不含 sign）
+            
+        Returns:
+            dict: 网关返回数据
+            
+        Raises:
+            httpx.HTTPError: 网络或HTTP状态错误
+            CircuitOpenError: 网关熔断中
+            ValueError: 返回签名无效
+        """
+        params = dict(params, sign=self.codec.sign(params))
+        # 微信支付接口以商户单号幂等，允许重试
+        response = await self.transport.request(
+            "POST",
+            f"{self.api_base_url}{path}",
+            idempotent=True,
+            content=self.codec.to_xml(params).encode("utf-8"),
+            headers={"Content-Type": "application/xml"}
+        )
+        response.raise_for_status()
+        
+        data = self.codec.from_xml(response.content)
+        if data.get("return_code") == "SUCCESS" and "sign" in data and not self.codec.verify(data, data["sign"]):
+            raise ValueError("微信支付返回签名无效")
+        return data
     
     def _generate_nonce_str(self) -> str:
         """生成随机字符串"""
-        return str(uuid.uuid4()).replace('-', '')[:32]
+        return uuid.uuid4().hex
     
     def _generate_sign(self, params: Dict[str, Any]) -> str:
         """
@@ -112,22 +144,8 @@ class WechatPayAdapter:
         Returns:
             str: MD5签名
         """
-        # 排序参数
-        sorted_params = sorted(params.items())
-        
-        # 拼接参数
-        param_str = '&'.join([f'{k}={v}' for k, v in sorted_params if v])
-        
-        # 添加API密钥
-        param_str += f'&key={self.api_key}'
-        
-        # MD5加密
-        return hashlib.md5(param_str.encode('utf-8')).hexdigest().upper()
+        return self.codec.sign(params)
     
     def _dict_to_xml(self, data: Dict[str, Any]) -> str:
         """字典转XML格式"""
-        xml = '<xml>'
-        for k, v in data.items():
-            xml += f'<{k}>{v}</{k}>'
-        xml += '</xml>'
-        return xml
\ No newline at end of file
+        return self.codec.to_xml(data)
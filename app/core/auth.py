@@ -2,17 +2,24 @@
 用户认证和JWT工具模块
 """
 import os
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional, Union, TYPE_CHECKING
 
 import jwt
 from jwt.exceptions import InvalidTokenError
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified, set_committed_value
 
 from app.core.database import get_db
+from app.core.login_throttle import get_login_throttle
+from app.core.password_hasher import get_password_hasher, pwd_context
+from app.core.permission_resolver import get_permission_resolver
+from app.core.principal_cache import Principal, get_principal_cache, invalidate_principal
+from app.core.session_activity import get_session_activity_buffer, hash_session_key, session_revocation_id
+from app.core.token_revocation import get_token_revocation_list
 
 # 使用TYPE_CHECKING避免循环导入
 if TYPE_CHECKING:
@@ -24,9 +31,6 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 30
 
-# 密码加密
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # HTTP Bearer认证
 security = HTTPBearer()
 
@@ -51,6 +55,16 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """在密码哈希执行器中验证密码"""
+    return await get_password_hasher().verify(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """在密码哈希执行器中生成密码哈希"""
+    return await get_password_hasher().hash(password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """创建访问令牌"""
     to_encode = data.copy()
@@ -59,7 +73,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "type": "access", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -68,7 +82,7 @@ def create_refresh_token(data: dict) -> str:
     """创建刷新令牌"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -84,18 +98,78 @@ def decode_token(token: str) -> dict:
         raise AuthenticationError("Invalid token")
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional["User"]:
-    """验证用户凭据，包含账户锁定逻辑"""
+def ensure_token_not_revoked(payload: dict) -> None:
+    """检查令牌及其所属会话是否已吊销（未吊销的常见情况由本地布隆过滤器判定）"""
+    revocations = get_token_revocation_list()
+    if revocations.is_revoked(payload.get("jti")):
+        raise AuthenticationError("Token has been revoked")
+    session_key = payload.get("sid")
+    if session_key and revocations.is_revoked(session_revocation_id(hash_session_key(session_key))):
+        raise AuthenticationError("Session has been revoked")
+
+
+def revoke_token(token: str) -> bool:
+    """
+    吊销令牌，Redis 中的记录在令牌过期时自动清理
+    
+    Returns:
+        bool: 是否已写入吊销列表；已过期、无效或不含 jti 的令牌返回 False
+    """
+    try:
+        payload = decode_token(token)
+    except AuthenticationError:
+        return False
+    jti = payload.get("jti")
+    if not jti:
+        return False
+    return get_token_revocation_list().revoke(jti, payload["exp"])
+
+
+def authenticate_user(
+    db: Session, username: str, password: str, client_ip: Optional[str] = None
+) -> Optional["User"]:
+    """验证用户凭据，包含限流和账户锁定逻辑（同步版本，供脚本和同步服务使用）"""
+    user = _get_login_user(db, username, client_ip)
+    if not user:
+        return None
+    
+    verified, new_hash = pwd_context.verify_and_update(password, user.password_hash)
+    return _complete_login(db, user, verified, new_hash, client_ip)
+
+
+async def authenticate_user_async(
+    db: Session, username: str, password: str, client_ip: Optional[str] = None
+) -> Optional["User"]:
+    """验证用户凭据，bcrypt 校验在密码哈希执行器中进行，不阻塞事件循环"""
+    user = _get_login_user(db, username, client_ip)
+    if not user:
+        return None
+    
+    verified, new_hash = await get_password_hasher().verify_and_update(password, user.password_hash)
+    return _complete_login(db, user, verified, new_hash, client_ip)
+
+
+def _get_login_user(db: Session, username: str, client_ip: Optional[str]) -> Optional["User"]:
+    """检查失败窗口后按用户名或邮箱查找用户，并检查锁定和激活状态"""
     # 延迟导入避免循环导入
     from app.modules.user_auth.models import User
     
+    # 失败次数超限时直接拒绝，不查询数据库、不做 bcrypt 运算
+    throttle = get_login_throttle()
+    throttle.check(username, client_ip)
+    
     user = db.query(User).filter(
         (User.username == username) | (User.email == username)
     ).first()
     
     if not user:
+        # 未知账户按登录名计数
+        throttle.record_failure(username, client_ip)
         return None
     
+    # 已知账户按用户ID计数，用户名与邮箱登录共用窗口
+    throttle.check(username, user_id=user.id)
+    
     # 检查账户是否被锁定
     if is_account_locked(user):
         raise AuthenticationError("Account is locked due to too many failed login attempts")
@@ -104,16 +178,33 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional["Us
     if not user.is_active:
         raise AuthenticationError("Account is disabled")
     
-    # 验证密码
-    if not verify_password(password, user.password_hash):
+    return user
+
+
+def _complete_login(
+    db: Session,
+    user: "User",
+    verified: bool,
+    new_hash: Optional[str],
+    client_ip: Optional[str]
+) -> Optional["User"]:
+    """根据密码校验结果记录失败或更新登录信息"""
+    if not verified:
         # 密码错误，增加失败次数
-        increment_failed_attempts(db, user)
+        increment_failed_attempts(db, user, client_ip)
         return None
     
+    # 哈希成本已变更，登录成功时透明升级
+    if new_hash is not None:
+        user.password_hash = new_hash
+    
     # 登录成功，重置失败次数并更新最后登录时间
+    was_locked = user.status == 'locked'
     reset_failed_attempts(db, user)
     user.last_login_at = datetime.utcnow()
     db.commit()
+    if was_locked:
+        invalidate_principal(user.id)
     
     return user
 
@@ -131,36 +222,44 @@ def is_account_locked(user: "User") -> bool:
     return True
 
 
-def increment_failed_attempts(db: Session, user: "User") -> None:
-    """增加登录失败次数，必要时锁定账户"""
-    MAX_FAILED_ATTEMPTS = 5  # 最大失败次数
+def increment_failed_attempts(db: Session, user: "User", client_ip: Optional[str] = None) -> None:
+    """记录登录失败（计数在Redis滑动窗口中），达到阈值时持久化锁定状态"""
     LOCK_DURATION_MINUTES = 30  # 锁定时长（分钟）
     
-    user.failed_login_attempts += 1
+    throttle = get_login_throttle()
+    failures = throttle.record_failure(user.username, client_ip, user_id=user.id)
+    
+    # 窗口计数同步到实例但不标记修改，未达阈值时不写 users 表
+    set_committed_value(user, 'failed_login_attempts', failures)
+    if failures < throttle.max_user_failures:
+        return
     
     # 达到最大失败次数，锁定账户
-    if user.failed_login_attempts >= MAX_FAILED_ATTEMPTS:
-        user.locked_until = datetime.utcnow() + timedelta(minutes=LOCK_DURATION_MINUTES)
-        user.status = 'locked'
-        
-        # 记录安全事件
-        from app.core.security_logger import log_security_event
-        log_security_event(
-            event_type="account_locked",
-            message=f"Account locked due to excessive failed login attempts",
-            user_data={
-                "user_id": user.id,
-                "username": user.username,
-                "failed_attempts": user.failed_login_attempts,
-                "locked_until": user.locked_until.isoformat()
-            }
-        )
+    user.failed_login_attempts = failures
+    flag_modified(user, 'failed_login_attempts')
+    user.locked_until = datetime.utcnow() + timedelta(minutes=LOCK_DURATION_MINUTES)
+    user.status = 'locked'
+    
+    # 记录安全事件
+    from app.core.security_logger import log_security_event
+    log_security_event(
+        event_type="account_locked",
+        message=f"Account locked due to excessive failed login attempts",
+        user_data={
+            "user_id": user.id,
+            "username": user.username,
+            "failed_attempts": user.failed_login_attempts,
+            "locked_until": user.locked_until.isoformat()
+        }
+    )
     
     db.commit()
+    invalidate_principal(user.id)
 
 
 def reset_failed_attempts(db: Session, user: "User") -> None:
     """重置登录失败次数"""
+    get_login_throttle().reset(user.username, user_id=user.id)
     if user.failed_login_attempts > 0 or user.locked_until is not None:
         user.failed_login_attempts = 0
         user.locked_until = None
@@ -182,11 +281,8 @@ def reset_failed_attempts(db: Session, user: "User") -> None:
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> "User":
-    """获取当前用户（依赖注入）"""
-    # 延迟导入避免循环导入
-    from app.modules.user_auth.models import User
-    
+) -> Principal:
+    """获取当前认证主体（依赖注入，命中主体缓存时不查询数据库）"""
     try:
         payload = decode_token(credentials.credentials)
         
@@ -194,6 +290,8 @@ async def get_current_user(
         if payload.get("type") != "access":
             raise AuthenticationError("Invalid token type")
         
+        ensure_token_not_revoked(payload)
+        
         user_id_str: str = payload.get("sub")
         if user_id_str is None:
             raise AuthenticationError("Invalid token payload")
@@ -203,14 +301,19 @@ async def get_current_user(
         except ValueError:
             raise AuthenticationError("Invalid user ID in token")
         
-        user = db.query(User).filter(User.id == user_id).first()
-        if user is None:
+        principal = get_principal_cache().get(db, user_id)
+        if principal is None:
             raise AuthenticationError("User not found")
         
-        if not user.is_active:
+        if not principal.is_active:
             raise AuthenticationError("User account is disabled")
         
-        return user
+        # 会话最近访问时间只记入内存，由后台任务批量写入
+        session_key = payload.get("sid")
+        if session_key:
+            get_session_activity_buffer().touch(hash_session_key(session_key))
+        
+        return principal
     
     except AuthenticationError:
         raise
@@ -218,16 +321,31 @@ async def get_current_user(
         raise AuthenticationError("Authentication failed")
 
 
-async def get_current_active_user(current_user: "User" = Depends(get_current_user)) -> "User":
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     """获取当前激活用户"""
     if not current_user.is_active:
         raise AuthenticationError("User account is disabled")
     return current_user
 
 
-async def get_current_admin_user(current_user: "User" = Depends(get_current_active_user)) -> "User":
+async def get_current_user_record(
+    current_user: Principal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+) -> "User":
+    """加载当前用户完整ORM对象（仅用于需要完整资料或修改用户的接口）"""
+    # 延迟导入避免循环导入
+    from app.modules.user_auth.models import User
+    
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if user is None:
+        invalidate_principal(current_user.id)
+        raise AuthenticationError("User not found")
+    return user
+
+
+async def get_current_admin_user(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     """获取当前管理员用户（权限检查）"""
-    if current_user.role not in ['admin', 'super_admin']:
+    if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="管理员权限不足，无法访问此资源"
@@ -235,7 +353,7 @@ async def get_current_admin_user(current_user: "User" = Depends(get_current_acti
     return current_user
 
 
-async def get_current_super_admin_user(current_user: "User" = Depends(get_current_active_user)) -> "User":
+async def get_current_super_admin_user(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     """获取当前超级管理员用户（最高权限检查）"""
     if current_user.role != 'super_admin':
         raise HTTPException(
@@ -245,10 +363,40 @@ async def get_current_super_admin_user(current_user: "User" = Depends(get_curren
     return current_user
 
 
+def require_permission(resource: str, action: str):
+    """
+    权限检查依赖工厂（RBAC 位掩码，一次位运算判定）
+
+    Args:
+        resource: 资源类型（permissions.resource）
+        action: 操作类型（permissions.action）
+
+    Returns:
+        依赖函数，返回当前认证主体；超级管理员拥有全部权限
+
+    使用示例：
+        current_user: Principal = Depends(require_permission("product", "update"))
+    """
+    async def permission_dependency(
+        current_user: Principal = Depends(get_current_active_user),
+        db: Session = Depends(get_db)
+    ) -> Principal:
+        if current_user.role == 'super_admin':
+            return current_user
+        if not get_permission_resolver().has_permission(db, current_user.id, resource, action):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"缺少权限: {resource}:{action}"
+            )
+        return current_user
+
+    return permission_dependency
+
+
 def get_optional_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
-) -> Optional["User"]:
+) -> Optional[Principal]:
     """获取可选的当前用户（用于可选认证的端点）"""
     if not credentials:
         return None
@@ -259,7 +407,7 @@ def get_optional_current_user(
         return None
 
 
-def require_ownership(resource_user_id: int, current_user: "User") -> bool:
+def require_ownership(resource_user_id: int, current_user: Principal) -> bool:
     """检查资源所有权（用户只能操作自己的资源）"""
     if current_user.role in ['admin', 'super_admin']:
         return True  # 管理员可以操作所有资源
@@ -267,7 +415,7 @@ def require_ownership(resource_user_id: int, current_user: "User") -> bool:
     return resource_user_id == current_user.id
 
 
-def check_resource_ownership(resource_user_id: int, current_user: "User" = Depends(get_current_active_user)):
+def check_resource_ownership(resource_user_id: int, current_user: Principal = Depends(get_current_active_user)):
     """资源所有权检查依赖"""
     if not require_ownership(resource_user_id, current_user):
         raise HTTPException(
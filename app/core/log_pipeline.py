@@ -0,0 +1,301 @@
+"""
+文件名：log_pipeline.py
+文件路径：app/core/log_pipeline.py
+功能描述：异步批量日志管道（QueueHandler/QueueListener 模式）
+
+主要功能：
+- 请求路径只把日志记录放入有界队列（微秒级），格式化和磁盘写入在后台线程完成
+- 后台线程按批取出记录，每批每个处理器只写一次、flush 一次
+- 队列满时丢弃新记录并计数，下一批写入一条 log_overflow 记录标明丢失数量
+- 提供入队/丢弃/写入/批次等指标，以及应用关闭时的刷新和退出时的停止
+
+使用说明：
+- 创建：logger = create_queued_logger("security", [BatchTimedRotatingFileHandler(...)])
+- 指标：get_log_pipeline("security").metrics()
+- 刷新：flush_log_pipelines()（应用关闭时调用），进程退出时自动 shutdown_log_pipelines()
+
+依赖模块：
+- logging.handlers: QueueHandler
+
+注意事项：
+- 日志时间取记录创建时间（record.created），而不是后台写入时间
+- 队列满时丢弃的是新记录，保证请求路径永不阻塞
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# 管道配置
+LOG_QUEUE_MAX_SIZE = int(os.getenv("LOG_QUEUE_MAX_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+LOG_LINGER_SECONDS = float(os.getenv("LOG_LINGER_SECONDS", "0.05"))
+LOG_STOP_TIMEOUT = 5.0
+
+_STOP = object()
+
+
+class _FlushMarker:
+    """刷新标记：后台线程写完标记之前的所有记录后置位"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """有界队列处理器，队列满时丢弃并计数"""
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self._counter_lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 记录为本次调用新建，无需复制；只合并消息参数，JSON 格式化交给后台线程
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += 1
+            return
+        with self._counter_lock:
+            self.enqueued += 1
+
+
+class BatchWriteMixin:
+    """流处理器批量写入：一批记录拼接后一次写入、一次 flush"""
+
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        lines: List[str] = []
+        self.acquire()
+        try:
+            for record in records:
+                if record.levelno < self.level or not self.filter(record):
+                    continue
+                should_rollover = getattr(self, "shouldRollover", None)
+                if should_rollover is not None and should_rollover(record):
+                    self._write_lines(lines)
+                    lines = []
+                    self.doRollover()
+                lines.append(self.format(record) + self.terminator)
+            self._write_lines(lines)
+        except Exception:
+            self.handleError(records[0])
+        finally:
+            self.release()
+
+    def _write_lines(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        if self.stream is None:
+            self.stream = self._open()
+        self.stream.write("".join(lines))
+        self.flush()
+
+
+class BatchStreamHandler(BatchWriteMixin, logging.StreamHandler):
+    """批量写入的控制台处理器"""
+
+
+class BatchTimedRotatingFileHandler(BatchWriteMixin, logging.handlers.TimedRotatingFileHandler):
+    """批量写入的按时间轮转文件处理器"""
+
+
+class LogPipeline:
+    """异步批量日志管道"""
+
+    def __init__(
+        self,
+        handlers: Iterable[logging.Handler],
+        name: str = "log",
+        max_queue_size: int = LOG_QUEUE_MAX_SIZE,
+        batch_size: int = LOG_BATCH_SIZE,
+        linger: float = LOG_LINGER_SECONDS
+    ):
+        """
+        Args:
+            handlers: 后台线程写入的处理器（支持 handle_batch 时批量写入）
+            name: 管道名称（用于线程名和溢出记录）
+            max_queue_size: 队列上限，超过后丢弃新记录
+            batch_size: 每批最多写入的记录数
+            linger: 取到第一条记录后等待凑批的最长时间（秒）
+        """
+        self.name = name
+        self.handlers = list(handlers)
+        self.batch_size = batch_size
+        self.linger = linger
+        self.queue: "queue.Queue" = queue.Queue(max_queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+        self._thread: Optional[threading.Thread] = None
+        self._reported_dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.max_batch = 0
+
+    def start(self) -> None:
+        """启动后台写入线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-log-writer", daemon=True)
+        self._thread.start()
+
+    def flush(self, timeout: float = LOG_STOP_TIMEOUT) -> bool:
+        """等待已入队的记录全部写入"""
+        if self._thread is None or not self._thread.is_alive():
+            return False
+        marker = _FlushMarker()
+        try:
+            self.queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def stop(self, timeout: float = LOG_STOP_TIMEOUT) -> None:
+        """写完队列中的记录后停止后台线程"""
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def metrics(self) -> Dict[str, int]:
+        """管道指标"""
+        return {
+            "enqueued": self.handler.enqueued,
+            "dropped": self.handler.dropped,
+            "written": self.written,
+            "batches": self.batches,
+            "max_batch": self.max_batch,
+            "queue_depth": self.queue.qsize(),
+        }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            batch: List[logging.LogRecord] = []
+            markers: List[_FlushMarker] = []
+            deadline = time.monotonic() + self.linger
+            while True:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stopping or markers or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if stopping:
+                # 停止前写完队列中剩余的记录
+                while True:
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, _FlushMarker):
+                        markers.append(item)
+                    elif item is not _STOP:
+                        batch.append(item)
+            self._write_batch(batch)
+            for marker in markers:
+                marker.done.set()
+
+    def _write_batch(self, batch: List[logging.LogRecord]) -> None:
+        dropped = self.handler.dropped
+        if dropped > self._reported_dropped:
+            batch.append(self._overflow_record(dropped - self._reported_dropped))
+            self._reported_dropped = dropped
+        if not batch:
+            return
+
+        for handler in self.handlers:
+            handle_batch = getattr(handler, "handle_batch", None)
+            if handle_batch is not None:
+                handle_batch(batch)
+                continue
+            for record in batch:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        self.written += len(batch)
+        self.batches += 1
+        self.max_batch = max(self.max_batch, len(batch))
+
+    def _overflow_record(self, dropped: int) -> logging.LogRecord:
+        return logging.makeLogRecord({
+            "name": self.name,
+            "levelno": logging.WARNING,
+            "levelname": "WARNING",
+            "msg": f"日志队列已满，丢弃 {dropped} 条记录",
+            "event_type": "log_overflow",
+            "dropped": dropped,
+        })
+
+
+# 已创建的日志管道
+_pipelines: Dict[str, LogPipeline] = {}
+
+
+def create_queued_logger(name: str, handlers: Iterable[logging.Handler], **pipeline_options) -> logging.Logger:
+    """
+    创建经由异步管道写入的日志记录器
+
+    Args:
+        name: 日志记录器名称
+        handlers: 后台线程写入的处理器
+        **pipeline_options: LogPipeline 参数（max_queue_size/batch_size/linger）
+
+    Returns:
+        logging.Logger: 只挂载队列处理器、不向上传播的日志记录器
+    """
+    pipeline = LogPipeline(handlers, name=name, **pipeline_options)
+    logger = logging.getLogger(name)
+    logger.addHandler(pipeline.handler)
+    logger.propagate = False
+    pipeline.start()
+    _pipelines[name] = pipeline
+    return logger
+
+
+def get_log_pipeline(name: str) -> Optional[LogPipeline]:
+    """获取日志记录器对应的管道"""
+    return _pipelines.get(name)
+
+
+def flush_log_pipelines(timeout: float = LOG_STOP_TIMEOUT) -> None:
+    """刷新全部日志管道"""
+    for pipeline in list(_pipelines.values()):
+        pipeline.flush(timeout)
+
+
+def shutdown_log_pipelines(timeout: float = LOG_STOP_TIMEOUT) -> None:
+    """停止全部日志管道（进程退出时调用）"""
+    for pipeline in list(_pipelines.values()):
+        pipeline.stop(timeout)
+
+
+atexit.register(shutdown_log_pipelines)
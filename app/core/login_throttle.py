@@ -0,0 +1,254 @@
+"""
+文件名：login_throttle.py
+文件路径：app/core/login_throttle.py
+功能描述：登录失败滑动窗口限流
+
+主要功能：
+- 按账户、按客户端IP分别统计窗口期内的登录失败次数（Redis 有序集合滑动窗口）
+- 账户窗口：已解析的用户按用户ID计数（用户名、邮箱登录共用一个窗口），未知账户按登录名计数
+- 登录前一次往返检查登录名与IP窗口，超过阈值直接返回 429，不查询数据库、不做 bcrypt 运算
+- 查到用户后、bcrypt 校验前检查该用户的账户窗口
+- 失败计数只写 Redis，账户窗口达到阈值时才由调用方持久化锁定状态
+- Redis 不可用时降级为进程内滑动窗口，并在退避期内不再尝试
+
+使用说明：
+- 获取实例：throttle = get_login_throttle()
+- 登录前：throttle.check(login_name, client_ip)
+- 查到用户后：throttle.check(login_name, user_id=user.id)
+- 登录失败：failures = throttle.record_failure(login_name, client_ip, user_id=user.id)（未知账户不传 user_id）
+- 登录成功：throttle.reset(user.username, user_id=user.id)
+- 配置：LOGIN_FAILURE_WINDOW_SECONDS / LOGIN_MAX_USER_FAILURES / LOGIN_MAX_IP_FAILURES
+
+依赖模块：
+- app.core.redis_client: 同步Redis连接
+
+注意事项：
+- 进程内降级窗口只在单进程内生效，多进程部署时阈值按进程分别计算
+- 登录成功只清除账户窗口，IP 窗口按时间自然滑出
+- 已存在账户的失败不进入登录名窗口，其请求会先查询用户再被账户窗口拒绝（仍不做 bcrypt 运算）
+
+创建时间：2026-10-18
+最后修改：2026-10-19
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.redis_client import get_sync_redis_connection
+
+logger = logging.getLogger(__name__)
+
+# 限流配置
+LOGIN_FAILURE_WINDOW_SECONDS = int(os.getenv("LOGIN_FAILURE_WINDOW_SECONDS", "900"))
+LOGIN_MAX_USER_FAILURES = int(os.getenv("LOGIN_MAX_USER_FAILURES", "5"))
+LOGIN_MAX_IP_FAILURES = int(os.getenv("LOGIN_MAX_IP_FAILURES", "30"))
+LOCAL_WINDOW_MAX_KEYS = 100000
+REDIS_RETRY_BACKOFF = 30.0
+REDIS_KEY_PREFIX = "auth:login_failures:"
+
+
+class LoginThrottled(HTTPException):
+    """登录失败次数过多"""
+    def __init__(self, retry_after: int, detail: str = "Too many failed login attempts, please retry later"):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(max(1, retry_after))},
+        )
+
+
+class LoginThrottle:
+    """登录失败滑动窗口限流"""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        redis_factory: Optional[Callable[[], Any]] = get_sync_redis_connection,
+        window_seconds: int = LOGIN_FAILURE_WINDOW_SECONDS,
+        max_user_failures: int = LOGIN_MAX_USER_FAILURES,
+        max_ip_failures: int = LOGIN_MAX_IP_FAILURES,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            redis_client: 同步Redis客户端；为 None 时首次使用通过 redis_factory 创建
+            redis_factory: Redis客户端工厂，为 None 时只使用进程内窗口
+            window_seconds: 滑动窗口长度（秒）
+            max_user_failures: 单个账户窗口内失败上限
+            max_ip_failures: 单个IP窗口内失败上限
+            clock: 时钟（测试注入）
+        """
+        self._redis = redis_client
+        self._redis_factory = redis_factory
+        self.window_seconds = window_seconds
+        self.max_user_failures = max_user_failures
+        self.max_ip_failures = max_ip_failures
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._local: "OrderedDict[str, Deque[float]]" = OrderedDict()
+        self._redis_down_until = 0.0
+        self._sequence = 0
+
+    @staticmethod
+    def user_key(username: str) -> str:
+        return f"{REDIS_KEY_PREFIX}user:{username.strip().lower()}"
+
+    @staticmethod
+    def account_key(user_id: int) -> str:
+        return f"{REDIS_KEY_PREFIX}account:{user_id}"
+
+    @staticmethod
+    def ip_key(client_ip: str) -> str:
+        return f"{REDIS_KEY_PREFIX}ip:{client_ip}"
+
+    def _primary_key(self, username: str, user_id: Optional[int]) -> str:
+        return self.user_key(username) if user_id is None else self.account_key(user_id)
+
+    def _limits(
+        self, username: str, client_ip: Optional[str], user_id: Optional[int] = None
+    ) -> List[Tuple[str, int]]:
+        limits = [(self._primary_key(username, user_id), self.max_user_failures)]
+        if client_ip:
+            limits.append((self.ip_key(client_ip), self.max_ip_failures))
+        return limits
+
+    def check(self, username: str, client_ip: Optional[str] = None, user_id: Optional[int] = None) -> None:
+        """
+        检查失败窗口
+
+        Args:
+            username: 登录名
+            client_ip: 客户端IP，为 None 时不检查IP窗口
+            user_id: 已解析的用户ID，给出时检查账户窗口而非登录名窗口
+
+        Raises:
+            LoginThrottled: 账户或IP窗口内失败次数已达上限
+        """
+        now = self._clock()
+        limits = self._limits(username, client_ip, user_id)
+        windows = self._windows([key for key, _ in limits], now)
+        for (_, limit), (count, oldest) in zip(limits, windows):
+            if count >= limit:
+                retry_after = int((oldest or now) + self.window_seconds - now) + 1
+                raise LoginThrottled(retry_after)
+
+    def record_failure(self, username: str, client_ip: Optional[str] = None, user_id: Optional[int] = None) -> int:
+        """
+        记录一次登录失败
+
+        Args:
+            username: 登录名
+            client_ip: 客户端IP
+            user_id: 已解析的用户ID，给出时计入账户窗口；未知账户不传，计入登录名窗口
+
+        Returns:
+            int: 账户窗口内的失败次数（含本次）
+        """
+        keys = [key for key, _ in self._limits(username, client_ip, user_id)]
+        now = self._clock()
+        client = self._redis_client()
+        if client is not None:
+            try:
+                with self._lock:
+                    self._sequence += 1
+                    member = f"{now:.6f}:{os.getpid()}:{self._sequence}"
+                pipe = client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.zadd(key, {member: now})
+                    pipe.zremrangebyscore(key, "-inf", now - self.window_seconds)
+                    pipe.zcard(key)
+                    pipe.expire(key, self.window_seconds)
+                results = pipe.execute()
+                return int(results[2])
+            except Exception as e:
+                self._mark_redis_down(e)
+
+        with self._lock:
+            counts = []
+            for key in keys:
+                window = self._local_window(key, now, create=True)
+                window.append(now)
+                counts.append(len(window))
+            return counts[0]
+
+    def reset(self, username: str, user_id: Optional[int] = None) -> None:
+        """登录成功后清除账户窗口（不传 user_id 时清除登录名窗口）"""
+        key = self._primary_key(username, user_id)
+        with self._lock:
+            self._local.pop(key, None)
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            client.delete(key)
+        except Exception as e:
+            self._mark_redis_down(e)
+
+    def _windows(self, keys: List[str], now: float) -> List[Tuple[int, Optional[float]]]:
+        """返回每个窗口的 (失败次数, 最早失败时间)"""
+        client = self._redis_client()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for key in keys:
+                    pipe.zremrangebyscore(key, "-inf", now - self.window_seconds)
+                    pipe.zcard(key)
+                    pipe.zrange(key, 0, 0, withscores=True)
+                results = pipe.execute()
+                windows = []
+                for index in range(len(keys)):
+                    _, count, oldest = results[index * 3:index * 3 + 3]
+                    windows.append((int(count), float(oldest[0][1]) if oldest else None))
+                return windows
+            except Exception as e:
+                self._mark_redis_down(e)
+
+        with self._lock:
+            windows = []
+            for key in keys:
+                window = self._local_window(key, now, create=False)
+                windows.append((len(window), window[0] if window else None))
+            return windows
+
+    def _local_window(self, key: str, now: float, create: bool) -> Deque[float]:
+        """进程内窗口（调用方持有锁）"""
+        window = self._local.get(key)
+        if window is None:
+            if not create:
+                return deque()
+            window = self._local[key] = deque()
+            while len(self._local) > LOCAL_WINDOW_MAX_KEYS:
+                self._local.popitem(last=False)
+        self._local.move_to_end(key)
+        while window and window[0] <= now - self.window_seconds:
+            window.popleft()
+        return window
+
+    def _redis_client(self) -> Any:
+        if time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None and self._redis_factory is not None:
+            self._redis = self._redis_factory()
+        return self._redis
+
+    def _mark_redis_down(self, error: Exception) -> None:
+        logger.warning(f"登录限流Redis不可用，{REDIS_RETRY_BACKOFF}秒内使用进程内窗口: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_BACKOFF
+
+
+# 全局登录限流器
+_login_throttle: Optional[LoginThrottle] = None
+
+
+def get_login_throttle() -> LoginThrottle:
+    """获取全局登录限流器"""
+    global _login_throttle
+    if _login_throttle is None:
+        _login_throttle = LoginThrottle()
+    return _login_throttle
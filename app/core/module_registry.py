@@ -0,0 +1,214 @@
+"""
+文件名：module_registry.py
+文件路径：app/core/module_registry.py
+功能描述：业务模块注册表与导入耗时分析
+
+主要功能：
+- 按 AVAILABLE_MODULES / MODULE_ROUTE_TAGS 和配置决定启用的模块，未启用模块的路由、服务、模型均不导入
+- 按启用模块注册路由、导入建表所需模型，并记录每个模块路由的导入耗时
+- 导入耗时分析命令：每个模块在独立子进程中以 -X importtime 导入，报告模块自身及依赖的导入成本
+
+使用说明：
+- 配置：ENABLED_MODULES=user_auth,payment_service（默认 all）；DISABLED_MODULES=member_system
+- 注册：register_module_routers(app)
+- 判断：is_module_enabled("payment_service")
+- 分析：python -m app.core.module_registry profile [--modules user_auth,member_system] [--top 5]
+- 列表：python -m app.core.module_registry list
+
+依赖模块：
+- app.modules: AVAILABLE_MODULES、MODULE_ROUTE_TAGS
+
+注意事项：
+- 配置在进程启动时读取；拆分部署时每个服务只启用所提供的模块
+- 模块间共享的核心依赖（FastAPI、SQLAlchemy、app.core）在分析中单独列为 (shared)
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import argparse
+import importlib
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.modules import AVAILABLE_MODULES, MODULE_ROUTE_TAGS
+
+API_PREFIX = "/api/v1"
+
+# 所有模块共享的导入（分析时预先导入，从模块成本中扣除）
+SHARED_IMPORTS = ("fastapi", "sqlalchemy.orm", "pydantic", "app.core.database", "app.core.auth")
+_PROFILE_MARKER = "--module-import-start--"
+
+# 每个已注册模块路由的导入耗时（秒）
+ROUTER_IMPORT_SECONDS: Dict[str, float] = {}
+
+
+class ImportProfile(NamedTuple):
+    """模块导入耗时"""
+    module: str
+    total_ms: float
+    own_ms: float
+    heaviest: List[Tuple[str, float]]
+
+
+def _parse_module_list(value: str) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def get_enabled_modules(enabled: Optional[str] = None, disabled: Optional[str] = None) -> List[str]:
+    """
+    解析启用的路由模块（按注册顺序）
+
+    Args:
+        enabled: 启用列表（逗号分隔或 all），默认读取 ENABLED_MODULES
+        disabled: 禁用列表（逗号分隔），默认读取 DISABLED_MODULES
+
+    Raises:
+        ValueError: 配置中含有未知模块
+    """
+    enabled = os.getenv("ENABLED_MODULES", "all") if enabled is None else enabled
+    disabled = os.getenv("DISABLED_MODULES", "") if disabled is None else disabled
+
+    requested = list(MODULE_ROUTE_TAGS) if enabled.strip().lower() == "all" else _parse_module_list(enabled)
+    excluded = _parse_module_list(disabled)
+    unknown = sorted(set(requested + excluded) - set(AVAILABLE_MODULES))
+    if unknown:
+        raise ValueError(f"未知模块: {', '.join(unknown)}")
+
+    return [name for name in MODULE_ROUTE_TAGS if name in requested and name not in excluded]
+
+
+def is_module_enabled(name: str) -> bool:
+    """模块是否启用"""
+    return name in get_enabled_modules()
+
+
+def register_module_routers(app, modules: Optional[Sequence[str]] = None, prefix: str = API_PREFIX) -> List[str]:
+    """
+    注册启用模块的路由，只导入启用的模块
+
+    Returns:
+        List[str]: 已注册的模块
+    """
+    modules = get_enabled_modules() if modules is None else modules
+    registered = []
+    for name in modules:
+        started = time.perf_counter()
+        router = importlib.import_module(f"app.modules.{name}.router").router
+        ROUTER_IMPORT_SECONDS[name] = time.perf_counter() - started
+        app.include_router(router, prefix=prefix, tags=[MODULE_ROUTE_TAGS[name]])
+        registered.append(name)
+    return registered
+
+
+def import_module_models(modules: Optional[Sequence[str]] = None) -> List[str]:
+    """
+    导入启用模块的模型（建表前注册表定义）；user_auth 为其他模块外键的目标，始终导入
+
+    Returns:
+        List[str]: 已导入的模型模块
+    """
+    modules = get_enabled_modules() if modules is None else modules
+    imported = []
+    for name in dict.fromkeys(["user_auth", *modules]):
+        module_path = f"app.modules.{name}.models"
+        if importlib.util.find_spec(module_path) is not None:
+            importlib.import_module(module_path)
+            imported.append(module_path)
+    return imported
+
+
+def parse_importtime(output: str, package: str, top: int = 5) -> ImportProfile:
+    """
+    解析 -X importtime 输出（只统计标记行之后的导入）
+
+    Args:
+        output: 子进程标准错误输出
+        package: 被分析的模块包名（如 app.modules.user_auth）
+        top: 报告自身耗时最高的依赖数
+    """
+    lines = output.splitlines()
+    if _PROFILE_MARKER in lines:
+        lines = lines[lines.index(_PROFILE_MARKER) + 1:]
+
+    total_us = own_us = 0
+    dependencies = []
+    for line in lines:
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_field, cumulative_us, name_field = line.split("|", 2)
+        self_us = self_field.split(":", 1)[1]
+        name = name_field.strip()
+        level = (len(name_field) - len(name_field.lstrip()) - 1) // 2
+        if level == 0:
+            total_us += int(cumulative_us)
+        if name == package or name.startswith(package + "."):
+            own_us += int(self_us)
+        else:
+            dependencies.append((name, int(self_us) / 1000))
+    dependencies.sort(key=lambda item: item[1], reverse=True)
+    return ImportProfile(package, total_us / 1000, own_us / 1000, dependencies[:top])
+
+
+def _run_importtime(statement: str, python: str) -> str:
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    )
+    return result.stderr
+
+
+def profile_module_imports(
+    modules: Optional[Sequence[str]] = None, top: int = 5, python: str = sys.executable
+) -> List[ImportProfile]:
+    """
+    在独立子进程中分析每个模块路由的导入耗时
+
+    Returns:
+        List[ImportProfile]: 首项为共享依赖 (shared)，其余按总耗时倒序
+    """
+    modules = list(MODULE_ROUTE_TAGS) if modules is None else modules
+    shared = "; ".join(f"import {name}" for name in SHARED_IMPORTS)
+    marker = f"import sys; sys.stderr.write({_PROFILE_MARKER!r} + '\\n'); sys.stderr.flush()"
+
+    shared_profile = parse_importtime(_run_importtime(f"{marker}; {shared}", python), "app.core", top)
+    profiles = [
+        parse_importtime(_run_importtime(f"{shared}; {marker}; import app.modules.{name}.router", python),
+                         f"app.modules.{name}", top)
+        for name in modules
+    ]
+    profiles.sort(key=lambda profile: profile.total_ms, reverse=True)
+    return [shared_profile._replace(module="(shared)")] + profiles
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="业务模块注册表与导入耗时分析")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("list", help="列出模块及启用状态")
+    profile_parser = subcommands.add_parser("profile", help="分析每个模块的导入耗时")
+    profile_parser.add_argument("--modules", default="all", help="逗号分隔的模块列表，默认全部路由模块")
+    profile_parser.add_argument("--top", type=int, default=5, help="每个模块列出的最重依赖数")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        enabled = set(get_enabled_modules())
+        for name in AVAILABLE_MODULES:
+            state = "enabled" if name in enabled else ("disabled" if name in MODULE_ROUTE_TAGS else "no router")
+            print(f"{name:<28}{state}")
+        return
+
+    modules = get_enabled_modules(enabled=args.modules, disabled="")
+    print(f"{'module':<36}{'total ms':>10}{'own ms':>10}  heaviest dependencies")
+    for profile in profile_module_imports(modules, args.top):
+        heaviest = ", ".join(f"{name} {ms:.1f}" for name, ms in profile.heaviest)
+        print(f"{profile.module:<36}{profile.total_ms:>10.1f}{profile.own_ms:>10.1f}  {heaviest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+文件名：password_hasher.py
+文件路径：app/core/password_hasher.py
+功能描述：密码哈希专用执行器
+
+主要功能：
+- bcrypt 哈希/校验在专用线程池中执行，不阻塞事件循环（bcrypt 计算期间释放GIL）
+- 准入控制：排队+执行中的任务达到上限时直接拒绝（503），登录洪峰不拖垮其他接口
+- 队列深度、执行中任务数、排队耗时、拒绝次数等指标
+- 校验同时返回按当前成本重新生成的哈希，登录成功时透明升级
+
+使用说明：
+- 获取实例：hasher = get_password_hasher()
+- 校验：ok, new_hash = await hasher.verify_and_update(plain, hashed)
+- 哈希：hashed = await hasher.hash(plain)
+- 指标：hasher.metrics()
+- 配置：PASSWORD_BCRYPT_ROUNDS / PASSWORD_HASH_WORKERS / PASSWORD_HASH_MAX_PENDING
+
+依赖模块：
+- passlib.context.CryptContext: bcrypt 哈希方案
+
+注意事项：
+- 线程数默认等于CPU核数，更多线程只会增加排队而不会提高吞吐
+- 修改 PASSWORD_BCRYPT_ROUNDS 后，旧成本的哈希在用户下次登录时自动升级
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# 哈希配置
+BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or (os.cpu_count() or 2)
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "0")) or PASSWORD_HASH_WORKERS * 8
+OVERLOAD_RETRY_AFTER_SECONDS = 1
+
+# 密码加密（成本变化后旧哈希标记为需要更新）
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class PasswordHasherOverloaded(HTTPException):
+    """密码哈希队列已满"""
+    def __init__(self, detail: str = "Too many concurrent authentication requests, please retry"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(OVERLOAD_RETRY_AFTER_SECONDS)},
+        )
+
+
+class PasswordHasher:
+    """带准入控制的密码哈希执行器"""
+
+    def __init__(
+        self,
+        context: Optional[CryptContext] = None,
+        max_workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING
+    ):
+        """
+        Args:
+            context: passlib 哈希上下文，默认使用全局 pwd_context
+            max_workers: 线程数
+            max_pending: 排队+执行中任务上限，超过时拒绝
+        """
+        self.context = context or pwd_context
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._rehashed = 0
+        self._wait_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        """生成密码哈希"""
+        return await self._submit(self.context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """校验密码"""
+        return await self._submit(self.context.verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        校验密码，哈希成本过期时同时返回新哈希
+
+        Returns:
+            tuple: (是否正确, 新哈希或None)
+        """
+        verified, new_hash = await self._submit(self.context.verify_and_update, plain_password, hashed_password)
+        if new_hash is not None:
+            with self._lock:
+                self._rehashed += 1
+        return verified, new_hash
+
+    def metrics(self) -> Dict[str, Any]:
+        """队列深度与吞吐指标"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "rehashed": self._rehashed,
+                "avg_wait_ms": round(self._wait_seconds / self._completed * 1000, 2) if self._completed else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        """关闭线程池（不等待排队任务）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                rejected = self._rejected
+                pending = self._pending
+            else:
+                rejected = None
+                self._pending += 1
+        if rejected is not None:
+            if rejected == 1 or rejected % 100 == 0:
+                logger.warning(f"密码哈希队列已满，拒绝请求: pending={pending}, rejected_total={rejected}")
+            raise PasswordHasherOverloaded()
+
+        enqueued_at = time.perf_counter()
+
+        def run() -> Any:
+            with self._lock:
+                self._running += 1
+                self._wait_seconds += time.perf_counter() - enqueued_at
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), run)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        return self._executor
+
+
+# 全局密码哈希执行器
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """获取全局密码哈希执行器"""
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher()
+    return _password_hasher
+
+
+def close_password_hasher() -> None:
+    """关闭全局密码哈希执行器"""
+    global _password_hasher
+    if _password_hasher is not None:
+        _password_hasher.shutdown()
+        _password_hasher = None
@@ -0,0 +1,323 @@
+"""
+文件名：permission_resolver.py
+文件路径：app/core/permission_resolver.py
+功能描述：RBAC 权限解析与位掩码缓存
+
+主要功能：
+- 把用户经 UserRole/RolePermission 得到的有效权限编译为位掩码（位序号按 permissions.id 升序稠密分配，id 有空洞时掩码仍紧凑）
+- 位掩码按用户两级缓存：进程内 LRU + Redis，权限检查为一次位运算
+- 角色级版本号失效：角色权限变更只递增该角色版本，持有该角色的用户缓存在下次检查时自动重新编译
+- 权限目录 (resource, action) → 位序号 进程内缓存，未知权限按限频重新加载；目录指纹随掩码缓存，目录变化后旧掩码自动重新编译
+
+使用说明：
+- 获取实例：resolver = get_permission_resolver()
+- 检查：resolver.has_permission(db, user_id, "product", "update")
+- 用户角色变更：resolver.invalidate_user(user_id)
+- 角色权限变更：resolver.bump_role(role_id)
+- 路由依赖：Depends(require_permission("product", "update"))（见 app.core.auth）
+
+依赖模块：
+- app.core.redis_client: 同步Redis连接
+- app.modules.user_auth.models: UserRole、RolePermission、Permission
+
+注意事项：
+- 角色版本每 ROLE_VERSION_SYNC_SECONDS 秒从 Redis 同步一次，其他进程的角色权限变更在该间隔内生效
+- 用户角色分配变更在其他进程的进程内缓存最迟 LOCAL_PERMISSION_TTL 秒后生效
+
+创建时间：2026-10-18
+最后修改：2026-10-19
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import get_sync_redis_connection
+
+logger = logging.getLogger(__name__)
+
+# 缓存配置
+LOCAL_PERMISSION_TTL = 10.0
+LOCAL_PERMISSION_MAX_ENTRIES = 10000
+REDIS_PERMISSION_TTL = 3600
+ROLE_VERSION_SYNC_SECONDS = 5.0
+CATALOG_RELOAD_SECONDS = 60.0
+REDIS_RETRY_BACKOFF = 30.0
+REDIS_KEY_PREFIX = "auth:rbac:user:"
+REDIS_ROLE_VERSIONS_KEY = "auth:rbac:role_versions"
+
+
+class UserPermissions(NamedTuple):
+    """编译后的用户权限（位掩码 + 编译时的角色版本与权限目录指纹）"""
+    mask: int
+    role_versions: Tuple[Tuple[int, int], ...]
+    catalog_version: str
+
+    def allows(self, bit: int) -> bool:
+        return (self.mask >> bit) & 1 == 1
+
+
+class _Catalog(NamedTuple):
+    """权限目录：位序号为权限在 id 升序中的下标"""
+    bits: Dict[Tuple[str, str], int]
+    bit_by_permission: Dict[int, int]
+    version: str
+
+
+class PermissionResolver:
+    """RBAC 权限解析器"""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        redis_factory: Optional[Callable[[], Any]] = get_sync_redis_connection,
+        local_ttl: float = LOCAL_PERMISSION_TTL,
+        local_max_entries: int = LOCAL_PERMISSION_MAX_ENTRIES,
+        redis_ttl: int = REDIS_PERMISSION_TTL,
+        version_sync_interval: float = ROLE_VERSION_SYNC_SECONDS,
+        catalog_reload_interval: float = CATALOG_RELOAD_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            redis_client: 同步Redis客户端；为 None 时首次使用通过 redis_factory 创建
+            redis_factory: Redis客户端工厂，为 None 时只使用进程内缓存
+            local_ttl: 进程内用户权限缓存时间（秒）
+            local_max_entries: 进程内缓存上限
+            redis_ttl: Redis 用户权限缓存时间（秒）
+            version_sync_interval: 角色版本同步间隔（秒）
+            catalog_reload_interval: 未知权限触发目录重新加载的最小间隔（秒）
+            clock: 时钟（测试注入）
+        """
+        self._redis = redis_client
+        self._redis_factory = redis_factory
+        self.local_ttl = local_ttl
+        self.local_max_entries = local_max_entries
+        self.redis_ttl = redis_ttl
+        self.version_sync_interval = version_sync_interval
+        self.catalog_reload_interval = catalog_reload_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._role_versions: Dict[int, int] = {}
+        self._versions_synced_at: Optional[float] = None
+        self._catalog: Optional[_Catalog] = None
+        self._catalog_loaded_at = 0.0
+        self._redis_down_until = 0.0
+        self.compiles = 0
+
+    def has_permission(self, db: Session, user_id: int, resource: str, action: str) -> bool:
+        """检查用户是否拥有 resource:action 权限"""
+        bit = self.permission_bit(db, resource, action)
+        if bit is None:
+            return False
+        return self.get_permissions(db, user_id).allows(bit)
+
+    def permission_bit(self, db: Session, resource: str, action: str) -> Optional[int]:
+        """权限对应的位序号；权限不存在返回 None"""
+        key = (resource, action)
+        catalog = self._catalog
+        if catalog is not None and key in catalog.bits:
+            return catalog.bits[key]
+        if catalog is None or self._clock() - self._catalog_loaded_at >= self.catalog_reload_interval:
+            catalog = self._load_catalog(db)
+        return catalog.bits.get(key)
+
+    def get_permissions(self, db: Session, user_id: int) -> UserPermissions:
+        """获取用户编译后的权限（版本失效时重新编译）"""
+        self._maybe_sync_versions()
+        permissions = self._get_local(user_id)
+        if permissions is None:
+            permissions = self._get_redis(user_id)
+            if permissions is None:
+                permissions = self._compile(db, user_id)
+                self._set_redis(user_id, permissions)
+            self._set_local(user_id, permissions)
+        return permissions
+
+    def invalidate_user(self, user_id: int) -> None:
+        """用户角色分配变更后失效该用户的权限缓存"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            client.delete(f"{REDIS_KEY_PREFIX}{user_id}")
+        except Exception as e:
+            self._mark_redis_down(e)
+
+    def bump_role(self, role_id: int) -> int:
+        """角色权限变更后递增角色版本，持有该角色的用户缓存随之失效"""
+        version = None
+        client = self._redis_client()
+        if client is not None:
+            try:
+                version = int(client.hincrby(REDIS_ROLE_VERSIONS_KEY, str(role_id), 1))
+            except Exception as e:
+                self._mark_redis_down(e)
+        with self._lock:
+            if version is None:
+                version = self._role_versions.get(role_id, 0) + 1
+            self._role_versions[role_id] = version
+        return version
+
+    def clear(self) -> None:
+        """清空进程内缓存"""
+        with self._lock:
+            self._entries.clear()
+        self._catalog = None
+
+    def _is_current(self, permissions: UserPermissions) -> bool:
+        # 目录未加载时无法比较指纹，权限检查前加载目录后会再次校验
+        catalog = self._catalog
+        if catalog is not None and catalog.version != permissions.catalog_version:
+            return False
+        versions = self._role_versions
+        return all(versions.get(role_id, 0) == version for role_id, version in permissions.role_versions)
+
+    def _compile(self, db: Session, user_id: int) -> UserPermissions:
+        # 延迟导入避免循环导入
+        from app.modules.user_auth.models import RolePermission, UserRole
+
+        # 版本在查询前取快照：编译期间发生的角色变更会使本次结果在下次检查时失效
+        with self._lock:
+            versions = dict(self._role_versions)
+        rows = (
+            db.query(UserRole.role_id, RolePermission.permission_id)
+            .outerjoin(RolePermission, RolePermission.role_id == UserRole.role_id)
+            .filter(UserRole.user_id == user_id)
+            .all()
+        )
+        catalog = self._catalog
+        permission_ids = {permission_id for _, permission_id in rows if permission_id is not None}
+        # 目录之后新建的权限没有位序号，重新加载目录
+        if catalog is None or not permission_ids <= catalog.bit_by_permission.keys():
+            catalog = self._load_catalog(db)
+        mask = 0
+        for permission_id in permission_ids:
+            bit = catalog.bit_by_permission.get(permission_id)
+            if bit is not None:
+                mask |= 1 << bit
+        role_ids = {role_id for role_id, _ in rows}
+        self.compiles += 1
+        return UserPermissions(
+            mask,
+            tuple((role_id, versions.get(role_id, 0)) for role_id in sorted(role_ids)),
+            catalog.version
+        )
+
+    def _load_catalog(self, db: Session) -> _Catalog:
+        from app.modules.user_auth.models import Permission
+
+        rows = db.query(Permission.id, Permission.resource, Permission.action).order_by(Permission.id).all()
+        bits = {}
+        bit_by_permission = {}
+        for bit, (permission_id, resource, action) in enumerate(rows):
+            bits[(resource, action)] = bit
+            bit_by_permission[permission_id] = bit
+        # 指纹只取决于 id 序列：各进程目录一致时共享 Redis 中的掩码
+        fingerprint = hashlib.blake2b(",".join(str(row[0]) for row in rows).encode(), digest_size=8).hexdigest()
+        catalog = _Catalog(bits, bit_by_permission, fingerprint)
+        self._catalog = catalog
+        self._catalog_loaded_at = self._clock()
+        return catalog
+
+    def _maybe_sync_versions(self) -> None:
+        now = self._clock()
+        if self._versions_synced_at is not None and now - self._versions_synced_at < self.version_sync_interval:
+            return
+        self._versions_synced_at = now
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            remote = client.hgetall(REDIS_ROLE_VERSIONS_KEY)
+        except Exception as e:
+            self._mark_redis_down(e)
+            return
+        with self._lock:
+            self._role_versions = {int(role_id): int(version) for role_id, version in remote.items()}
+
+    def _get_local(self, user_id: int) -> Optional[UserPermissions]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            permissions, expires_at = entry
+            if self._clock() >= expires_at or not self._is_current(permissions):
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return permissions
+
+    def _set_local(self, user_id: int, permissions: UserPermissions) -> None:
+        with self._lock:
+            self._entries[user_id] = (permissions, self._clock() + self.local_ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.local_max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_client(self) -> Any:
+        if self._clock() < self._redis_down_until:
+            return None
+        if self._redis is None and self._redis_factory is not None:
+            self._redis = self._redis_factory()
+        return self._redis
+
+    def _mark_redis_down(self, error: Exception) -> None:
+        logger.warning(f"权限缓存Redis不可用，{REDIS_RETRY_BACKOFF}秒内只使用进程内缓存: {error}")
+        self._redis_down_until = self._clock() + REDIS_RETRY_BACKOFF
+
+    def _get_redis(self, user_id: int) -> Optional[UserPermissions]:
+        client = self._redis_client()
+        if client is None:
+            return None
+        try:
+            value = client.get(f"{REDIS_KEY_PREFIX}{user_id}")
+        except Exception as e:
+            self._mark_redis_down(e)
+            return None
+        if value is None:
+            return None
+        cached = json.loads(value)
+        # 旧格式（无目录指纹）的位序号为 permissions.id，视为失效
+        if len(cached) != 3:
+            return None
+        mask, role_versions, catalog_version = cached
+        permissions = UserPermissions(
+            int(mask, 16), tuple((int(r), int(v)) for r, v in role_versions), catalog_version
+        )
+        with self._lock:
+            return permissions if self._is_current(permissions) else None
+
+    def _set_redis(self, user_id: int, permissions: UserPermissions) -> None:
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            client.set(
+                f"{REDIS_KEY_PREFIX}{user_id}",
+                json.dumps([format(permissions.mask, "x"), permissions.role_versions, permissions.catalog_version]),
+                ex=self.redis_ttl
+            )
+        except Exception as e:
+            self._mark_redis_down(e)
+
+
+# 全局权限解析器
+_permission_resolver: Optional[PermissionResolver] = None
+
+
+def get_permission_resolver() -> PermissionResolver:
+    """获取全局权限解析器"""
+    global _permission_resolver
+    if _permission_resolver is None:
+        _permission_resolver = PermissionResolver()
+    return _permission_resolver
@@ -0,0 +1,210 @@
+"""
+文件名：principal_cache.py
+文件路径：app/core/principal_cache.py
+功能描述：认证主体缓存
+
+主要功能：
+- 缓存鉴权所需的最小用户字段（id、role、is_active、status），认证依赖不再每次请求查询 users 表
+- 两级缓存：进程内 LRU（短TTL） + Redis（共享，长TTL）
+- 用户资料更新、锁定/解锁、角色变更时按用户失效
+- Redis 不可用时降级为数据库查询，并在退避期内不再尝试
+
+使用说明：
+- 获取主体：principal = get_principal_cache().get(db, user_id)
+- 失效：invalidate_principal(user_id)
+
+依赖模块：
+- app.core.redis_client: 同步Redis连接
+- app.modules.user_auth.models.User: 缓存未命中时按主键查询最小字段
+
+注意事项：
+- 其他进程的进程内缓存最迟在 LOCAL_PRINCIPAL_TTL 秒后感知失效
+- 需要完整用户资料或修改用户的接口应使用 get_current_user_record 加载 ORM 对象
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import get_sync_redis_connection
+
+logger = logging.getLogger(__name__)
+
+# 缓存配置
+LOCAL_PRINCIPAL_TTL = 10.0
+LOCAL_PRINCIPAL_MAX_ENTRIES = 10000
+REDIS_PRINCIPAL_TTL = 600
+REDIS_RETRY_BACKOFF = 30.0
+REDIS_KEY_PREFIX = "auth:principal:"
+
+ADMIN_ROLES = ('admin', 'super_admin')
+
+
+class Principal(NamedTuple):
+    """已认证主体（鉴权所需的最小用户字段）"""
+    id: int
+    role: str
+    is_active: bool
+    status: str
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role in ADMIN_ROLES
+
+
+class PrincipalCache:
+    """认证主体缓存"""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        redis_factory: Optional[Callable[[], Any]] = get_sync_redis_connection,
+        local_ttl: float = LOCAL_PRINCIPAL_TTL,
+        local_max_entries: int = LOCAL_PRINCIPAL_MAX_ENTRIES,
+        redis_ttl: int = REDIS_PRINCIPAL_TTL,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            redis_client: 同步Redis客户端；为 None 时首次使用通过 redis_factory 创建
+            redis_factory: Redis客户端工厂，为 None 时只使用进程内缓存
+            local_ttl: 进程内缓存时间（秒）
+            local_max_entries: 进程内缓存上限
+            redis_ttl: Redis 缓存时间（秒）
+            clock: 时钟（测试注入）
+        """
+        self._redis = redis_client
+        self._redis_factory = redis_factory
+        self.local_ttl = local_ttl
+        self.local_max_entries = local_max_entries
+        self.redis_ttl = redis_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._redis_down_until = 0.0
+
+    def get(self, db: Session, user_id: int) -> Optional[Principal]:
+        """
+        获取认证主体
+
+        Returns:
+            Optional[Principal]: 用户不存在返回 None（不做负缓存）
+        """
+        principal = self._get_local(user_id)
+        if principal is None:
+            principal = self._get_redis(user_id)
+            if principal is None:
+                principal = self._load(db, user_id)
+                if principal is None:
+                    return None
+                self._set_redis(principal)
+            self._set_local(principal)
+        return principal
+
+    def invalidate(self, user_id: int) -> None:
+        """用户资料、状态或角色变更后失效缓存"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            client.delete(f"{REDIS_KEY_PREFIX}{user_id}")
+        except Exception as e:
+            self._mark_redis_down(e)
+
+    def clear(self) -> None:
+        """清空进程内缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _load(db: Session, user_id: int) -> Optional[Principal]:
+        # 延迟导入避免循环导入
+        from app.modules.user_auth.models import User
+
+        row = db.query(User.id, User.role, User.is_active, User.status).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        return Principal(row.id, row.role, bool(row.is_active), row.status)
+
+    def _get_local(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def _set_local(self, principal: Principal) -> None:
+        with self._lock:
+            self._entries[principal.id] = (principal, self._clock() + self.local_ttl)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.local_max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_client(self) -> Any:
+        if self._clock() < self._redis_down_until:
+            return None
+        if self._redis is None and self._redis_factory is not None:
+            self._redis = self._redis_factory()
+        return self._redis
+
+    def _mark_redis_down(self, error: Exception) -> None:
+        logger.warning(f"认证主体缓存Redis不可用，{REDIS_RETRY_BACKOFF}秒内降级为数据库查询: {error}")
+        self._redis_down_until = self._clock() + REDIS_RETRY_BACKOFF
+
+    def _get_redis(self, user_id: int) -> Optional[Principal]:
+        client = self._redis_client()
+        if client is None:
+            return None
+        try:
+            value = client.get(f"{REDIS_KEY_PREFIX}{user_id}")
+        except Exception as e:
+            self._mark_redis_down(e)
+            return None
+        if value is None:
+            return None
+        return Principal(user_id, *json.loads(value))
+
+    def _set_redis(self, principal: Principal) -> None:
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            client.set(
+                f"{REDIS_KEY_PREFIX}{principal.id}",
+                json.dumps([principal.role, principal.is_active, principal.status]),
+                ex=self.redis_ttl
+            )
+        except Exception as e:
+            self._mark_redis_down(e)
+
+
+# 全局认证主体缓存
+_principal_cache: Optional[PrincipalCache] = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    """获取全局认证主体缓存"""
+    global _principal_cache
+    if _principal_cache is None:
+        _principal_cache = PrincipalCache()
+    return _principal_cache
+
+
+def invalidate_principal(user_id: int) -> None:
+    """失效指定用户的认证主体缓存"""
+    get_principal_cache().invalidate(user_id)
@@ -4,6 +4,7 @@ Redis连接和缓存管理模块
 import os
 import json
 import redis.asyncio as redis
+import redis as sync_redis
 from typing import Optional, Dict, Any, List
 from fastapi import HTTPException
 
@@ -26,6 +27,30 @@ async def close_redis_connection():
     if redis_pool:
         await redis_pool.aclose()
         redis_pool = None
+    close_sync_redis_connection()
+
+# 同步Redis连接池（供在线程中执行的同步服务层缓存使用）
+sync_redis_pool: Optional[sync_redis.Redis] = None
+SYNC_REDIS_SOCKET_TIMEOUT = float(os.getenv("SYNC_REDIS_SOCKET_TIMEOUT", "0.2"))
+
+def get_sync_redis_connection() -> sync_redis.Redis:
+    """获取同步Redis连接"""
+    global sync_redis_pool
+    if sync_redis_pool is None:
+        sync_redis_pool = sync_redis.Redis.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            socket_timeout=SYNC_REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=SYNC_REDIS_SOCKET_TIMEOUT
+        )
+    return sync_redis_pool
+
+def close_sync_redis_connection():
+    """关闭同步Redis连接"""
+    global sync_redis_pool
+    if sync_redis_pool:
+        sync_redis_pool.close()
+        sync_redis_pool = None
 
 class RedisCartManager:
     """Redis购物车管理器"""
@@ -1,19 +1,56 @@
 """
 安全事件日志记录模块
 用于记录登录失败、账户锁定等安全相关事件
+
+日志经由异步管道（app.core.log_pipeline）写入：请求路径只入队，
+JSON 编码和文件写入在后台线程按批完成。
 """
 
+import json
 import logging
 import logging.handlers
-import json
+import os
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
 from pathlib import Path
 
+from app.core.log_pipeline import (
+    BatchStreamHandler,
+    BatchTimedRotatingFileHandler,
+    create_queued_logger,
+    get_log_pipeline,
+)
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
 # 创建日志目录
 log_dir = Path("logs")
 log_dir.mkdir(exist_ok=True)
 
+# 异步日志管道配置：请求路径只入队，后台线程批量写文件
+SECURITY_LOG_QUEUE_SIZE = int(os.getenv("SECURITY_LOG_QUEUE_SIZE", "10000"))
+SECURITY_LOG_BATCH_SIZE = int(os.getenv("SECURITY_LOG_BATCH_SIZE", "256"))
+
+# 写入JSON的安全事件字段
+SECURITY_EVENT_FIELDS = (
+    "user_id", "username", "event_type", "failed_attempts", "locked_until", "ip_address", "dropped",
+)
+
+
+def _json_default(value: Any) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def dumps_log_entry(entry: Dict[str, Any]) -> str:
+    """日志条目JSON编码（优先使用 orjson）"""
+    if orjson is not None:
+        return orjson.dumps(entry, default=_json_default).decode()
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+
 class SecurityEventFilter(logging.Filter):
     """安全事件过滤器，确保只记录安全相关事件"""
     
@@ -22,45 +59,50 @@ class SecurityEventFilter(logging.Filter):
 
 class SecurityJSONFormatter(logging.Formatter):
     """安全事件JSON格式化器"""
+
+    def __init__(self, fields: Iterable[str] = SECURITY_EVENT_FIELDS):
+        super().__init__()
+        self.fields = tuple(fields)
     
     def format(self, record):
+        # 在后台线程格式化，时间取事件发生时间而非写入时间
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(),
             "level": record.levelname,
             "message": record.getMessage(),
             "logger": record.name
         }
         
         # 添加安全事件相关字段
-        if hasattr(record, 'user_id'):
-            log_entry['user_id'] = record.user_id
-        if hasattr(record, 'username'):
-            log_entry['username'] = record.username
-        if hasattr(record, 'event_type'):
-            log_entry['event_type'] = record.event_type
-        if hasattr(record, 'failed_attempts'):
-            log_entry['failed_attempts'] = record.failed_attempts
-        if hasattr(record, 'locked_until'):
-            log_entry['locked_until'] = record.locked_until
-        if hasattr(record, 'ip_address'):
-            log_entry['ip_address'] = record.ip_address
+        record_fields = record.__dict__
+        for field in self.fields:
+            if field in record_fields:
+                log_entry[field] = record_fields[field]
         
-        return json.dumps(log_entry, ensure_ascii=False)
+        return dumps_log_entry(log_entry)
 
-def setup_security_logger():
-    """配置安全事件日志记录器"""
-    
-    # 创建安全日志记录器
-    security_logger = logging.getLogger("security")
-    security_logger.setLevel(logging.INFO)
+def setup_audit_logger(name: str, filename: str, fields: Iterable[str] = SECURITY_EVENT_FIELDS) -> logging.Logger:
+    """
+    配置经由异步管道写入的审计日志记录器
+
+    Args:
+        name: 日志记录器名称
+        filename: logs 目录下的日志文件名（每天轮转，保留30天）
+        fields: 写入JSON的事件字段
+
+    Returns:
+        logging.Logger: 日志记录器（重复调用返回已配置的实例）
+    """
+    audit_logger = logging.getLogger(name)
+    audit_logger.setLevel(logging.INFO)
     
     # 防止重复添加处理器
-    if security_logger.handlers:
-        return security_logger
+    if get_log_pipeline(name) is not None:
+        return audit_logger
     
     # 创建文件处理器（每天轮转）
-    security_handler = logging.handlers.TimedRotatingFileHandler(
-        filename=log_dir / "security_events.log",
+    file_handler = BatchTimedRotatingFileHandler(
+        filename=log_dir / filename,
         when='midnight',
         interval=1,
         backupCount=30,  # 保留30天的日志
@@ -68,30 +110,32 @@ def setup_security_logger():
     )
     
     # 创建控制台处理器（开发环境）
-    console_handler = logging.StreamHandler()
+    console_handler = BatchStreamHandler()
     
     # 设置格式化器
-    json_formatter = SecurityJSONFormatter()
-    security_handler.setFormatter(json_formatter)
+    json_formatter = SecurityJSONFormatter(fields)
+    file_handler.setFormatter(json_formatter)
     console_handler.setFormatter(json_formatter)
     
-    # 添加过滤器
-    security_filter = SecurityEventFilter()
-    security_handler.addFilter(security_filter)
-    console_handler.addFilter(security_filter)
-    
-    # 添加处理器
-    security_logger.addHandler(security_handler)
-    security_logger.addHandler(console_handler)
+    create_queued_logger(
+        name,
+        [file_handler, console_handler],
+        max_queue_size=SECURITY_LOG_QUEUE_SIZE,
+        batch_size=SECURITY_LOG_BATCH_SIZE
+    )
     
-    # 防止向父日志记录器传播
-    security_logger.propagate = False
+    # 过滤器挂在队列处理器上，非安全事件不进入队列
+    get_log_pipeline(name).handler.addFilter(SecurityEventFilter())
     
-    return security_logger
+    return audit_logger
+
+def setup_security_logger():
+    """配置安全事件日志记录器"""
+    return setup_audit_logger("security", "security_events.log")
 
 def log_security_event(event_type: str, message: str, user_data: Dict[str, Any] = None, **kwargs):
-    """记录安全事件的便捷函数"""
-    logger = setup_security_logger()
+    """记录安全事件的便捷函数（只入队，不阻塞请求）"""
+    logger = _security_event_logger
     
     # 准备额外信息
     extra = {"event_type": event_type}
@@ -108,7 +152,7 @@ def log_security_event(event_type: str, message: str, user_data: Dict[str, Any]
         logger.info(message, extra=extra)
 
 # 初始化安全日志记录器
-setup_security_logger()
+_security_event_logger = setup_security_logger()
 
 
 class SecurityLogger:
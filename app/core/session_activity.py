@@ -0,0 +1,191 @@
+"""
+文件名：session_activity.py
+文件路径：app/core/session_activity.py
+功能描述：会话最近访问时间的内存合并与批量写入
+
+主要功能：
+- 认证依赖每次请求只在内存中记录会话最近访问时间（同一会话多次访问合并为一条）
+- 后台任务每隔 SESSION_TOUCH_FLUSH_SECONDS 秒用一条 executemany UPDATE 批量写入 sessions 表
+- 会话键哈希（sessions.token_hash）与会话吊销标记
+
+使用说明：
+- 记录访问：get_session_activity_buffer().touch(hash_session_key(sid))
+- 批量写入：buffer.flush()（后台任务自动执行，应用关闭时写完剩余记录）
+- 配置：SESSION_TOUCH_FLUSH_SECONDS / SESSION_TOUCH_MAX_PENDING
+
+依赖模块：
+- app.core.database: 数据库会话工厂
+- app.modules.user_auth.models.Session: 会话表
+
+注意事项：
+- 最近访问时间最多滞后一个写入间隔；进程异常退出时丢失尚未写入的访问时间
+- 待写入条目超过上限时丢弃新会话的访问记录并计数，已有条目继续更新
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# 批量写入配置
+SESSION_TOUCH_FLUSH_SECONDS = float(os.getenv("SESSION_TOUCH_FLUSH_SECONDS", "5"))
+SESSION_TOUCH_MAX_PENDING = int(os.getenv("SESSION_TOUCH_MAX_PENDING", "100000"))
+
+# 会话吊销标记在令牌吊销列表中的前缀
+SESSION_REVOCATION_PREFIX = "session:"
+
+
+def hash_session_key(session_key: str) -> str:
+    """会话键哈希（sessions.token_hash），数据库中不保存会话键明文"""
+    return hashlib.sha256(session_key.encode()).hexdigest()
+
+
+def session_revocation_id(token_hash: str) -> str:
+    """会话在令牌吊销列表中的标识"""
+    return f"{SESSION_REVOCATION_PREFIX}{token_hash}"
+
+
+class SessionActivityBuffer:
+    """会话最近访问时间缓冲区"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_interval: float = SESSION_TOUCH_FLUSH_SECONDS,
+        max_pending: int = SESSION_TOUCH_MAX_PENDING,
+        clock: Callable[[], datetime] = datetime.utcnow
+    ):
+        """
+        Args:
+            session_factory: 数据库会话工厂
+            flush_interval: 批量写入间隔（秒）
+            max_pending: 待写入会话数上限
+            clock: 时钟（测试注入）
+        """
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self.touches = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+
+    def touch(self, token_hash: str, accessed_at: Optional[datetime] = None) -> None:
+        """记录一次会话访问（只写内存）"""
+        accessed_at = accessed_at or self._clock()
+        with self._lock:
+            self.touches += 1
+            if token_hash not in self._pending and len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending[token_hash] = accessed_at
+
+    def pending(self, token_hash: str) -> Optional[datetime]:
+        """尚未写入数据库的最近访问时间"""
+        return self._pending.get(token_hash)
+
+    def discard(self, token_hash: str) -> None:
+        """会话吊销后丢弃待写入的访问记录"""
+        with self._lock:
+            self._pending.pop(token_hash, None)
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """
+        批量写入待更新的最近访问时间
+
+        Returns:
+            int: 本次写入的会话数
+        """
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+
+        # 延迟导入避免循环导入
+        from app.modules.user_auth.models import Session as UserSession
+
+        sessions = UserSession.__table__
+        statement = (
+            update(sessions)
+            .where(sessions.c.token_hash == bindparam("b_token_hash"), sessions.c.is_active.is_(True))
+            .values(last_accessed_at=bindparam("b_accessed_at"))
+        )
+        params = [{"b_token_hash": token_hash, "b_accessed_at": accessed_at} for token_hash, accessed_at in batch.items()]
+
+        owns_session = db is None
+        db = db or self.session_factory()
+        try:
+            db.execute(statement, params)
+            db.commit()
+        except Exception:
+            db.rollback()
+            # 写入失败时放回缓冲区，保留更新的访问时间
+            with self._lock:
+                for token_hash, accessed_at in batch.items():
+                    current = self._pending.get(token_hash)
+                    if current is None or current < accessed_at:
+                        self._pending[token_hash] = accessed_at
+            raise
+        finally:
+            if owns_session:
+                db.close()
+
+        self.flushes += 1
+        self.flushed_rows += len(batch)
+        return len(batch)
+
+    async def run(self) -> None:
+        """后台循环：按间隔批量写入"""
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"会话访问时间批量写入失败: {e}")
+
+    def start(self) -> asyncio.Task:
+        """启动后台写入任务"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """停止后台任务并写完剩余记录"""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+# 全局会话访问缓冲区
+_session_activity_buffer: Optional[SessionActivityBuffer] = None
+
+
+def get_session_activity_buffer() -> SessionActivityBuffer:
+    """获取全局会话访问缓冲区"""
+    global _session_activity_buffer
+    if _session_activity_buffer is None:
+        _session_activity_buffer = SessionActivityBuffer()
+    return _session_activity_buffer
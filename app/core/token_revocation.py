@@ -0,0 +1,266 @@
+"""
+文件名：token_revocation.py
+文件路径：app/core/token_revocation.py
+功能描述：JWT 吊销列表（Redis + 进程内布隆过滤器）
+
+主要功能：
+- 吊销的 JTI 写入 Redis，TTL 等于令牌剩余有效期，过期后自动清理
+- 进程内布隆过滤器预判：未吊销（绝大多数请求）在本地直接判定，不访问 Redis
+- 布隆过滤器命中（可能已吊销）时才查询 Redis 确认
+- 定期从 Redis 吊销索引增量同步其他进程的吊销记录，并周期性全量重建以剔除过期记录
+- 写入 Redis 失败的吊销保留在本地待写表中，同步时重试写入，全量重建时保留，直到写入成功或令牌过期
+
+使用说明：
+- 获取实例：revocations = get_token_revocation_list()
+- 吊销：revocations.revoke(jti, expires_at)
+- 校验：revocations.is_revoked(jti)
+- 配置：TOKEN_REVOCATION_SYNC_SECONDS / TOKEN_REVOCATION_REBUILD_SECONDS
+
+依赖模块：
+- app.core.redis_client: 同步Redis连接
+
+注意事项：
+- 其他进程吊销的令牌最迟在 TOKEN_REVOCATION_SYNC_SECONDS 秒后在本进程生效，本进程吊销立即生效
+- 布隆过滤器命中而 Redis 不可用时按已吊销处理（误判概率约为 BLOOM_ERROR_RATE）
+- 待写表只在本进程内生效，写入 Redis 之前其他进程不知道该吊销
+
+创建时间：2026-10-18
+最后修改：2026-10-19
+"""
+
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+from app.core.redis_client import get_sync_redis_connection
+
+logger = logging.getLogger(__name__)
+
+# 吊销列表配置
+TOKEN_REVOCATION_SYNC_SECONDS = float(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", "5"))
+TOKEN_REVOCATION_REBUILD_SECONDS = float(os.getenv("TOKEN_REVOCATION_REBUILD_SECONDS", "600"))
+BLOOM_CAPACITY = 100000
+BLOOM_ERROR_RATE = 0.001
+REDIS_RETRY_BACKOFF = 30.0
+REDIS_KEY_PREFIX = "auth:revoked:"
+REDIS_INDEX_KEY = "auth:revoked_index"
+
+# 增量同步回看时间，覆盖进程间时钟偏差
+SYNC_OVERLAP_SECONDS = 2.0
+
+
+class BloomFilter:
+    """位数组布隆过滤器（双重哈希）"""
+
+    def __init__(self, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + index * second) % self.size for index in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenRevocationList:
+    """令牌吊销列表"""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        redis_factory: Optional[Callable[[], Any]] = get_sync_redis_connection,
+        sync_interval: float = TOKEN_REVOCATION_SYNC_SECONDS,
+        rebuild_interval: float = TOKEN_REVOCATION_REBUILD_SECONDS,
+        capacity: int = BLOOM_CAPACITY,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            redis_client: 同步Redis客户端；为 None 时首次使用通过 redis_factory 创建
+            redis_factory: Redis客户端工厂
+            sync_interval: 增量同步间隔（秒）
+            rebuild_interval: 全量重建间隔（秒）
+            capacity: 布隆过滤器初始容量，吊销数超过一半时按两倍扩容
+            clock: 时钟（测试注入）
+        """
+        self._redis = redis_client
+        self._redis_factory = redis_factory
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.capacity = capacity
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity)
+        # 尚未写入Redis的本进程吊销：jti -> 过期时间戳
+        self._pending: Dict[str, float] = {}
+        self._synced_at: Optional[float] = None
+        self._rebuilt_at: Optional[float] = None
+        self._redis_down_until = 0.0
+        self.redis_checks = 0
+
+    def revoke(self, jti: str, expires_at: Union[datetime, float, int]) -> bool:
+        """
+        吊销令牌
+
+        Args:
+            jti: 令牌ID
+            expires_at: 令牌过期时间（datetime 或 Unix 时间戳）
+
+        Returns:
+            bool: 是否写入Redis；已过期的令牌无需吊销，返回 False。
+                  写入失败时吊销仍在本进程生效，并在之后的同步中重试写入
+        """
+        expires_ts = expires_at.replace(tzinfo=expires_at.tzinfo or timezone.utc).timestamp() \
+            if isinstance(expires_at, datetime) else float(expires_at)
+        now = self._clock()
+        ttl = int(math.ceil(expires_ts - now))
+        if ttl <= 0:
+            return False
+
+        # 本进程立即生效，写入Redis前记为待写
+        with self._lock:
+            self._bloom.add(jti)
+            self._pending[jti] = expires_ts
+
+        client = self._redis_client()
+        if client is None:
+            return False
+        try:
+            self._write(client, {jti: expires_ts}, now)
+        except Exception as e:
+            self._mark_redis_down(e)
+            return False
+        with self._lock:
+            self._pending.pop(jti, None)
+        return True
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """判断令牌是否已吊销（未命中布隆过滤器时不访问Redis）"""
+        if not jti:
+            return False
+        self._maybe_sync()
+        with self._lock:
+            if jti not in self._bloom:
+                return False
+            # Redis 中没有记录的本进程吊销
+            if jti in self._pending:
+                return self._pending[jti] > self._clock()
+
+        client = self._redis_client()
+        if client is None:
+            # 可能已吊销且无法确认，按已吊销处理
+            return True
+        self.redis_checks += 1
+        try:
+            return bool(client.exists(f"{REDIS_KEY_PREFIX}{jti}"))
+        except Exception as e:
+            self._mark_redis_down(e)
+            return True
+
+    def sync(self, full: bool = False) -> None:
+        """从Redis吊销索引同步（增量或全量重建）"""
+        client = self._redis_client()
+        if client is None:
+            return
+        now = self._clock()
+        try:
+            self._flush_pending(client, now)
+            if full:
+                # 全量重建：剔除已过期的索引项并重新生成布隆过滤器
+                live, expired = [], []
+                for member in client.zrange(REDIS_INDEX_KEY, 0, -1):
+                    jti, expires_ts = member.rsplit(":", 1)
+                    if int(expires_ts) > now:
+                        live.append(jti)
+                    else:
+                        expired.append(member)
+                if expired:
+                    client.zrem(REDIS_INDEX_KEY, *expired)
+                bloom = BloomFilter(max(self.capacity, len(live) * 2))
+                for jti in live:
+                    bloom.add(jti)
+                # 重建期间新增的吊销由下一次增量同步（回看 SYNC_OVERLAP_SECONDS）补齐
+                with self._lock:
+                    for jti in self._pending:
+                        bloom.add(jti)
+                    self._bloom = bloom
+                    self._rebuilt_at = now
+            else:
+                since = (self._synced_at or now) - SYNC_OVERLAP_SECONDS
+                members = client.zrangebyscore(REDIS_INDEX_KEY, since, "+inf")
+                with self._lock:
+                    for member in members:
+                        self._bloom.add(member.rsplit(":", 1)[0])
+            self._synced_at = now
+        except Exception as e:
+            self._mark_redis_down(e)
+
+    def _write(self, client: Any, revocations: Dict[str, float], now: float) -> None:
+        """一次管道往返写入吊销记录"""
+        pipe = client.pipeline(transaction=False)
+        for jti, expires_ts in revocations.items():
+            pipe.set(f"{REDIS_KEY_PREFIX}{jti}", "1", ex=int(math.ceil(expires_ts - now)))
+            # 索引分数为吊销时间（增量同步），成员记录过期时间（全量重建时剔除）
+            pipe.zadd(REDIS_INDEX_KEY, {f"{jti}:{int(expires_ts)}": now})
+        pipe.execute()
+
+    def _flush_pending(self, client: Any, now: float) -> None:
+        """重试写入待写吊销，已过期的直接丢弃；写入失败时异常交由调用方处理"""
+        with self._lock:
+            for jti in [jti for jti, expires_ts in self._pending.items() if expires_ts <= now]:
+                del self._pending[jti]
+            pending = dict(self._pending)
+        if not pending:
+            return
+        self._write(client, pending, now)
+        with self._lock:
+            for jti in pending:
+                self._pending.pop(jti, None)
+        logger.info(f"令牌吊销列表已补写 {len(pending)} 条本地吊销记录")
+
+    def _maybe_sync(self) -> None:
+        now = self._clock()
+        if self._rebuilt_at is None or now - self._rebuilt_at >= self.rebuild_interval:
+            self.sync(full=True)
+        elif now - (self._synced_at or 0) >= self.sync_interval:
+            self.sync()
+
+    def _redis_client(self) -> Any:
+        if time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None and self._redis_factory is not None:
+            self._redis = self._redis_factory()
+        return self._redis
+
+    def _mark_redis_down(self, error: Exception) -> None:
+        logger.warning(f"令牌吊销列表Redis不可用，{REDIS_RETRY_BACKOFF}秒内仅使用本地布隆过滤器: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_BACKOFF
+
+
+# 全局令牌吊销列表
+_token_revocation_list: Optional[TokenRevocationList] = None
+
+
+def get_token_revocation_list() -> TokenRevocationList:
+    """获取全局令牌吊销列表"""
+    global _token_revocation_list
+    if _token_revocation_list is None:
+        _token_revocation_list = TokenRevocationList()
+    return _token_revocation_list
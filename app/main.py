@@ -22,6 +22,14 @@ import os
 
 # Redis连接管理
 from app.core.redis_client import close_redis_connection
+# 第三方出站HTTP连接池
+from app.adapters.http_transport import close_http_transport
+# 密码哈希执行器
+from app.core.password_hasher import close_password_hasher
+# 异步审计日志管道
+from app.core.log_pipeline import flush_log_pipelines
+# 业务模块注册表
+from app.core.module_registry import get_enabled_modules, import_module_models, register_module_routers
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -34,23 +42,78 @@ async def lifespan(app: FastAPI):
         print("📋 自动创建数据库表...")
         from app.core.database import engine
         from app.shared.base_models import Base
-        # 导入所有模型以确保表定义被注册
-        from app.modules.user_auth.models import User
-        from app.modules.product_catalog.models import Category, Brand, Product, SKU, ProductAttribute, SKUAttribute, ProductImage, ProductTag
-        from app.modules.shopping_cart.models import Cart, CartItem
+        # 导入启用模块的模型以确保表定义被注册
+        import_module_models(ENABLED_MODULES)
         Base.metadata.create_all(bind=engine)
         print("✅ 数据库表创建完成")
     
+    # 启动订单事件发件箱分发器
+    order_outbox_dispatcher = None
+    if OUTBOX_DISPATCHER_ENABLED and "order_management" in ENABLED_MODULES:
+        from app.modules.order_management.outbox_service import OrderOutboxDispatcher
+        order_outbox_dispatcher = OrderOutboxDispatcher()
+        order_outbox_dispatcher.start()
+        print("📨 订单事件分发器已启动")
+    
+    # 启动支付回调处理器（回调队列模式）
+    payment_callback_worker = None
+    payment_expiry_sweeper = None
+    if "payment_service" in ENABLED_MODULES:
+        from app.modules.payment_service import callback_queue
+        if callback_queue.CALLBACK_QUEUE_ENABLED:
+            payment_callback_worker = callback_queue.PaymentCallbackWorker()
+            payment_callback_worker.start()
+            print("💳 支付回调处理器已启动")
+        
+        # 启动待支付记录过期清理任务
+        from app.modules.payment_service import expiry_job
+        if expiry_job.EXPIRY_SWEEPER_ENABLED:
+            payment_expiry_sweeper = expiry_job.PaymentExpirySweeper()
+            payment_expiry_sweeper.start()
+            print("⏰ 支付过期清理任务已启动")
+    
+    # 启动积分过期批处理任务
+    point_expiry_job = None
+    if "member_system" in ENABLED_MODULES:
+        from app.modules.member_system import expiry_job as point_expiry
+        if point_expiry.POINT_EXPIRY_ENABLED:
+            point_expiry_job = point_expiry.PointExpiryJob()
+            point_expiry_job.start()
+            print("🎯 积分过期任务已启动")
+    
+    # 启动会话访问时间批量写入任务
+    from app.core.session_activity import get_session_activity_buffer
+    session_activity = get_session_activity_buffer()
+    session_activity.start()
+    
     yield
     # 关闭时的清理代码
     print("🛑 电商平台服务关闭中...")
+    if order_outbox_dispatcher:
+        await order_outbox_dispatcher.stop()
+    if payment_callback_worker:
+        await payment_callback_worker.stop()
+    if payment_expiry_sweeper:
+        await payment_expiry_sweeper.stop()
+    if point_expiry_job:
+        await point_expiry_job.stop()
+    await session_activity.stop()
     await close_redis_connection()
+    await close_http_transport()
+    close_password_hasher()
+    flush_log_pipelines()
 
 # 开发环境自动创建表设置
 _auto_create_flag = os.environ.get("AUTO_CREATE_TABLES", "0") == "1"
 _is_ci = os.environ.get("CI", "").lower() in ("1", "true", "yes") or os.environ.get("GITHUB_ACTIONS", "").lower() == "true"
 AUTO_CREATE = _auto_create_flag and not _is_ci
 
+# 启用的业务模块（ENABLED_MODULES / DISABLED_MODULES）
+ENABLED_MODULES = get_enabled_modules()
+
+# 订单事件发件箱分发器开关（每个部署至少一个进程开启）
+OUTBOX_DISPATCHER_ENABLED = os.environ.get("OUTBOX_DISPATCHER_ENABLED", "0") == "1"
+
 # 创建FastAPI应用实例
 app = FastAPI(
     title="电商平台后端服务", 
@@ -76,45 +139,7 @@ async def health():
     """健康检查接口"""
     return {"status": "ok", "message": "服务运行正常"}
 
-# 注册模块化路由 - 按照模块化单体架构直接注册各模块路由
-from app.modules.user_auth.router import router as user_auth_router
-from app.modules.quality_control.router import router as quality_control_router
-
-# 注册模块路由，使用统一的API前缀
-app.include_router(
-    user_auth_router, 
-    prefix="/api/v1", 
-    tags=["用户认证"]
-)
-
-app.include_router(
-    quality_control_router,
-    prefix="/api/v1",
-    tags=["质量控制"]
-)
-
-# 注册产品目录模块路由
-from app.modules.product_catalog.router import router as product_router
-app.include_router(product_router, prefix="/api/v1", tags=["商品管理"])
-
-# 注册订单管理模块路由
-from app.modules.order_management.router import router as order_router
-app.include_router(order_router, prefix="/api/v1", tags=["订单管理"])
-
-# 注册购物车模块路由
-from app.modules.shopping_cart.router import router as cart_router
-app.include_router(cart_router, prefix="/api/v1", tags=["购物车"])
-
-# 注册库存管理模块路由
-from app.modules.inventory_management.router import router as inventory_router
-app.include_router(inventory_router, prefix="/api/v1", tags=["库存管理"])
-
-# 注册支付服务模块路由
-from app.modules.payment_service.router import router as payment_router
-app.include_router(payment_router, prefix="/api/v1", tags=["支付服务"])
-
-# 注册会员系统模块路由
-from app.modules.member_system.router import router as member_system_router
-app.include_router(member_system_router, prefix="/api/v1", tags=["会员系统"])
+# 注册模块化路由 - 只导入 ENABLED_MODULES / DISABLED_MODULES 配置启用的模块
+register_module_routers(app, ENABLED_MODULES)
 
-# TODO: 其他模块路由按需添加
+# 其他模块实现路由后加入 app.modules.MODULE_ROUTE_TAGS 即可按配置注册
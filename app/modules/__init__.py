@@ -12,6 +12,7 @@
 - 通过此文件可访问各个业务模块
 - 每个业务模块采用垂直切片架构
 - 包含router、service、models、schemas等组件
+- 启用的模块由 ENABLED_MODULES / DISABLED_MODULES 配置，见 app/core/module_registry.py
 
 架构说明：
 - 核心交易模块：user_auth, product_catalog, shopping_cart, order_management, payment_service
@@ -56,4 +57,15 @@ AVAILABLE_MODULES = [
     
     # 质量控制模块 (P2)
     "quality_control",
-]
\ No newline at end of file
+]
+# 已实现路由的模块及其 OpenAPI 标签（按注册顺序，由 app.core.module_registry 按配置加载）
+MODULE_ROUTE_TAGS = {
+    "user_auth": "用户认证",
+    "quality_control": "质量控制",
+    "product_catalog": "商品管理",
+    "order_management": "订单管理",
+    "shopping_cart": "购物车",
+    "inventory_management": "库存管理",
+    "payment_service": "支付服务",
+    "member_system": "会员系统",
+}
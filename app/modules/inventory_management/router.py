@@ -28,7 +28,7 @@ API分类：
 - 历史接口：变动记录查询和审计
 
 创建时间：2025-09-15
-最后修改：2025-09-15
+最后修改：2026-10-19
 """
 
 # 标准库导入
@@ -41,7 +41,7 @@ from sqlalchemy.orm import Session
 # 本地应用导入
 from app.core.auth import get_current_active_user, get_current_admin_user
 from app.core.database import get_db
-from app.modules.user_auth.models import User
+from app.core.principal_cache import Principal
 from .service import InventoryService
 from .schemas import (
     # 基础Schemas
@@ -78,7 +78,7 @@ router = APIRouter()
 async def get_sku_inventory(
     sku_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     获取指定SKU的实时库存信息
@@ -108,7 +108,7 @@ async def get_sku_inventory(
 async def get_batch_sku_inventory(
     query: BatchInventoryQuery,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     批量获取多个SKU的库存信息
@@ -136,7 +136,7 @@ async def reserve_inventory(
     request: ReserveRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     为购物车或订单预占库存
@@ -190,7 +190,7 @@ async def release_reservation(
     reservation_id: str,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     释放指定的库存预占
@@ -232,7 +232,7 @@ async def release_user_reservations(
     user_id: str,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     释放指定用户的所有预占（购物车清空）
@@ -280,7 +280,7 @@ async def deduct_inventory(
     request: InventoryDeductRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     订单完成后扣减库存（从预占转为实际扣减）
@@ -331,7 +331,7 @@ async def adjust_inventory(
     adjustment: InventoryAdjustment,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    admin_user: User = Depends(get_current_admin_user)
+    admin_user: Principal = Depends(get_current_admin_user)
 ):
     """
     管理员调整SKU库存数量
@@ -397,7 +397,7 @@ async def update_inventory_threshold(
     sku_id: str,
     threshold: ThresholdUpdate,
     db: Session = Depends(get_db),
-    admin_user: User = Depends(get_current_admin_user)
+    admin_user: Principal = Depends(get_current_admin_user)
 ):
     """
     设置SKU的库存预警阈值
@@ -440,7 +440,7 @@ async def get_low_stock_skus(
     limit: int = Query(100, ge=1, le=1000, description="返回数量限制"),
     offset: int = Query(0, ge=0, description="分页偏移"),
     db: Session = Depends(get_db),
-    admin_user: User = Depends(get_current_admin_user)
+    admin_user: Principal = Depends(get_current_admin_user)
 ):
     """
     获取库存不足的SKU列表
@@ -472,7 +472,7 @@ async def get_sku_transaction_logs(
     limit: int = Query(50, ge=1, le=1000, description="返回数量限制"),
     offset: int = Query(0, ge=0, description="分页偏移"),
     db: Session = Depends(get_db),
-    admin_user: User = Depends(get_current_admin_user)
+    admin_user: Principal = Depends(get_current_admin_user)
 ):
     """
     获取指定SKU的库存变动历史记录
@@ -517,7 +517,7 @@ async def search_inventory_transactions(
     limit: int = Query(50, ge=1, le=1000, description="返回数量限制"),
     offset: int = Query(0, ge=0, description="分页偏移"),
     db: Session = Depends(get_db),
-    admin_user: User = Depends(get_current_admin_user)
+    admin_user: Principal = Depends(get_current_admin_user)
 ):
     """
     按条件搜索库存变动记录
@@ -558,7 +558,7 @@ async def cleanup_expired_reservations(
     db: Session = Depends(get_db),
     # 注意：这个接口应该由系统内部调用或定时任务调用
     # 这里暂时使用管理员权限，实际生产中可能需要特殊的系统权限
-    admin_user: User = Depends(get_current_admin_user)
+    admin_user: Principal = Depends(get_current_admin_user)
 ):
     """
     清理过期的库存预占记录
@@ -581,7 +581,7 @@ async def cleanup_expired_reservations(
 @router.post("/inventory-management/maintenance/consistency-check", response_model=ConsistencyCheckResponse, summary="库存一致性检查")
 async def check_inventory_consistency(
     db: Session = Depends(get_db),
-    admin_user: User = Depends(get_current_admin_user)
+    admin_user: Principal = Depends(get_current_admin_user)
 ):
     """
     检查库存数据一致性
@@ -607,7 +607,7 @@ async def check_inventory_consistency(
 async def create_sku_inventory(
     inventory_data: SKUInventoryCreate,
     db: Session = Depends(get_db),
-    admin_user: User = Depends(get_current_admin_user)
+    admin_user: Principal = Depends(get_current_admin_user)
 ):
     """
     为新SKU创建库存记录
@@ -642,7 +642,7 @@ async def update_sku_inventory_config(
     sku_id: str,
     update_data: SKUInventoryUpdate,
     db: Session = Depends(get_db),
-    admin_user: User = Depends(get_current_admin_user)
+    admin_user: Principal = Depends(get_current_admin_user)
 ):
     """
     更新SKU库存配置
@@ -0,0 +1,251 @@
+"""
+文件名：context_cache.py
+文件路径：app/modules/member_system/context_cache.py
+功能描述：会员上下文缓存（等级表 + 用户等级）
+
+主要功能：
+- member_levels 整表常驻进程内存，按 min_points 排序，bisect 按积分定位等级
+- 用户当前等级ID两级缓存：进程内 LRU（短TTL） + Redis（共享，长TTL）
+- 等级调整、入会时按用户失效；等级配置变更时失效等级表
+- Redis 不可用时自动降级为数据库查询，并在退避期内不再尝试
+
+使用说明：
+- 获取实例：cache = get_member_context_cache()
+- 查询等级：level = cache.get_member_level(db, user_id)
+- 按积分定位等级：level = cache.levels(db).for_points(1200)
+- 失效：cache.invalidate_user(user_id) / cache.invalidate_users(user_ids) / cache.invalidate_levels()
+
+依赖模块：
+- app.modules.member_system.models: MemberProfile / MemberLevel
+- app.core.redis_client: 同步Redis连接
+
+注意事项：
+- 进程内用户等级只缓存 LOCAL_USER_TTL 秒，其他进程的失效最迟在该时间后生效
+- 非会员以 0 作为负缓存，入会时必须调用 invalidate_user
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import get_sync_redis_connection
+from app.modules.member_system.models import MemberLevel, MemberProfile
+
+logger = logging.getLogger(__name__)
+
+# 缓存配置
+LEVEL_TABLE_TTL = 300.0
+LOCAL_USER_TTL = 30.0
+LOCAL_USER_MAX_ENTRIES = 10000
+REDIS_USER_TTL = 3600
+REDIS_RETRY_BACKOFF = 30.0
+REDIS_KEY_PREFIX = "member_system:level:"
+
+# 非会员负缓存标记
+_NOT_A_MEMBER = 0
+
+
+class LevelInfo(NamedTuple):
+    """会员等级快照（不依赖数据库会话）"""
+    id: int
+    level_name: str
+    min_points: int
+    discount_rate: Decimal
+    benefits: Dict[str, Any]
+
+
+class LevelTable:
+    """按 min_points 排序的等级表"""
+
+    def __init__(self, levels: List[LevelInfo]):
+        self.levels = sorted(levels, key=lambda level: (level.min_points, level.id))
+        self._thresholds = [level.min_points for level in self.levels]
+        self.by_id = {level.id: level for level in self.levels}
+
+    def for_points(self, points: int) -> Optional[LevelInfo]:
+        """返回积分可达到的最高等级，低于最低门槛时返回 None"""
+        index = bisect.bisect_right(self._thresholds, points) - 1
+        return self.levels[index] if index >= 0 else None
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+
+class MemberContextCache:
+    """会员上下文缓存"""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        redis_factory: Optional[Callable[[], Any]] = get_sync_redis_connection,
+        level_ttl: float = LEVEL_TABLE_TTL,
+        local_user_ttl: float = LOCAL_USER_TTL,
+        local_max_entries: int = LOCAL_USER_MAX_ENTRIES,
+        redis_user_ttl: int = REDIS_USER_TTL,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            redis_client: 同步Redis客户端；为 None 时首次使用通过 redis_factory 创建
+            redis_factory: Redis客户端工厂，为 None 时只使用进程内缓存
+            level_ttl: 等级表刷新间隔（秒）
+            local_user_ttl: 进程内用户等级缓存时间（秒）
+            local_max_entries: 进程内用户等级缓存上限
+            redis_user_ttl: Redis 用户等级缓存时间（秒）
+            clock: 时钟（测试注入）
+        """
+        self._redis = redis_client
+        self._redis_factory = redis_factory
+        self.level_ttl = level_ttl
+        self.local_user_ttl = local_user_ttl
+        self.local_max_entries = local_max_entries
+        self.redis_user_ttl = redis_user_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._level_table: Optional[LevelTable] = None
+        self._level_loaded_at = 0.0
+        self._users: "OrderedDict[int, tuple]" = OrderedDict()
+        self._redis_down_until = 0.0
+
+    # ================== 等级表 ==================
+
+    def levels(self, db: Session) -> LevelTable:
+        """获取等级表（过期或失效时从数据库重新加载）"""
+        table = self._level_table
+        if table is not None and self._clock() - self._level_loaded_at < self.level_ttl:
+            return table
+
+        rows = db.query(
+            MemberLevel.id, MemberLevel.level_name, MemberLevel.min_points,
+            MemberLevel.discount_rate, MemberLevel.benefits
+        ).all()
+        table = LevelTable([
+            LevelInfo(row.id, row.level_name, row.min_points, Decimal(str(row.discount_rate)), row.benefits or {})
+            for row in rows
+        ])
+        with self._lock:
+            self._level_table = table
+            self._level_loaded_at = self._clock()
+        return table
+
+    def invalidate_levels(self) -> None:
+        """等级配置变更后失效等级表"""
+        with self._lock:
+            self._level_table = None
+
+    # ================== 用户等级 ==================
+
+    def get_user_level_id(self, db: Session, user_id: int) -> Optional[int]:
+        """
+        获取用户当前等级ID
+
+        Returns:
+            Optional[int]: 等级ID，非会员返回 None
+        """
+        level_id = self._get_local(user_id)
+        if level_id is None:
+            level_id = self._get_redis(user_id)
+            if level_id is None:
+                level_id = db.query(MemberProfile.level_id).filter(
+                    MemberProfile.user_id == user_id
+                ).scalar() or _NOT_A_MEMBER
+                self._set_redis(user_id, level_id)
+            self._set_local(user_id, level_id)
+        return level_id or None
+
+    def get_member_level(self, db: Session, user_id: int) -> Optional[LevelInfo]:
+        """获取用户当前等级信息，非会员或等级不存在返回 None"""
+        level_id = self.get_user_level_id(db, user_id)
+        if level_id is None:
+            return None
+        return self.levels(db).by_id.get(level_id)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """用户等级变更或入会后失效缓存"""
+        self.invalidate_users([user_id])
+
+    def invalidate_users(self, user_ids: List[int]) -> None:
+        """批量失效用户缓存（Redis 一次删除）"""
+        if not user_ids:
+            return
+        with self._lock:
+            for user_id in user_ids:
+                self._users.pop(user_id, None)
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            client.delete(*[f"{REDIS_KEY_PREFIX}{user_id}" for user_id in user_ids])
+        except Exception as e:
+            self._mark_redis_down(e)
+
+    def _get_local(self, user_id: int) -> Optional[int]:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            level_id, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return level_id
+
+    def _set_local(self, user_id: int, level_id: int) -> None:
+        with self._lock:
+            self._users[user_id] = (level_id, self._clock() + self.local_user_ttl)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.local_max_entries:
+                self._users.popitem(last=False)
+
+    def _redis_client(self) -> Any:
+        if self._clock() < self._redis_down_until:
+            return None
+        if self._redis is None and self._redis_factory is not None:
+            self._redis = self._redis_factory()
+        return self._redis
+
+    def _mark_redis_down(self, error: Exception) -> None:
+        logger.warning(f"会员上下文缓存Redis不可用，{REDIS_RETRY_BACKOFF}秒内降级为数据库查询: {error}")
+        self._redis_down_until = self._clock() + REDIS_RETRY_BACKOFF
+
+    def _get_redis(self, user_id: int) -> Optional[int]:
+        client = self._redis_client()
+        if client is None:
+            return None
+        try:
+            value = client.get(f"{REDIS_KEY_PREFIX}{user_id}")
+        except Exception as e:
+            self._mark_redis_down(e)
+            return None
+        return int(value) if value is not None else None
+
+    def _set_redis(self, user_id: int, level_id: int) -> None:
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            client.set(f"{REDIS_KEY_PREFIX}{user_id}", level_id, ex=self.redis_user_ttl)
+        except Exception as e:
+            self._mark_redis_down(e)
+
+
+# 全局会员上下文缓存
+_member_context_cache: Optional[MemberContextCache] = None
+
+
+def get_member_context_cache() -> MemberContextCache:
+    """获取全局会员上下文缓存"""
+    global _member_context_cache
+    if _member_context_cache is None:
+        _member_context_cache = MemberContextCache()
+    return _member_context_cache
@@ -0,0 +1,330 @@
+"""
+文件名：expiry_job.py
+文件路径：app/modules/member_system/expiry_job.py
+功能描述：积分过期批处理任务
+
+主要功能：
+- 按 FIFO 规则计算每个用户已到期的积分：使用和过期总是先消耗最早获得的积分，
+  因此到期积分 = 有效期起点之前获得的积分 - 累计已使用 - 累计已过期
+- 按用户ID键集分块处理，每块一次聚合查询统计有效期内获得的积分
+- 每块批量写入 expire 流水并批量扣减余额，单块一个事务
+- 支持按用户ID区间分区，多个进程/主机并行处理互不重叠的区间
+- 每块提交后批量同步积分排行榜分数
+
+使用说明：
+- 单次执行：stats = PointExpiryEngine(db).expire()
+- 指定分区：PointExpiryEngine(db).expire(start_user_id=1, end_user_id=10001)
+- 后台任务：job = PointExpiryJob(); job.start()
+- 开启后台任务：设置环境变量 MEMBER_POINT_EXPIRY_ENABLED=1
+- 命令行：python -m app.modules.member_system.expiry_job --workers 4
+- 多主机分区：python -m app.modules.member_system.expiry_job --partition 0/4
+
+依赖模块：
+- app.modules.member_system.models: MemberPoint / PointTransaction 数据模型
+- app.core.database.SessionLocal: 后台任务和分区进程的独立数据库会话
+
+注意事项：
+- 积分有效期按自然月对齐，有效期起点之前获得的积分视为到期
+- 分块读取使用 SKIP LOCKED，正在发放/使用积分的账户留到下一轮
+- 流水压缩的保留期不得短于有效期（压缩只删除有效期外的流水，不影响本任务）
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.modules.member_system.leaderboard import BOARD_POINTS, get_member_leaderboard
+from app.modules.member_system.ledger import month_start_before
+from app.modules.member_system.models import MemberPoint, PointTransaction
+
+logger = logging.getLogger(__name__)
+
+
+# 后台任务开关
+POINT_EXPIRY_ENABLED = os.environ.get("MEMBER_POINT_EXPIRY_ENABLED", "0") == "1"
+
+# 默认配置
+DEFAULT_POINT_VALIDITY_MONTHS = 24
+DEFAULT_EXPIRY_CHUNK_SIZE = 500
+DEFAULT_EXPIRY_INTERVAL_SECONDS = 24 * 3600.0
+
+
+class PointExpiryEngine:
+    """积分过期批处理引擎"""
+
+    def __init__(
+        self,
+        db: Session,
+        validity_months: int = DEFAULT_POINT_VALIDITY_MONTHS,
+        chunk_size: int = DEFAULT_EXPIRY_CHUNK_SIZE
+    ):
+        self.db = db
+        self.validity_months = validity_months
+        self.chunk_size = chunk_size
+
+    def expiry_cutoff(self, now: Optional[datetime] = None) -> datetime:
+        """有效期起点：早于该时间获得的积分视为到期"""
+        return month_start_before(self.validity_months, now)
+
+    def expire(
+        self,
+        start_user_id: Optional[int] = None,
+        end_user_id: Optional[int] = None,
+        cutoff: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        处理一个用户ID区间内的到期积分
+
+        Args:
+            start_user_id: 区间起点（含），None 表示不限
+            end_user_id: 区间终点（不含），None 表示不限
+            cutoff: 有效期起点，默认按有效期月数计算
+
+        Returns:
+            dict: 统计（处理账户数、过期用户数、过期积分、分块数、耗时）
+        """
+        started = time.perf_counter()
+        cutoff = cutoff or self.expiry_cutoff()
+        stats = {"scanned_accounts": 0, "expired_users": 0, "expired_points": 0, "chunks": 0}
+
+        last_user_id = start_user_id - 1 if start_user_id is not None else None
+        while True:
+            chunk = self._fetch_chunk(last_user_id, end_user_id)
+            if not chunk:
+                self.db.rollback()
+                break
+            last_user_id = chunk[-1].user_id
+
+            try:
+                balances = self._expire_chunk(chunk, cutoff)
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                logger.error(f"积分过期分块处理失败: last_user_id={last_user_id}, error={e}")
+                continue
+
+            if balances:
+                get_member_leaderboard().update_scores(
+                    BOARD_POINTS, {user_id: balance for user_id, balance, _ in balances}
+                )
+            stats["scanned_accounts"] += len(chunk)
+            stats["expired_users"] += len(balances)
+            stats["expired_points"] += sum(amount for _, _, amount in balances)
+            stats["chunks"] += 1
+
+            if len(chunk) < self.chunk_size:
+                break
+
+        stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        stats["cutoff"] = cutoff.isoformat()
+        if stats["expired_points"]:
+            logger.info(f"积分过期处理完成: range=[{start_user_id}, {end_user_id}), {stats}")
+        return stats
+
+    def _fetch_chunk(self, last_user_id: Optional[int], end_user_id: Optional[int]) -> List:
+        """按用户ID键集分页读取并锁定一块有余额的积分账户"""
+        query = self.db.query(
+            MemberPoint.id,
+            MemberPoint.user_id,
+            MemberPoint.current_points,
+            MemberPoint.total_earned,
+            MemberPoint.total_used,
+            MemberPoint.total_expired
+        ).filter(MemberPoint.current_points > 0)
+        if last_user_id is not None:
+            query = query.filter(MemberPoint.user_id > last_user_id)
+        if end_user_id is not None:
+            query = query.filter(MemberPoint.user_id < end_user_id)
+        return query.order_by(MemberPoint.user_id).limit(
+            self.chunk_size
+        ).with_for_update(skip_locked=True).all()
+
+    def _expire_chunk(self, chunk: List, cutoff: datetime) -> List[Tuple[int, int, int]]:
+        """
+        过期一个分块
+
+        Returns:
+            list: [(用户ID, 过期后余额, 过期积分), ...]
+        """
+        # 有效期内获得的积分（一次分组聚合）
+        unexpired_earned = dict(
+            self.db.query(PointTransaction.user_id, func.sum(PointTransaction.points_change)).filter(
+                PointTransaction.user_id.in_([row.user_id for row in chunk]),
+                PointTransaction.transaction_type == 'earn',
+                PointTransaction.created_at >= cutoff
+            ).group_by(PointTransaction.user_id).all()
+        )
+
+        account_updates = []
+        transactions = []
+        now = datetime.now()
+        for row in chunk:
+            expired_lots = row.total_earned - (unexpired_earned.get(row.user_id) or 0)
+            # FIFO：已使用和已过期的积分先抵扣最早的获得记录
+            amount = min(row.current_points, expired_lots - row.total_used - row.total_expired)
+            if amount <= 0:
+                continue
+
+            balance_after = row.current_points - amount
+            account_updates.append({
+                "id": row.id,
+                "current_points": balance_after,
+                "total_expired": row.total_expired + amount
+            })
+            transactions.append({
+                "user_id": row.user_id,
+                "transaction_type": 'expire',
+                "points_change": -amount,
+                "reference_type": 'expiry',
+                "reference_id": cutoff.strftime("%Y-%m"),
+                "description": f"{cutoff.strftime('%Y-%m-%d')}前获得的积分到期",
+                "balance_after": balance_after,
+                "status": 'completed',
+                "created_at": now,
+                "updated_at": now
+            })
+
+        if not account_updates:
+            return []
+
+        self.db.bulk_update_mappings(MemberPoint, account_updates)
+        self.db.bulk_insert_mappings(PointTransaction, transactions)
+        return [(item["user_id"], item["balance_after"], -item["points_change"]) for item in transactions]
+
+    def partition_ranges(self, partitions: int) -> List[Tuple[int, int]]:
+        """
+        按用户ID将积分账户划分为互不重叠的半开区间
+
+        Returns:
+            list: [(start_user_id, end_user_id), ...]，空表返回空列表
+        """
+        low, high = self.db.query(func.min(MemberPoint.user_id), func.max(MemberPoint.user_id)).one()
+        if low is None:
+            return []
+        span = high - low + 1
+        step = max(1, -(-span // max(1, partitions)))
+        return [(start, min(start + step, high + 1)) for start in range(low, high + 1, step)]
+
+
+def expire_partition(
+    start_user_id: Optional[int],
+    end_user_id: Optional[int],
+    cutoff: datetime,
+    chunk_size: int = DEFAULT_EXPIRY_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """在独立会话中处理一个分区（供进程池调用）"""
+    db = SessionLocal()
+    try:
+        return PointExpiryEngine(db, chunk_size=chunk_size).expire(start_user_id, end_user_id, cutoff=cutoff)
+    finally:
+        db.close()
+
+
+class PointExpiryJob:
+    """积分过期后台任务（单进程按间隔执行全量区间）"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        validity_months: int = DEFAULT_POINT_VALIDITY_MONTHS,
+        chunk_size: int = DEFAULT_EXPIRY_CHUNK_SIZE,
+        interval: float = DEFAULT_EXPIRY_INTERVAL_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.validity_months = validity_months
+        self.chunk_size = chunk_size
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def run_once(self) -> Dict[str, Any]:
+        """使用独立会话执行一轮积分过期"""
+        db = self.session_factory()
+        try:
+            return PointExpiryEngine(db, self.validity_months, self.chunk_size).expire()
+        finally:
+            db.close()
+
+    async def run(self) -> None:
+        """按间隔持续执行积分过期"""
+        while not self._stopping.is_set():
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"积分过期任务异常: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> asyncio.Task:
+        """在当前事件循环中启动后台任务"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """停止后台任务，等待当前轮次完成"""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="积分过期批处理")
+    parser.add_argument("--validity-months", type=int, default=DEFAULT_POINT_VALIDITY_MONTHS)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_EXPIRY_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1, help="本机并行进程数")
+    parser.add_argument("--partition", default=None, help="只处理指定分区，格式 序号/总数，如 0/4")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        engine = PointExpiryEngine(db, args.validity_months, args.chunk_size)
+        cutoff = engine.expiry_cutoff()
+        if args.partition:
+            index, total = (int(part) for part in args.partition.split("/"))
+            ranges = engine.partition_ranges(total)
+            ranges = ranges[index:index + 1]
+        else:
+            ranges = engine.partition_ranges(args.workers)
+    finally:
+        db.close()
+
+    if not ranges:
+        print("没有需要处理的积分账户")
+        return
+
+    if len(ranges) == 1:
+        results = [expire_partition(ranges[0][0], ranges[0][1], cutoff, args.chunk_size)]
+    else:
+        # spawn 启动子进程，避免复用父进程的数据库连接
+        with ProcessPoolExecutor(len(ranges), mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [
+                executor.submit(expire_partition, start, end, cutoff, args.chunk_size) for start, end in ranges
+            ]
+            results = [future.result() for future in futures]
+
+    print(f"积分过期完成: 截止 {cutoff.isoformat()}，分区 {len(ranges)} 个，"
+          f"过期用户 {sum(r['expired_users'] for r in results)} 个，"
+          f"过期积分 {sum(r['expired_points'] for r in results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+文件名：leaderboard.py
+文件路径：app/modules/member_system/leaderboard.py
+功能描述：会员排行榜（Redis 有序集合）
+
+主要功能：
+- 积分榜（member_points.current_points）、消费榜（member_profiles.total_spent）各一个有序集合
+- 积分发放/使用/过期提交后同步更新积分榜分数
+- 排名、TopN、我的前后名次查询均为 O(log n)，不再 ORDER BY + OFFSET 或 COUNT 全表
+- 重建命令按ID键集分批从数据库加载到临时键，完成后 RENAME 原子替换
+
+使用说明：
+- 获取实例：board = get_member_leaderboard()
+- 查询：board.top(BOARD_POINTS, 10) / board.rank(BOARD_POINTS, user_id) / board.around(BOARD_POINTS, user_id, 5)
+- 同步：board.update_points(user_id, balance)
+- 重建：python -m app.modules.member_system.leaderboard --board points
+
+依赖模块：
+- app.modules.member_system.models: MemberPoint / MemberProfile
+- app.core.redis_client: 同步Redis连接
+
+注意事项：
+- 同步写入失败只记录日志不影响业务事务，以定期重建兜底
+- 消费榜当前没有实时写入来源（total_spent 由订单统计回填），依赖重建或 update_scores 刷新
+- 名次从 1 开始，同分按 Redis 有序集合规则（成员字典序）排列
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import argparse
+import logging
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import get_sync_redis_connection
+from app.modules.member_system.models import MemberPoint, MemberProfile
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_KEY_PREFIX = "member_system:leaderboard:"
+DEFAULT_REBUILD_BATCH_SIZE = 5000
+
+BOARD_POINTS = "points"
+BOARD_SPEND = "spend"
+
+# 榜单 -> (模型, 分数字段)
+_BOARD_SOURCES = {
+    BOARD_POINTS: (MemberPoint, MemberPoint.current_points),
+    BOARD_SPEND: (MemberProfile, MemberProfile.total_spent),
+}
+
+
+class RankEntry(NamedTuple):
+    """排行榜条目"""
+    user_id: int
+    score: float
+    rank: int
+
+
+class MemberLeaderboard:
+    """会员排行榜"""
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        redis_factory: Optional[Callable[[], Any]] = get_sync_redis_connection,
+        key_prefix: str = LEADERBOARD_KEY_PREFIX
+    ):
+        """
+        Args:
+            redis_client: 同步Redis客户端；为 None 时首次使用通过 redis_factory 创建
+            redis_factory: Redis客户端工厂
+            key_prefix: 有序集合键前缀
+        """
+        self._redis = redis_client
+        self._redis_factory = redis_factory
+        self.key_prefix = key_prefix
+
+    @property
+    def redis(self) -> Any:
+        if self._redis is None:
+            self._redis = self._redis_factory()
+        return self._redis
+
+    def key(self, board: str) -> str:
+        if board not in _BOARD_SOURCES:
+            raise ValueError(f"未知排行榜: {board}")
+        return f"{self.key_prefix}{board}"
+
+    # ================== 同步写入 ==================
+
+    def update_scores(self, board: str, scores: Dict[int, float]) -> bool:
+        """
+        批量写入分数（一次 ZADD）
+
+        Returns:
+            bool: 是否写入成功，失败时等待重建修正
+        """
+        if not scores:
+            return True
+        try:
+            self.redis.zadd(self.key(board), {str(user_id): float(score) for user_id, score in scores.items()})
+            return True
+        except Exception as e:
+            logger.warning(f"排行榜同步失败，等待重建修正: board={board}, users={len(scores)}, error={e}")
+            return False
+
+    def update_points(self, user_id: int, points: int) -> bool:
+        """积分余额变化后同步积分榜"""
+        return self.update_scores(BOARD_POINTS, {user_id: points})
+
+    def remove(self, board: str, user_id: int) -> None:
+        """从榜单移除用户（如会员注销）"""
+        self.redis.zrem(self.key(board), str(user_id))
+
+    # ================== 查询 ==================
+
+    def top(self, board: str, limit: int = 10) -> List[RankEntry]:
+        """前 limit 名"""
+        return self._range(board, 0, limit - 1)
+
+    def rank(self, board: str, user_id: int) -> Optional[RankEntry]:
+        """用户名次，不在榜单中返回 None"""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrevrank(self.key(board), str(user_id))
+        pipe.zscore(self.key(board), str(user_id))
+        index, score = pipe.execute()
+        if index is None:
+            return None
+        return RankEntry(user_id, float(score), index + 1)
+
+    def around(self, board: str, user_id: int, radius: int = 5) -> List[RankEntry]:
+        """用户及其前后各 radius 名，不在榜单中返回空列表"""
+        index = self.redis.zrevrank(self.key(board), str(user_id))
+        if index is None:
+            return []
+        return self._range(board, max(0, index - radius), index + radius)
+
+    def size(self, board: str) -> int:
+        return self.redis.zcard(self.key(board))
+
+    def _range(self, board: str, start: int, stop: int) -> List[RankEntry]:
+        if stop < start:
+            return []
+        rows = self.redis.zrevrange(self.key(board), start, stop, withscores=True)
+        return [
+            RankEntry(int(member), float(score), start + offset + 1)
+            for offset, (member, score) in enumerate(rows)
+        ]
+
+    # ================== 重建 ==================
+
+    def rebuild(self, db: Session, board: str, batch_size: int = DEFAULT_REBUILD_BATCH_SIZE) -> int:
+        """
+        从数据库重建榜单
+
+        按ID键集分批读取写入临时键，全部完成后 RENAME 覆盖正式键，
+        重建期间查询仍读取旧榜单。
+
+        Returns:
+            int: 写入的用户数
+        """
+        model, score_column = _BOARD_SOURCES[board]
+        live_key = self.key(board)
+        staging_key = f"{live_key}:rebuild"
+        self.redis.delete(staging_key)
+
+        loaded = 0
+        last_id = 0
+        while True:
+            rows = db.query(model.id, model.user_id, score_column).filter(
+                model.id > last_id
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            self.redis.zadd(staging_key, {str(row.user_id): float(row[2] or 0) for row in rows})
+            loaded += len(rows)
+            if len(rows) < batch_size:
+                break
+
+        if loaded:
+            self.redis.rename(staging_key, live_key)
+        else:
+            self.redis.delete(live_key)
+        logger.info(f"排行榜重建完成: board={board}, users={loaded}")
+        return loaded
+
+
+# 全局排行榜
+_member_leaderboard: Optional[MemberLeaderboard] = None
+
+
+def get_member_leaderboard() -> MemberLeaderboard:
+    """获取全局会员排行榜"""
+    global _member_leaderboard
+    if _member_leaderboard is None:
+        _member_leaderboard = MemberLeaderboard()
+    return _member_leaderboard
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="会员排行榜重建")
+    parser.add_argument("--board", choices=sorted(_BOARD_SOURCES) + ["all"], default="all")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_REBUILD_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    from app.core.database import SessionLocal
+
+    boards = sorted(_BOARD_SOURCES) if args.board == "all" else [args.board]
+    db = SessionLocal()
+    try:
+        for board in boards:
+            loaded = get_member_leaderboard().rebuild(db, board, args.batch_size)
+            print(f"排行榜 {board} 重建完成: {loaded} 个用户")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
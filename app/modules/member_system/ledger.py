@@ -0,0 +1,309 @@
+"""
+文件名：ledger.py
+文件路径：app/modules/member_system/ledger.py
+功能描述：积分流水账本与历史流水压缩
+
+主要功能：
+- 积分余额与流水在同一事务内原子维护：余额使用条件 UPDATE 增减，流水只追加不修改
+- 扣减类变动以 current_points >= 扣减量 为条件，并发扣减不会透支
+- 每条流水记录变动后余额，汇总查询直接读取 member_points 单行（O(1)）
+- 按 id 键集分块将早于保留期的流水压缩为按用户按月汇总行，并删除原始流水
+
+使用说明：
+- 记账：PointLedger(db).post(user_id, "earn", 100, reference_type="order", reference_id="ORD1")
+- 汇总：PointLedger(db).get_summary(user_id)
+- 压缩：PointLedgerCompactor(db).compact(before=datetime(2025, 1, 1))
+- 命令行：python -m app.modules.member_system.ledger --retention-months 24
+
+依赖模块：
+- app.modules.member_system.models: MemberPoint / PointTransaction / PointLedgerMonthlySummary
+
+注意事项：
+- post() 不提交事务，由调用方在业务操作完成后统一提交
+- 压缩会删除原始流水，保留期内的明细查询不受影响
+- 保留期不得短于积分有效期，过期任务依赖有效期内的获得流水（见 expiry_job.py）
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import argparse
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.modules.member_system.models import MemberPoint, PointLedgerMonthlySummary, PointTransaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEVEL_ID = 1
+DEFAULT_RETENTION_MONTHS = 24
+DEFAULT_COMPACT_CHUNK_SIZE = 1000
+
+# 各交易类型对 member_points 累计字段的影响
+_COUNTER_COLUMNS = {
+    "earn": "total_earned",
+    "use": "total_used",
+    "expire": "total_expired",
+}
+
+
+def month_start_before(months: int, now: Optional[datetime] = None) -> datetime:
+    """返回 months 个月之前那个月的月初"""
+    now = now or datetime.now()
+    index = now.year * 12 + now.month - 1 - months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _empty_summary() -> Dict[str, Any]:
+    return {
+        "total_points": 0,
+        "available_points": 0,
+        "total_used": 0,
+        "frozen_points": 0,
+        "expiring_points": 0,
+        "expiring_date": None
+    }
+
+
+class PointLedger:
+    """积分账本：余额与流水原子维护"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def post(
+        self,
+        user_id: int,
+        transaction_type: str,
+        points_change: int,
+        reference_type: Optional[str] = None,
+        reference_id: Optional[str] = None,
+        description: Optional[str] = None
+    ) -> PointTransaction:
+        """
+        记一笔积分变动（不提交事务）
+
+        Args:
+            user_id: 用户ID
+            transaction_type: 交易类型 earn/use/expire/freeze/unfreeze
+            points_change: 变动数量（正数增加，负数扣减）
+            reference_type: 关联业务类型
+            reference_id: 关联业务ID
+            description: 变动说明
+
+        Returns:
+            PointTransaction: 已 flush 的流水记录（含变动后余额）
+
+        Raises:
+            HTTPException: 扣减时余额不足（400）
+        """
+        values = {"current_points": MemberPoint.current_points + points_change}
+        counter = _COUNTER_COLUMNS.get(transaction_type)
+        if counter:
+            values[counter] = getattr(MemberPoint, counter) + abs(points_change)
+
+        conditions = [MemberPoint.user_id == user_id]
+        if points_change < 0:
+            conditions.append(MemberPoint.current_points >= -points_change)
+
+        stmt = update(MemberPoint).where(and_(*conditions)).values(**values).execution_options(
+            synchronize_session=False
+        )
+        if self.db.execute(stmt).rowcount == 0:
+            if points_change < 0:
+                raise HTTPException(status_code=400, detail="积分余额不足")
+            self._ensure_account(user_id)
+            self.db.execute(stmt)
+
+        # 条件 UPDATE 已持有该行锁，读取到的余额即本次变动后的余额
+        balance_after = self.db.query(MemberPoint.current_points).filter(
+            MemberPoint.user_id == user_id
+        ).scalar()
+
+        transaction = PointTransaction(
+            user_id=user_id,
+            transaction_type=transaction_type,
+            points_change=points_change,
+            reference_type=reference_type,
+            reference_id=reference_id,
+            description=description,
+            balance_after=balance_after,
+            status='completed'
+        )
+        self.db.add(transaction)
+        self.db.flush()
+        return transaction
+
+    def _ensure_account(self, user_id: int) -> None:
+        """创建积分账户（并发创建时以唯一约束兜底）"""
+        try:
+            with self.db.begin_nested():
+                self.db.add(MemberPoint(
+                    user_id=user_id,
+                    level_id=DEFAULT_LEVEL_ID,
+                    current_points=0,
+                    total_earned=0,
+                    total_used=0,
+                    total_expired=0
+                ))
+        except IntegrityError:
+            logger.debug(f"积分账户已由并发请求创建: user_id={user_id}")
+
+    def get_summary(self, user_id: int) -> Dict[str, Any]:
+        """读取预先维护的积分汇总（单行查询）"""
+        row = self.db.query(
+            MemberPoint.current_points, MemberPoint.total_earned, MemberPoint.total_used
+        ).filter(MemberPoint.user_id == user_id).first()
+        if row is None:
+            return _empty_summary()
+
+        summary = _empty_summary()
+        summary.update(
+            total_points=row.total_earned,
+            available_points=row.current_points,
+            total_used=row.total_used
+        )
+        return summary
+
+
+class PointLedgerCompactor:
+    """历史积分流水压缩"""
+
+    def __init__(self, db: Session, chunk_size: int = DEFAULT_COMPACT_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def retention_cutoff(retention_months: int = DEFAULT_RETENTION_MONTHS, now: Optional[datetime] = None) -> datetime:
+        """计算保留期起点（按自然月对齐）"""
+        return month_start_before(retention_months, now)
+
+    def compact(self, before: datetime) -> Dict[str, Any]:
+        """
+        将 before 所在月份之前的流水压缩为月度汇总
+
+        Args:
+            before: 截止时间（向下对齐到月初，保证只压缩完整月份）
+
+        Returns:
+            Dict[str, Any]: 压缩统计
+        """
+        cutoff = datetime(before.year, before.month, 1)
+        stats = {"compacted_transactions": 0, "summaries_written": 0, "chunks": 0, "cutoff": cutoff.isoformat()}
+
+        last_id = 0
+        while True:
+            rows = self._fetch_chunk(cutoff, last_id)
+            if not rows:
+                break
+            try:
+                stats["summaries_written"] += self._merge_summaries(rows)
+                deleted = self.db.query(PointTransaction).filter(
+                    PointTransaction.id > last_id,
+                    PointTransaction.id <= rows[-1].id,
+                    PointTransaction.created_at < cutoff
+                ).delete(synchronize_session=False)
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+
+            stats["compacted_transactions"] += deleted
+            stats["chunks"] += 1
+            last_id = rows[-1].id
+
+        logger.info(f"积分流水压缩完成: {stats}")
+        return stats
+
+    def _fetch_chunk(self, cutoff: datetime, last_id: int) -> List[Any]:
+        return self.db.query(
+            PointTransaction.id,
+            PointTransaction.user_id,
+            PointTransaction.transaction_type,
+            PointTransaction.points_change,
+            PointTransaction.balance_after,
+            PointTransaction.created_at
+        ).filter(
+            PointTransaction.created_at < cutoff,
+            PointTransaction.id > last_id
+        ).order_by(PointTransaction.id).limit(self.chunk_size).all()
+
+    def _merge_summaries(self, rows: List[Any]) -> int:
+        """将一个分块的流水累加到月度汇总行"""
+        totals: Dict[Tuple[int, str], Dict[str, Any]] = defaultdict(lambda: {
+            "earned_points": 0, "used_points": 0, "expired_points": 0, "adjusted_points": 0,
+            "transaction_count": 0, "closing_balance": None, "last_transaction_id": 0
+        })
+        for row in rows:
+            entry = totals[(row.user_id, row.created_at.strftime("%Y-%m"))]
+            if row.transaction_type == "earn":
+                entry["earned_points"] += row.points_change
+            elif row.transaction_type == "use":
+                entry["used_points"] += -row.points_change
+            elif row.transaction_type == "expire":
+                entry["expired_points"] += -row.points_change
+            else:
+                entry["adjusted_points"] += row.points_change
+            entry["transaction_count"] += 1
+            # 分块按 id 升序，最后一条即当月最新余额
+            if row.balance_after is not None:
+                entry["closing_balance"] = row.balance_after
+            entry["last_transaction_id"] = row.id
+
+        user_ids = {user_id for user_id, _ in totals}
+        periods = {period for _, period in totals}
+        existing = {
+            (summary.user_id, summary.period): summary
+            for summary in self.db.query(PointLedgerMonthlySummary).filter(
+                PointLedgerMonthlySummary.user_id.in_(user_ids),
+                PointLedgerMonthlySummary.period.in_(periods)
+            )
+        }
+
+        new_rows = []
+        for (user_id, period), entry in totals.items():
+            summary = existing.get((user_id, period))
+            if summary is None:
+                new_rows.append(dict(entry, user_id=user_id, period=period))
+                continue
+            for field in ("earned_points", "used_points", "expired_points", "adjusted_points", "transaction_count"):
+                setattr(summary, field, getattr(summary, field) + entry[field])
+            if entry["closing_balance"] is not None:
+                summary.closing_balance = entry["closing_balance"]
+            summary.last_transaction_id = entry["last_transaction_id"]
+
+        if new_rows:
+            self.db.bulk_insert_mappings(PointLedgerMonthlySummary, new_rows)
+        return len(totals)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="积分历史流水按月压缩")
+    parser.add_argument("--retention-months", type=int, default=DEFAULT_RETENTION_MONTHS, help="保留明细的月数")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_COMPACT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        stats = PointLedgerCompactor(db, chunk_size=args.chunk_size).compact(
+            PointLedgerCompactor.retention_cutoff(args.retention_months)
+        )
+    finally:
+        db.close()
+
+    print(f"压缩完成: 流水 {stats['compacted_transactions']} 条，汇总行 {stats['summaries_written']} 次写入，"
+          f"截止 {stats['cutoff']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -68,6 +68,7 @@ class PointTransaction(Base, TimestampMixin):
     reference_id = Column(String(100), comment='关联业务ID（订单ID、活动ID等）')
     reference_type = Column(String(50), comment='关联业务类型（order/activity/manual等）')
     description = Column(String(500), comment='变动说明')
+    balance_after = Column(Integer, comment='变动后可用积分余额')
     
     # 交易状态
     status = Column(String(20), nullable=False, default='completed', comment='交易状态：pending/completed/cancelled')
@@ -86,6 +87,36 @@ class PointTransaction(Base, TimestampMixin):
         return f"<PointTransaction(id={self.id}, user_id={self.user_id}, type='{self.transaction_type}', points={self.points_change})"
 
 
+class PointLedgerMonthlySummary(Base, TimestampMixin):
+    """积分流水月度汇总表 - 历史流水压缩后的按用户按月汇总"""
+    __tablename__ = 'point_ledger_monthly_summaries'
+
+    # 主键 - 严格遵循架构规范使用 INTEGER
+    id = Column(Integer, primary_key=True, autoincrement=True, comment='汇总记录ID')
+    
+    # 关联关系
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, comment='用户ID')
+    period = Column(String(7), nullable=False, comment='汇总月份，格式YYYY-MM')
+    
+    # 汇总数据
+    earned_points = Column(Integer, nullable=False, default=0, comment='当月获得积分')
+    used_points = Column(Integer, nullable=False, default=0, comment='当月使用积分')
+    expired_points = Column(Integer, nullable=False, default=0, comment='当月过期积分')
+    adjusted_points = Column(Integer, nullable=False, default=0, comment='当月其他变动积分（冻结/解冻等）净值')
+    transaction_count = Column(Integer, nullable=False, default=0, comment='被压缩的流水条数')
+    closing_balance = Column(Integer, comment='月末可用积分余额')
+    last_transaction_id = Column(Integer, nullable=False, comment='被压缩的最后一条流水ID')
+
+    # 索引定义 - 严格按照database-standards.md规范
+    __table_args__ = (
+        UniqueConstraint('user_id', 'period', name='uk_point_ledger_summaries_user_period'),
+        Index('idx_point_ledger_summaries_period', 'period'),
+    )
+
+    def __repr__(self):
+        return f"<PointLedgerMonthlySummary(user_id={self.user_id}, period='{self.period}')>"
+
+
 class MemberProfile(Base, TimestampMixin):
     """会员档案表 - 严格按照原计划，但使用profiles以区分业务含义"""
     __tablename__ = 'member_profiles'
@@ -154,6 +185,7 @@ class MemberPoint(Base, TimestampMixin):
     current_points = Column(Integer, nullable=False, default=0, comment='当前可用积分')
     total_earned = Column(Integer, nullable=False, default=0, comment='历史累计获得积分')
     total_used = Column(Integer, nullable=False, default=0, comment='历史累计使用积分')
+    total_expired = Column(Integer, nullable=False, default=0, comment='历史累计过期积分')
 
     # 索引定义 - 严格按照database-standards.md规范
     __table_args__ = (
@@ -165,6 +197,7 @@ class MemberPoint(Base, TimestampMixin):
         CheckConstraint('current_points >= 0', name='check_current_points_non_negative'),
         CheckConstraint('total_earned >= 0', name='check_total_earned_non_negative'),
         CheckConstraint('total_used >= 0', name='check_total_used_non_negative'),
+        CheckConstraint('total_expired >= 0', name='check_total_expired_non_negative'),
     )
 
     # 关系定义
@@ -172,3 +205,34 @@ class MemberPoint(Base, TimestampMixin):
 
     def __repr__(self):
         return f"<MemberPoint(id={self.id}, user_id={self.user_id}, current={self.current_points})"
+
+
+class MemberLevelChangeEvent(Base):
+    """会员等级变更事件表 - 批量重算与手动调整时写入，供通知等下游消费"""
+    __tablename__ = 'member_level_change_events'
+
+    # 主键 - 自增ID同时作为事件消费顺序
+    id = Column(Integer, primary_key=True, autoincrement=True, comment='事件ID')
+    
+    # 关联关系
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, comment='用户ID')
+    member_id = Column(Integer, ForeignKey('member_profiles.id'), nullable=False, comment='会员ID')
+    
+    # 变更信息
+    old_level_id = Column(Integer, nullable=True, comment='原等级ID')
+    new_level_id = Column(Integer, nullable=False, comment='新等级ID')
+    change_type = Column(String(20), nullable=False, comment='变更类型：upgrade/downgrade')
+    trigger = Column(String(20), nullable=False, comment='触发方式：batch/manual')
+    points_snapshot = Column(Integer, nullable=True, comment='变更时的累计积分')
+    
+    # 审计字段
+    created_at = Column(DateTime, default=func.now(), nullable=False, comment='创建时间')
+
+    # 索引定义 - 严格按照database-standards.md规范
+    __table_args__ = (
+        Index('idx_member_level_events_user_id', 'user_id'),
+        Index('idx_member_level_events_created_at', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<MemberLevelChangeEvent(id={self.id}, user_id={self.user_id}, {self.old_level_id}->{self.new_level_id})>"
@@ -0,0 +1,204 @@
+"""
+文件名：releveling_job.py
+文件路径：app/modules/member_system/releveling_job.py
+功能描述：会员等级批量重算任务
+
+主要功能：
+- 按会员ID键集分块，每块一条SQL：member_profiles 关联 member_points，
+  以相关子查询取 min_points <= 累计积分 的最高等级作为目标等级
+- 等级变化的会员批量更新 level_id，并批量写入 member_level_change_events 事件
+- 每块一个事务，提交后批量失效会员上下文缓存
+- 默认只升级不降级，可选允许按当前门槛降级
+
+使用说明：
+- 单次执行：stats = MemberRelevelingJob(db).run()
+- 命令行（适合夜间定时任务）：python -m app.modules.member_system.releveling_job --allow-downgrade
+
+依赖模块：
+- app.modules.member_system.models: MemberProfile / MemberPoint / MemberLevel / MemberLevelChangeEvent
+- app.modules.member_system.context_cache: 会员上下文缓存失效
+
+注意事项：
+- 等级门槛只有 member_levels.min_points，评估指标为 member_points.total_earned（累计获得积分，
+  使用或过期积分不会导致降级）
+- 分块读取使用 SKIP LOCKED，正在被手动调整的会员留到下一轮
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import argparse
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.modules.member_system.context_cache import get_member_context_cache
+from app.modules.member_system.models import MemberLevel, MemberLevelChangeEvent, MemberPoint, MemberProfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RELEVEL_CHUNK_SIZE = 2000
+
+CHANGE_UPGRADE = "upgrade"
+CHANGE_DOWNGRADE = "downgrade"
+TRIGGER_BATCH = "batch"
+TRIGGER_MANUAL = "manual"
+
+
+def record_level_change_event(
+    db: Session,
+    member: MemberProfile,
+    old_level_id: Optional[int],
+    new_level_id: int,
+    trigger: str = TRIGGER_MANUAL,
+    points_snapshot: Optional[int] = None,
+    change_type: Optional[str] = None
+) -> MemberLevelChangeEvent:
+    """
+    写入单条等级变更事件（仅加入会话，由调用方提交）
+
+    Args:
+        change_type: 变更类型，未指定时按新旧等级ID大小判断
+    """
+    event = MemberLevelChangeEvent(
+        user_id=member.user_id,
+        member_id=member.id,
+        old_level_id=old_level_id,
+        new_level_id=new_level_id,
+        change_type=change_type or (CHANGE_UPGRADE if (old_level_id or 0) < new_level_id else CHANGE_DOWNGRADE),
+        trigger=trigger,
+        points_snapshot=points_snapshot
+    )
+    db.add(event)
+    return event
+
+
+class MemberRelevelingJob:
+    """会员等级批量重算"""
+
+    def __init__(self, db: Session, chunk_size: int = DEFAULT_RELEVEL_CHUNK_SIZE, allow_downgrade: bool = False):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.allow_downgrade = allow_downgrade
+
+    def run(self) -> Dict[str, Any]:
+        """
+        重算全部会员等级
+
+        Returns:
+            dict: 统计（扫描会员数、升级数、降级数、分块数、耗时、吞吐量）
+        """
+        started = time.perf_counter()
+        stats = {"scanned_members": 0, "upgraded": 0, "downgraded": 0, "chunks": 0}
+        cache = get_member_context_cache()
+
+        last_member_id = 0
+        while True:
+            chunk = self._fetch_chunk(last_member_id)
+            if not chunk:
+                self.db.rollback()
+                break
+            last_member_id = chunk[-1].id
+
+            try:
+                changes = self._apply_chunk(chunk)
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                logger.error(f"会员等级重算分块失败: last_member_id={last_member_id}, error={e}")
+                continue
+
+            cache.invalidate_users([change["user_id"] for change in changes])
+            stats["scanned_members"] += len(chunk)
+            stats["upgraded"] += sum(1 for change in changes if change["change_type"] == CHANGE_UPGRADE)
+            stats["downgraded"] += sum(1 for change in changes if change["change_type"] == CHANGE_DOWNGRADE)
+            stats["chunks"] += 1
+
+            if len(chunk) < self.chunk_size:
+                break
+
+        elapsed = time.perf_counter() - started
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["members_per_second"] = round(stats["scanned_members"] / elapsed, 1) if elapsed > 0 else 0.0
+        logger.info(f"会员等级重算完成: {stats}")
+        return stats
+
+    def _fetch_chunk(self, last_member_id: int) -> List:
+        """读取一块会员及其按门槛计算出的目标等级（一条SQL）"""
+        points = func.coalesce(MemberPoint.total_earned, 0)
+        target_level = select(MemberLevel.id).where(
+            MemberLevel.min_points <= points
+        ).order_by(MemberLevel.min_points.desc(), MemberLevel.id.desc()).limit(1).correlate(
+            MemberPoint
+        ).scalar_subquery()
+
+        return self.db.query(
+            MemberProfile.id,
+            MemberProfile.user_id,
+            MemberProfile.level_id,
+            points.label("points"),
+            target_level.label("target_level_id")
+        ).outerjoin(
+            MemberPoint, MemberPoint.user_id == MemberProfile.user_id
+        ).filter(
+            MemberProfile.id > last_member_id
+        ).order_by(MemberProfile.id).limit(self.chunk_size).with_for_update(
+            skip_locked=True, of=MemberProfile
+        ).all()
+
+    def _apply_chunk(self, chunk: List) -> List[Dict[str, Any]]:
+        """批量更新等级变化的会员并写入事件"""
+        level_thresholds = dict(self.db.query(MemberLevel.id, MemberLevel.min_points).all())
+        updates = []
+        events = []
+        for row in chunk:
+            target = row.target_level_id
+            if target is None or target == row.level_id:
+                continue
+            # 以门槛高低判断升降级，当前等级已被删除时视为升级
+            current_min = level_thresholds.get(row.level_id)
+            is_upgrade = current_min is None or level_thresholds[target] > current_min
+            if not is_upgrade and not self.allow_downgrade:
+                continue
+
+            updates.append({"id": row.id, "level_id": target})
+            events.append({
+                "user_id": row.user_id,
+                "member_id": row.id,
+                "old_level_id": row.level_id,
+                "new_level_id": target,
+                "change_type": CHANGE_UPGRADE if is_upgrade else CHANGE_DOWNGRADE,
+                "trigger": TRIGGER_BATCH,
+                "points_snapshot": row.points
+            })
+
+        if updates:
+            self.db.bulk_update_mappings(MemberProfile, updates)
+            self.db.bulk_insert_mappings(MemberLevelChangeEvent, events)
+        return events
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="会员等级批量重算")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_RELEVEL_CHUNK_SIZE)
+    parser.add_argument("--allow-downgrade", action="store_true", help="按当前门槛降级")
+    args = parser.parse_args(argv)
+
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        stats = MemberRelevelingJob(db, args.chunk_size, args.allow_downgrade).run()
+    finally:
+        db.close()
+
+    print(f"等级重算完成: 会员 {stats['scanned_members']} 个，升级 {stats['upgraded']} 个，"
+          f"降级 {stats['downgraded']} 个，耗时 {stats['elapsed_seconds']} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@
 主要功能：
 - 会员信息管理相关API（获取档案、更新资料、注册会员）
 - 会员等级管理API（等级列表、手动升级）
-- 积分管理API（积分明细、获取积分、使用积分）
+- 积分管理API（积分明细、获取积分、使用积分、排行榜）
 - 权益管理API（权益检查、权益使用、使用历史）
 - 活动管理API（活动创建、参与活动、我的活动）
 使用说明：
@@ -19,7 +19,7 @@
 - app.core.auth: JWT认证相关功能
 - app.core.database: 数据库会话依赖
 创建时间：2024-09-17
-最后修改：2024-09-17
+最后修改：2026-10-19
 """
 
 # 标准库
@@ -39,6 +39,9 @@ from app.modules.member_system.service import (
     MemberService, PointService, BenefitService, EventService
 )
 from app.modules.member_system.models import MemberLevel
+from app.modules.member_system.context_cache import get_member_context_cache
+from app.modules.member_system.leaderboard import BOARD_POINTS, BOARD_SPEND, get_member_leaderboard
+from app.modules.member_system.releveling_job import CHANGE_DOWNGRADE, CHANGE_UPGRADE, record_level_change_event
 from app.modules.member_system.schemas import (
     # 会员相关
     MemberCreate, MemberUpdate, MemberRead, MemberWithDetails,
@@ -57,7 +60,7 @@ from app.modules.member_system.schemas import (
     BenefitType, EventType, ActivityStatus
 )
 from app.core.auth import get_current_admin_user
-from app.modules.user_auth.models import User
+from app.core.principal_cache import Principal
 from .dependencies import (
     get_member_service_dep, get_point_service_dep, 
     get_benefit_service_dep, get_event_service_dep,
@@ -246,26 +249,19 @@ async def get_membership_levels(
         APIResponse: 包含等级列表的响应
     """
     try:
-        # 从数据库获取所有激活的会员等级
-        levels = member_service.db.query(
-            member_service.db.query.__class__.__module__.split('.')[0] + '.modules.member_system.models.MembershipLevel'
-        ).filter_by(is_active=True).order_by('level_id').all()
-        
-        level_list = []
-        for level in levels:
-            # 获取该等级的权益信息
-            benefits = member_service._get_member_benefits(level.level_id)
-            
-            level_list.append({
-                "level_id": level.level_id,
+        # 等级表常驻会员上下文缓存，按 min_points 升序
+        levels = get_member_context_cache().levels(member_service.db).levels
+        
+        level_list = [
+            {
+                "level_id": level.id,
                 "level_name": level.level_name,
-                "level_code": level.level_code,
-                "required_spent": float(level.required_spent),
+                "min_points": level.min_points,
                 "discount_rate": float(level.discount_rate),
-                "point_multiplier": float(level.point_multiplier),
-                "description": level.description,
-                "benefits": benefits
-            })
+                "benefits": level.benefits
+            }
+            for level in levels
+        ]
         
         return APIResponse(
             code=200,
@@ -295,7 +291,7 @@ async def manual_upgrade_level(
             }
         }
     }),
-    admin_user: User = Depends(get_current_admin_user),
+    admin_user: Principal = Depends(get_current_admin_user),
     member_service: MemberService = Depends(get_member_service_dep)
 ) -> APIResponse:
     """
@@ -322,7 +318,7 @@ async def manual_upgrade_level(
         user_id = upgrade_data.get("user_id")
         target_level_id = upgrade_data.get("target_level_id")
         reason = upgrade_data.get("reason", "管理员手动调整")
-        operator = upgrade_data.get("operator", admin_user.username)
+        operator = upgrade_data.get("operator", str(admin_user.id))
         
         if not user_id or not target_level_id:
             raise HTTPException(
@@ -336,37 +332,42 @@ async def manual_upgrade_level(
             raise HTTPException(status_code=404, detail="用户不是会员")
         
         # 验证目标等级存在
-        from app.modules.member_system.models import MembershipLevel
-        target_level = member_service.db.query(MembershipLevel).filter(
-            MembershipLevel.level_id == target_level_id
+        target_level = member_service.db.query(MemberLevel).filter(
+            MemberLevel.id == target_level_id
         ).first()
         
         if not target_level:
             raise HTTPException(status_code=404, detail="目标等级不存在")
         
         # 记录原等级
-        old_level = member_service.db.query(MembershipLevel).filter(
-            MembershipLevel.level_id == member.level_id
+        old_level = member_service.db.query(MemberLevel).filter(
+            MemberLevel.id == member.level_id
         ).first()
         
-        # 执行等级调整
+        # 执行等级调整，并在同一事务中写入等级变更事件
+        old_level_id = member.level_id
         member.level_id = target_level_id
-        member.level_upgrade_date = datetime.utcnow()
+        upgrade_time = datetime.utcnow()
+        if old_level_id != target_level_id:
+            record_level_change_event(
+                member_service.db, member, old_level_id, target_level_id,
+                change_type=CHANGE_UPGRADE if not old_level or target_level.min_points > old_level.min_points else CHANGE_DOWNGRADE
+            )
         
         member_service.db.commit()
         
-        # 更新缓存
-        member_service._cache_member_info(member)
+        # 失效会员上下文缓存中的用户等级
+        get_member_context_cache().invalidate_user(user_id)
         
         # 记录操作日志
         upgrade_info = {
             "user_id": user_id,
-            "member_id": member.member_id,
+            "member_id": member.id,
             "old_level": old_level.level_name if old_level else "未知",
             "new_level": target_level.level_name,
             "reason": reason,
             "operator": operator,
-            "upgrade_time": member.level_upgrade_date.isoformat()
+            "upgrade_time": upgrade_time.isoformat()
         }
         
         from app.core.security_logger import SecurityLogger
@@ -379,7 +380,7 @@ async def manual_upgrade_level(
             data={
                 "old_level": old_level.level_name if old_level else "未知",
                 "new_level": target_level.level_name,
-                "effective_time": member.level_upgrade_date.isoformat(),
+                "effective_time": upgrade_time.isoformat(),
                 "operation_id": f"MANUAL_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
             }
         )
@@ -434,7 +435,7 @@ async def get_point_transactions(
         
         # 应用过滤条件
         if transaction_type:
-            query = query.filter(PointTransaction.transaction_type == transaction_type.upper())
+            query = query.filter(PointTransaction.transaction_type == transaction_type.lower())
         
         if start_date:
             start_datetime = datetime.combine(start_date, datetime.min.time())
@@ -456,19 +457,18 @@ async def get_point_transactions(
         transaction_list = []
         for trans in transactions:
             transaction_list.append({
-                "transaction_id": trans.transaction_id,
+                "transaction_id": trans.id,
                 "type": trans.transaction_type,
-                "event_type": trans.event_type,
-                "points": trans.points,
+                "event_type": trans.reference_type,
+                "points": trans.points_change,
+                "balance_after": trans.balance_after,
                 "description": trans.description,
                 "related_order": trans.reference_id,
-                "created_at": trans.created_at.isoformat(),
-                "expiry_date": trans.expiry_date.isoformat() if trans.expiry_date else None
+                "created_at": trans.created_at.isoformat()
             })
         
-        # 计算积分汇总
-        member_service = get_member_service(point_service.db)
-        point_summary = member_service._calculate_point_summary(user_id)
+        # 积分汇总直接读取积分账户预先维护的数据
+        point_summary = point_service.get_point_summary(user_id)
         
         return APIResponse(
             code=200,
@@ -476,7 +476,7 @@ async def get_point_transactions(
             data={
                 "summary": {
                     "total_earned": point_summary["total_points"],
-                    "total_used": point_summary["total_points"] - point_summary["available_points"],
+                    "total_used": point_summary["total_used"],
                     "current_balance": point_summary["available_points"]
                 },
                 "transactions": transaction_list,
@@ -651,8 +651,7 @@ async def get_point_summary(
         APIResponse: 积分汇总信息
     """
     try:
-        member_service = get_member_service(point_service.db)
-        point_summary = member_service._calculate_point_summary(user_id)
+        point_summary = point_service.get_point_summary(user_id)
         
         return APIResponse(
             code=200,
@@ -669,6 +668,45 @@ async def get_point_summary(
         )
 
 
+@router.get("/member-system/points/leaderboard", response_model=APIResponse, summary="获取会员排行榜")
+async def get_leaderboard(
+    board: str = Query(BOARD_POINTS, pattern=f"^({BOARD_POINTS}|{BOARD_SPEND})$", description="榜单：points/spend"),
+    limit: int = Query(10, ge=1, le=100, description="TopN数量"),
+    radius: int = Query(5, ge=0, le=50, description="我的前后名次数量"),
+    user_id: int = Depends(get_user_id_from_token)
+) -> APIResponse:
+    """
+    获取会员排行榜
+    
+    返回TopN、当前用户名次及其前后名次，均由Redis有序集合提供。
+    
+    Returns:
+        APIResponse: 排行榜数据
+    """
+    try:
+        leaderboard = get_member_leaderboard()
+        my_rank = leaderboard.rank(board, user_id)
+        
+        return APIResponse(
+            code=200,
+            message="success",
+            data={
+                "board": board,
+                "top": [entry._asdict() for entry in leaderboard.top(board, limit)],
+                "my_rank": my_rank._asdict() if my_rank else None,
+                "around_me": [entry._asdict() for entry in leaderboard.around(board, user_id, radius)]
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"获取排行榜失败: user_id={user_id}, board={board}, error={str(e)}")
+        return APIResponse(
+            code=500,
+            message="获取排行榜失败",
+            data=None
+        )
+
+
 @router.post("/member-system/points/redeem", response_model=APIResponse, summary="积分兑换商品")
 async def redeem_points(
     redeem_data: Dict[str, Any] = Body(..., examples={
@@ -1012,7 +1050,7 @@ async def get_benefit_status(
 @router.post("/member-system/activities", response_model=APIResponse, summary="创建会员活动")
 async def create_activity(
     activity_data: MemberActivityCreate,
-    admin_user: User = Depends(get_current_admin_user),
+    admin_user: Principal = Depends(get_current_admin_user),
     event_service: EventService = Depends(get_event_service_dep)
 ) -> APIResponse:
     """
@@ -1055,7 +1093,7 @@ async def create_activity(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"创建活动失败: admin_user={admin_user.username}, error={str(e)}")
+        logger.error(f"创建活动失败: admin_user_id={admin_user.id}, error={str(e)}")
         return APIResponse(
             code=500,
             message="创建活动失败",
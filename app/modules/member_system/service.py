@@ -22,6 +22,9 @@ from fastapi import HTTPException
 from app.modules.member_system.models import (
     MemberProfile, MemberLevel, MemberPoint, PointTransaction
 )
+from app.modules.member_system.ledger import PointLedger
+from app.modules.member_system.context_cache import get_member_context_cache
+from app.modules.member_system.leaderboard import get_member_leaderboard
 from app.core.security_logger import SecurityLogger
 
 logger = logging.getLogger(__name__)
@@ -177,6 +180,9 @@ class MemberService:
             # 初始化积分账户
             self._create_member_points(user_id, initial_level.id)
             
+            # 清除非会员负缓存
+            get_member_context_cache().invalidate_user(user_id)
+            
             logger.info(f"创建会员成功: user_id={user_id}, member_code={member_code}")
             return new_member
             
@@ -186,30 +192,9 @@ class MemberService:
             raise
 
     def _get_point_summary(self, user_id: int) -> Dict[str, Any]:
-        """获取积分统计摘要"""
+        """获取积分统计摘要（读取积分账户预先维护的汇总值）"""
         try:
-            # 获取积分账户信息
-            member_points = self.db.query(MemberPoint).filter(
-                MemberPoint.user_id == user_id
-            ).first()
-            
-            if not member_points:
-                return {
-                    "total_points": 0,
-                    "available_points": 0,
-                    "frozen_points": 0,
-                    "expiring_points": 0,
-                    "expiring_date": None
-                }
-            
-            return {
-                "total_points": member_points.total_earned,
-                "available_points": member_points.current_points,
-                "frozen_points": 0,  # 需要添加冻结积分逻辑
-                "expiring_points": 0,  # 需要添加过期积分逻辑
-                "expiring_date": None
-            }
-            
+            return PointLedger(self.db).get_summary(user_id)
         except Exception as e:
             logger.error(f"获取积分统计失败: user_id={user_id}, error={e}")
             return {
@@ -228,7 +213,8 @@ class MemberService:
                 level_id=level_id,
                 current_points=0,
                 total_earned=0,
-                total_used=0
+                total_used=0,
+                total_expired=0
             )
             
             self.db.add(member_points)
@@ -265,40 +251,19 @@ class PointService:
             PointTransaction: 积分交易记录
         """
         try:
-            # 创建积分交易记录
-            transaction = PointTransaction(
+            # 余额原子增加并追加流水，账户不存在时自动创建
+            transaction = PointLedger(self.db).post(
                 user_id=user_id,
                 transaction_type='earn',
                 points_change=points,
                 reference_type=reference_type,
                 reference_id=reference_id,
-                description=description or f"{reference_type}获得积分",
-                status='completed'
+                description=description or f"{reference_type}获得积分"
             )
             
-            self.db.add(transaction)
-            
-            # 更新积分账户
-            member_points = self.db.query(MemberPoint).filter(
-                MemberPoint.user_id == user_id
-            ).first()
-            
-            if member_points:
-                member_points.current_points += points
-                member_points.total_earned += points
-            else:
-                # 如果积分账户不存在，创建一个
-                member_points = MemberPoint(
-                    user_id=user_id,
-                    level_id=1,  # 默认等级
-                    current_points=points,
-                    total_earned=points,
-                    total_used=0
-                )
-                self.db.add(member_points)
-            
             self.db.commit()
             self.db.refresh(transaction)
+            get_member_leaderboard().update_points(user_id, transaction.balance_after)
             
             logger.info(f"积分发放成功: user_id={user_id}, points={points}")
             return transaction
@@ -324,33 +289,19 @@ class PointService:
             PointTransaction: 积分交易记录
         """
         try:
-            # 检查积分余额
-            member_points = self.db.query(MemberPoint).filter(
-                MemberPoint.user_id == user_id
-            ).first()
-            
-            if not member_points or member_points.current_points < points:
-                raise HTTPException(status_code=400, detail="积分余额不足")
-            
-            # 创建积分交易记录
-            transaction = PointTransaction(
+            # 条件扣减余额（余额不足时不会扣减）并追加流水
+            transaction = PointLedger(self.db).post(
                 user_id=user_id,
                 transaction_type='use',
                 points_change=-points,
                 reference_type=reference_type,
                 reference_id=reference_id,
-                description=description or f"{reference_type}使用积分",
-                status='completed'
+                description=description or f"{reference_type}使用积分"
             )
             
-            self.db.add(transaction)
-            
-            # 更新积分账户
-            member_points.current_points -= points
-            member_points.total_used += points
-            
             self.db.commit()
             self.db.refresh(transaction)
+            get_member_leaderboard().update_points(user_id, transaction.balance_after)
             
             logger.info(f"积分使用成功: user_id={user_id}, points={points}")
             return transaction
@@ -360,6 +311,18 @@ class PointService:
             logger.error(f"积分使用失败: user_id={user_id}, error={e}")
             raise
 
+    def get_point_summary(self, user_id: int) -> Dict[str, Any]:
+        """
+        获取积分汇总
+        
+        Args:
+            user_id (int): 用户ID
+            
+        Returns:
+            Dict[str, Any]: 累计获得、可用、累计使用等汇总数据
+        """
+        return PointLedger(self.db).get_summary(user_id)
+
 
 class BenefitService:
     """
@@ -383,19 +346,13 @@ class BenefitService:
             Dict[str, Any]: 可用权益信息
         """
         try:
-            # 获取会员信息
-            member = self.db.query(MemberProfile).filter(
-                MemberProfile.user_id == user_id
-            ).first()
-            
-            if not member:
+            # 等级表与用户等级均来自会员上下文缓存
+            cache = get_member_context_cache()
+            level_id = cache.get_user_level_id(self.db, user_id)
+            if level_id is None:
                 return {"benefits": [], "level": None}
             
-            # 获取等级信息
-            level = self.db.query(MemberLevel).filter(
-                MemberLevel.id == member.level_id
-            ).first()
-            
+            level = cache.levels(self.db).by_id.get(level_id)
             if not level or not level.benefits:
                 return {"benefits": [], "level": level.level_name if level else None}
             
@@ -421,17 +378,7 @@ class BenefitService:
             Decimal: 折扣后金额
         """
         try:
-            member = self.db.query(MemberProfile).filter(
-                MemberProfile.user_id == user_id
-            ).first()
-            
-            if not member:
-                return order_amount
-            
-            level = self.db.query(MemberLevel).filter(
-                MemberLevel.id == member.level_id
-            ).first()
-            
+            level = get_member_context_cache().get_member_level(self.db, user_id)
             if not level:
                 return order_amount
             
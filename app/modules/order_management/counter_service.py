@@ -0,0 +1,226 @@
+"""
+文件名：counter_service.py
+文件路径：app/modules/order_management/counter_service.py
+功能描述：订单数量计数服务，为分页列表提供低成本的总数查询
+
+主要功能：
+- 按 (user_id, status) 维护订单计数，随订单创建和状态变更在同一事务中更新
+- 用户维度的精确计数：读取至多6行计数记录，无需 COUNT(*)
+- 全站维度的近似计数：汇总计数表并在进程内短时缓存，供管理员查询使用
+- 计数重建：从 orders 表重新统计，用于历史数据回填和一致性修复
+
+使用说明：
+- 导入：from app.modules.order_management.counter_service import OrderCounterService
+- 初始化：counter_service = OrderCounterService(db_session)
+- 写入：counter_service.record_transition(user_id, "pending", "paid")  # 不提交事务
+- 读取：total = counter_service.count_user_orders(user_id, status="paid")
+
+依赖模块：
+- app.modules.order_management.models: Order、OrderCounter 数据模型
+- sqlalchemy.orm.Session: 数据库会话管理
+
+创建时间：2026-10-18
+最后修改：2026-10-19
+"""
+
+import time
+from typing import Optional, Dict, Tuple
+
+from sqlalchemy import case, func, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import Order, OrderCounter
+
+
+# 全站计数缓存时间（秒），近似模式下允许的最大滞后
+APPROXIMATE_COUNT_TTL_SECONDS = 30
+
+# 全站计数进程内缓存：status -> (计数, 写入时间)
+_approximate_count_cache: Dict[Optional[str], Tuple[int, float]] = {}
+
+
+def _status_value(status) -> Optional[str]:
+    """统一状态参数为字符串值（兼容枚举和字符串）"""
+    if status is None:
+        return None
+    return getattr(status, "value", status)
+
+
+class OrderCounterService:
+    """
+    订单计数服务类
+
+    计数写入只修改当前会话，不提交事务，由调用方与订单数据一起提交，
+    保证计数与订单状态的一致性。
+    """
+
+    def __init__(self, db: Session):
+        """
+        初始化订单计数服务
+
+        Args:
+            db: 数据库会话实例
+        """
+        self.db = db
+
+    # ============ 计数写入 ============
+
+    def increment(self, user_id: int, status, delta: int = 1) -> None:
+        """
+        调整指定用户、状态的订单计数
+
+        先执行原子的 UPDATE order_count = order_count + delta，
+        计数行不存在时再插入；并发插入冲突时在保存点内回退并重试更新。
+        计数上线前的历史订单离开某状态时，该状态的计数行可能不存在或未计入该订单，
+        因此插入和更新后的计数下限均为0，历史数据由 rebuild 回填。
+
+        Args:
+            user_id: 用户ID
+            status: 订单状态
+            delta: 变化量，可为负数
+        """
+        if not delta:
+            return
+        status_value = _status_value(status)
+
+        if self._apply_delta(user_id, status_value, delta):
+            return
+
+        try:
+            with self.db.begin_nested():
+                self.db.add(OrderCounter(user_id=user_id, status=status_value, order_count=max(delta, 0)))
+        except IntegrityError:
+            # 其他事务已创建该计数行，改为更新
+            self._apply_delta(user_id, status_value, delta)
+
+    def record_created(self, user_id: int, status="pending") -> None:
+        """记录新订单创建"""
+        self.increment(user_id, status, 1)
+
+    def record_transition(self, user_id: int, old_status, new_status) -> None:
+        """
+        记录订单状态变更
+
+        Args:
+            user_id: 订单所属用户ID
+            old_status: 原状态
+            new_status: 新状态
+        """
+        old_value = _status_value(old_status)
+        new_value = _status_value(new_status)
+        if old_value == new_value:
+            return
+        if old_value is not None:
+            self.increment(user_id, old_value, -1)
+        self.increment(user_id, new_value, 1)
+
+    def apply_deltas(self, deltas: Dict[Tuple[int, str], int]) -> None:
+        """
+        批量应用计数变化（用于批量状态变更）
+
+        Args:
+            deltas: {(user_id, status): 变化量}
+        """
+        # 按键排序更新，多事务并发时以相同顺序获取计数行锁
+        for (user_id, status_value), delta in sorted(deltas.items()):
+            self.increment(user_id, status_value, delta)
+
+    def _apply_delta(self, user_id: int, status_value: str, delta: int) -> bool:
+        """执行计数更新，返回是否命中已有计数行"""
+        result = self.db.execute(
+            update(OrderCounter)
+            .where(OrderCounter.user_id == user_id, OrderCounter.status == status_value)
+            .values(order_count=case(
+                (OrderCounter.order_count + delta < 0, 0),
+                else_=OrderCounter.order_count + delta
+            ))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+
+    # ============ 计数读取 ============
+
+    def count_user_orders(self, user_id: int, status=None) -> int:
+        """
+        获取用户订单数量（精确值）
+
+        Args:
+            user_id: 用户ID
+            status: 状态筛选（可选）
+
+        Returns:
+            int: 订单数量
+        """
+        query = self.db.query(func.coalesce(func.sum(OrderCounter.order_count), 0)).filter(
+            OrderCounter.user_id == user_id
+        )
+        status_value = _status_value(status)
+        if status_value:
+            query = query.filter(OrderCounter.status == status_value)
+        return int(query.scalar() or 0)
+
+    def count_all_orders(self, status=None, approximate: bool = True) -> int:
+        """
+        获取全站订单数量
+
+        近似模式下返回最多 APPROXIMATE_COUNT_TTL_SECONDS 秒前的汇总结果，
+        适用于管理员全量列表的分页总数展示。
+
+        Args:
+            status: 状态筛选（可选）
+            approximate: 是否允许使用缓存的近似值
+
+        Returns:
+            int: 订单数量
+        """
+        status_value = _status_value(status)
+        now = time.monotonic()
+
+        if approximate:
+            cached = _approximate_count_cache.get(status_value)
+            if cached and now - cached[1] < APPROXIMATE_COUNT_TTL_SECONDS:
+                return cached[0]
+
+        query = self.db.query(func.coalesce(func.sum(OrderCounter.order_count), 0))
+        if status_value:
+            query = query.filter(OrderCounter.status == status_value)
+        total = int(query.scalar() or 0)
+
+        _approximate_count_cache[status_value] = (total, now)
+        return total
+
+    # ============ 计数维护 ============
+
+    def rebuild(self, user_id: Optional[int] = None) -> int:
+        """
+        从订单表重建计数
+
+        用于上线前回填历史订单或修复计数偏差，会提交事务。
+
+        Args:
+            user_id: 仅重建指定用户（可选，默认全量）
+
+        Returns:
+            int: 写入的计数行数
+        """
+        try:
+            delete_stmt = delete(OrderCounter)
+            grouped = self.db.query(Order.user_id, Order.status, func.count(Order.id))
+            if user_id is not None:
+                delete_stmt = delete_stmt.where(OrderCounter.user_id == user_id)
+                grouped = grouped.filter(Order.user_id == user_id)
+
+            self.db.execute(delete_stmt.execution_options(synchronize_session=False))
+            rows = grouped.group_by(Order.user_id, Order.status).all()
+            self.db.bulk_insert_mappings(OrderCounter, [
+                {"user_id": row_user_id, "status": row_status, "order_count": row_count}
+                for row_user_id, row_status, row_count in rows
+            ])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        _approximate_count_cache.clear()
+        return len(rows)
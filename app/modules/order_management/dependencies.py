@@ -36,6 +36,7 @@ from app.core.auth import get_current_user, get_current_admin_user
 
 # 模块内依赖
 from .service import OrderService
+from .export_service import OrderExportService
 from .models import Order
 from app.modules.user_auth.models import User
 
@@ -59,6 +60,22 @@ def get_order_service(db: Session = Depends(get_db)) -> OrderService:
     return OrderService(db)
 
 
+def get_order_export_service(db: Session = Depends(get_db)) -> OrderExportService:
+    """
+    获取订单导出服务实例
+    
+    Args:
+        db (Session): 数据库会话实例
+        
+    Returns:
+        OrderExportService: 订单导出服务实例
+        
+    Note:
+        导出数据在独立会话中流式读取，请求会话仅用于确定数据库引擎
+    """
+    return OrderExportService(db)
+
+
 # ============ 权限验证依赖 ============
 
 def get_current_authenticated_user(current_user: User = Depends(get_current_user)) -> User:
@@ -0,0 +1,210 @@
+"""
+文件名：export_service.py
+文件路径：app/modules/order_management/export_service.py
+功能描述：订单数据流式导出服务，支持CSV和NDJSON格式
+
+主要功能：
+- orders 与 order_items 单次连接查询，按订单+订单项逐行输出
+- 服务端游标（yield_per）分批读取，内存占用与数据总量无关
+- 支持按订单状态和创建日期范围筛选
+- CSV / NDJSON 两种编码，按批次生成字节块供 StreamingResponse 输出
+
+使用说明：
+- 导入：from app.modules.order_management.export_service import OrderExportService
+- 初始化：export_service = OrderExportService(db_session)
+- 流式输出：StreamingResponse(export_service.stream_export("csv", status_filter="paid"))
+
+依赖模块：
+- app.modules.order_management.models: Order、OrderItem 数据模型
+- sqlalchemy.orm.Session: 数据库会话管理
+
+注意事项：
+- 请求级会话在响应体发送前即被关闭，导出生成器使用绑定同一引擎的独立会话，
+  在生成器结束（包括客户端断开）时关闭
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .models import Order, OrderItem
+
+
+# 支持的导出格式及对应的响应类型
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# 导出列定义（顺序即CSV列顺序）
+EXPORT_COLUMNS = (
+    ("order_id", Order.id),
+    ("order_number", Order.order_number),
+    ("user_id", Order.user_id),
+    ("status", Order.status),
+    ("subtotal", Order.subtotal),
+    ("shipping_fee", Order.shipping_fee),
+    ("discount_amount", Order.discount_amount),
+    ("total_amount", Order.total_amount),
+    ("order_created_at", Order.created_at),
+    ("item_id", OrderItem.id),
+    ("product_id", OrderItem.product_id),
+    ("sku_id", OrderItem.sku_id),
+    ("sku_code", OrderItem.sku_code),
+    ("product_name", OrderItem.product_name),
+    ("sku_name", OrderItem.sku_name),
+    ("quantity", OrderItem.quantity),
+    ("unit_price", OrderItem.unit_price),
+    ("total_price", OrderItem.total_price),
+)
+
+EXPORT_FIELD_NAMES = tuple(name for name, _ in EXPORT_COLUMNS)
+
+# 服务端游标每批读取行数
+DEFAULT_EXPORT_BATCH_SIZE = 1000
+
+
+def _format_value(value):
+    """将数据库值转换为可序列化的基础类型"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class OrderExportService:
+    """
+    订单导出服务类
+
+    只查询导出所需的列，不构造ORM对象，结果以元组形式从服务端游标分批读取。
+    """
+
+    def __init__(self, db: Session, batch_size: int = DEFAULT_EXPORT_BATCH_SIZE):
+        """
+        初始化订单导出服务
+
+        Args:
+            db: 数据库会话实例（用于确定导出连接的数据库引擎）
+            batch_size: 服务端游标每批读取行数
+        """
+        self.db = db
+        self.batch_size = batch_size
+
+    def iter_rows(
+        self,
+        session: Session,
+        status_filter: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Iterator[Tuple]:
+        """
+        逐行读取订单导出数据
+
+        Args:
+            session: 执行查询的数据库会话
+            status_filter: 订单状态筛选（可选）
+            start_date: 创建日期起始（含）
+            end_date: 创建日期截止（含）
+
+        Yields:
+            tuple: 按 EXPORT_COLUMNS 顺序排列的行数据
+        """
+        query = session.query(*(column for _, column in EXPORT_COLUMNS)).outerjoin(
+            OrderItem, OrderItem.order_id == Order.id
+        )
+
+        status_value = getattr(status_filter, "value", status_filter)
+        if status_value:
+            query = query.filter(Order.status == status_value)
+        if start_date:
+            query = query.filter(Order.created_at >= datetime.combine(start_date, datetime.min.time()))
+        if end_date:
+            query = query.filter(
+                Order.created_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+            )
+
+        # yield_per 启用服务端游标（stream_results），按批次从数据库拉取
+        query = query.order_by(Order.id, OrderItem.id).yield_per(self.batch_size)
+        for row in query:
+            yield tuple(row)
+
+    def _encode_csv(self, rows: Iterator[Tuple]) -> Iterator[bytes]:
+        """CSV编码：表头 + 每批数据一个字节块"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # UTF-8 BOM，保证Excel正确识别中文
+        buffer.write("\ufeff")
+        writer.writerow(EXPORT_FIELD_NAMES)
+
+        pending = 0
+        for row in rows:
+            writer.writerow([_format_value(value) for value in row])
+            pending += 1
+            if pending >= self.batch_size:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate(0)
+                pending = 0
+
+        remaining = buffer.getvalue()
+        if remaining:
+            yield remaining.encode("utf-8")
+
+    def _encode_ndjson(self, rows: Iterator[Tuple]) -> Iterator[bytes]:
+        """NDJSON编码：每行一个JSON对象，每批数据一个字节块"""
+        lines = []
+        for row in rows:
+            record = {name: _format_value(value) for name, value in zip(EXPORT_FIELD_NAMES, row)}
+            lines.append(json.dumps(record, ensure_ascii=False))
+            if len(lines) >= self.batch_size:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+                lines = []
+
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    def stream_export(
+        self,
+        export_format: str = "csv",
+        status_filter: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Iterator[bytes]:
+        """
+        生成导出文件字节流
+
+        Args:
+            export_format: 导出格式（csv / ndjson）
+            status_filter: 订单状态筛选（可选）
+            start_date: 创建日期起始（含）
+            end_date: 创建日期截止（含）
+
+        Returns:
+            Iterator[bytes]: 编码后的数据块生成器
+
+        Raises:
+            ValueError: 不支持的导出格式
+        """
+        if export_format not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"不支持的导出格式: {export_format}")
+
+        encoder = self._encode_csv if export_format == "csv" else self._encode_ndjson
+        return self._stream_with_session(encoder, status_filter, start_date, end_date)
+
+    def _stream_with_session(self, encoder, status_filter, start_date, end_date) -> Iterator[bytes]:
+        """在独立会话中执行导出查询，生成器结束时释放连接"""
+        export_session = Session(bind=self.db.get_bind())
+        try:
+            rows = self.iter_rows(export_session, status_filter, start_date, end_date)
+            yield from encoder(rows)
+        finally:
+            export_session.close()
@@ -8,10 +8,12 @@
 - Order: 订单主表，订单生命周期和状态管理
 - OrderItem: 订单商品表，订单商品明细和价格快照记录
 - OrderStatusHistory: 订单状态历史表，状态变更审计记录
+- OrderCounter: 订单计数表，按用户+状态维护的订单数量计数器
+- OrderOutboxEvent: 订单事件发件箱表，与状态变更同事务写入、后台异步分发
 """
 
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, ForeignKey, UniqueConstraint, Index, JSON
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -143,4 +145,75 @@ class OrderStatusHistory(Base):
     operator = relationship("User")
     
     def __repr__(self):
-        return f"<OrderStatusHistory(id={self.id}, order_id={self.order_id}, {self.old_status}->{self.new_status})>"
\ No newline at end of file
+        return f"<OrderStatusHistory(id={self.id}, order_id={self.order_id}, {self.old_status}->{self.new_status})>"
+
+class OrderCounter(Base):
+    """订单计数表模型
+    
+    按 (user_id, status) 维护订单数量，与订单创建、状态变更在同一事务中更新，
+    分页列表通过读取计数行获取总数，避免每次请求执行 COUNT(*)
+    """
+    __tablename__ = 'order_counters'
+    
+    # 主键
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # 计数维度 - 不设外键，计数行只作为派生数据存在
+    user_id = Column(Integer, nullable=False, comment='用户ID')
+    status = Column(String(20), nullable=False, comment='订单状态')
+    
+    # 计数值
+    order_count = Column(Integer, nullable=False, default=0, comment='订单数量')
+    
+    # 审计字段
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False, comment='更新时间')
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'status', name='uq_order_counters_user_status'),
+    )
+    
+    def __repr__(self):
+        return f"<OrderCounter(user_id={self.user_id}, status='{self.status}', count={self.order_count})>"
+
+
+class OutboxEventStatus(Enum):
+    """发件箱事件状态枚举"""
+    PENDING = "pending"        # 待分发
+    DISPATCHING = "dispatching"  # 已被分发器领取（available_at 为租约到期时间）
+    DISPATCHED = "dispatched"  # 已分发
+    FAILED = "failed"          # 超过重试次数，分发失败
+
+
+class OrderOutboxEvent(Base):
+    """订单事件发件箱表模型
+    
+    与 OrderStatusHistory 在同一事务中写入订单领域事件，
+    由后台分发器批量轮询并投递给进程内订阅者（通知、积分、分析等模块），
+    保证事件与订单状态变更同时提交、不丢失
+    """
+    __tablename__ = 'order_outbox_events'
+    
+    # 主键 - 自增ID同时作为事件分发顺序
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # 事件信息
+    event_type = Column(String(50), nullable=False, comment='事件类型')
+    order_id = Column(Integer, nullable=False, index=True, comment='订单ID')
+    payload = Column(JSON, nullable=False, comment='事件数据')
+    
+    # 分发状态
+    status = Column(String(20), nullable=False, default='pending', comment='分发状态')
+    attempts = Column(Integer, nullable=False, default=0, comment='分发尝试次数')
+    last_error = Column(Text, nullable=True, comment='最近一次分发错误')
+    available_at = Column(DateTime, default=func.now(), nullable=False, comment='可分发时间（重试退避）')
+    
+    # 审计字段
+    created_at = Column(DateTime, default=func.now(), nullable=False, comment='创建时间')
+    dispatched_at = Column(DateTime, nullable=True, comment='分发完成时间')
+    
+    __table_args__ = (
+        Index('idx_order_outbox_status_available', 'status', 'available_at'),
+    )
+    
+    def __repr__(self):
+        return f"<OrderOutboxEvent(id={self.id}, event_type='{self.event_type}', status='{self.status}')>"
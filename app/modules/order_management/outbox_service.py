@@ -0,0 +1,333 @@
+"""
+文件名：outbox_service.py
+文件路径：app/modules/order_management/outbox_service.py
+功能描述：订单事件发件箱（Transactional Outbox）与异步事件分发器
+
+主要功能：
+- 订单状态变更时在同一事务中写入 order_outbox_events 事件记录
+- 进程内事件订阅注册：其他模块（通知、积分、分析）按事件类型订阅
+- 后台分发器批量轮询待分发事件并投递给订阅者，失败按指数退避重试
+- 领取与结果写入在工作线程中各用一个短事务完成，投递时不持有事务和行锁
+- 多进程部署时通过 SKIP LOCKED 行锁和领取租约避免重复领取同一批事件
+
+使用说明：
+- 订阅事件：
+    from app.modules.order_management.outbox_service import order_event_bus, ORDER_STATUS_CHANGED
+    @order_event_bus.subscribe(ORDER_STATUS_CHANGED)
+    async def on_status_changed(event): ...
+- 写入事件（不提交事务）：record_status_change_event(db, order, "pending", "paid", operator_id)
+- 启动分发器：dispatcher = OrderOutboxDispatcher(); dispatcher.start()
+
+依赖模块：
+- app.modules.order_management.models: OrderOutboxEvent 数据模型
+- app.core.database.SessionLocal: 分发器独立数据库会话
+
+注意事项：
+- 事件至少投递一次（at-least-once），同一事件的任一订阅者失败时整条事件重试，
+  订阅者需要按事件ID保证幂等
+- 分发器在租约（DEFAULT_DISPATCH_LEASE_SECONDS）内未写回结果的事件（如进程退出）
+  到期后重新领取，租约应大于一批事件的投递耗时
+
+创建时间：2026-10-18
+最后修改：2026-10-19
+"""
+
+import asyncio
+import inspect
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from .models import Order, OrderOutboxEvent, OutboxEventStatus
+
+logger = logging.getLogger(__name__)
+
+
+# 事件类型
+ORDER_STATUS_CHANGED = "order.status_changed"
+
+# 分发器默认配置
+DEFAULT_DISPATCH_BATCH_SIZE = 100
+DEFAULT_POLL_INTERVAL_SECONDS = 1.0
+DEFAULT_MAX_ATTEMPTS = 5
+MAX_RETRY_BACKOFF_SECONDS = 300
+DEFAULT_DISPATCH_LEASE_SECONDS = 60
+
+EventHandler = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+
+class OrderEventBus:
+    """订单事件订阅注册表（进程内）"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[EventHandler]] = defaultdict(list)
+
+    def subscribe(self, event_type: str, handler: Optional[EventHandler] = None):
+        """
+        订阅事件，可直接调用或作为装饰器使用
+
+        Args:
+            event_type: 事件类型
+            handler: 事件处理函数（同步或异步），参数为事件字典
+        """
+        if handler is None:
+            def decorator(func: EventHandler) -> EventHandler:
+                self._subscribers[event_type].append(func)
+                return func
+            return decorator
+
+        self._subscribers[event_type].append(handler)
+        return handler
+
+    def unsubscribe(self, event_type: str, handler: EventHandler) -> None:
+        """取消订阅"""
+        if handler in self._subscribers.get(event_type, []):
+            self._subscribers[event_type].remove(handler)
+
+    def get_subscribers(self, event_type: str) -> List[EventHandler]:
+        """获取事件类型的全部订阅者"""
+        return list(self._subscribers.get(event_type, []))
+
+    async def publish(self, event: Dict[str, Any]) -> None:
+        """
+        将事件依次投递给订阅者
+
+        Raises:
+            Exception: 任一订阅者处理失败时抛出，由分发器负责重试
+        """
+        for handler in self.get_subscribers(event["event_type"]):
+            result = handler(event)
+            if inspect.isawaitable(result):
+                await result
+
+
+# 全局订单事件总线
+order_event_bus = OrderEventBus()
+
+
+# ============ 事件写入 ============
+
+def record_order_event(db: Session, event_type: str, order_id: int, payload: Dict[str, Any]) -> OrderOutboxEvent:
+    """
+    写入发件箱事件（仅加入会话，由调用方随业务数据一起提交）
+
+    Args:
+        db: 数据库会话
+        event_type: 事件类型
+        order_id: 订单ID
+        payload: 事件数据（需可JSON序列化）
+
+    Returns:
+        OrderOutboxEvent: 发件箱事件对象
+    """
+    event = OrderOutboxEvent(
+        event_type=event_type,
+        order_id=order_id,
+        payload=payload,
+        status=OutboxEventStatus.PENDING.value,
+        attempts=0,
+        available_at=datetime.now()
+    )
+    db.add(event)
+    return event
+
+
+def record_status_change_event(
+    db: Session,
+    order: Order,
+    old_status: Optional[str],
+    new_status: str,
+    operator_id: Optional[int] = None,
+    remark: Optional[str] = None
+) -> OrderOutboxEvent:
+    """
+    写入订单状态变更事件
+
+    Args:
+        db: 数据库会话
+        order: 订单对象（需已flush获得ID）
+        old_status: 原状态，新建订单为None
+        new_status: 新状态
+        operator_id: 操作人ID
+        remark: 变更备注
+    """
+    return record_order_event(db, ORDER_STATUS_CHANGED, order.id, {
+        "order_id": order.id,
+        "order_number": order.order_number,
+        "user_id": order.user_id,
+        "old_status": old_status,
+        "new_status": new_status,
+        "total_amount": str(order.total_amount) if order.total_amount is not None else None,
+        "operator_id": operator_id,
+        "remark": remark,
+        "occurred_at": datetime.now().isoformat(),
+    })
+
+
+# ============ 事件分发 ============
+
+class OrderOutboxDispatcher:
+    """
+    发件箱后台分发器
+
+    每轮在工作线程中领取一批可分发事件（按ID顺序）并标记为领取中，立即提交释放行锁；
+    在事务之外投递给订阅者，再在工作线程中写回结果：成功标记为已分发，
+    失败按指数退避推迟，超过最大次数标记为失败。
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        event_bus: OrderEventBus = order_event_bus,
+        batch_size: int = DEFAULT_DISPATCH_BATCH_SIZE,
+        poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        lease_seconds: float = DEFAULT_DISPATCH_LEASE_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.event_bus = event_bus
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def dispatch_once(self) -> int:
+        """
+        分发一批事件
+
+        Returns:
+            int: 本批处理的事件数量（含失败）
+        """
+        events = await asyncio.to_thread(self._claim_batch)
+        if not events:
+            return 0
+
+        errors: Dict[int, Optional[str]] = {}
+        for event in events:
+            errors[event["id"]] = await self._deliver(event)
+
+        await asyncio.to_thread(self._record_results, events, errors)
+        return len(events)
+
+    def _claim_batch(self) -> List[Dict[str, Any]]:
+        """领取一批事件（短事务），返回投递所需的事件快照"""
+        now = datetime.now()
+        db = self.session_factory()
+        try:
+            events = db.query(OrderOutboxEvent).filter(
+                OrderOutboxEvent.status.in_([
+                    OutboxEventStatus.PENDING.value, OutboxEventStatus.DISPATCHING.value
+                ]),
+                # 待分发事件到达可分发时间，或领取中事件的租约已过期
+                OrderOutboxEvent.available_at <= now
+            ).order_by(OrderOutboxEvent.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+            lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+            claimed = []
+            for event in events:
+                event.status = OutboxEventStatus.DISPATCHING.value
+                event.attempts += 1
+                event.available_at = lease_expires_at
+                claimed.append({
+                    "id": event.id,
+                    "event_type": event.event_type,
+                    "order_id": event.order_id,
+                    "payload": event.payload,
+                    "attempts": event.attempts,
+                })
+            db.commit()
+            return claimed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _deliver(self, event: Dict[str, Any]) -> Optional[str]:
+        """投递单条事件，返回错误信息（成功为None）"""
+        try:
+            await self.event_bus.publish({
+                "id": event["id"],
+                "event_type": event["event_type"],
+                "order_id": event["order_id"],
+                "payload": event["payload"],
+            })
+        except Exception as e:
+            return str(e)[:2000] or type(e).__name__
+        return None
+
+    def _record_results(self, events: List[Dict[str, Any]], errors: Dict[int, Optional[str]]) -> None:
+        """写回投递结果（短事务）；租约过期后已被重新领取的事件不覆盖"""
+        now = datetime.now()
+        db = self.session_factory()
+        try:
+            for event in events:
+                error = errors[event["id"]]
+                if error is None:
+                    values = {
+                        OrderOutboxEvent.status: OutboxEventStatus.DISPATCHED.value,
+                        OrderOutboxEvent.dispatched_at: now,
+                        OrderOutboxEvent.last_error: None,
+                    }
+                elif event["attempts"] >= self.max_attempts:
+                    values = {
+                        OrderOutboxEvent.status: OutboxEventStatus.FAILED.value,
+                        OrderOutboxEvent.last_error: error,
+                    }
+                    logger.error(f"订单事件分发失败，已停止重试: event_id={event['id']}, error={error}")
+                else:
+                    backoff = min(2 ** event["attempts"], MAX_RETRY_BACKOFF_SECONDS)
+                    values = {
+                        OrderOutboxEvent.status: OutboxEventStatus.PENDING.value,
+                        OrderOutboxEvent.available_at: now + timedelta(seconds=backoff),
+                        OrderOutboxEvent.last_error: error,
+                    }
+                    logger.warning(f"订单事件分发失败，{backoff}秒后重试: event_id={event['id']}, error={error}")
+
+                db.query(OrderOutboxEvent).filter(
+                    OrderOutboxEvent.id == event["id"],
+                    OrderOutboxEvent.status == OutboxEventStatus.DISPATCHING.value,
+                    OrderOutboxEvent.attempts == event["attempts"]
+                ).update(values, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def run(self) -> None:
+        """持续轮询分发，批次满额时立即继续，否则等待轮询间隔"""
+        while not self._stopping.is_set():
+            try:
+                processed = await self.dispatch_once()
+            except Exception as e:
+                logger.error(f"订单事件分发轮询异常: {e}")
+                processed = 0
+
+            if processed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> asyncio.Task:
+        """在当前事件循环中启动后台分发任务"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """停止后台分发任务，等待当前批次完成"""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
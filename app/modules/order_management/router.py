@@ -25,26 +25,35 @@
 最后修改：2025-09-15
 """
 
+from datetime import date, datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from .service import OrderService
+from .export_service import OrderExportService, EXPORT_MEDIA_TYPES
 from .models import Order, OrderStatus
 from ..user_auth.models import User
 from .schemas import (
     OrderCreateRequest, OrderResponse, OrderListResponse, 
     OrderStatusUpdateRequest, OrderItemResponse, ApiResponse,
-    PaginatedResponse, OrderDetailResponse, OrderStatisticsResponse
+    PaginatedResponse, OrderDetailResponse, OrderStatisticsResponse, OrderExportFormat,
+    OrderBatchStatusUpdateRequest, OrderBatchStatusUpdateResponse
 )
+from app.shared.serialization import FastJSONResponse, RowSerializer
 from .dependencies import (
-    get_order_service, get_current_authenticated_user, get_current_admin_user_validated,
+    get_order_service, get_order_export_service,
+    get_current_authenticated_user, get_current_admin_user_validated,
     validate_order_access, validate_order_creation_permission,
     validate_order_status_update_permission, validate_statistics_access_permission
 )
 
 router = APIRouter()
 
+# 订单列表按响应字段直接查询列，跳过 ORM 实例化和响应模型二次校验
+ORDER_ROWS = RowSerializer.for_schema(OrderResponse, Order)
+
 
 @router.post("/order-management/orders", response_model=ApiResponse[OrderResponse], status_code=status.HTTP_201_CREATED)
 async def create_order(
@@ -104,7 +113,11 @@ async def create_order(
         )
 
 
-@router.get("/order-management/orders", response_model=ApiResponse[PaginatedResponse[OrderListResponse]])
+@router.get(
+    "/order-management/orders",
+    response_model=ApiResponse[PaginatedResponse[OrderResponse]],
+    response_class=FastJSONResponse
+)
 async def list_orders(
     status_filter: Optional[OrderStatus] = Query(None, description="订单状态筛选"),
     user_id: Optional[int] = Query(None, description="用户ID筛选（仅管理员可用）"),
@@ -131,7 +144,7 @@ async def list_orders(
         current_user: 当前登录用户
         
     Returns:
-        ApiResponse[PaginatedResponse[OrderListResponse]]: 分页的订单列表
+        ApiResponse[PaginatedResponse[OrderResponse]]: 分页的订单列表
         
     Raises:
         HTTPException: 
@@ -153,30 +166,34 @@ async def list_orders(
         # 计算分页参数
         skip = (page - 1) * page_size
         
-        # 获取订单列表
-        orders = await order_service.get_orders_list(
+        # 获取订单列表（只查询响应字段列，不加载订单项）
+        rows = await order_service.get_order_list_rows(
+            ORDER_ROWS.columns,
             user_id=query_user_id,
             status=status_filter,
             skip=skip,
             limit=page_size
         )
         
-        # 转换为响应模型
-        order_list = [OrderListResponse.model_validate(order) for order in orders]
-        
-        # 构造分页响应
-        paginated_response = PaginatedResponse[OrderListResponse](
-            items=order_list,
-            page=page,
-            page_size=page_size,
-            total_count=len(order_list)  # 简化实现，实际应该查询总数
+        # 获取总数（读取订单计数表，不执行COUNT查询）
+        total_count = await order_service.count_orders(
+            user_id=query_user_id,
+            status_filter=status_filter
         )
         
-        return ApiResponse[PaginatedResponse[OrderListResponse]](
-            success=True,
-            message="获取订单列表成功",
-            data=paginated_response
-        )
+        # 行元组直接组装响应，字段与 ApiResponse[PaginatedResponse[OrderResponse]] 一致
+        return FastJSONResponse({
+            "success": True,
+            "code": 200,
+            "message": "获取订单列表成功",
+            "data": {
+                "items": ORDER_ROWS.serialize(rows),
+                "page": page,
+                "page_size": page_size,
+                "total_count": total_count
+            },
+            "metadata": None
+        })
         
     except HTTPException:
         raise
@@ -187,6 +204,60 @@ async def list_orders(
         )
 
 
+@router.get("/order-management/orders/export")
+async def export_orders(
+    export_format: OrderExportFormat = Query(OrderExportFormat.CSV, alias="format", description="导出格式"),
+    status_filter: Optional[OrderStatus] = Query(None, description="订单状态筛选"),
+    start_date: Optional[date] = Query(None, description="创建日期起始(YYYY-MM-DD，含)"),
+    end_date: Optional[date] = Query(None, description="创建日期截止(YYYY-MM-DD，含)"),
+    export_service: OrderExportService = Depends(get_order_export_service),
+    current_admin = Depends(get_current_admin_user_validated)
+):
+    """
+    流式导出订单及订单商品
+    
+    orders 与 order_items 单次连接查询，每个订单商品输出一行：
+    - 需要管理员权限
+    - 通过服务端游标分批读取，内存占用不随数据量增长
+    - 支持CSV和NDJSON格式，支持状态和创建日期范围筛选
+    
+    Args:
+        export_format: 导出格式（csv / ndjson）
+        status_filter: 订单状态筛选（可选）
+        start_date: 创建日期起始（可选）
+        end_date: 创建日期截止（可选）
+        export_service: 订单导出服务实例
+        current_admin: 当前管理员用户（权限验证）
+        
+    Returns:
+        StreamingResponse: 导出文件流
+        
+    Raises:
+        HTTPException: 
+            - 400: 日期范围不合法
+            - 403: 权限不足（非管理员）
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="开始日期不能晚于结束日期"
+        )
+    
+    content = export_service.stream_export(
+        export_format=export_format.value,
+        status_filter=status_filter,
+        start_date=start_date,
+        end_date=end_date
+    )
+    filename = f"orders_{datetime.now().strftime('%Y%m%d%H%M%S')}.{export_format.value}"
+    
+    return StreamingResponse(
+        content,
+        media_type=EXPORT_MEDIA_TYPES[export_format.value],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.get("/order-management/orders/{order_id}", response_model=ApiResponse[OrderResponse])
 async def get_order_detail(
     order: Order = Depends(validate_order_access)
@@ -226,6 +297,57 @@ async def get_order_detail(
         )
 
 
+@router.patch("/order-management/orders/batch/status", response_model=ApiResponse[OrderBatchStatusUpdateResponse])
+async def batch_update_order_status(
+    batch_update: OrderBatchStatusUpdateRequest,
+    order_service: OrderService = Depends(get_order_service),
+    current_admin = Depends(validate_order_status_update_permission)
+):
+    """
+    批量更新订单状态
+    
+    面向仓库批量发货等场景，一次请求处理多个订单：
+    - 需要管理员权限
+    - 逐个验证状态转换的合法性，库存影响按SKU汇总处理
+    - 状态历史批量写入，整批一次提交
+    - 返回每个订单的成功/失败结果，单个订单失败不影响其他订单
+    
+    Args:
+        batch_update: 批量状态更新请求数据（最多500个订单）
+        order_service: 订单服务实例
+        current_admin: 当前管理员用户（权限验证）
+        
+    Returns:
+        ApiResponse[OrderBatchStatusUpdateResponse]: 批量处理汇总和逐个订单结果
+        
+    Raises:
+        HTTPException: 
+            - 403: 权限不足（非管理员）
+            - 500: 服务器内部错误
+    """
+    try:
+        batch_result = await order_service.batch_update_order_status(
+            order_ids=batch_update.order_ids,
+            new_status=batch_update.status.value,
+            operator_id=current_admin.id,
+            remark=batch_update.remark
+        )
+        
+        return ApiResponse[OrderBatchStatusUpdateResponse](
+            success=True,
+            message=f"批量更新完成：成功 {batch_result['succeeded']} 个，失败 {batch_result['failed']} 个",
+            data=OrderBatchStatusUpdateResponse.model_validate(batch_result)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量更新订单状态失败: {str(e)}"
+        )
+
+
 @router.patch("/order-management/orders/{order_id}/status", response_model=ApiResponse[OrderResponse])
 async def update_order_status(
     order_id: int = Path(..., ge=1, description="订单ID"),
@@ -79,6 +79,12 @@ class OrderStatus(str, Enum):
     RETURNED = "returned"   # 已退货
 
 
+class OrderExportFormat(str, Enum):
+    """订单导出格式枚举"""
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
 # ============ 订单项相关模式 ============
 
 class OrderItemRequest(BaseSchema):
@@ -153,6 +159,35 @@ class OrderStatusUpdateRequest(BaseSchema):
     status: OrderStatus = Field(..., description="订单状态")
     remark: Optional[str] = Field(None, max_length=500, description="状态变更备注")
 
+class OrderBatchStatusUpdateRequest(BaseSchema):
+    """订单批量状态更新请求模式"""
+    order_ids: List[int] = Field(..., min_length=1, max_length=500, description="订单ID列表")
+    status: OrderStatus = Field(..., description="目标订单状态")
+    remark: Optional[str] = Field(None, max_length=500, description="状态变更备注")
+    
+    @field_validator('order_ids')
+    @classmethod
+    def validate_order_ids(cls, v):
+        """验证订单ID为正整数并去重（保持原顺序）"""
+        if any(order_id <= 0 for order_id in v):
+            raise ValueError('订单ID必须为正整数')
+        return list(dict.fromkeys(v))
+
+class OrderBatchStatusResult(BaseModel):
+    """单个订单的批量状态更新结果"""
+    order_id: int
+    success: bool
+    old_status: Optional[str] = None
+    new_status: Optional[str] = None
+    error: Optional[str] = None
+
+class OrderBatchStatusUpdateResponse(BaseModel):
+    """订单批量状态更新响应模式"""
+    total: int = Field(description="请求订单数")
+    succeeded: int = Field(description="成功数量")
+    failed: int = Field(description="失败数量")
+    results: List[OrderBatchStatusResult] = Field(default_factory=list, description="逐个订单结果")
+
 class OrderCancelRequest(BaseSchema):
     """订单取消请求模式"""
     reason: Optional[str] = Field(None, max_length=500, description="取消原因")
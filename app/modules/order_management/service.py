@@ -33,22 +33,29 @@
 最后修改：2025-09-15
 """
 
+import logging
 import uuid
-from typing import Optional, List, Dict, Any
+from collections import defaultdict
+from typing import Optional, List, Dict, Any, Sequence, Tuple
 from decimal import Decimal
 from datetime import datetime, timezone
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy import func
 from fastapi import HTTPException, status
 
 from .models import Order, OrderItem, OrderStatusHistory, OrderStatus
 from .schemas import OrderCreateRequest, OrderItemRequest, ApiResponse
+from .counter_service import OrderCounterService
+from .outbox_service import record_status_change_event
+from app.modules.inventory_management.models import InventoryStock, InventoryTransaction, TransactionType
 from app.modules.inventory_management.schemas import ReservationItem
 from app.modules.user_auth.models import User
 from app.modules.product_catalog.models import Product, SKU
 from app.modules.inventory_management.service import InventoryService
 
+logger = logging.getLogger(__name__)
+
 
 class OrderService:
     """
@@ -67,6 +74,7 @@ class OrderService:
         """
         self.db = db
         self.inventory_service = InventoryService(db)
+        self.counter_service = OrderCounterService(db)
 
     def _generate_order_number(self) -> str:
         """
@@ -298,6 +306,12 @@ class OrderService:
             )
             self.db.add(status_history)
             
+            # 同一事务内更新订单计数并写入订单事件
+            self.counter_service.record_created(user_id, OrderStatus.PENDING.value)
+            record_status_change_event(
+                self.db, order, None, OrderStatus.PENDING.value, operator_id=user_id, remark="订单创建"
+            )
+            
             self.db.commit()
             self.db.refresh(order)
             
@@ -378,6 +392,66 @@ class OrderService:
                 detail=f"获取订单列表失败: {str(e)}"
             )
     
+    async def get_order_list_rows(
+        self,
+        columns: Sequence[Any],
+        user_id: Optional[int] = None,
+        status: Optional[OrderStatus] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Tuple]:
+        """
+        获取订单列表行元组（只查询指定列，不加载订单项）
+        
+        Args:
+            columns: 查询列（如 RowSerializer.columns）
+            user_id: 用户ID筛选（可选）
+            status: 状态筛选（可选）
+            skip: 跳过数量
+            limit: 限制数量
+            
+        Returns:
+            List[Tuple]: 按 columns 顺序的行元组
+        """
+        query = self.db.query(*columns)
+        if user_id:
+            query = query.filter(Order.user_id == user_id)
+        if status:
+            query = query.filter(Order.status == status)
+        return [tuple(row) for row in query.order_by(Order.created_at.desc()).offset(skip).limit(limit)]
+    
+    async def count_orders(
+        self,
+        user_id: Optional[int] = None,
+        status_filter: Optional[OrderStatus] = None,
+        approximate: bool = True
+    ) -> int:
+        """
+        获取订单总数（用于分页）
+        
+        基于订单计数表读取，不对 orders 表执行 COUNT(*)：
+        - 指定用户时返回精确值
+        - 全站查询时默认返回短时缓存的近似值
+        
+        Args:
+            user_id: 用户ID筛选（可选）
+            status_filter: 状态筛选（可选）
+            approximate: 全站查询是否允许近似值
+            
+        Returns:
+            int: 订单总数
+        """
+        try:
+            if user_id:
+                return self.counter_service.count_user_orders(user_id, status_filter)
+            return self.counter_service.count_all_orders(status_filter, approximate=approximate)
+            
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"获取订单总数失败: {str(e)}"
+            )
+    
     async def update_order_status(
         self,
         order_id: int,
@@ -424,7 +498,7 @@ class OrderService:
                 )
             
             # 执行状态相关的业务逻辑
-            await self._handle_status_change_business_logic(order, old_status, new_status)
+            await self._handle_status_change_business_logic(order, old_status, new_status, operator_id)
             
             # 更新订单状态
             order.status = new_status  # 直接使用字符串值
@@ -439,6 +513,13 @@ class OrderService:
             )
             self.db.add(status_history)
             
+            # 同一事务内更新订单计数并写入订单事件（由后台分发器异步通知订阅模块）
+            self.counter_service.record_transition(order.user_id, old_status, new_status)
+            record_status_change_event(
+                self.db, order, old_status, new_status,
+                operator_id=operator_id, remark=status_history.remark
+            )
+            
             self.db.commit()
             self.db.refresh(order)
             
@@ -453,6 +534,218 @@ class OrderService:
                 detail=f"更新订单状态失败: {str(e)}"
             )
 
+    async def batch_update_order_status(
+        self,
+        order_ids: List[int],
+        new_status: str,
+        operator_id: int,
+        remark: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        批量更新订单状态（详见 apply_batch_status_update）
+        """
+        return self.apply_batch_status_update(order_ids, new_status, operator_id, remark)
+
+    def apply_batch_status_update(
+        self,
+        order_ids: List[int],
+        new_status: str,
+        operator_id: Optional[int],
+        remark: Optional[str] = None,
+        commit: bool = True
+    ) -> Dict[str, Any]:
+        """
+        批量更新订单状态
+        
+        面向仓库批量发货等场景，所有订单在一个事务中处理：
+        1. 按订单ID顺序一次性锁定订单
+        2. 使用 _is_valid_status_transition 逐个验证状态转换
+        3. 按SKU汇总库存影响，按SKU顺序一次性锁定库存行并统一扣减/释放
+        4. 批量写入状态历史、订单计数和订单事件，最后统一提交
+        
+        单个订单不存在、状态转换不合法或预占库存不足时只记录该订单失败，
+        不影响其他订单。
+        
+        Args:
+            order_ids: 订单ID列表
+            new_status: 新状态
+            operator_id: 操作者ID（系统任务为None）
+            remark: 备注
+            commit: 是否提交事务；为False时只flush，由调用方与其他变更一起提交
+            
+        Returns:
+            dict: total/succeeded/failed 汇总及逐个订单结果
+            
+        Raises:
+            HTTPException: 数据库异常等导致整批失败
+        """
+        new_status = getattr(new_status, "value", new_status)
+        order_ids = list(dict.fromkeys(order_ids))
+        results: Dict[int, Dict[str, Any]] = {}
+        
+        try:
+            # 1. 按ID顺序锁定订单，与其他批量操作保持一致的加锁顺序
+            orders = self.db.query(Order).options(
+                selectinload(Order.order_items)
+            ).filter(
+                Order.id.in_(order_ids)
+            ).order_by(Order.id).with_for_update().all()
+            orders_by_id = {order.id: order for order in orders}
+            
+            # 2. 验证状态转换
+            candidates = []
+            for order_id in order_ids:
+                order = orders_by_id.get(order_id)
+                if not order:
+                    results[order_id] = {"order_id": order_id, "success": False, "error": "订单不存在"}
+                elif not self._is_valid_status_transition(order.status, new_status):
+                    results[order_id] = {
+                        "order_id": order_id, "success": False, "old_status": order.status,
+                        "error": f"无法从状态 {order.status} 转换到 {new_status}"
+                    }
+                else:
+                    candidates.append(order)
+            
+            # 3. 按SKU汇总并应用库存影响，预占库存不足的订单记为失败
+            succeeded_orders = self._apply_batch_stock_effects(
+                candidates, new_status, results, operator_id
+            )
+            
+            # 4. 更新订单状态并批量写入历史、计数和事件
+            history_rows = []
+            counter_deltas: Dict[tuple, int] = defaultdict(int)
+            for order in succeeded_orders:
+                old_status = order.status
+                order.status = new_status
+                history_remark = remark or f"状态从 {old_status} 变更为 {new_status}"
+                history_rows.append({
+                    "order_id": order.id,
+                    "old_status": old_status,
+                    "new_status": new_status,
+                    "remark": history_remark,
+                    "operator_id": operator_id
+                })
+                counter_deltas[(order.user_id, old_status)] -= 1
+                counter_deltas[(order.user_id, new_status)] += 1
+                record_status_change_event(
+                    self.db, order, old_status, new_status,
+                    operator_id=operator_id, remark=history_remark
+                )
+                results[order.id] = {
+                    "order_id": order.id, "success": True,
+                    "old_status": old_status, "new_status": new_status
+                }
+            
+            if history_rows:
+                self.db.bulk_insert_mappings(OrderStatusHistory, history_rows)
+                self.counter_service.apply_deltas(counter_deltas)
+            
+            if commit:
+                self.db.commit()
+            else:
+                self.db.flush()
+            
+        except HTTPException:
+            self.db.rollback()
+            raise
+        except Exception as e:
+            self.db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"批量更新订单状态失败: {str(e)}"
+            )
+        
+        ordered_results = [results[order_id] for order_id in order_ids]
+        succeeded = sum(1 for result in ordered_results if result["success"])
+        return {
+            "total": len(ordered_results),
+            "succeeded": succeeded,
+            "failed": len(ordered_results) - succeeded,
+            "results": ordered_results
+        }
+
+    def _apply_batch_stock_effects(
+        self,
+        orders: List[Order],
+        new_status: str,
+        results: Dict[int, Dict[str, Any]],
+        operator_id: Optional[int] = None
+    ) -> List[Order]:
+        """
+        按SKU汇总批量状态变更的库存影响并统一应用
+        
+        与 _handle_status_change_business_logic 规则一致：
+        - 变更为 cancelled：释放订单商品的预占库存
+        - pending 变更为 paid：从预占库存中确认扣减
+        
+        涉及的库存行按 sku_id 排序后一次查询加锁；扣减时按订单顺序在内存中
+        核对剩余预占数量，不足的订单记入 results 并排除。
+        
+        Args:
+            orders: 已通过状态验证的订单
+            new_status: 新状态
+            results: 逐个订单结果（失败订单写入此处）
+            operator_id: 操作者ID（写入库存变动记录）
+            
+        Returns:
+            List[Order]: 库存处理成功、可以变更状态的订单
+        """
+        stock_orders = [
+            order for order in orders
+            if (new_status == "cancelled" and order.status != "cancelled")
+            or (new_status == "paid" and order.status == "pending")
+        ]
+        if not stock_orders:
+            return orders
+        
+        order_quantities = {order.id: self._sum_order_item_quantities(order) for order in stock_orders}
+        stocks_by_sku = self._lock_inventory_stocks(
+            {sku_id for quantities in order_quantities.values() for sku_id in quantities}
+        )
+        remaining_reserved = {sku_id: stock.reserved_quantity for sku_id, stock in stocks_by_sku.items()}
+        
+        movements = []
+        failed_ids = set()
+        
+        for order in stock_orders:
+            quantities = order_quantities[order.id]
+            
+            if new_status == "cancelled":
+                # 释放预占：与单个订单取消一致，预占不足的SKU跳过
+                for sku_id, quantity in quantities.items():
+                    if sku_id in remaining_reserved and remaining_reserved[sku_id] >= quantity:
+                        remaining_reserved[sku_id] -= quantity
+                        movements.append((order, sku_id, quantity))
+                continue
+            
+            # 确认扣减：订单全部SKU预占充足才扣减
+            shortage = [
+                sku_id for sku_id, quantity in quantities.items()
+                if sku_id in remaining_reserved and remaining_reserved[sku_id] < quantity
+            ]
+            if shortage:
+                failed_ids.add(order.id)
+                results[order.id] = {
+                    "order_id": order.id, "success": False, "old_status": order.status,
+                    "error": f"SKU {', '.join(str(sku_id) for sku_id in shortage)} 预占库存不足，无法确认扣减"
+                }
+                continue
+            for sku_id, quantity in quantities.items():
+                if sku_id in remaining_reserved:
+                    remaining_reserved[sku_id] -= quantity
+                    movements.append((order, sku_id, quantity))
+        
+        if new_status == "cancelled":
+            self._apply_stock_movements(
+                stocks_by_sku, movements, TransactionType.RELEASE, operator_id, "订单取消释放预占库存"
+            )
+        else:
+            self._apply_stock_movements(
+                stocks_by_sku, movements, TransactionType.DEDUCT, operator_id, "订单支付确认扣减库存"
+            )
+        
+        return [order for order in orders if order.id not in failed_ids]
+
     def _is_valid_status_transition(
         self, 
         current_status: str, 
@@ -483,7 +776,8 @@ class OrderService:
         self,
         order: Order,
         old_status: str,
-        new_status: str
+        new_status: str,
+        operator_id: Optional[int] = None
     ):
         """
         处理状态变更相关的业务逻辑
@@ -492,65 +786,145 @@ class OrderService:
             order: 订单对象
             old_status: 原状态
             new_status: 新状态
+            operator_id: 操作者ID
         """
         # 订单取消 - 释放库存
         if new_status == "cancelled" and old_status != "cancelled":
-            await self._release_order_stock(order)
+            await self._release_order_stock(order, operator_id)
         
         # 订单支付 - 确认库存扣减
         elif new_status == "paid" and old_status == "pending":
-            await self._confirm_stock_deduction(order)
+            await self._confirm_stock_deduction(order, operator_id)
+
+    @staticmethod
+    def _sum_order_item_quantities(order: Order) -> Dict[int, int]:
+        """按SKU汇总订单商品数量（同一SKU多个订单项合并）"""
+        quantities: Dict[int, int] = defaultdict(int)
+        for item in order.order_items:
+            quantities[item.sku_id] += item.quantity
+        return dict(quantities)
+
+    def _lock_inventory_stocks(self, sku_ids) -> Dict[int, InventoryStock]:
+        """
+        一次查询锁定多个SKU的库存行
+        
+        统一按 sku_id 升序加锁，所有订单操作遵循相同的加锁顺序，
+        避免并发取消/支付之间互相等待形成死锁。
+        """
+        if not sku_ids:
+            return {}
+        stocks = self.db.query(InventoryStock).filter(
+            InventoryStock.sku_id.in_(sorted(sku_ids))
+        ).order_by(InventoryStock.sku_id).with_for_update().all()
+        return {stock.sku_id: stock for stock in stocks}
+
+    def _apply_stock_movements(
+        self,
+        stocks_by_sku: Dict[int, InventoryStock],
+        movements: List[tuple],
+        transaction_type: TransactionType,
+        operator_id: Optional[int],
+        reason: str
+    ) -> None:
+        """
+        应用已校验的库存变动并批量写入库存变动记录
+        
+        - RELEASE：释放预占，记录可用库存的变化
+        - DEDUCT：从预占中扣减出库，记录总库存的变化
+        
+        Args:
+            stocks_by_sku: 已加锁的库存行
+            movements: (订单, sku_id, 数量) 列表
+            transaction_type: 变动类型（RELEASE / DEDUCT）
+            operator_id: 操作者ID
+            reason: 变动原因
+        """
+        transaction_rows = []
+        for order, sku_id, quantity in movements:
+            stock = stocks_by_sku[sku_id]
+            if transaction_type == TransactionType.RELEASE:
+                quantity_before = stock.available_quantity
+                stock.release_quantity(quantity)
+                quantity_after = stock.available_quantity
+                quantity_change = quantity
+            else:
+                quantity_before = stock.total_quantity
+                stock.deduct_quantity(quantity, from_reserved=True)
+                quantity_after = stock.total_quantity
+                quantity_change = -quantity
+            
+            transaction_rows.append({
+                "sku_id": sku_id,
+                "transaction_type": transaction_type,
+                "quantity_change": quantity_change,
+                "quantity_before": quantity_before,
+                "quantity_after": quantity_after,
+                "reference_type": "order",
+                "reference_id": order.order_number,
+                "operator_id": operator_id,
+                "reason": reason
+            })
+        
+        if transaction_rows:
+            self.db.bulk_insert_mappings(InventoryTransaction, transaction_rows)
 
-    async def _release_order_stock(self, order: Order):
+    async def _release_order_stock(self, order: Order, operator_id: Optional[int] = None):
         """
         释放订单库存
         
+        按SKU汇总数量后一次锁定库存行，库存变更与订单状态在同一事务中提交。
+        
         Args:
             order: 订单对象
+            operator_id: 操作者ID
         """
         try:
-            # 导入所需的模型
-            from app.modules.inventory_management.models import InventoryStock
-            
-            for item in order.order_items:
-                # 获取库存记录并释放数量
-                inventory = self.db.query(InventoryStock).filter(
-                    InventoryStock.sku_id == item.sku_id
-                ).with_for_update().first()
-                
-                if inventory:
-                    inventory.release_quantity(item.quantity)
-            
-            self.db.commit()
+            # 保存点：库存释放失败只回滚本步骤
+            with self.db.begin_nested():
+                quantities = self._sum_order_item_quantities(order)
+                stocks_by_sku = self._lock_inventory_stocks(quantities.keys())
+                movements = [
+                    (order, sku_id, quantity) for sku_id, quantity in sorted(quantities.items())
+                    if sku_id in stocks_by_sku and stocks_by_sku[sku_id].reserved_quantity >= quantity
+                ]
+                self._apply_stock_movements(
+                    stocks_by_sku, movements, TransactionType.RELEASE, operator_id, "订单取消释放预占库存"
+                )
         except Exception as e:
-            self.db.rollback()
             # 库存释放失败不应阻止订单状态变更，但需要记录
-            # 可以考虑使用日志或消息队列进行异步处理
-            pass
+            logger.error(f"订单库存释放失败: order_id={order.id}, error={e}")
 
-    async def _confirm_stock_deduction(self, order: Order):
+    async def _confirm_stock_deduction(self, order: Order, operator_id: Optional[int] = None):
         """
         确认库存扣减
         
+        按SKU汇总数量后一次锁定库存行，全部SKU预占充足才扣减，
+        库存变更与订单状态在同一事务中提交。
+        
         Args:
             order: 订单对象
+            operator_id: 操作者ID
         """
         try:
-            # 导入所需的模型
-            from app.modules.inventory_management.models import InventoryStock
-            
-            for item in order.order_items:
-                # 获取库存记录并确认扣减
-                inventory = self.db.query(InventoryStock).filter(
-                    InventoryStock.sku_id == item.sku_id
-                ).with_for_update().first()
-                
-                if inventory:
-                    # 从预占库存中扣减（实际出库）
-                    if not inventory.deduct_quantity(item.quantity, from_reserved=True):
-                        raise Exception(f"SKU {item.sku_id} 预占库存不足，无法确认扣减")
+            quantities = self._sum_order_item_quantities(order)
+            stocks_by_sku = self._lock_inventory_stocks(quantities.keys())
+            
+            shortage = [
+                sku_id for sku_id, quantity in sorted(quantities.items())
+                if sku_id in stocks_by_sku and stocks_by_sku[sku_id].reserved_quantity < quantity
+            ]
+            if shortage:
+                raise Exception(
+                    f"SKU {', '.join(str(sku_id) for sku_id in shortage)} 预占库存不足，无法确认扣减"
+                )
             
-            self.db.commit()
+            movements = [
+                (order, sku_id, quantity) for sku_id, quantity in sorted(quantities.items())
+                if sku_id in stocks_by_sku
+            ]
+            self._apply_stock_movements(
+                stocks_by_sku, movements, TransactionType.DEDUCT, operator_id, "订单支付确认扣减库存"
+            )
         except Exception as e:
             self.db.rollback()
             # 库存确认失败需要处理，可能需要回滚订单状态
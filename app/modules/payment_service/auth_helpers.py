@@ -8,15 +8,24 @@ from fastapi import HTTPException, status, Depends
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.modules.user_auth.models import User
 from app.modules.order_management.models import Order
 from app.modules.payment_service.models import Payment
 from app.core.auth import get_current_active_user, get_current_admin_user
+from app.core.principal_cache import Principal
+from app.core.security_logger import setup_audit_logger
+
+# 支付审计日志字段
+PAYMENT_AUDIT_FIELDS = (
+    "event_type", "payment_id", "user_id", "action", "old_status", "new_status", "ip_address", "user_agent", "dropped",
+)
+
+# 支付审计日志经由异步管道写入 logs/payment_audit.log，不阻塞支付请求
+_payment_audit_logger = setup_audit_logger("payment_audit", "payment_audit.log", PAYMENT_AUDIT_FIELDS)
 
 
 async def verify_payment_ownership(
     payment_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ) -> tuple[Payment, Order]:
     """
@@ -61,7 +70,7 @@ async def verify_payment_ownership(
 
 async def verify_order_ownership_for_payment(
     order_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ) -> Order:
     """
@@ -173,19 +182,17 @@ def create_payment_audit_log(
         user_agent: 用户代理
         db: 数据库连接
     """
-    # TODO: 实现审计日志记录
-    # 当前版本暂时使用日志记录，后续版本添加数据库审计表
-    import logging
-    
-    logger = logging.getLogger("payment_audit")
-    log_data = {
-        "payment_id": payment_id,
-        "user_id": user_id,
-        "action": action,
-        "old_status": old_status,
-        "new_status": new_status,
-        "ip_address": ip_address,
-        "user_agent": user_agent
-    }
-    
-    logger.info(f"Payment audit: {log_data}")
+    # 当前版本使用异步审计日志管道记录，后续版本添加数据库审计表
+    _payment_audit_logger.info(
+        f"Payment audit: payment_id={payment_id}, action={action}",
+        extra={
+            "event_type": "payment_audit",
+            "payment_id": payment_id,
+            "user_id": user_id,
+            "action": action,
+            "old_status": old_status,
+            "new_status": new_status,
+            "ip_address": ip_address,
+            "user_agent": user_agent
+        }
+    )
@@ -0,0 +1,378 @@
+"""
+文件名：callback_queue.py
+文件路径：app/modules/payment_service/callback_queue.py
+功能描述：支付回调收件箱与后台批量处理器
+
+主要功能：
+- 回调接收模式：将原始回调写入 payment_callback_inbox 并立即应答网关（回调验签尚为演示桩）
+- 按 (provider, transaction_id, trade_state) 唯一约束去重：网关重复推送同一状态不会重复入队，
+  同一交易的状态推进（如 PAYERROR 之后的 SUCCESS）作为新回调处理
+- 后台处理器池批量领取待处理回调，一次查询加载支付单和订单，幂等地应用状态变更
+- 处理失败（含支付单尚不存在）按指数退避重试，超过最大次数标记为失败，可重新入队
+- 回调状态应用逻辑与同步处理模式共用（apply_wechat_callback）
+
+使用说明：
+- 开启队列模式：设置环境变量 PAYMENT_CALLBACK_QUEUE_ENABLED=1
+- 写入回调：enqueue_callback(db, "wechat", transaction_id, out_trade_no, trade_state, payload)
+- 启动处理器：worker = PaymentCallbackWorker(concurrency=2); worker.start()
+- 失败回调重新入队：requeue_failed_callbacks(db, transaction_ids=[...])
+  或 python -m app.modules.payment_service.callback_queue requeue [--transaction-id ID ...]
+
+依赖模块：
+- app.modules.payment_service.models: Payment、PaymentCallbackInbox 数据模型
+- app.modules.order_management: 订单计数与订单事件
+- app.core.database.SessionLocal: 处理器独立数据库会话
+
+注意事项：
+- 处理器通过 SKIP LOCKED 领取回调，多个处理器（线程或进程）不会重复处理同一条
+- 已处于终态的支付单再次收到回调时只标记回调已处理，不重复变更状态
+- 标记为失败的回调以 ERROR 级别记录日志，需要告警监控 payment_callback_inbox 中 status='failed' 的记录
+
+创建时间：2026-10-18
+最后修改：2026-10-19
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.modules.order_management.counter_service import OrderCounterService
+from app.modules.order_management.models import Order
+from app.modules.order_management.outbox_service import record_status_change_event
+from .auth_helpers import create_payment_audit_log
+from .models import Payment, PaymentCallbackInbox
+
+logger = logging.getLogger(__name__)
+
+
+# 回调队列模式开关（关闭时回调在请求内同步处理）
+CALLBACK_QUEUE_ENABLED = os.environ.get("PAYMENT_CALLBACK_QUEUE_ENABLED", "0") == "1"
+
+# 处理器默认配置
+DEFAULT_CALLBACK_BATCH_SIZE = 100
+DEFAULT_CALLBACK_POLL_INTERVAL_SECONDS = 0.5
+DEFAULT_CALLBACK_WORKERS = 2
+DEFAULT_CALLBACK_MAX_ATTEMPTS = 5
+MAX_CALLBACK_RETRY_BACKOFF_SECONDS = 300
+
+# 支付单终态：再次收到回调时不再变更
+FINAL_PAYMENT_STATUSES = {'paid', 'completed', 'refunded', 'partial_refunded'}
+# 微信交易失败状态
+WECHAT_FAILED_TRADE_STATES = {'CLOSED', 'REVOKED', 'PAYERROR'}
+
+
+def apply_wechat_callback(
+    db: Session,
+    payment: Payment,
+    callback: Dict[str, Any],
+    order: Optional[Order] = None
+) -> bool:
+    """
+    将微信支付回调应用到支付单（幂等）
+
+    Args:
+        db: 数据库会话
+        payment: 支付单（调用方负责加锁）
+        callback: 回调数据
+        order: 支付单关联订单（未传入时按需查询）
+
+    Returns:
+        bool: 订单是否由 pending 变更为 paid（调用方据此维护订单计数）
+    """
+    if payment.status in FINAL_PAYMENT_STATUSES:
+        return False
+
+    now = datetime.utcnow()
+    trade_state = callback.get('trade_state')
+    order_paid = False
+
+    if trade_state == 'SUCCESS':
+        payment.status = 'paid'
+        payment.paid_at = now
+        payment.external_payment_id = callback.get('out_trade_no')
+        payment.external_transaction_id = callback.get('transaction_id')
+
+        # 更新订单状态
+        if order is None:
+            order = db.query(Order).filter(Order.id == payment.order_id).first()
+        if order and order.status == 'pending':
+            order.status = 'paid'
+            order.paid_at = now
+            record_status_change_event(db, order, 'pending', 'paid', remark="支付回调确认")
+            order_paid = True
+
+    elif trade_state in WECHAT_FAILED_TRADE_STATES:
+        payment.status = 'failed'
+        payment.failed_at = now
+
+    # 记录回调信息
+    payment.callback_received_at = now
+    payment.callback_data = json.dumps(callback, ensure_ascii=False, default=str)  # 简化存储，生产环境需要加密
+
+    return order_paid
+
+
+def enqueue_callback(
+    db: Session,
+    provider: str,
+    transaction_id: str,
+    out_trade_no: str,
+    trade_state: str,
+    payload: Dict[str, Any],
+    client_ip: Optional[str] = None,
+    user_agent: Optional[str] = None
+) -> bool:
+    """
+    将回调写入收件箱并提交
+
+    Args:
+        db: 数据库会话
+        provider: 支付渠道
+        transaction_id: 网关交易号（与交易状态一起作为去重键）
+        out_trade_no: 商户支付单号
+        trade_state: 交易状态
+        payload: 回调原始数据
+        client_ip: 回调来源IP
+        user_agent: 回调请求UA
+
+    Returns:
+        bool: 新写入返回True，同一交易同一状态的重复回调返回False
+    """
+    entry = PaymentCallbackInbox(
+        provider=provider,
+        transaction_id=transaction_id,
+        out_trade_no=out_trade_no,
+        trade_state=trade_state,
+        raw_payload=json.dumps(payload, ensure_ascii=False, default=str),
+        client_ip=client_ip,
+        user_agent=(user_agent or '')[:500] or None,
+        status='pending',
+        attempts=0,
+        received_at=datetime.utcnow()
+    )
+    db.add(entry)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        logger.info(
+            f"重复的支付回调已忽略: provider={provider}, transaction_id={transaction_id}, trade_state={trade_state}"
+        )
+        return False
+    return True
+
+
+def requeue_failed_callbacks(
+    db: Session,
+    transaction_ids: Optional[Sequence[str]] = None,
+    provider: Optional[str] = None
+) -> int:
+    """
+    将处理失败的回调重新入队（重置尝试次数）
+
+    Args:
+        db: 数据库会话
+        transaction_ids: 只重新入队指定交易号（默认全部失败回调）
+        provider: 只重新入队指定支付渠道
+
+    Returns:
+        int: 重新入队的回调数量
+    """
+    query = db.query(PaymentCallbackInbox).filter(PaymentCallbackInbox.status == 'failed')
+    if transaction_ids:
+        query = query.filter(PaymentCallbackInbox.transaction_id.in_(list(transaction_ids)))
+    if provider:
+        query = query.filter(PaymentCallbackInbox.provider == provider)
+    requeued = query.update({
+        PaymentCallbackInbox.status: 'pending',
+        PaymentCallbackInbox.attempts: 0,
+        PaymentCallbackInbox.next_attempt_at: None,
+    }, synchronize_session=False)
+    db.commit()
+    if requeued:
+        logger.info(f"失败的支付回调已重新入队: {requeued} 条")
+    return requeued
+
+
+class PaymentCallbackWorker:
+    """
+    支付回调后台处理器池
+
+    每个处理器循环领取一批待处理回调（按ID顺序、SKIP LOCKED），
+    批量加载并锁定支付单和订单后逐条应用，整批一次提交；
+    单条回调失败（含支付单尚不存在）只回滚该条（保存点）并按指数退避重试，
+    累计尝试次数超过上限后标记为失败。
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = DEFAULT_CALLBACK_BATCH_SIZE,
+        poll_interval: float = DEFAULT_CALLBACK_POLL_INTERVAL_SECONDS,
+        concurrency: int = DEFAULT_CALLBACK_WORKERS,
+        max_attempts: int = DEFAULT_CALLBACK_MAX_ATTEMPTS
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    def process_batch(self) -> int:
+        """
+        处理一批回调（同步执行，由处理器在线程池中调用）
+
+        Returns:
+            int: 本批领取的回调数量（含失败）
+        """
+        db = self.session_factory()
+        audit_entries = []
+        try:
+            now = datetime.utcnow()
+            entries = db.query(PaymentCallbackInbox).filter(
+                PaymentCallbackInbox.status == 'pending',
+                or_(PaymentCallbackInbox.next_attempt_at.is_(None), PaymentCallbackInbox.next_attempt_at <= now)
+            ).order_by(PaymentCallbackInbox.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+            if not entries:
+                return 0
+
+            # 一次查询加载并锁定本批涉及的支付单和订单（按ID顺序加锁）
+            payments = db.query(Payment).filter(
+                Payment.payment_no.in_({entry.out_trade_no for entry in entries})
+            ).order_by(Payment.id).with_for_update().all()
+            payments_by_no = {payment.payment_no: payment for payment in payments}
+            orders = db.query(Order).filter(
+                Order.id.in_({payment.order_id for payment in payments})
+            ).order_by(Order.id).with_for_update().all() if payments else []
+            orders_by_id = {order.id: order for order in orders}
+
+            counter_deltas: Dict[tuple, int] = defaultdict(int)
+            for entry in entries:
+                entry.attempts += 1
+                payment = payments_by_no.get(entry.out_trade_no)
+                if payment is None:
+                    # 回调可能先于支付单提交到达，按退避重试
+                    self._mark_failed(entry, "支付单不存在", final=entry.attempts >= self.max_attempts)
+                    continue
+
+                old_status = payment.status
+                try:
+                    with db.begin_nested():
+                        order = orders_by_id.get(payment.order_id)
+                        if apply_wechat_callback(db, payment, json.loads(entry.raw_payload), order):
+                            counter_deltas[(order.user_id, 'pending')] -= 1
+                            counter_deltas[(order.user_id, 'paid')] += 1
+                except Exception as e:
+                    self._mark_failed(entry, str(e), final=entry.attempts >= self.max_attempts)
+                    continue
+
+                entry.status = 'processed'
+                entry.processed_at = datetime.utcnow()
+                entry.last_error = None
+                entry.next_attempt_at = None
+                audit_entries.append((
+                    payment.id, payment.user_id, old_status, payment.status, entry.client_ip, entry.user_agent
+                ))
+
+            if counter_deltas:
+                OrderCounterService(db).apply_deltas(counter_deltas)
+
+            db.commit()
+            processed = len(entries)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        # 审计日志在提交后记录
+        for payment_id, user_id, old_status, new_status, client_ip, user_agent in audit_entries:
+            create_payment_audit_log(
+                payment_id=payment_id,
+                user_id=user_id,
+                action='callback',
+                old_status=old_status,
+                new_status=new_status,
+                ip_address=client_ip,
+                user_agent=user_agent
+            )
+        return processed
+
+    def _mark_failed(self, entry: PaymentCallbackInbox, error: str, final: bool) -> None:
+        """记录回调处理失败，final 为True时不再重试（可通过 requeue_failed_callbacks 重新入队）"""
+        entry.last_error = error[:2000]
+        if final:
+            entry.status = 'failed'
+            logger.error(
+                f"支付回调处理失败，已停止重试: transaction_id={entry.transaction_id}, "
+                f"trade_state={entry.trade_state}, error={error}"
+            )
+        else:
+            backoff = min(2 ** entry.attempts, MAX_CALLBACK_RETRY_BACKOFF_SECONDS)
+            entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff)
+            logger.warning(
+                f"支付回调处理失败，{backoff}秒后重试: transaction_id={entry.transaction_id}, error={error}"
+            )
+
+    async def run(self) -> None:
+        """单个处理器循环：批次满额时立即继续，否则等待轮询间隔"""
+        while not self._stopping.is_set():
+            try:
+                processed = await asyncio.to_thread(self.process_batch)
+            except Exception as e:
+                logger.error(f"支付回调处理轮询异常: {e}")
+                processed = 0
+
+            if processed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> List[asyncio.Task]:
+        """在当前事件循环中启动 concurrency 个处理器"""
+        if not self._tasks:
+            self._stopping.clear()
+            self._tasks = [asyncio.create_task(self.run()) for _ in range(self.concurrency)]
+        return self._tasks
+
+    async def stop(self) -> None:
+        """停止全部处理器，等待当前批次完成"""
+        self._stopping.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+            self._tasks = []
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="支付回调收件箱维护")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    requeue_parser = subcommands.add_parser("requeue", help="将处理失败的回调重新入队")
+    requeue_parser.add_argument("--transaction-id", action="append", dest="transaction_ids", help="交易号，可重复")
+    requeue_parser.add_argument("--provider", default=None, help="支付渠道")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        requeued = requeue_failed_callbacks(db, args.transaction_ids, args.provider)
+    finally:
+        db.close()
+    print(f"重新入队 {requeued} 条失败回调")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+文件名：expiry_job.py
+文件路径：app/modules/payment_service/expiry_job.py
+功能描述：超时待支付记录的集合式过期清理任务
+
+主要功能：
+- 按 (created_at, id) 键集分页扫描超时的待支付记录（使用 idx_status_created 索引）
+- 每个分块一条条件 UPDATE 将支付单置为已取消，不逐条查询和提交
+- 分块内批量取消关联的待支付订单，库存按SKU汇总释放
+- 统计并记录每轮处理数量与吞吐量
+
+使用说明：
+- 单次执行：stats = PaymentExpirySweeper.sweep(db, timeout_minutes=30)
+- 后台任务：sweeper = PaymentExpirySweeper(); sweeper.start()
+- 开启后台任务：设置环境变量 PAYMENT_EXPIRY_SWEEPER_ENABLED=1
+
+依赖模块：
+- app.modules.payment_service.models: Payment 数据模型
+- app.modules.order_management.service: 订单批量状态更新
+- app.core.database.SessionLocal: 后台任务独立数据库会话
+
+注意事项：
+- 分块查询使用 SKIP LOCKED，正在被回调处理的支付单留到下一轮
+- 订单仍有其他有效支付记录时不会被取消
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.modules.order_management.models import Order
+from app.modules.order_management.service import OrderService
+from .models import Payment
+
+logger = logging.getLogger(__name__)
+
+
+# 后台任务开关
+EXPIRY_SWEEPER_ENABLED = os.environ.get("PAYMENT_EXPIRY_SWEEPER_ENABLED", "0") == "1"
+
+# 默认配置
+DEFAULT_PAYMENT_TIMEOUT_MINUTES = 30
+DEFAULT_EXPIRY_CHUNK_SIZE = 500
+DEFAULT_SWEEP_INTERVAL_SECONDS = 60.0
+
+# 订单仍视为有效的支付状态
+ACTIVE_PAYMENT_STATUSES = ('pending', 'processing', 'completed', 'paid')
+
+
+class PaymentExpirySweeper:
+    """
+    待支付记录过期清理任务
+
+    每个分块在一个事务内完成：锁定本块支付单、条件 UPDATE、取消关联订单并释放库存。
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        timeout_minutes: int = DEFAULT_PAYMENT_TIMEOUT_MINUTES,
+        chunk_size: int = DEFAULT_EXPIRY_CHUNK_SIZE,
+        interval: float = DEFAULT_SWEEP_INTERVAL_SECONDS,
+        cancel_orders: bool = True
+    ):
+        self.session_factory = session_factory
+        self.timeout_minutes = timeout_minutes
+        self.chunk_size = chunk_size
+        self.interval = interval
+        self.cancel_orders = cancel_orders
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @classmethod
+    def sweep(
+        cls,
+        db: Session,
+        timeout_minutes: int = DEFAULT_PAYMENT_TIMEOUT_MINUTES,
+        chunk_size: int = DEFAULT_EXPIRY_CHUNK_SIZE,
+        cancel_orders: bool = True
+    ) -> Dict[str, Any]:
+        """
+        使用给定会话执行一轮过期清理
+
+        Args:
+            db: 数据库会话
+            timeout_minutes: 超时分钟数
+            chunk_size: 每个分块的支付单数量
+            cancel_orders: 是否同时取消关联的待支付订单
+
+        Returns:
+            dict: 本轮统计（过期支付数、取消订单数、分块数、耗时、吞吐量）
+        """
+        sweeper = cls(timeout_minutes=timeout_minutes, chunk_size=chunk_size, cancel_orders=cancel_orders)
+        return sweeper.sweep_with_session(db)
+
+    def sweep_once(self) -> Dict[str, Any]:
+        """使用独立会话执行一轮过期清理"""
+        db = self.session_factory()
+        try:
+            return self.sweep_with_session(db)
+        finally:
+            db.close()
+
+    def sweep_with_session(self, db: Session) -> Dict[str, Any]:
+        """按键集分块执行过期清理，每个分块单独提交"""
+        started = time.perf_counter()
+        cutoff = datetime.now() - timedelta(minutes=self.timeout_minutes)
+        stats = {"expired_payments": 0, "cancelled_orders": 0, "chunks": 0}
+
+        last_key = None
+        while True:
+            chunk = self._fetch_chunk(db, cutoff, last_key)
+            if not chunk:
+                db.rollback()
+                break
+            last_key = (chunk[-1].created_at, chunk[-1].id)
+
+            try:
+                expired, cancelled = self._expire_chunk(db, chunk, cutoff)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"待支付记录过期清理分块失败: last_id={chunk[-1].id}, error={e}")
+                continue
+
+            stats["expired_payments"] += expired
+            stats["cancelled_orders"] += cancelled
+            stats["chunks"] += 1
+
+            if len(chunk) < self.chunk_size:
+                break
+
+        elapsed = time.perf_counter() - started
+        stats["elapsed_seconds"] = round(elapsed, 3)
+        stats["payments_per_second"] = round(stats["expired_payments"] / elapsed, 1) if elapsed > 0 else 0.0
+        if stats["expired_payments"]:
+            logger.info(f"待支付记录过期清理完成: {stats}")
+        return stats
+
+    def _fetch_chunk(self, db: Session, cutoff: datetime, last_key) -> List:
+        """键集分页读取并锁定一块超时待支付记录（只取所需列）"""
+        query = db.query(Payment.id, Payment.order_id, Payment.created_at).filter(
+            Payment.status == 'pending',
+            Payment.created_at < cutoff
+        )
+        if last_key is not None:
+            last_created_at, last_id = last_key
+            query = query.filter(or_(
+                Payment.created_at > last_created_at,
+                and_(Payment.created_at == last_created_at, Payment.id > last_id)
+            ))
+        return query.order_by(Payment.created_at, Payment.id).limit(
+            self.chunk_size
+        ).with_for_update(skip_locked=True).all()
+
+    def _expire_chunk(self, db: Session, chunk: List, cutoff: datetime):
+        """
+        过期一个分块
+
+        Returns:
+            tuple: (过期支付数, 取消订单数)
+        """
+        payment_ids = [row.id for row in chunk]
+        result = db.execute(
+            update(Payment).where(
+                Payment.id.in_(payment_ids),
+                Payment.status == 'pending',
+                Payment.created_at < cutoff
+            ).values(status='cancelled').execution_options(synchronize_session=False)
+        )
+        expired = result.rowcount
+
+        if not self.cancel_orders:
+            return expired, 0
+
+        # 只取消仍为待支付、且没有其他有效支付记录的订单
+        order_ids = {row.order_id for row in chunk}
+        still_paying = {
+            order_id for (order_id,) in db.query(Payment.order_id).filter(
+                Payment.order_id.in_(order_ids),
+                Payment.status.in_(ACTIVE_PAYMENT_STATUSES)
+            ).distinct()
+        }
+        pending_order_ids = [
+            order_id for (order_id,) in db.query(Order.id).filter(
+                Order.id.in_(order_ids - still_paying),
+                Order.status == 'pending'
+            ).order_by(Order.id)
+        ]
+        if not pending_order_ids:
+            return expired, 0
+
+        result = OrderService(db).apply_batch_status_update(
+            pending_order_ids, 'cancelled', operator_id=None, remark="支付超时自动取消", commit=False
+        )
+        return expired, result["succeeded"]
+
+    async def run(self) -> None:
+        """按间隔持续执行过期清理"""
+        while not self._stopping.is_set():
+            try:
+                await asyncio.to_thread(self.sweep_once)
+            except Exception as e:
+                logger.error(f"待支付记录过期清理异常: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> asyncio.Task:
+        """在当前事件循环中启动后台清理任务"""
+        if self._task is None or self._task.done():
+            self._stopping.clear()
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        """停止后台清理任务，等待当前轮次完成"""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
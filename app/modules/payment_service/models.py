@@ -6,6 +6,7 @@
 - Payment支付模型：支付记录、状态管理、第三方支付集成
 - Refund退款模型：退款申请、退款处理、状态跟踪
 - 支付流水和退款流水管理
+- PaymentCallbackInbox回调收件箱：支付网关回调先落库再由后台批量处理
 使用说明：
 - 导入：from app.models.payment import Payment, Refund
 - 关系：Payment与Order的多对一关系，Payment与Refund的一对多关系
@@ -14,7 +15,7 @@
 - sqlalchemy: 数据库字段定义和关系映射
 """
 
-from sqlalchemy import Column, String, Text, DECIMAL, Integer, ForeignKey, Index, DateTime
+from sqlalchemy import Column, String, Text, DECIMAL, Integer, ForeignKey, Index, DateTime, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.shared.base_models import TimestampMixin
@@ -118,4 +119,45 @@ class Refund(Base, TimestampMixin):
     )
     
     def __repr__(self):
-        return f"<Refund(id={self.id}, refund_no='{self.refund_no}', status='{self.status}')>"
\ No newline at end of file
+        return f"<Refund(id={self.id}, refund_no='{self.refund_no}', status='{self.status}')>"
+
+
+class PaymentCallbackInbox(Base):
+    """
+    支付回调收件箱（只追加）
+    
+    网关回调立即写入并应答，由后台处理器批量消费。
+    (provider, transaction_id, trade_state) 唯一：网关重复推送同一状态时直接去重，
+    同一交易的状态推进（如 PAYERROR 之后的 SUCCESS）作为新回调入队。
+    """
+    __tablename__ = 'payment_callback_inbox'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    
+    # 回调标识
+    provider = Column(String(20), nullable=False)                 # 'wechat', 'alipay'
+    transaction_id = Column(String(200), nullable=False)          # 支付网关交易号（去重键）
+    out_trade_no = Column(String(100), nullable=False)            # 商户支付单号（payments.payment_no）
+    trade_state = Column(String(32), nullable=False)
+    
+    # 原始回调与请求信息
+    raw_payload = Column(Text, nullable=False)                    # 回调原始数据（JSON格式）
+    client_ip = Column(String(45), nullable=True)
+    user_agent = Column(String(500), nullable=True)
+    
+    # 处理状态
+    status = Column(String(20), default='pending', nullable=False)  # 'pending', 'processed', 'failed'
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, nullable=True)              # 重试退避：早于该时间不再领取
+    received_at = Column(DateTime, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+    
+    # 索引优化
+    __table_args__ = (
+        UniqueConstraint('provider', 'transaction_id', 'trade_state', name='uq_callback_provider_transaction_state'),
+        Index('idx_callback_status_id', 'status', 'id'),
+    )
+    
+    def __repr__(self):
+        return f"<PaymentCallbackInbox(id={self.id}, transaction_id='{self.transaction_id}', status='{self.status}')>"
@@ -0,0 +1,348 @@
+"""
+文件名：reconciliation.py
+文件路径：app/modules/payment_service/reconciliation.py
+功能描述：支付网关对账单流式对账服务
+
+主要功能：
+- 逐行读取网关对账单CSV（可达数百MB），内存占用与文件大小无关
+- 按分块 IN 查询，以 external_transaction_id / external_refund_id 匹配支付单和退款单
+- 比对金额与状态，差异逐行写入对账差异报告CSV
+- 反向检查：对账单时间范围内本地已成功、但对账单中没有的支付记录
+- 对账单中已出现的交易号落盘到临时 SQLite 文件，反向检查不占用进程内存
+
+使用说明：
+- 服务调用：
+    service = PaymentReconciliationService(db)
+    summary = service.reconcile("statement.csv", "report.csv")
+- 命令行：python -m app.modules.payment_service.reconciliation statement.csv report.csv
+- 本地样例对账单（代替网关下载）：samples/wechat_statement_sample.csv
+
+依赖模块：
+- app.modules.payment_service.models: Payment、Refund 数据模型
+- app.core.database.SessionLocal: 命令行模式数据库会话
+
+注意事项：
+- 对账单列：trade_time, transaction_id, out_trade_no, record_type(PAYMENT/REFUND), amount, status
+- 对账单只需按行读取，不要求排序
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import tempfile
+from collections import Counter
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .models import Payment, Refund
+
+
+# 本地样例对账单
+SAMPLE_STATEMENT_PATH = Path(__file__).parent / "samples" / "wechat_statement_sample.csv"
+
+# 对账单列与报告列
+STATEMENT_FIELDS = ("trade_time", "transaction_id", "out_trade_no", "record_type", "amount", "status")
+REPORT_FIELDS = (
+    "discrepancy_type", "record_type", "transaction_id", "out_trade_no",
+    "statement_amount", "local_amount", "statement_status", "local_status", "note"
+)
+
+RECORD_PAYMENT = "PAYMENT"
+RECORD_REFUND = "REFUND"
+
+# 差异类型
+MISSING_LOCAL = "missing_local"                  # 对账单有、本地无
+MISSING_IN_STATEMENT = "missing_in_statement"    # 本地已成功、对账单无
+AMOUNT_MISMATCH = "amount_mismatch"
+STATUS_MISMATCH = "status_mismatch"
+INVALID_ROW = "invalid_row"
+
+# 网关成功状态与本地对应的成功状态
+STATEMENT_SUCCESS_STATUS = "SUCCESS"
+LOCAL_PAYMENT_SUCCESS_STATUSES = ('paid', 'completed', 'refunded', 'partial_refunded')
+LOCAL_REFUND_SUCCESS_STATUSES = ('completed',)
+
+DEFAULT_RECONCILE_CHUNK_SIZE = 1000
+
+
+def iter_statement_rows(path) -> Iterator[Dict[str, str]]:
+    """
+    逐行读取对账单
+
+    Yields:
+        dict: 每行对账记录（附带行号 line_no）
+    """
+    with open(path, newline="", encoding="utf-8-sig") as statement_file:
+        reader = csv.DictReader(statement_file)
+        missing = set(STATEMENT_FIELDS) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"对账单缺少列: {', '.join(sorted(missing))}")
+        for line_no, row in enumerate(reader, start=2):
+            if not any(row.values()):
+                continue
+            row["line_no"] = line_no
+            yield row
+
+
+def _chunked(rows: Iterable, size: int) -> Iterator[List]:
+    """按固定大小分块"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _SeenTransactionStore:
+    """
+    已出现交易号集合（落盘到临时 SQLite 文件）
+
+    对账单可能包含数百万笔交易，反向检查需要判断本地交易号是否出现过，
+    使用带主键的临时表代替内存集合。
+    """
+
+    def __init__(self):
+        handle, self.path = tempfile.mkstemp(suffix=".db", prefix="reconcile_")
+        os.close(handle)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute("CREATE TABLE seen (transaction_id TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def add_many(self, transaction_ids: Iterable[str]) -> None:
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO seen (transaction_id) VALUES (?)",
+            ((transaction_id,) for transaction_id in transaction_ids)
+        )
+
+    def missing(self, transaction_ids: List[str]) -> List[str]:
+        """返回未出现过的交易号"""
+        if not transaction_ids:
+            return []
+        placeholders = ",".join("?" * len(transaction_ids))
+        found = {
+            row[0] for row in self._conn.execute(
+                f"SELECT transaction_id FROM seen WHERE transaction_id IN ({placeholders})", transaction_ids
+            )
+        }
+        return [transaction_id for transaction_id in transaction_ids if transaction_id not in found]
+
+    def close(self) -> None:
+        self._conn.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PaymentReconciliationService:
+    """
+    支付对账服务
+
+    对账单按分块处理：每块一次 IN 查询加载本地支付单、一次 IN 查询加载退款单，
+    只读取比对所需的列。
+    """
+
+    def __init__(self, db: Session, chunk_size: int = DEFAULT_RECONCILE_CHUNK_SIZE):
+        """
+        初始化对账服务
+
+        Args:
+            db: 数据库会话
+            chunk_size: 每块对账记录数量（同时是 IN 查询的参数个数上限）
+        """
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def reconcile(
+        self,
+        statement_path,
+        report_path,
+        check_missing_in_statement: bool = True
+    ) -> Dict[str, Any]:
+        """
+        执行对账
+
+        Args:
+            statement_path: 网关对账单路径
+            report_path: 差异报告输出路径
+            check_missing_in_statement: 是否反向检查本地有、对账单无的支付
+
+        Returns:
+            dict: 对账汇总（记录数、匹配数、各类差异数量、金额合计、时间范围）
+        """
+        summary = {
+            "statement_rows": 0,
+            "matched": 0,
+            "statement_amount": Decimal("0.00"),
+            "discrepancies": Counter(),
+            "period_start": None,
+            "period_end": None,
+        }
+
+        with open(report_path, "w", newline="", encoding="utf-8") as report_file, \
+                _SeenTransactionStore() as seen:
+            writer = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+
+            def report(discrepancy_type: str, **fields) -> None:
+                summary["discrepancies"][discrepancy_type] += 1
+                writer.writerow({"discrepancy_type": discrepancy_type, **fields})
+
+            for chunk in _chunked(iter_statement_rows(statement_path), self.chunk_size):
+                self._reconcile_chunk(chunk, summary, report, seen)
+
+            if check_missing_in_statement and summary["period_start"] is not None:
+                self._check_missing_in_statement(summary, report, seen)
+
+        summary["discrepancies"] = dict(summary["discrepancies"])
+        summary["discrepancy_count"] = sum(summary["discrepancies"].values())
+        summary["statement_amount"] = str(summary["statement_amount"])
+        return summary
+
+    def _reconcile_chunk(self, chunk: List[Dict], summary: Dict, report, seen: _SeenTransactionStore) -> None:
+        """对账一块记录"""
+        records = []
+        for row in chunk:
+            summary["statement_rows"] += 1
+            record = self._parse_row(row)
+            if record is None:
+                report(INVALID_ROW, transaction_id=row.get("transaction_id"),
+                       out_trade_no=row.get("out_trade_no"), note=f"第{row['line_no']}行格式错误")
+                continue
+            records.append(record)
+            summary["statement_amount"] += record["amount"]
+            if summary["period_start"] is None or record["trade_time"] < summary["period_start"]:
+                summary["period_start"] = record["trade_time"]
+            if summary["period_end"] is None or record["trade_time"] > summary["period_end"]:
+                summary["period_end"] = record["trade_time"]
+
+        payment_ids = [r["transaction_id"] for r in records if r["record_type"] == RECORD_PAYMENT]
+        refund_ids = [r["transaction_id"] for r in records if r["record_type"] == RECORD_REFUND]
+
+        local_payments = {
+            row.external_transaction_id: row for row in self.db.query(
+                Payment.external_transaction_id, Payment.payment_no, Payment.amount, Payment.status
+            ).filter(Payment.external_transaction_id.in_(payment_ids))
+        } if payment_ids else {}
+        local_refunds = {
+            row.external_refund_id: row for row in self.db.query(
+                Refund.external_refund_id, Refund.refund_no, Refund.amount, Refund.status
+            ).filter(Refund.external_refund_id.in_(refund_ids))
+        } if refund_ids else {}
+        seen.add_many(payment_ids)
+
+        for record in records:
+            if record["record_type"] == RECORD_PAYMENT:
+                local = local_payments.get(record["transaction_id"])
+                success_statuses = LOCAL_PAYMENT_SUCCESS_STATUSES
+            else:
+                local = local_refunds.get(record["transaction_id"])
+                success_statuses = LOCAL_REFUND_SUCCESS_STATUSES
+
+            fields = {
+                "record_type": record["record_type"],
+                "transaction_id": record["transaction_id"],
+                "out_trade_no": record["out_trade_no"],
+                "statement_amount": str(record["amount"]),
+                "statement_status": record["status"],
+            }
+            if local is None:
+                report(MISSING_LOCAL, **fields)
+                continue
+
+            fields.update(local_amount=str(local.amount), local_status=local.status)
+            if Decimal(local.amount) != record["amount"]:
+                report(AMOUNT_MISMATCH, **fields)
+            elif (record["status"] == STATEMENT_SUCCESS_STATUS) != (local.status in success_statuses):
+                report(STATUS_MISMATCH, **fields)
+            else:
+                summary["matched"] += 1
+
+    @staticmethod
+    def _parse_row(row: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """解析并校验单行对账记录，格式错误返回None"""
+        try:
+            record_type = row["record_type"].strip().upper()
+            transaction_id = row["transaction_id"].strip()
+            if record_type not in (RECORD_PAYMENT, RECORD_REFUND) or not transaction_id:
+                return None
+            return {
+                "trade_time": datetime.fromisoformat(row["trade_time"].strip()),
+                "transaction_id": transaction_id,
+                "out_trade_no": row["out_trade_no"].strip(),
+                "record_type": record_type,
+                "amount": Decimal(row["amount"].strip()).quantize(Decimal("0.01")),
+                "status": row["status"].strip().upper(),
+            }
+        except (AttributeError, KeyError, ValueError, InvalidOperation):
+            return None
+
+    def _check_missing_in_statement(self, summary: Dict, report, seen: _SeenTransactionStore) -> None:
+        """按ID键集分页检查对账单时间范围内本地已成功、对账单中没有的支付"""
+        last_id = 0
+        while True:
+            rows = self.db.query(
+                Payment.id, Payment.external_transaction_id, Payment.payment_no, Payment.amount, Payment.status
+            ).filter(
+                Payment.id > last_id,
+                Payment.external_transaction_id.isnot(None),
+                Payment.status.in_(LOCAL_PAYMENT_SUCCESS_STATUSES),
+                Payment.paid_at >= summary["period_start"],
+                Payment.paid_at <= summary["period_end"]
+            ).order_by(Payment.id).limit(self.chunk_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            missing = set(seen.missing([row.external_transaction_id for row in rows]))
+            for row in rows:
+                if row.external_transaction_id in missing:
+                    report(
+                        MISSING_IN_STATEMENT,
+                        record_type=RECORD_PAYMENT,
+                        transaction_id=row.external_transaction_id,
+                        out_trade_no=row.payment_no,
+                        local_amount=str(row.amount),
+                        local_status=row.status
+                    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="支付网关对账单对账")
+    parser.add_argument("statement", nargs="?", default=str(SAMPLE_STATEMENT_PATH), help="对账单CSV路径")
+    parser.add_argument("report", nargs="?", default="reconciliation_report.csv", help="差异报告输出路径")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_RECONCILE_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        summary = PaymentReconciliationService(db, chunk_size=args.chunk_size).reconcile(args.statement, args.report)
+    finally:
+        db.close()
+
+    print(f"对账完成: 记录 {summary['statement_rows']} 条，匹配 {summary['matched']} 条，"
+          f"差异 {summary['discrepancy_count']} 条 {summary['discrepancies']}")
+    print(f"差异报告: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,7 @@ from app.modules.payment_service.models import Payment, Refund
 from app.modules.order_management.models import Order
 from app.modules.user_auth.models import User
 from app.core.auth import get_current_active_user, get_current_admin_user
+from app.core.principal_cache import Principal
 from app.modules.payment_service.auth_helpers import (
     verify_payment_ownership,
     verify_order_ownership_for_payment,
@@ -28,6 +29,9 @@ from app.modules.payment_service.auth_helpers import (
     PaymentSecurityError,
     create_payment_audit_log
 )
+from app.modules.payment_service import callback_queue
+from app.modules.payment_service.callback_queue import apply_wechat_callback, enqueue_callback
+from app.modules.order_management.counter_service import OrderCounterService
 from app.modules.payment_service.service import (
     wechat_pay_service,
     payment_validator,
@@ -52,7 +56,7 @@ def generate_payment_no() -> str:
 async def create_payment(
     payment_data: PaymentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     创建支付单
@@ -106,7 +110,8 @@ async def create_payment(
                 payment_no=payment.payment_no,
                 amount=payment.amount,
                 description=f"订单{order.order_no}支付",
-                user_openid=getattr(current_user, 'wx_openid', None)
+                # 认证主体不含 openid，仅微信支付时单独读取
+                user_openid=db.query(User.wx_openid).filter(User.id == current_user.id).scalar()
             )
             payment_response = create_payment_response(payment, wechat_response)
         except Exception as e:
@@ -136,7 +141,7 @@ async def create_payment(
 async def get_payment(
     payment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """查询支付状态（所有权验证）"""
     
@@ -151,7 +156,7 @@ async def list_payments(
     limit: int = 20,
     offset: int = 0,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     获取支付记录列表
@@ -186,15 +191,36 @@ async def wechat_payment_callback(
     """
     微信支付回调处理
     
-    注意：此端点不需要用户认证，但需要验证微信签名
+    注意：此端点不需要用户认证。签名验证尚未实现：wechat_pay_service.verify_callback
+    目前为演示桩，始终通过，接入微信支付平台证书验签前不得对外开放此端点
+    
+    开启回调队列模式（PAYMENT_CALLBACK_QUEUE_ENABLED=1）时，回调写入收件箱
+    并立即应答，由后台处理器批量处理；否则在请求内同步处理。
     """
-    # TODO: 实现微信签名验证
-    # verify_wechat_signature(callback_data.model_dump(), request.headers.get('Wechatpay-Signature'))
+    if not wechat_pay_service.verify_callback(callback_data.model_dump()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="回调签名验证失败"
+        )
+    
+    if callback_queue.CALLBACK_QUEUE_ENABLED:
+        # 持久化后立即应答，重复回调同样应答成功
+        enqueue_callback(
+            db,
+            provider='wechat',
+            transaction_id=callback_data.transaction_id,
+            out_trade_no=callback_data.out_trade_no,
+            trade_state=callback_data.trade_state,
+            payload=callback_data.model_dump(mode='json'),
+            client_ip=request.client.host if request.client else None,
+            user_agent=request.headers.get('user-agent')
+        )
+        return {"code": "SUCCESS", "message": "处理成功"}
     
     # 根据商户订单号查找支付单
     payment = db.query(Payment).filter(
         Payment.payment_no == callback_data.out_trade_no
-    ).first()
+    ).with_for_update().first()
     
     if not payment:
         raise HTTPException(
@@ -202,28 +228,12 @@ async def wechat_payment_callback(
             detail="支付单不存在"
         )
     
-    # 更新支付状态
+    # 更新支付状态（已处于终态的支付单不重复处理）
     old_status = payment.status
     
-    if callback_data.trade_state == 'SUCCESS':
-        payment.status = 'paid'
-        payment.paid_at = datetime.utcnow()
-        payment.external_payment_id = callback_data.out_trade_no
-        payment.external_transaction_id = callback_data.transaction_id
-        
-        # 更新订单状态
-        order = db.query(Order).filter(Order.id == payment.order_id).first()
-        if order and order.status == 'pending':
-            order.status = 'paid'
-            order.paid_at = datetime.utcnow()
-    
-    elif callback_data.trade_state in ['CLOSED', 'REVOKED', 'PAYERROR']:
-        payment.status = 'failed'
-        payment.failed_at = datetime.utcnow()
-    
-    # 记录回调信息
-    payment.callback_received_at = datetime.utcnow()
-    payment.callback_data = str(callback_data.model_dump())  # 简化存储，生产环境需要加密
+    order_paid = apply_wechat_callback(db, payment, callback_data.model_dump(mode='json'))
+    if order_paid:
+        OrderCounterService(db).record_transition(payment.order.user_id, 'pending', 'paid')
     
     db.commit()
     
@@ -250,7 +260,7 @@ async def admin_list_all_payments(
     limit: int = 50,
     offset: int = 0,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """管理员查看所有支付记录"""
     
@@ -277,7 +287,7 @@ async def admin_update_payment_status(
     payment_id: int,
     status_update: PaymentStatusUpdate,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """管理员更新支付状态（用于处理退款等）"""
     
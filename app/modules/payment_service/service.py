@@ -23,6 +23,8 @@ from fastapi import HTTPException, status
 
 from app.modules.user_auth.models import User
 from app.modules.order_management.models import Order
+from app.modules.order_management.counter_service import OrderCounterService
+from app.modules.order_management.outbox_service import record_status_change_event
 from .models import Payment
 from app.adapters.payment import WechatPayAdapter
 
@@ -253,6 +255,9 @@ class PaymentService:
             order = db.query(Order).filter(Order.id == payment.order_id).first()
             if order and order.status == 'pending':
                 order.status = 'paid'
+                # 订单计数、状态变更事件与状态变更同事务提交
+                OrderCounterService(db).record_transition(order.user_id, 'pending', 'paid')
+                record_status_change_event(db, order, 'pending', 'paid', remark="支付完成")
         
         db.commit()
         db.refresh(payment)
@@ -443,6 +448,9 @@ class PaymentService:
         """
         取消超时的待支付记录
         
+        按键集分块执行条件 UPDATE，并批量取消关联的待支付订单、释放库存，
+        详见 PaymentExpirySweeper。
+        
         Args:
             db: 数据库会话
             timeout_minutes: 超时分钟数
@@ -450,14 +458,10 @@ class PaymentService:
         Returns:
             int: 取消的支付记录数量
         """
-        expired_payments = PaymentService.get_pending_payments(db, timeout_minutes)
-        
-        count = 0
-        for payment in expired_payments:
-            PaymentService.update_payment_status(db, payment.id, 'cancelled')
-            count += 1
+        from .expiry_job import PaymentExpirySweeper
         
-        return count
+        stats = PaymentExpirySweeper.sweep(db, timeout_minutes=timeout_minutes)
+        return stats["expired_payments"]
 
 
 # 创建服务实例
@@ -508,8 +512,13 @@ class WechatPayService:
         }
     
     def verify_callback(self, callback_data: dict) -> bool:
-        """验证回调签名"""
-        # 演示实现，实际需要验证微信签名
+        """
+        验证回调签名（演示桩：尚未实现，始终返回True）
+        
+        回调报文为 JSON 且不携带签名，WechatPayCodec 的 MD5/HMAC-SHA256 验签
+        （WechatPayAdapter.verify_callback_signature）无法直接适用；
+        实际接入需使用微信支付平台证书验证 Wechatpay-Signature 请求头
+        """
         return True
     
     def process_callback(self, xml_data: str) -> dict:
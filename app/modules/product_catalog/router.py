@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.core.database import get_db
-from app.modules.user_auth.models import User
+from app.core.principal_cache import Principal
 from .models import Product, Category, Brand, SKU
 from .schemas import (
     ProductRead, ProductCreate, ProductUpdate,
@@ -16,9 +16,13 @@ from .schemas import (
     SKURead, SKUCreate, SKUUpdate,
 )
 from app.core.auth import get_current_admin_user
+from app.shared.serialization import FastJSONResponse, RowSerializer
 
 router = APIRouter()
 
+# 列表接口按响应字段直接查询列，跳过 ORM 实例化和响应模型二次校验
+PRODUCT_ROWS = RowSerializer.for_schema(ProductRead, Product)
+
 
 # ============ 分类管理API ============
 
@@ -26,7 +30,7 @@ router = APIRouter()
 async def create_category(
     payload: CategoryCreate, 
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """创建新分类（需要管理员权限）"""
     try:
@@ -72,7 +76,7 @@ async def list_categories(
 async def create_brand(
     payload: BrandCreate, 
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """创建新品牌（需要管理员权限）"""
     try:
@@ -96,7 +100,7 @@ async def create_brand(
 async def create_product(
     payload: ProductCreate, 
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """创建新商品（需要管理员权限）"""
     try:
@@ -114,7 +118,7 @@ async def create_product(
         )
 
 
-@router.get("/product-catalog/products", response_model=List[ProductRead])
+@router.get("/product-catalog/products", response_model=List[ProductRead], response_class=FastJSONResponse)
 async def list_products(
     search: Optional[str] = Query(None, description="搜索商品名称或描述"),
     category_id: Optional[int] = Query(None, description="按分类筛选"),
@@ -123,7 +127,7 @@ async def list_products(
     db: Session = Depends(get_db)
 ):
     """获取商品列表，支持分页和筛选"""
-    query = db.query(Product).filter(Product.is_deleted == False)
+    query = db.query(*PRODUCT_ROWS.columns).filter(Product.is_deleted == False)
     
     if search:
         query = query.filter(
@@ -137,8 +141,7 @@ async def list_products(
     if status is not None:
         query = query.filter(Product.status == status)
     
-    products = query.all()
-    return products
+    return FastJSONResponse(PRODUCT_ROWS.serialize(query.all()))
 
 
 @router.get("/product-catalog/products/{product_id}", response_model=ProductRead)
@@ -161,7 +164,7 @@ async def update_product(
     product_id: int,
     payload: ProductUpdate,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """更新商品信息（需要管理员权限）"""
     product = db.query(Product).get(product_id)
@@ -191,7 +194,7 @@ async def update_product(
 async def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """删除商品（需要管理员权限，软删除）"""
     product = db.query(Product).get(product_id)
@@ -218,7 +221,7 @@ async def delete_product(
 async def create_sku(
     payload: SKUCreate, 
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """创建新SKU（需要管理员权限）"""
     # 验证产品是否存在
@@ -297,7 +300,7 @@ async def update_sku(
     sku_id: int,
     payload: SKUUpdate,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """更新SKU（需要管理员权限）"""
     sku = db.query(SKU).filter(SKU.id == sku_id).first()
@@ -326,7 +329,7 @@ async def update_sku(
 async def delete_sku(
     sku_id: int,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """删除SKU（需要管理员权限）"""
     sku = db.query(SKU).filter(SKU.id == sku_id).first()
@@ -354,7 +357,7 @@ async def create_product_sku(
     product_id: int,
     payload: dict,  # 使用dict来兼容测试中的数据格式
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """为特定产品创建SKU（兼容接口）"""
     # 验证产品是否存在
@@ -15,30 +15,30 @@
 - app.core.database: 数据库连接管理
 - app.core.redis_client: Redis缓存客户端
 创建时间：2025-09-16
-最后修改：2025-09-16
+最后修改：2026-10-19
 """
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Dict, Any
 from redis import Redis
 
 from app.core.database import get_db
 from app.core.auth import get_current_user
+from app.core.principal_cache import Principal
 from app.core.redis_client import get_redis_connection
 from .service import CartService
 
 
 async def get_current_active_user(
-    current_user: Dict[str, Any] = Depends(get_current_user)
-) -> Dict[str, Any]:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     获取当前活跃用户
     
     Args:
-        current_user: 当前用户信息
+        current_user: 当前认证主体
         
     Returns:
-        用户信息字典
+        当前认证主体
         
     Raises:
         HTTPException: 当用户不存在或未激活时
@@ -50,7 +50,7 @@ async def get_current_active_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not current_user.get("is_active", False):
+    if not current_user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="用户账号未激活"
@@ -113,13 +113,13 @@ def validate_cart_business_rules(
 
 
 def get_user_id_from_token(
-    current_user: Dict[str, Any] = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ) -> int:
     """
     从JWT Token中提取用户ID
     
     Args:
-        current_user: 当前用户信息
+        current_user: 当前认证主体
         
     Returns:
         用户ID
@@ -127,17 +127,10 @@ def get_user_id_from_token(
     Raises:
         HTTPException: 当用户ID不存在时
     """
-    user_id = current_user.get("sub") or current_user.get("user_id")
-    if not user_id:
+    if not current_user.id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="无效的用户令牌"
         )
     
-    try:
-        return int(user_id)
-    except (ValueError, TypeError):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="用户ID格式错误"
-        )
+    return current_user.id
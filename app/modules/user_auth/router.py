@@ -1,26 +1,34 @@
 """
 用户认证相关API路由
 """
-from datetime import timedelta
+from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from app.core.database import get_db
 from app.modules.user_auth.models import User
 from app.core.auth import (
-    authenticate_user, 
+    authenticate_user_async, 
     create_access_token, 
     create_refresh_token,
-    get_password_hash,
+    get_password_hash_async,
+    verify_password_async,
     get_current_user,
     get_current_active_user,
+    get_current_user_record,
     decode_token,
+    ensure_token_not_revoked,
+    revoke_token,
+    security,
     AuthenticationError,
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    REFRESH_TOKEN_EXPIRE_DAYS
 )
+from app.core.principal_cache import Principal
 from app.modules.user_auth.schemas import (
     UserRegister,
     UserLogin, 
@@ -28,8 +36,11 @@ from app.modules.user_auth.schemas import (
     UserUpdate,
     UserChangePassword,
     Token,
-    TokenRefresh
+    TokenRefresh,
+    SessionRead
 )
+from app.modules.user_auth.session_service import SessionService, new_session_key
+from app.core.session_activity import hash_session_key
 
 router = APIRouter()
 
@@ -59,7 +70,7 @@ async def register_user(
     
     # 创建新用户
     try:
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hash_async(user_data.password)
         
         db_user = User(
             username=user_data.username,
@@ -88,11 +99,15 @@ async def register_user(
 @router.post("/user-auth/login", response_model=Token)
 async def login_user(
     user_credentials: UserLogin,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """用户登录"""
+    client_ip = request.client.host if request.client else None
     try:
-        user = authenticate_user(db, user_credentials.username, user_credentials.password)
+        user = await authenticate_user_async(
+            db, user_credentials.username, user_credentials.password, client_ip
+        )
         
         if not user:
             # 记录登录失败事件（用户名不存在或密码错误）
@@ -112,9 +127,20 @@ async def login_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        # 创建服务端会话，会话键随令牌下发
+        session_key = new_session_key()
+        SessionService.create_session(
+            db,
+            user.id,
+            session_key,
+            expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+            ip_address=client_ip,
+            user_agent=request.headers.get("user-agent")
+        )
+        
         # 创建访问令牌和刷新令牌
-        access_token = create_access_token(data={"sub": str(user.id)})
-        refresh_token = create_refresh_token(data={"sub": str(user.id)})
+        access_token = create_access_token(data={"sub": str(user.id), "sid": session_key})
+        refresh_token = create_refresh_token(data={"sub": str(user.id), "sid": session_key})
         
         return {
             "access_token": access_token,
@@ -171,6 +197,8 @@ async def refresh_token(
         if payload.get("type") != "refresh":
             raise AuthenticationError("Invalid token type")
         
+        ensure_token_not_revoked(payload)
+        
         user_id: int = payload.get("sub")
         if user_id is None:
             raise AuthenticationError("Invalid token payload")
@@ -180,9 +208,20 @@ async def refresh_token(
         if not user or not user.is_active:
             raise AuthenticationError("User not found or inactive")
         
+        # 校验会话仍有效，并随新刷新令牌延长会话有效期
+        token_claims = {"sub": str(user.id)}
+        session_key = payload.get("sid")
+        if session_key:
+            session = SessionService.get_active_session(db, session_key)
+            if session is None or session.user_id != user.id:
+                raise AuthenticationError("Session has been revoked")
+            session.expires_at = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+            db.commit()
+            token_claims["sid"] = session_key
+        
         # 创建新的访问令牌
-        access_token = create_access_token(data={"sub": str(user.id)})
-        new_refresh_token = create_refresh_token(data={"sub": user.id})
+        access_token = create_access_token(data=token_claims)
+        new_refresh_token = create_refresh_token(data=token_claims)
         
         return {
             "access_token": access_token,
@@ -201,7 +240,7 @@ async def refresh_token(
 
 @router.get("/user-auth/me", response_model=UserRead)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user_record)
 ):
     """获取当前用户信息"""
     return current_user
@@ -210,7 +249,7 @@ async def get_current_user_info(
 @router.put("/user-auth/me", response_model=UserRead)
 async def update_current_user(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """更新当前用户信息"""
@@ -247,20 +286,19 @@ async def update_current_user(
 @router.put("/user-auth/password")
 async def change_password(
     password_data: UserChangePassword,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """修改密码"""
     # 验证旧密码
-    from app.core.auth import verify_password
-    if not verify_password(password_data.old_password, current_user.password_hash):
+    if not await verify_password_async(password_data.old_password, current_user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect current password"
         )
     
     # 更新密码
-    current_user.password_hash = get_password_hash(password_data.new_password)
+    current_user.password_hash = await get_password_hash_async(password_data.new_password)
     
     try:
         db.commit()
@@ -275,20 +313,84 @@ async def change_password(
 
 @router.post("/user-auth/logout")
 async def logout_user(
-    current_user: User = Depends(get_current_active_user)
+    token_data: Optional[TokenRefresh] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: Principal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
 ):
-    """用户登出"""
-    # 注意：由于JWT是无状态的，真正的登出需要在客户端删除token
-    # 或者实现token黑名单机制（需要Redis等外部存储）
+    """用户登出（吊销当前访问令牌和会话，可同时吊销刷新令牌）"""
+    revoke_token(credentials.credentials)
+    
+    session_key = decode_token(credentials.credentials).get("sid")
+    if session_key:
+        SessionService.revoke_session_by_key(db, current_user.id, session_key)
+    
+    # 只吊销属于当前用户的刷新令牌
+    if token_data is not None:
+        try:
+            payload = decode_token(token_data.refresh_token)
+        except AuthenticationError:
+            payload = {}
+        if payload.get("type") == "refresh" and str(payload.get("sub")) == str(current_user.id):
+            revoke_token(token_data.refresh_token)
+    
     return {"message": "Logged out successfully"}
 
 
+def _current_session_key(credentials: HTTPAuthorizationCredentials) -> Optional[str]:
+    """当前访问令牌所属会话键"""
+    return decode_token(credentials.credentials).get("sid")
+
+
+@router.get("/user-auth/sessions", response_model=list[SessionRead])
+async def list_sessions(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: Principal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """列出当前用户的活跃会话"""
+    session_key = _current_session_key(credentials)
+    current_hash = hash_session_key(session_key) if session_key else None
+    
+    sessions = SessionService.list_active_sessions(db, current_user.id)
+    return [
+        SessionRead.model_validate(session).model_copy(update={"is_current": session.token_hash == current_hash})
+        for session in sessions
+    ]
+
+
+@router.delete("/user-auth/sessions/{session_id}")
+async def revoke_session(
+    session_id: int,
+    current_user: Principal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """吊销当前用户的指定会话"""
+    if not SessionService.revoke_session(db, current_user.id, session_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found"
+        )
+    return {"message": "Session revoked successfully"}
+
+
+@router.delete("/user-auth/sessions")
+async def revoke_other_sessions(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: Principal = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """吊销当前用户除当前会话外的全部会话"""
+    revoked = SessionService.revoke_other_sessions(db, current_user.id, _current_session_key(credentials))
+    return {"message": "Other sessions revoked successfully", "revoked": revoked}
+
+
 # 管理员相关路由（可选）
 @router.get("/user-auth/users", response_model=list[UserRead])
 async def list_users(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """获取用户列表（仅限管理员）"""
@@ -301,7 +403,7 @@ async def list_users(
 @router.get("/user-auth/users/{user_id}", response_model=UserRead)
 async def get_user_by_id(
     user_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """通过ID获取用户信息"""
@@ -132,6 +132,17 @@ class TokenRefresh(BaseSchema):
     refresh_token: str
 
 
+class SessionRead(BaseSchema):
+    """登录会话模式"""
+    id: int
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    created_at: datetime
+    last_accessed_at: datetime
+    expires_at: datetime
+    is_current: bool = False
+
+
 class TokenData(BaseSchema):
     """令牌数据模式（用于JWT解析）"""
     user_id: Optional[int] = None
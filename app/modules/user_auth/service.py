@@ -17,8 +17,10 @@ from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
-from app.modules.user_auth.models import User
+from app.modules.user_auth.models import User, UserRole, RolePermission
 from app.core.auth import create_access_token, create_refresh_token, verify_password, get_password_hash
+from app.core.principal_cache import invalidate_principal
+from app.core.permission_resolver import get_permission_resolver
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -157,6 +159,8 @@ class UserService:
         try:
             db.commit()
             db.refresh(user)
+            # 角色、激活状态等可能变化，失效认证主体缓存
+            invalidate_principal(user_id)
             return user
         except IntegrityError:
             db.rollback()
@@ -204,4 +208,70 @@ class UserService:
             "access_token": access_token,
             "refresh_token": None,  # 暂时不实现refresh_token
             "token_type": "bearer"
-        }
\ No newline at end of file
+        }
+
+
+class RoleService:
+    """角色分配与角色权限管理（变更后失效权限位掩码缓存）"""
+    
+    @staticmethod
+    def assign_role(db: Session, user_id: int, role_id: int, assigned_by: Optional[int] = None) -> bool:
+        """
+        为用户分配角色
+        
+        Returns:
+            bool: 新分配返回True，已拥有该角色返回False
+        """
+        if db.get(UserRole, (user_id, role_id)) is not None:
+            return False
+        db.add(UserRole(user_id=user_id, role_id=role_id, assigned_by=assigned_by))
+        db.commit()
+        get_permission_resolver().invalidate_user(user_id)
+        return True
+    
+    @staticmethod
+    def remove_role(db: Session, user_id: int, role_id: int) -> bool:
+        """
+        移除用户角色
+        
+        Returns:
+            bool: 移除成功返回True，用户未拥有该角色返回False
+        """
+        deleted = db.query(UserRole).filter(
+            UserRole.user_id == user_id, UserRole.role_id == role_id
+        ).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            get_permission_resolver().invalidate_user(user_id)
+        return bool(deleted)
+    
+    @staticmethod
+    def grant_permission(db: Session, role_id: int, permission_id: int, granted_by: Optional[int] = None) -> bool:
+        """
+        为角色授予权限（持有该角色的用户缓存通过角色版本失效）
+        
+        Returns:
+            bool: 新授予返回True，角色已拥有该权限返回False
+        """
+        if db.get(RolePermission, (role_id, permission_id)) is not None:
+            return False
+        db.add(RolePermission(role_id=role_id, permission_id=permission_id, granted_by=granted_by))
+        db.commit()
+        get_permission_resolver().bump_role(role_id)
+        return True
+    
+    @staticmethod
+    def revoke_permission(db: Session, role_id: int, permission_id: int) -> bool:
+        """
+        收回角色权限
+        
+        Returns:
+            bool: 收回成功返回True，角色未拥有该权限返回False
+        """
+        deleted = db.query(RolePermission).filter(
+            RolePermission.role_id == role_id, RolePermission.permission_id == permission_id
+        ).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            get_permission_resolver().bump_role(role_id)
+        return bool(deleted)
@@ -0,0 +1,169 @@
+"""
+文件名：session_service.py
+文件路径：app/modules/user_auth/session_service.py
+功能描述：服务端登录会话管理
+
+主要功能：
+- 登录时创建会话记录，只保存会话键的 SHA-256 哈希（sessions.token_hash）
+- 按会话键哈希查询会话（刷新令牌时校验会话有效）
+- 通过 user_id 索引列出、吊销用户的活跃会话
+- 吊销会话时写入令牌吊销列表，该会话签发的访问令牌立即失效，刷新令牌校验会话表
+
+使用说明：
+- 登录：session_key = new_session_key(); SessionService.create_session(db, user.id, session_key, expires_at)
+- 列表：SessionService.list_active_sessions(db, user_id)
+- 吊销：SessionService.revoke_session(db, user_id, session_id)
+
+依赖模块：
+- app.core.session_activity: 会话键哈希、最近访问时间缓冲区
+- app.core.token_revocation: 令牌吊销列表
+
+注意事项：
+- 会话键随令牌下发（sid 声明），令牌签名保证其不可伪造
+- 最近访问时间由认证依赖记入内存并批量写入，列表接口合并本进程尚未写入的访问时间
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import secrets
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.auth import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.session_activity import get_session_activity_buffer, hash_session_key, session_revocation_id
+from app.core.token_revocation import get_token_revocation_list
+from app.modules.user_auth.models import Session as UserSession
+
+
+def new_session_key() -> str:
+    """生成会话键"""
+    return secrets.token_urlsafe(32)
+
+
+class SessionService:
+    """登录会话管理服务"""
+
+    @staticmethod
+    def create_session(
+        db: Session,
+        user_id: int,
+        session_key: str,
+        expires_at: datetime,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ) -> UserSession:
+        """
+        创建登录会话
+
+        Args:
+            db: 数据库会话
+            user_id: 用户ID
+            session_key: 会话键（只保存哈希）
+            expires_at: 会话过期时间（与刷新令牌一致）
+            ip_address: 客户端IP
+            user_agent: 客户端标识
+
+        Returns:
+            UserSession: 会话记录
+        """
+        now = datetime.utcnow()
+        session = UserSession(
+            user_id=user_id,
+            token_hash=hash_session_key(session_key),
+            expires_at=expires_at,
+            last_accessed_at=now,
+            is_active=True,
+            ip_address=ip_address,
+            user_agent=user_agent[:512] if user_agent else None
+        )
+        db.add(session)
+        db.commit()
+        return session
+
+    @staticmethod
+    def get_active_session(db: Session, session_key: str) -> Optional[UserSession]:
+        """按会话键哈希查询未过期的活跃会话"""
+        return db.query(UserSession).filter(
+            UserSession.token_hash == hash_session_key(session_key),
+            UserSession.is_active.is_(True),
+            UserSession.expires_at > datetime.utcnow()
+        ).first()
+
+    @staticmethod
+    def list_active_sessions(db: Session, user_id: int) -> List[UserSession]:
+        """
+        列出用户的活跃会话（按最近访问时间倒序）
+
+        最近访问时间合并本进程尚未写入数据库的访问记录
+        """
+        sessions = db.query(UserSession).filter(
+            UserSession.user_id == user_id,
+            UserSession.is_active.is_(True),
+            UserSession.expires_at > datetime.utcnow()
+        ).all()
+
+        buffer = get_session_activity_buffer()
+        for session in sessions:
+            pending = buffer.pending(session.token_hash)
+            if pending is not None and pending > session.last_accessed_at:
+                # 只用于展示，不标记修改
+                db.expunge(session)
+                session.last_accessed_at = pending
+        sessions.sort(key=lambda session: session.last_accessed_at, reverse=True)
+        return sessions
+
+    @staticmethod
+    def revoke_session(db: Session, user_id: int, session_id: int) -> bool:
+        """
+        吊销用户的指定会话
+
+        Returns:
+            bool: 吊销成功返回True，会话不存在、不属于该用户或已吊销返回False
+        """
+        return SessionService._revoke(db, user_id, UserSession.id == session_id) == 1
+
+    @staticmethod
+    def revoke_session_by_key(db: Session, user_id: int, session_key: str) -> bool:
+        """按会话键吊销会话（登出当前会话）"""
+        return SessionService._revoke(db, user_id, UserSession.token_hash == hash_session_key(session_key)) == 1
+
+    @staticmethod
+    def revoke_other_sessions(db: Session, user_id: int, keep_session_key: Optional[str] = None) -> int:
+        """
+        吊销用户除当前会话外的全部活跃会话
+
+        Returns:
+            int: 吊销的会话数
+        """
+        criteria = []
+        if keep_session_key:
+            criteria.append(UserSession.token_hash != hash_session_key(keep_session_key))
+        return SessionService._revoke(db, user_id, *criteria)
+
+    @staticmethod
+    def _revoke(db: Session, user_id: int, *criteria) -> int:
+        rows = db.query(UserSession.id, UserSession.token_hash, UserSession.expires_at).filter(
+            UserSession.user_id == user_id,
+            UserSession.is_active.is_(True),
+            *criteria
+        ).all()
+        if not rows:
+            return 0
+
+        db.query(UserSession).filter(UserSession.id.in_([row.id for row in rows])).update(
+            {UserSession.is_active: False}, synchronize_session=False
+        )
+        db.commit()
+
+        # 该会话签发的访问令牌在吊销列表中按会话标识拒绝；刷新令牌由会话表校验，
+        # 吊销标记只需保留到已签发访问令牌全部过期
+        revocations = get_token_revocation_list()
+        buffer = get_session_activity_buffer()
+        access_expires_at = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        for row in rows:
+            revocations.revoke(session_revocation_id(row.token_hash), min(row.expires_at, access_expires_at))
+            buffer.discard(row.token_hash)
+        return len(rows)
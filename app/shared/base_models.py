@@ -3,13 +3,23 @@
 
 提供跨模块共享的基础模型类和通用数据结构
 根据 docs/design/modules/data-models/overview.md 文档规范实现
+
+- BaseModel.to_dict 按模型类预编译列访问器和转换器（每个类只生成一次）
+- JSONType 使用可替换的JSON编解码器，安装 orjson 时默认使用 orjson
 """
 
 import json
 from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime, Boolean, func
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import Column, Integer, DateTime, Boolean, func, inspect
 from sqlalchemy.types import TypeDecorator, TEXT
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
 # 从技术基础设施层导入统一的Base类
 from app.core.database import Base
 
@@ -46,13 +56,7 @@ class BaseModel(Base):
     
     def to_dict(self):
         """转换为字典格式"""
-        result = {}
-        for column in self.__table__.columns:
-            value = getattr(self, column.name)
-            if isinstance(value, datetime):
-                value = value.isoformat()
-            result[column.name] = value
-        return result
+        return _get_dict_serializer(type(self))(self)
     
     def from_dict(self, data):
         """从字典创建实例"""
@@ -61,18 +65,103 @@ class BaseModel(Base):
                 setattr(self, key, value)
 
 
+class ModelDictSerializer:
+    """模型字典序列化器：列访问器和转换器按模型类生成一次"""
+    
+    def __init__(self, model_class):
+        mapper = inspect(model_class)
+        columns = list(model_class.__table__.columns)
+        self.names = tuple(column.name for column in columns)
+        # 列名可能与属性名不同，按映射属性读取
+        keys = [mapper.get_property_by_column(column).key for column in columns]
+        self._loaded_getter = itemgetter(*keys)
+        self._getter = attrgetter(*keys)
+        self._single = len(keys) == 1
+        self._datetime_indexes = tuple(
+            index for index, column in enumerate(columns) if isinstance(column.type, DateTime)
+        )
+    
+    def __call__(self, instance) -> Dict[str, Any]:
+        try:
+            # 已加载的列值直接从实例字典读取，跳过属性描述符
+            values = self._loaded_getter(instance.__dict__)
+        except KeyError:
+            # 存在过期或未加载的列时走属性访问（触发延迟加载）
+            values = self._getter(instance)
+        values = [values] if self._single else list(values)
+        for index in self._datetime_indexes:
+            value = values[index]
+            # 软删除等场景可能暂存SQL表达式，只转换datetime
+            if isinstance(value, datetime):
+                values[index] = value.isoformat()
+        return dict(zip(self.names, values))
+
+
+_dict_serializers: Dict[type, ModelDictSerializer] = {}
+
+
+def _get_dict_serializer(model_class) -> ModelDictSerializer:
+    serializer = _dict_serializers.get(model_class)
+    if serializer is None:
+        serializer = _dict_serializers[model_class] = ModelDictSerializer(model_class)
+    return serializer
+
+
+class JSONCodec:
+    """JSON编解码器（dumps 返回 str，loads 接受 str）"""
+    
+    def __init__(self, name: str, dumps: Callable[[Any], str], loads: Callable[[str], Any]):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+    
+    def __repr__(self):
+        return f"JSONCodec({self.name!r})"
+
+
+STDLIB_JSON_CODEC = JSONCodec("json", lambda value: json.dumps(value, ensure_ascii=False), json.loads)
+
+ORJSON_CODEC = JSONCodec(
+    "orjson", lambda value: orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode(), orjson.loads
+) if orjson is not None else None
+
+_json_codec: JSONCodec = ORJSON_CODEC or STDLIB_JSON_CODEC
+
+
+def get_json_codec() -> JSONCodec:
+    """获取 JSONType 默认编解码器"""
+    return _json_codec
+
+
+def set_json_codec(codec: JSONCodec) -> JSONCodec:
+    """
+    替换 JSONType 默认编解码器（未指定 codec 的列生效）
+    
+    Returns:
+        JSONCodec: 原编解码器
+    """
+    global _json_codec
+    previous, _json_codec = _json_codec, codec
+    return previous
+
+
 class JSONType(TypeDecorator):
-    """JSON数据类型"""
+    """JSON数据类型（JSONType(codec=STDLIB_JSON_CODEC) 可为单列指定编解码器）"""
     impl = TEXT
+    cache_ok = True
+    
+    def __init__(self, *args, codec: Optional[JSONCodec] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.codec = codec
     
     def process_bind_param(self, value, dialect):
         if value is not None:
-            return json.dumps(value, ensure_ascii=False)
+            return (self.codec or _json_codec).dumps(value)
         return value
     
     def process_result_value(self, value, dialect):
         if value is not None:
-            return json.loads(value)
+            return (self.codec or _json_codec).loads(value)
         return value
 
 
@@ -94,4 +183,7 @@ class ModelRegistry:
         return list(cls._models.values())
 
 
-__all__ = ['Base', 'BaseModel', 'TimestampMixin', 'SoftDeleteMixin', 'JSONType', 'ModelRegistry']
\ No newline at end of file
+__all__ = [
+    'Base', 'BaseModel', 'TimestampMixin', 'SoftDeleteMixin', 'JSONType', 'JSONCodec', 'ModelRegistry',
+    'STDLIB_JSON_CODEC', 'ORJSON_CODEC', 'get_json_codec', 'set_json_codec'
+]
\ No newline at end of file
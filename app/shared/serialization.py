@@ -0,0 +1,101 @@
+"""
+文件名：serialization.py
+文件路径：app/shared/serialization.py
+功能描述：热点列表接口的快速序列化
+
+主要功能：
+- FastJSONResponse：安装 orjson 时使用 orjson 编码，否则回退标准库（输出格式与 Pydantic JSON 模式一致）
+- RowSerializer：按响应模式字段只查询所需列，行元组直接组装为响应字典，跳过 ORM 实例化和 Pydantic 二次校验
+
+使用说明：
+- 定义：PRODUCT_ROWS = RowSerializer.for_schema(ProductRead, Product)
+- 查询：rows = db.query(*PRODUCT_ROWS.columns).filter(...).all()
+- 响应：return FastJSONResponse(PRODUCT_ROWS.serialize(rows))
+- 路由保留 response_model 用于 OpenAPI 文档，直接返回 Response 时 FastAPI 不再校验
+
+依赖模块：
+- orjson（可选）
+
+注意事项：
+- 响应模式字段必须全部对应模型列（关系字段需 exclude），否则在定义时抛出 ValueError
+- Decimal 编码为字符串、datetime 编码为 ISO 8601，与 Pydantic JSON 模式输出一致
+
+创建时间：2026-10-18
+最后修改：2026-10-18
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def _json_default(value: Any) -> Any:
+    """orjson/标准库无法直接编码的类型"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_json_bytes(content: Any) -> bytes:
+    """编码为 UTF-8 JSON 字节（优先使用 orjson）"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_json_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """快速JSON响应（orjson 可选）"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json_bytes(content)
+
+
+class RowSerializer:
+    """行元组序列化器：按响应字段顺序查询列，直接组装字典"""
+
+    def __init__(self, fields: Sequence[str], columns: Sequence[Any]):
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.columns: Tuple[Any, ...] = tuple(columns)
+
+    @classmethod
+    def for_schema(cls, schema: Any, model: Any, exclude: Iterable[str] = ()) -> "RowSerializer":
+        """
+        按 Pydantic 响应模式生成序列化器
+
+        Args:
+            schema: Pydantic 模型类（字段顺序即输出顺序）
+            model: SQLAlchemy 模型类
+            exclude: 不输出的字段（如关系字段）
+
+        Raises:
+            ValueError: 响应字段在模型中没有对应的列
+        """
+        excluded = set(exclude)
+        fields = [name for name in schema.model_fields if name not in excluded]
+        table_columns = model.__table__.columns
+        missing = [name for name in fields if name not in table_columns]
+        if missing:
+            raise ValueError(f"{schema.__name__} 字段没有对应的 {model.__name__} 列: {', '.join(missing)}")
+        return cls(fields, [getattr(model, name) for name in fields])
+
+    def serialize(self, rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+        """行元组列表转换为响应字典列表"""
+        fields = self.fields
+        return [dict(zip(fields, row)) for row in rows]
@@ -58,6 +58,13 @@ def mock_setup(mocker):
     mock_redis.delete.return_value = 1
     mocker.patch('app.core.redis_client.get_redis_connection', return_value=mock_redis)
     
+    # 登录失败窗口、令牌吊销列表、权限缓存、会话访问缓冲区、认证主体缓存为进程级状态，每个测试使用新实例
+    mocker.patch('app.core.login_throttle._login_throttle', None)
+    mocker.patch('app.core.token_revocation._token_revocation_list', None)
+    mocker.patch('app.core.permission_resolver._permission_resolver', None)
+    mocker.patch('app.core.session_activity._session_activity_buffer', None)
+    mocker.patch('app.core.principal_cache._principal_cache', None)
+    
     # 日志Mock（避免测试时产生真实日志）
     # mock_logger = mocker.Mock()
     # mocker.patch('app.core.security_logger.security_logger', mock_logger)  # 暂时注释，避免AttributeError
@@ -170,7 +177,7 @@ def clean_database_after_test(request):
         pass
 
 @pytest.fixture(scope="function")
-def unit_test_client(unit_test_engine, mock_admin_user):
+def unit_test_client(unit_test_engine, mock_admin_principal):
     """单元测试客户端"""
     # 导入认证函数
     from app.core.auth import get_current_user, get_current_active_user, get_current_admin_user
@@ -188,13 +195,13 @@ def unit_test_client(unit_test_engine, mock_admin_user):
             database.close()
         
     async def override_get_current_user():
-        return mock_admin_user
+        return mock_admin_principal
         
     async def override_get_current_active_user():
-        return mock_admin_user
+        return mock_admin_principal
         
     async def override_get_current_admin_user():
-        return mock_admin_user
+        return mock_admin_principal
     
     # 清除现有依赖覆盖
     app.dependency_overrides.clear()
@@ -259,7 +266,7 @@ def smoke_test_db(smoke_test_engine):
         database.close()
 
 @pytest.fixture(scope="function")
-def smoke_test_client(smoke_test_db, mock_admin_user):
+def smoke_test_client(smoke_test_db, mock_admin_principal):
     """烟雾测试客户端"""
     # 导入认证函数
     from app.core.auth import get_current_user, get_current_active_user, get_current_admin_user
@@ -268,13 +275,13 @@ def smoke_test_client(smoke_test_db, mock_admin_user):
         yield smoke_test_db
         
     async def override_get_current_user():
-        return mock_admin_user
+        return mock_admin_principal
         
     async def override_get_current_active_user():
-        return mock_admin_user
+        return mock_admin_principal
         
     async def override_get_current_admin_user():
-        return mock_admin_user
+        return mock_admin_principal
     
     # 清除现有依赖覆盖
     app.dependency_overrides.clear()
@@ -397,7 +404,7 @@ def clean_integration_test_data(request):
         # 不抛出异常，避免影响测试结果
 
 @pytest.fixture(scope="function")
-def api_client(mysql_integration_db, mock_admin_user):
+def api_client(mysql_integration_db, mock_admin_principal):
     """集成测试客户端"""
     # 导入认证函数
     from app.core.auth import get_current_user, get_current_active_user, get_current_admin_user
@@ -406,13 +413,13 @@ def api_client(mysql_integration_db, mock_admin_user):
         yield mysql_integration_db
         
     async def override_get_current_user():
-        return mock_admin_user
+        return mock_admin_principal
         
     async def override_get_current_active_user():
-        return mock_admin_user
+        return mock_admin_principal
         
     async def override_get_current_admin_user():
-        return mock_admin_user
+        return mock_admin_principal
     
     # 清除现有依赖覆盖
     app.dependency_overrides.clear()
@@ -451,6 +458,12 @@ def mock_admin_user():
     )
     return mock_user
 
+@pytest.fixture
+def mock_admin_principal(mock_admin_user):
+    """模拟管理员认证主体（认证依赖的返回值）"""
+    from app.core.principal_cache import Principal
+    return Principal(mock_admin_user.id, mock_admin_user.role, mock_admin_user.is_active, "active")
+
 @pytest.fixture
 def sample_user_data():
     """示例用户数据"""
@@ -0,0 +1,99 @@
+"""
+共享基础模型序列化性能测试
+
+测试类型: 专项测试 (Performance)
+
+10000 行数据对比：
+- BaseModel.to_dict：逐列 getattr/isinstance 的原实现 vs 按模型类预编译的序列化器
+- JSONType：标准库 json 编解码 vs 默认编解码器（安装 orjson 时为 orjson）
+"""
+
+import time
+from datetime import datetime
+
+import pytest
+
+from app.modules.inventory_management.models import InventoryTransaction, TransactionType
+from app.shared.base_models import ORJSON_CODEC, STDLIB_JSON_CODEC, JSONType
+
+ROWS = 10000
+ROUNDS = 5
+
+
+def _legacy_to_dict(instance):
+    result = {}
+    for column in instance.__table__.columns:
+        value = getattr(instance, column.name)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        result[column.name] = value
+    return result
+
+
+def _transactions():
+    now = datetime(2026, 10, 18, 12, 0, 0)
+    return [
+        InventoryTransaction(
+            id=i, sku_id=i % 100, transaction_type=TransactionType.DEDUCT, quantity_change=-1,
+            quantity_before=i, quantity_after=i - 1, reference_type="order", reference_id=f"ORD{i:08d}",
+            operator_id=7, reason="订单出库", notes=None, created_at=now, updated_at=now
+        )
+        for i in range(ROWS)
+    ]
+
+
+def _payloads():
+    return [
+        {
+            "sku_id": i, "name": f"有机大米 {i}", "tags": ["东北", "五常", "稻花香"],
+            "attributes": {"weight": "5kg", "origin": "黑龙江"}, "price": 59.9, "stock": i
+        }
+        for i in range(ROWS)
+    ]
+
+
+def _best_seconds(func):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _json_round_trip(json_type, payloads):
+    stored = [json_type.process_bind_param(payload, None) for payload in payloads]
+    return [json_type.process_result_value(value, None) for value in stored]
+
+
+@pytest.mark.performance
+class TestBaseModelSerializationPerformance:
+    """基础模型序列化基准"""
+
+    def test_to_dict_10k_rows(self):
+        transactions = _transactions()
+        assert [row.to_dict() for row in transactions[:10]] == [_legacy_to_dict(row) for row in transactions[:10]]
+
+        legacy_seconds = _best_seconds(lambda: [_legacy_to_dict(row) for row in transactions])
+        compiled_seconds = _best_seconds(lambda: [row.to_dict() for row in transactions])
+
+        print(f"to_dict {ROWS} rows: legacy {legacy_seconds * 1000:.1f} ms, "
+              f"compiled {compiled_seconds * 1000:.1f} ms, speedup {legacy_seconds / compiled_seconds:.1f}x")
+
+        assert compiled_seconds < legacy_seconds
+
+    def test_json_type_codec_10k_rows(self):
+        if ORJSON_CODEC is None:
+            pytest.skip("未安装 orjson")
+        payloads = _payloads()
+        stdlib_type = JSONType(codec=STDLIB_JSON_CODEC)
+        orjson_type = JSONType(codec=ORJSON_CODEC)
+        assert _json_round_trip(orjson_type, payloads[:10]) == _json_round_trip(stdlib_type, payloads[:10])
+
+        stdlib_seconds = _best_seconds(lambda: _json_round_trip(stdlib_type, payloads))
+        orjson_seconds = _best_seconds(lambda: _json_round_trip(orjson_type, payloads))
+
+        print(f"JSONType bind+result {ROWS} rows: json {stdlib_seconds * 1000:.1f} ms, "
+              f"orjson {orjson_seconds * 1000:.1f} ms, speedup {stdlib_seconds / orjson_seconds:.1f}x")
+
+        assert orjson_seconds < stdlib_seconds
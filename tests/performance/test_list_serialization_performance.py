@@ -0,0 +1,83 @@
+"""
+列表接口序列化性能测试
+
+测试类型: 专项测试 (Performance)
+
+对比商品列表的两种序列化路径（100 / 1000 条）：
+- 原实现：查询 ORM 实例 -> 响应模型校验 -> 标准 JSONResponse 渲染
+- 快速路径：按响应字段查询行元组 -> RowSerializer 组装字典 -> FastJSONResponse 渲染
+"""
+
+import time
+from datetime import datetime
+from typing import List
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.orm import sessionmaker
+
+from app.modules.product_catalog.models import Product
+from app.modules.product_catalog.schemas import ProductRead
+from app.shared.serialization import FastJSONResponse, RowSerializer
+
+ROUNDS = 20
+PRODUCT_ROWS = RowSerializer.for_schema(ProductRead, Product)
+PRODUCT_LIST = TypeAdapter(List[ProductRead])
+
+
+def _seed_products(db, count):
+    now = datetime(2026, 10, 18, 12, 0, 0)
+    db.add_all([
+        Product(
+            name=f"有机大米 {i}", description="东北五常稻花香" * 4, status="active",
+            published_at=now, seo_title=f"有机大米 {i}", seo_keywords="大米,有机",
+            sort_order=i, view_count=i * 3, sale_count=i, created_at=now, updated_at=now
+        )
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def _orm_response(db, limit):
+    products = db.query(Product).filter(Product.is_deleted == False).limit(limit).all()
+    content = jsonable_encoder(PRODUCT_LIST.validate_python(products, from_attributes=True))
+    return JSONResponse(content).body
+
+
+def _row_response(db, limit):
+    rows = db.query(*PRODUCT_ROWS.columns).filter(Product.is_deleted == False).limit(limit).all()
+    return FastJSONResponse(PRODUCT_ROWS.serialize(rows)).body
+
+
+def _best_seconds(func, db, limit):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        db.expire_all()
+        start = time.perf_counter()
+        func(db, limit)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.performance
+class TestListSerializationPerformance:
+    """列表序列化路径基准"""
+
+    @pytest.mark.parametrize("count", [100, 1000])
+    def test_row_path_faster_than_orm_path(self, performance_test_db, count):
+        db = sessionmaker(bind=performance_test_db)()
+        try:
+            _seed_products(db, count)
+
+            orm_seconds = _best_seconds(_orm_response, db, count)
+            row_seconds = _best_seconds(_row_response, db, count)
+
+            print(f"{count} items: orm {orm_seconds / count * 1e6:.1f} us/item, "
+                  f"rows {row_seconds / count * 1e6:.1f} us/item, "
+                  f"speedup {orm_seconds / row_seconds:.1f}x")
+
+            assert row_seconds < orm_seconds
+        finally:
+            db.close()
@@ -0,0 +1,89 @@
+"""
+微信支付编解码器性能测试
+
+测试类型: 专项测试 (Performance)
+
+对比逐次构建的签名/序列化实现与 WechatPayCodec 的吞吐量：
+- 签名（MD5 / HMAC-SHA256）
+- 验签
+- XML 序列化（编解码器对特殊字符做转义，旧实现不转义）
+"""
+
+import hashlib
+import hmac
+import time
+
+import pytest
+
+from app.adapters.payment.codec import SIGN_TYPE_HMAC_SHA256, WechatPayCodec
+
+
+ITERATIONS = 20000
+
+PARAMS = {
+    "appid": "wx2421b1c4370ec43b",
+    "mch_id": "10000100",
+    "nonce_str": "ibuaiVcKdpRxkhJA",
+    "body": "有机大米 5kg装",
+    "out_trade_no": "PAY20261018123456ABCDEF12",
+    "total_fee": 5990,
+    "spbill_create_ip": "127.0.0.1",
+    "notify_url": "https://example.com/api/v1/payment-service/payments/callback/wechat",
+    "trade_type": "NATIVE",
+}
+
+
+def _legacy_sign(params, api_key):
+    param_str = '&'.join([f'{k}={v}' for k, v in sorted(params.items()) if v])
+    param_str += f'&key={api_key}'
+    return hashlib.md5(param_str.encode('utf-8')).hexdigest().upper()
+
+
+def _legacy_hmac_sign(params, api_key):
+    param_str = '&'.join([f'{k}={v}' for k, v in sorted(params.items()) if v])
+    return hmac.new(api_key.encode(), param_str.encode('utf-8'), hashlib.sha256).hexdigest().upper()
+
+
+def _legacy_to_xml(data):
+    xml = '<xml>'
+    for k, v in data.items():
+        xml += f'<{k}>{v}</{k}>'
+    xml += '</xml>'
+    return xml
+
+
+def _ops_per_second(func):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return ITERATIONS / (time.perf_counter() - start)
+
+
+@pytest.mark.performance
+class TestWechatPayCodecPerformance:
+    """编解码器吞吐量基准"""
+
+    def test_sign_verify_serialize_throughput(self):
+        md5_codec = WechatPayCodec("api_key_32_bytes_0123456789abcdef")
+        hmac_codec = WechatPayCodec("api_key_32_bytes_0123456789abcdef", sign_type=SIGN_TYPE_HMAC_SHA256)
+        signature = md5_codec.sign(PARAMS)
+
+        results = {
+            "legacy_md5_sign": _ops_per_second(lambda: _legacy_sign(PARAMS, "api_key_32_bytes_0123456789abcdef")),
+            "codec_md5_sign": _ops_per_second(lambda: md5_codec.sign(PARAMS)),
+            "legacy_hmac_sign": _ops_per_second(
+                lambda: _legacy_hmac_sign(PARAMS, "api_key_32_bytes_0123456789abcdef")
+            ),
+            "codec_hmac_sign": _ops_per_second(lambda: hmac_codec.sign(PARAMS)),
+            "codec_verify": _ops_per_second(lambda: md5_codec.verify(PARAMS, signature)),
+            "legacy_to_xml": _ops_per_second(lambda: _legacy_to_xml(PARAMS)),
+            "codec_to_xml": _ops_per_second(lambda: WechatPayCodec.to_xml(PARAMS)),
+        }
+
+        for name, rate in results.items():
+            print(f"{name}: {rate:,.0f} ops/s")
+
+        # 性能基准：单核签名/验签/序列化均 > 10000 次/秒
+        assert min(results.values()) > 10000
+        # 预计算的HMAC哈希状态应快于每次重新构建HMAC对象
+        assert results["codec_hmac_sign"] > results["legacy_hmac_sign"]
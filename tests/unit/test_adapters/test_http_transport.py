@@ -0,0 +1,245 @@
+"""
+共享出站HTTP传输单元测试
+
+测试覆盖：
+- 可重试状态码对幂等请求重试，非幂等POST默认不重试
+- 网络错误重试耗尽后抛出
+- 熔断器打开、短路、冷却后半开探测恢复；探测被取消或非网络异常时释放探测名额
+- 按主机并发限制
+- 本地桩服务器上的真实连接复用
+"""
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.adapters.http_transport import (
+    CircuitBreaker, CircuitOpenError, PooledHttpTransport, close_http_transport, get_http_transport
+)
+
+
+def _sequence_transport(responses, calls):
+    """按顺序返回预设响应（异常实例则抛出）的模拟传输"""
+    iterator = iter(responses)
+
+    def handler(request):
+        calls.append(request)
+        item = next(iterator)
+        if isinstance(item, Exception):
+            raise item
+        return httpx.Response(item)
+
+    return httpx.MockTransport(handler)
+
+
+def _transport(responses, calls, **kwargs):
+    kwargs.setdefault("backoff_base", 0)
+    return PooledHttpTransport(transport=_sequence_transport(responses, calls), **kwargs)
+
+
+class TestRetry:
+    """重试策略测试"""
+
+    def test_idempotent_request_retried_on_503(self):
+        calls = []
+        transport = _transport([503, 503, 200], calls, max_retries=2)
+
+        response = asyncio.run(transport.request("GET", "https://gateway.test/ping"))
+
+        assert response.status_code == 200
+        assert len(calls) == 3
+
+    def test_post_not_retried_by_default(self):
+        calls = []
+        transport = _transport([503, 200], calls)
+
+        response = asyncio.run(transport.request("POST", "https://gateway.test/pay"))
+
+        assert response.status_code == 503
+        assert len(calls) == 1
+
+    def test_post_retried_when_declared_idempotent(self):
+        calls = []
+        transport = _transport([502, 200], calls)
+
+        response = asyncio.run(transport.request("POST", "https://gateway.test/pay", idempotent=True))
+
+        assert response.status_code == 200
+        assert len(calls) == 2
+
+    def test_network_error_raised_after_retries(self):
+        calls = []
+        error = httpx.ConnectError("refused")
+        transport = _transport([error, error], calls, max_retries=1)
+
+        with pytest.raises(httpx.ConnectError):
+            asyncio.run(transport.request("GET", "https://gateway.test/ping"))
+        assert len(calls) == 2
+
+
+class TestCircuitBreaker:
+    """熔断测试"""
+
+    def test_breaker_state_transitions(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+
+        breaker.record_failure()
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+        now[0] = 11
+        # 半开状态只放行一个探测请求
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_open_breaker_short_circuits_requests(self):
+        calls = []
+        transport = _transport([503, 503, 200], calls, max_retries=0, breaker_failure_threshold=2)
+
+        async def scenario():
+            await transport.request("GET", "https://gateway.test/a")
+            await transport.request("GET", "https://gateway.test/a")
+            with pytest.raises(CircuitOpenError):
+                await transport.request("GET", "https://gateway.test/a")
+            # 其他主机不受影响
+            return await transport.request("GET", "https://other.test/a")
+
+        assert asyncio.run(scenario()).status_code == 200
+        assert len(calls) == 3
+
+
+    def test_cancelled_probe_releases_half_open_slot(self):
+        state = {"hang": True}
+
+        async def handler(request):
+            if state["hang"]:
+                state["started"].set()
+                await asyncio.sleep(3600)
+            return httpx.Response(200)
+
+        transport = PooledHttpTransport(transport=httpx.MockTransport(handler), max_retries=0)
+        breaker = transport.get_breaker("gateway.test")
+        breaker.state = CircuitBreaker.OPEN
+
+        async def scenario():
+            state["started"] = asyncio.Event()
+            breaker._opened_at = breaker._clock() - breaker.reset_timeout
+            probe = asyncio.create_task(transport.request("GET", "https://gateway.test/a"))
+            await state["started"].wait()
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+
+            # 探测被取消按失败处理：重新打开，冷却后可再次探测并恢复
+            assert breaker.state == CircuitBreaker.OPEN
+            breaker._opened_at = breaker._clock() - breaker.reset_timeout
+            state["hang"] = False
+            return await transport.request("GET", "https://gateway.test/a")
+
+        assert asyncio.run(scenario()).status_code == 200
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_non_network_error_in_probe_reopens_breaker(self):
+        calls = []
+        transport = _transport([ValueError("bad payload"), 200], calls, max_retries=0)
+        breaker = transport.get_breaker("gateway.test")
+        breaker.state = CircuitBreaker.OPEN
+        breaker._opened_at = breaker._clock() - breaker.reset_timeout
+
+        with pytest.raises(ValueError):
+            asyncio.run(transport.request("GET", "https://gateway.test/a"))
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker._probe_in_flight
+
+
+class TestConcurrencyLimit:
+    """按主机并发限制测试"""
+
+    def test_per_host_limit(self):
+        state = {"active": 0, "peak": 0}
+
+        async def handler(request):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.01)
+            state["active"] -= 1
+            return httpx.Response(200)
+
+        transport = PooledHttpTransport(transport=httpx.MockTransport(handler), max_connections_per_host=2)
+
+        async def scenario():
+            await asyncio.gather(*(transport.request("GET", "https://gateway.test/x") for _ in range(6)))
+
+        asyncio.run(scenario())
+        assert state["peak"] == 2
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    ports = []
+    original = server.process_request
+
+    def record(request, client_address):
+        ports.append(client_address[1])
+        original(request, client_address)
+
+    server.process_request = record
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", ports
+    server.shutdown()
+    server.server_close()
+
+
+class TestLocalStubServer:
+    """本地桩服务器测试"""
+
+    def test_keep_alive_reuses_connection(self, stub_server):
+        base_url, ports = stub_server
+        transport = PooledHttpTransport()
+
+        async def scenario():
+            try:
+                return [
+                    (await transport.request("POST", f"{base_url}/echo", content=f"req{i}".encode())).text
+                    for i in range(5)
+                ]
+            finally:
+                await transport.aclose()
+
+        assert asyncio.run(scenario()) == [f"req{i}" for i in range(5)]
+        # 5个请求共用一条keep-alive连接
+        assert len(ports) == 1
+
+    def test_global_transport_lifecycle(self):
+        transport = get_http_transport()
+        assert get_http_transport() is transport
+
+        asyncio.run(close_http_transport())
+        assert get_http_transport() is not transport
+        asyncio.run(close_http_transport())
@@ -0,0 +1,119 @@
+"""
+微信支付编解码器单元测试
+
+测试覆盖：
+- MD5 / HMAC-SHA256 签名与官方算法一致
+- 签名忽略 sign 字段和空值
+- 常量时间验签
+- XML 序列化转义与解析往返
+- 适配器通过共享连接池发送请求并校验返回签名
+"""
+
+import asyncio
+import hashlib
+import hmac
+
+import httpx
+import pytest
+
+from app.adapters.http_transport import PooledHttpTransport
+from app.adapters.payment import WechatPayAdapter, WechatPayCodec
+from app.adapters.payment.codec import SIGN_TYPE_HMAC_SHA256
+
+
+PARAMS = {
+    "appid": "wx_app",
+    "mch_id": "10000100",
+    "nonce_str": "ibuaiVcKdpRxkhJA",
+    "body": "有机大米",
+    "total_fee": 5990,
+    "attach": "",
+}
+
+
+def _reference_string(params):
+    return "&".join(f"{k}={v}" for k, v in sorted(params.items()) if v and k != "sign")
+
+
+class TestWechatPayCodecSign:
+    """签名测试"""
+
+    def test_md5_sign_matches_reference(self):
+        codec = WechatPayCodec("secret_key")
+        expected = hashlib.md5(f"{_reference_string(PARAMS)}&key=secret_key".encode()).hexdigest().upper()
+
+        assert codec.sign(PARAMS) == expected
+        # 多次签名复用模板对象，结果稳定
+        assert codec.sign(PARAMS) == expected
+
+    def test_hmac_sha256_sign_matches_reference(self):
+        codec = WechatPayCodec("secret_key", sign_type=SIGN_TYPE_HMAC_SHA256)
+        expected = hmac.new(b"secret_key", _reference_string(PARAMS).encode(), hashlib.sha256).hexdigest().upper()
+
+        assert codec.sign(PARAMS) == expected
+
+    def test_sign_field_is_excluded(self):
+        codec = WechatPayCodec("secret_key")
+        signed = dict(PARAMS, sign="WHATEVER")
+
+        assert codec.sign(signed) == codec.sign(PARAMS)
+
+    def test_verify(self):
+        codec = WechatPayCodec("secret_key")
+        signature = codec.sign(PARAMS)
+
+        assert codec.verify(PARAMS, signature) is True
+        assert codec.verify(PARAMS, signature.lower()) is True
+        assert codec.verify(PARAMS, "0" * 32) is False
+        assert codec.verify(PARAMS, "") is False
+        assert codec.verify(PARAMS, "签名") is False
+
+    def test_unknown_sign_type_rejected(self):
+        with pytest.raises(ValueError):
+            WechatPayCodec("secret_key", sign_type="SHA1")
+
+
+class TestWechatPayCodecSerialize:
+    """报文序列化测试"""
+
+    def test_xml_round_trip_with_escaping(self):
+        xml = WechatPayCodec.to_xml({"body": "A&B <茶>", "total_fee": 100, "openid": None})
+
+        assert xml == "<xml><body>A&amp;B &lt;茶&gt;</body><total_fee>100</total_fee></xml>"
+        assert WechatPayCodec.from_xml(xml) == {"body": "A&B <茶>", "total_fee": "100"}
+
+    def test_json_is_compact(self):
+        assert WechatPayCodec.to_json({"a": 1, "b": "茶"}).decode("utf-8") == '{"a":1,"b":"茶"}'
+
+
+class TestWechatPayAdapterTransport:
+    """适配器网关请求测试"""
+
+    def test_post_xml_signs_and_verifies_response(self, monkeypatch):
+        captured = {}
+
+        def handler(request):
+            captured["body"] = WechatPayCodec.from_xml(request.content)
+            reply = {"return_code": "SUCCESS", "result_code": "SUCCESS", "prepay_id": "wx123"}
+            reply["sign"] = adapter.codec.sign(reply)
+            return httpx.Response(200, content=WechatPayCodec.to_xml(reply))
+
+        transport = PooledHttpTransport(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr("app.adapters.http_transport._http_transport", transport)
+        adapter = WechatPayAdapter()
+
+        result = asyncio.run(adapter.post_xml("/pay/unifiedorder", {"out_trade_no": "PAY1", "total_fee": 100}))
+
+        assert result["prepay_id"] == "wx123"
+        assert adapter.verify_callback_signature(captured["body"], captured["body"]["sign"])
+        # 默认使用全局共享传输
+        assert WechatPayAdapter().transport is transport
+
+    def test_post_xml_rejects_bad_response_signature(self):
+        reply = WechatPayCodec.to_xml({"return_code": "SUCCESS", "sign": "BAD"})
+        transport = PooledHttpTransport(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=reply))
+        )
+
+        with pytest.raises(ValueError):
+            asyncio.run(WechatPayAdapter(transport=transport).post_xml("/pay/orderquery", {"out_trade_no": "PAY1"}))
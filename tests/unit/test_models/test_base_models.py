@@ -0,0 +1,104 @@
+"""
+共享基础模型单元测试
+
+测试覆盖：
+- BaseModel.to_dict 预编译序列化器与逐列实现输出一致，每个模型类只生成一次
+- JSONType 默认编解码器可替换，单列可指定编解码器
+- JSONType 读写数据库往返一致（含中文和非字符串键）
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, func, insert, select
+
+from app.modules.inventory_management.models import InventoryStock, InventoryTransaction, TransactionType
+from app.shared import base_models
+from app.shared.base_models import (
+    ORJSON_CODEC, STDLIB_JSON_CODEC, JSONCodec, JSONType, get_json_codec, set_json_codec
+)
+
+
+def _legacy_to_dict(instance):
+    result = {}
+    for column in instance.__table__.columns:
+        value = getattr(instance, column.name)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        result[column.name] = value
+    return result
+
+
+class TestBaseModelToDict:
+    """to_dict 预编译序列化器测试"""
+
+    def test_matches_legacy_output(self):
+        now = datetime(2026, 10, 18, 9, 30, 15, 123456)
+        transaction = InventoryTransaction(
+            id=1, sku_id=1, transaction_type=TransactionType.RESTOCK, quantity_change=5, quantity_before=5,
+            quantity_after=10, reference_type="manual", reason="补货", created_at=now, updated_at=now
+        )
+        stock = InventoryStock(id=1, sku_id=1, total_quantity=10, available_quantity=10, created_at=now)
+
+        assert transaction.to_dict() == _legacy_to_dict(transaction)
+        assert transaction.to_dict()["created_at"] == "2026-10-18T09:30:15.123456"
+        assert transaction.to_dict()["transaction_type"] is TransactionType.RESTOCK
+        assert stock.to_dict() == _legacy_to_dict(stock)
+
+    def test_serializer_compiled_once_per_class(self):
+        first = InventoryStock(sku_id=1, total_quantity=1, updated_at=func.now())
+        second = InventoryStock(sku_id=2, total_quantity=2)
+
+        # 未写入数据库的SQL表达式原样保留
+        assert first.to_dict()["updated_at"] is first.updated_at
+        assert second.to_dict()["sku_id"] == 2
+        assert base_models._get_dict_serializer(InventoryStock) is base_models._get_dict_serializer(InventoryStock)
+        assert list(second.to_dict()) == [column.name for column in InventoryStock.__table__.columns]
+
+
+class TestJSONType:
+    """JSONType 编解码器测试"""
+
+    def test_default_codec_is_replaceable(self):
+        json_type = JSONType()
+        calls = []
+        recording = JSONCodec("recording", lambda value: calls.append(value) or "{}", lambda value: {"loaded": value})
+
+        previous = set_json_codec(recording)
+        try:
+            assert get_json_codec() is recording
+            assert json_type.process_bind_param({"a": 1}, None) == "{}"
+            assert json_type.process_result_value("[]", None) == {"loaded": "[]"}
+            assert calls == [{"a": 1}]
+            # 单列指定的编解码器不受默认值影响
+            assert JSONType(codec=STDLIB_JSON_CODEC).process_bind_param({"a": 1}, None) == '{"a": 1}'
+        finally:
+            set_json_codec(previous)
+
+        assert get_json_codec() is previous
+        assert json_type.process_bind_param(None, None) is None
+
+    @pytest.mark.parametrize("codec", [STDLIB_JSON_CODEC, ORJSON_CODEC], ids=["json", "orjson"])
+    def test_database_round_trip(self, codec):
+        if codec is None:
+            pytest.skip("未安装 orjson")
+
+        metadata = MetaData()
+        documents = Table(
+            "documents", metadata,
+            Column("id", Integer, primary_key=True),
+            Column("payload", JSONType(codec=codec))
+        )
+        engine = create_engine("sqlite://")
+        metadata.create_all(engine)
+        payload = {"name": "有机大米", "tags": ["东北", "五常"], "price": 59.9, 1: None}
+
+        with engine.begin() as connection:
+            connection.execute(insert(documents), [{"id": 1, "payload": payload}, {"id": 2, "payload": None}])
+            rows = connection.execute(select(documents.c.payload).order_by(documents.c.id)).scalars().all()
+
+        assert rows == [{"name": "有机大米", "tags": ["东北", "五常"], "price": 59.9, "1": None}, None]
+        # 两种编解码器写入的数据互相可读
+        stored = JSONType(codec=codec).process_bind_param(payload, None)
+        assert STDLIB_JSON_CODEC.loads(stored) == (ORJSON_CODEC or STDLIB_JSON_CODEC).loads(stored)
+        engine.dispose()
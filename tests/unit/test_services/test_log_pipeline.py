@@ -0,0 +1,174 @@
+"""
+异步审计日志管道单元测试
+
+测试覆盖：
+- 后台线程按批写入，每批一次 write/flush，时间取记录创建时间
+- 有界队列满时丢弃并计数，溢出数量写入日志
+- 写入缓慢时请求路径不阻塞
+- 安全事件、支付审计日志经由管道写入JSON
+- orjson 不可用时回退标准库编码
+"""
+
+import io
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from app.core import security_logger
+from app.core.log_pipeline import BatchStreamHandler, LogPipeline, get_log_pipeline
+from app.core.security_logger import SecurityJSONFormatter, dumps_log_entry, log_security_event
+from app.modules.payment_service.auth_helpers import PAYMENT_AUDIT_FIELDS, create_payment_audit_log
+
+
+class CountingStream(io.StringIO):
+    """记录 write/flush 次数的流"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+        self.flushes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+    def flush(self):
+        self.flushes += 1
+
+    def entries(self):
+        return [json.loads(line) for line in self.getvalue().splitlines()]
+
+
+def _stream_handler(fields=security_logger.SECURITY_EVENT_FIELDS):
+    stream = CountingStream()
+    handler = BatchStreamHandler(stream)
+    handler.setFormatter(SecurityJSONFormatter(fields))
+    return stream, handler
+
+
+def _logger(pipeline, name):
+    logger = logging.getLogger(f"test.log_pipeline.{name}")
+    logger.handlers = [pipeline.handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+@pytest.fixture
+def swap_handlers():
+    """把全局管道的写入目标替换为内存流，测试结束后恢复"""
+    restored = []
+
+    def swap(name, fields=security_logger.SECURITY_EVENT_FIELDS):
+        pipeline = get_log_pipeline(name)
+        pipeline.flush()
+        stream, handler = _stream_handler(fields)
+        restored.append((pipeline, pipeline.handlers))
+        pipeline.handlers = [handler]
+        return pipeline, stream
+
+    yield swap
+    for pipeline, handlers in restored:
+        pipeline.handlers = handlers
+
+
+class TestLogPipeline:
+    """异步日志管道测试"""
+
+    def test_batched_write_keeps_event_time(self):
+        stream, handler = _stream_handler()
+        pipeline = LogPipeline([handler], name="batch", batch_size=100)
+        logger = _logger(pipeline, "batch")
+
+        for index in range(50):
+            logger.info("event %s", index, extra={"event_type": "login_failed", "user_id": index})
+        created = time.time()
+        time.sleep(0.05)
+        pipeline.start()
+        try:
+            assert pipeline.flush()
+        finally:
+            pipeline.stop()
+
+        entries = stream.entries()
+        assert [entry["user_id"] for entry in entries] == list(range(50))
+        assert entries[0]["message"] == "event 0"
+        assert (stream.writes, stream.flushes) == (1, 1)
+        assert datetime.fromisoformat(entries[-1]["timestamp"]) <= datetime.utcfromtimestamp(created)
+        metrics = pipeline.metrics()
+        assert (metrics["enqueued"], metrics["written"], metrics["batches"], metrics["max_batch"]) == (50, 50, 1, 50)
+
+    def test_full_queue_drops_and_reports_overflow(self):
+        stream, handler = _stream_handler()
+        pipeline = LogPipeline([handler], name="overflow", max_queue_size=3)
+        logger = _logger(pipeline, "overflow")
+
+        for index in range(5):
+            logger.warning("event %s", index, extra={"event_type": "login_failed"})
+        assert pipeline.metrics()["dropped"] == 2
+
+        pipeline.start()
+        try:
+            pipeline.flush()
+        finally:
+            pipeline.stop()
+
+        entries = stream.entries()
+        assert [entry["message"] for entry in entries[:3]] == ["event 0", "event 1", "event 2"]
+        assert (entries[-1]["event_type"], entries[-1]["dropped"]) == ("log_overflow", 2)
+
+    def test_slow_writer_does_not_block_callers(self):
+        release = threading.Event()
+
+        class SlowHandler(logging.Handler):
+            def handle_batch(self, records):
+                release.wait(5)
+
+        pipeline = LogPipeline([SlowHandler()], name="slow")
+        logger = _logger(pipeline, "slow")
+        pipeline.start()
+        try:
+            started = time.perf_counter()
+            for index in range(200):
+                logger.info("event %s", index, extra={"event_type": "login_failed"})
+            elapsed = time.perf_counter() - started
+        finally:
+            release.set()
+            pipeline.stop()
+
+        assert elapsed < 0.5
+        assert pipeline.metrics()["written"] == 200
+
+    def test_security_and_payment_events_use_pipelines(self, swap_handlers):
+        security, security_stream = swap_handlers("security")
+        payment, payment_stream = swap_handlers("payment_audit", PAYMENT_AUDIT_FIELDS)
+
+        log_security_event("login_failed", "Login failed", {"username": "alice"}, ip_address="10.0.0.1")
+        create_payment_audit_log(
+            payment_id=7, user_id=3, action="callback", old_status="pending", new_status="paid", ip_address="10.0.0.2"
+        )
+        security.flush()
+        payment.flush()
+
+        [security_entry] = security_stream.entries()
+        assert (security_entry["event_type"], security_entry["username"], security_entry["level"]) == (
+            "login_failed", "alice", "WARNING"
+        )
+        [payment_entry] = payment_stream.entries()
+        assert {key: payment_entry[key] for key in ("payment_id", "action", "old_status", "new_status")} == {
+            "payment_id": 7, "action": "callback", "old_status": "pending", "new_status": "paid"
+        }
+
+    def test_stdlib_json_fallback(self, monkeypatch):
+        entry = {"message": "账户锁定", "locked_until": datetime(2026, 10, 18, 8, 30)}
+        fast = json.loads(dumps_log_entry(entry))
+
+        monkeypatch.setattr(security_logger, "orjson", None)
+        encoded = dumps_log_entry(entry)
+
+        assert "账户锁定" in encoded
+        assert json.loads(encoded) == fast == {"message": "账户锁定", "locked_until": "2026-10-18T08:30:00"}
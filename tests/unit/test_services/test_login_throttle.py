@@ -0,0 +1,198 @@
+"""
+登录失败限流单元测试
+
+测试覆盖：
+- 账户窗口达到阈值后，登录在 bcrypt 校验之前被拒绝（429），未知登录名在查询数据库之前被拒绝
+- 用户名与邮箱登录计入同一账户窗口
+- 未达阈值的失败不写 users 表，达到阈值时才持久化锁定
+- 同一IP跨用户名的失败窗口
+- 滑动窗口过期、登录成功后清除账户窗口
+- Redis 有序集合窗口（一次管道往返）
+"""
+
+import pytest
+from passlib.context import CryptContext
+from sqlalchemy import event
+
+from app.core import auth, login_throttle
+from app.core.auth import authenticate_user
+from app.core.login_throttle import LoginThrottle, LoginThrottled
+from app.modules.user_auth.models import User
+
+FAST_CONTEXT = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4)
+
+
+class FakeSortedSetRedis:
+    """只实现限流用到命令的同步Redis替身"""
+
+    def __init__(self):
+        self.zsets = {}
+        self.round_trips = 0
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zremrangebyscore(self, key, low, high):
+        entries = self.zsets.get(key, {})
+        for member in [m for m, score in entries.items() if score <= high]:
+            del entries[member]
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zrange(self, key, start, stop, withscores=False):
+        return sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])[start:stop + 1]
+
+    def expire(self, key, seconds):
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.zsets.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        self.redis.round_trips += 1
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def throttle(monkeypatch, clock):
+    instance = LoginThrottle(redis_factory=None, window_seconds=900, max_user_failures=5, max_ip_failures=8, clock=clock)
+    monkeypatch.setattr(login_throttle, "_login_throttle", instance)
+    monkeypatch.setattr(auth, "pwd_context", FAST_CONTEXT)
+    return instance
+
+
+@pytest.fixture
+def user(unit_test_db):
+    user = User(username="throttle_user", email="throttle@example.com", password_hash=FAST_CONTEXT.hash("secret123"))
+    unit_test_db.add(user)
+    unit_test_db.commit()
+    return user
+
+
+@pytest.fixture
+def statements(unit_test_engine):
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    event.listen(unit_test_engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(unit_test_engine, "before_cursor_execute", record)
+
+
+def _fail(db, username="throttle_user", client_ip="10.0.0.1"):
+    return authenticate_user(db, username, "wrong", client_ip)
+
+
+class TestLoginThrottle:
+    """登录失败限流测试"""
+
+    def test_failures_below_threshold_do_not_write_users(self, unit_test_db, throttle, user, statements):
+        for _ in range(4):
+            assert _fail(unit_test_db) is None
+
+        assert not [sql for sql in statements if sql.startswith("UPDATE users")]
+        unit_test_db.expire_all()
+        assert unit_test_db.get(User, user.id).failed_login_attempts == 0
+
+    def test_lock_persisted_at_threshold_then_rejected_before_bcrypt(
+        self, unit_test_db, throttle, user, statements, monkeypatch
+    ):
+        for _ in range(5):
+            _fail(unit_test_db)
+
+        unit_test_db.expire_all()
+        stored = unit_test_db.get(User, user.id)
+        assert (stored.status, stored.failed_login_attempts) == ("locked", 5)
+        assert stored.locked_until is not None
+
+        statements.clear()
+        monkeypatch.setattr(auth, "pwd_context", None)
+        with pytest.raises(LoginThrottled) as exc_info:
+            authenticate_user(unit_test_db, "throttle_user", "secret123", "10.0.0.2")
+        assert exc_info.value.status_code == 429
+        assert 0 < int(exc_info.value.headers["Retry-After"]) <= 901
+        # 只查询用户，不写 users 表
+        assert len(statements) == 1 and statements[0].startswith("SELECT")
+
+    def test_username_and_email_share_account_window(self, unit_test_db, throttle, user):
+        for login_name in ["throttle_user", "throttle@example.com"] * 2:
+            _fail(unit_test_db, username=login_name, client_ip=None)
+
+        assert throttle.record_failure("throttle_user", user_id=user.id) == 5
+        with pytest.raises(LoginThrottled):
+            authenticate_user(unit_test_db, "throttle@example.com", "secret123")
+        # 已知账户的失败不进入登录名窗口
+        throttle.check("throttle@example.com")
+
+    def test_unknown_login_name_rejected_before_db(self, unit_test_db, throttle, statements):
+        for _ in range(5):
+            _fail(unit_test_db, username="ghost", client_ip=None)
+
+        statements.clear()
+        with pytest.raises(LoginThrottled):
+            _fail(unit_test_db, username="ghost", client_ip=None)
+        assert statements == []
+
+    def test_ip_window_spans_usernames(self, unit_test_db, throttle, user):
+        for index in range(8):
+            _fail(unit_test_db, username=f"unknown_{index}")
+
+        with pytest.raises(LoginThrottled):
+            authenticate_user(unit_test_db, "throttle_user", "secret123", "10.0.0.1")
+        assert authenticate_user(unit_test_db, "throttle_user", "secret123", "10.0.0.9").id == user.id
+
+    def test_window_slides_and_success_resets(self, unit_test_db, throttle, user, clock):
+        for _ in range(4):
+            _fail(unit_test_db)
+        clock.now += 901
+        assert throttle.record_failure("throttle_user", user_id=user.id) == 1
+
+        assert authenticate_user(unit_test_db, "throttle@example.com", "secret123").id == user.id
+        assert throttle.record_failure("throttle_user", user_id=user.id) == 1
+
+    def test_redis_sliding_window(self, clock):
+        redis = FakeSortedSetRedis()
+        throttle = LoginThrottle(redis_client=redis, max_user_failures=2, max_ip_failures=10, clock=clock)
+
+        assert throttle.record_failure("Alice", "10.0.0.1") == 1
+        clock.now += 1
+        assert throttle.record_failure("alice ", "10.0.0.1") == 2
+        redis.round_trips = 0
+
+        with pytest.raises(LoginThrottled) as exc_info:
+            throttle.check("alice", "10.0.0.1")
+        assert redis.round_trips == 1
+        assert exc_info.value.headers["Retry-After"] == "900"
+
+        throttle.reset("alice")
+        throttle.check("alice", "10.0.0.1")
+        assert redis.zcard(LoginThrottle.ip_key("10.0.0.1")) == 2
@@ -0,0 +1,148 @@
+"""
+会员上下文缓存单元测试
+
+测试覆盖：
+- 等级表按 min_points 排序，bisect 按积分定位等级
+- 折扣/权益计算命中缓存后不再查询数据库
+- Redis 共享层在进程内缓存失效后继续生效
+- 等级调整后失效用户缓存
+- Redis 异常时降级为数据库查询
+"""
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.modules.member_system import context_cache
+from app.modules.member_system.context_cache import LevelInfo, LevelTable, MemberContextCache
+from app.modules.member_system.models import MemberLevel, MemberProfile
+from app.modules.member_system.service import BenefitService
+from app.modules.user_auth.models import User
+
+
+class FakeRedis:
+    """最小化的同步Redis替身"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = str(value)
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+class BrokenRedis:
+    def get(self, key):
+        raise ConnectionError("redis down")
+
+    set = delete = get
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def cache(monkeypatch, fake_redis):
+    instance = MemberContextCache(redis_client=fake_redis, redis_factory=None)
+    monkeypatch.setattr(context_cache, "_member_context_cache", instance)
+    return instance
+
+
+@pytest.fixture
+def member(unit_test_db):
+    unit_test_db.add_all([
+        MemberLevel(id=1, level_name="注册会员", min_points=0, discount_rate=Decimal("1.000")),
+        MemberLevel(id=2, level_name="金牌会员", min_points=5000, discount_rate=Decimal("0.850"),
+                    benefits={"free_shipping": True}),
+        MemberLevel(id=3, level_name="银牌会员", min_points=2000, discount_rate=Decimal("0.900")),
+    ])
+    user = User(username="context_user", email="context@example.com", password_hash="hashed")
+    unit_test_db.add(user)
+    unit_test_db.flush()
+    profile = MemberProfile(member_code="M202610180001", user_id=user.id, level_id=2)
+    unit_test_db.add(profile)
+    unit_test_db.commit()
+    return profile
+
+
+@pytest.fixture
+def query_counter(unit_test_engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(unit_test_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(unit_test_engine, "before_cursor_execute", record)
+
+
+class TestLevelTable:
+    """等级表测试"""
+
+    def test_bisect_by_points(self):
+        table = LevelTable([
+            LevelInfo(2, "金牌", 5000, Decimal("0.85"), {}),
+            LevelInfo(1, "注册", 100, Decimal("1"), {}),
+            LevelInfo(3, "银牌", 2000, Decimal("0.9"), {}),
+        ])
+
+        assert table.for_points(99) is None
+        assert table.for_points(100).id == 1
+        assert table.for_points(4999).id == 3
+        assert table.for_points(5000).id == 2
+
+
+class TestMemberContextCache:
+    """会员上下文缓存测试"""
+
+    def test_discount_served_from_cache(self, unit_test_db, cache, member, query_counter):
+        service = BenefitService(unit_test_db)
+        user_id = member.user_id
+        query_counter.clear()
+
+        assert service.calculate_discount(user_id, Decimal("100")) == Decimal("85.000")
+        queries_after_first = len(query_counter)
+        assert service.calculate_discount(user_id, Decimal("200")) == Decimal("170.000")
+        assert service.get_available_benefits(user_id)["benefits"] == {"free_shipping": True}
+
+        # 首次：用户等级 + 等级表各一次查询；之后全部命中内存
+        assert queries_after_first == 2
+        assert len(query_counter) == queries_after_first
+
+    def test_shared_redis_tier(self, unit_test_db, fake_redis, member, query_counter):
+        user_id = member.user_id
+        MemberContextCache(redis_client=fake_redis, redis_factory=None).get_user_level_id(unit_test_db, user_id)
+        query_counter.clear()
+
+        other_process = MemberContextCache(redis_client=fake_redis, redis_factory=None)
+        assert other_process.get_user_level_id(unit_test_db, user_id) == 2
+        assert query_counter == []
+
+    def test_invalidate_user_after_level_change(self, unit_test_db, cache, member):
+        service = BenefitService(unit_test_db)
+        service.calculate_discount(member.user_id, Decimal("100"))
+
+        member.level_id = 3
+        unit_test_db.commit()
+        cache.invalidate_user(member.user_id)
+
+        assert service.calculate_discount(member.user_id, Decimal("100")) == Decimal("90.000")
+
+    def test_non_member_negative_cache(self, unit_test_db, cache, member):
+        assert BenefitService(unit_test_db).get_available_benefits(999) == {"benefits": [], "level": None}
+        assert cache.get_user_level_id(unit_test_db, 999) is None
+
+    def test_redis_failure_falls_back_to_database(self, unit_test_db, member):
+        cache = MemberContextCache(redis_client=BrokenRedis(), redis_factory=None)
+
+        assert cache.get_member_level(unit_test_db, member.user_id).level_name == "金牌会员"
+        assert cache._redis_client() is None
@@ -0,0 +1,150 @@
+"""
+会员排行榜单元测试
+
+测试覆盖：
+- TopN、用户名次、我的前后名次查询
+- 积分发放/使用提交后同步积分榜
+- 积分过期后批量同步积分榜
+- 从数据库分批重建榜单并原子替换旧榜单
+- Redis 写入失败不影响积分业务
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.modules.member_system import leaderboard as leaderboard_module
+from app.modules.member_system.expiry_job import PointExpiryEngine
+from app.modules.member_system.leaderboard import BOARD_POINTS, MemberLeaderboard, RankEntry
+from app.modules.member_system.models import MemberLevel, MemberPoint, PointTransaction
+from app.modules.member_system.service import PointService
+from app.modules.user_auth.models import User
+
+
+class FakeSortedSetRedis:
+    """只实现排行榜用到命令的同步Redis替身"""
+
+    def __init__(self):
+        self.zsets = {}
+
+    def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(member, None)
+
+    def _ordered(self, key):
+        return sorted(self.zsets.get(key, {}).items(), key=lambda item: (item[1], item[0]), reverse=True)
+
+    def zrevrank(self, key, member):
+        members = [name for name, _ in self._ordered(key)]
+        return members.index(member) if member in members else None
+
+    def zscore(self, key, member):
+        return self.zsets.get(key, {}).get(member)
+
+    def zrevrange(self, key, start, stop, withscores=False):
+        return self._ordered(key)[start:stop + 1]
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def delete(self, *keys):
+        for key in keys:
+            self.zsets.pop(key, None)
+
+    def rename(self, src, dst):
+        self.zsets[dst] = self.zsets.pop(src)
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class BrokenRedis:
+    def zadd(self, key, mapping):
+        raise ConnectionError("redis down")
+
+
+@pytest.fixture
+def board(monkeypatch):
+    instance = MemberLeaderboard(redis_client=FakeSortedSetRedis(), redis_factory=None)
+    monkeypatch.setattr(leaderboard_module, "_member_leaderboard", instance)
+    return instance
+
+
+@pytest.fixture
+def users(unit_test_db):
+    unit_test_db.add(MemberLevel(id=1, level_name="注册会员", min_points=0))
+    users = [
+        User(username=f"board_{index}", email=f"board_{index}@example.com", password_hash="hashed")
+        for index in range(3)
+    ]
+    unit_test_db.add_all(users)
+    unit_test_db.commit()
+    return users
+
+
+class TestMemberLeaderboard:
+    """排行榜测试"""
+
+    def test_top_rank_and_around(self, board):
+        board.update_scores(BOARD_POINTS, {user_id: user_id * 10 for user_id in range(1, 11)})
+
+        assert board.top(BOARD_POINTS, 3) == [RankEntry(10, 100.0, 1), RankEntry(9, 90.0, 2), RankEntry(8, 80.0, 3)]
+        assert board.rank(BOARD_POINTS, 7) == RankEntry(7, 70.0, 4)
+        assert board.rank(BOARD_POINTS, 99) is None
+        assert [entry.user_id for entry in board.around(BOARD_POINTS, 9, radius=2)] == [10, 9, 8, 7]
+        assert board.around(BOARD_POINTS, 99) == []
+        assert board.size(BOARD_POINTS) == 10
+
+    def test_synced_on_earn_and_use(self, unit_test_db, board, users):
+        service = PointService(unit_test_db)
+        service.earn_points(users[0].id, 300, "order", "O1")
+        service.earn_points(users[1].id, 200, "order", "O2")
+        service.use_points(users[0].id, 250, "order", "O3")
+
+        assert [(entry.user_id, entry.score) for entry in board.top(BOARD_POINTS)] == [
+            (users[1].id, 200.0), (users[0].id, 50.0)
+        ]
+
+    def test_synced_on_expiry(self, unit_test_db, board, users):
+        PointService(unit_test_db).earn_points(users[0].id, 100, "order", "O1")
+        unit_test_db.query(PointTransaction).update({"created_at": datetime(2023, 5, 1)})
+        unit_test_db.commit()
+
+        PointExpiryEngine(unit_test_db).expire(cutoff=datetime(2024, 10, 1))
+
+        assert board.rank(BOARD_POINTS, users[0].id).score == 0.0
+
+    def test_rebuild_from_database(self, unit_test_db, board, users):
+        board.update_scores(BOARD_POINTS, {999: 1.0})
+        for index, user in enumerate(users):
+            unit_test_db.add(MemberPoint(user_id=user.id, level_id=1, current_points=(index + 1) * 100))
+        unit_test_db.commit()
+
+        assert board.rebuild(unit_test_db, BOARD_POINTS, batch_size=2) == 3
+
+        assert [entry.user_id for entry in board.top(BOARD_POINTS)] == [user.id for user in reversed(users)]
+        assert board.rank(BOARD_POINTS, 999) is None
+
+    def test_redis_failure_does_not_break_points(self, unit_test_db, monkeypatch, users):
+        monkeypatch.setattr(
+            leaderboard_module, "_member_leaderboard",
+            MemberLeaderboard(redis_client=BrokenRedis(), redis_factory=None)
+        )
+
+        transaction = PointService(unit_test_db).earn_points(users[0].id, 100, "order", "O1")
+
+        assert transaction.balance_after == 100
@@ -0,0 +1,121 @@
+"""
+会员等级批量重算单元测试
+
+测试覆盖：
+- 按累计获得积分和等级门槛计算目标等级并批量升级
+- 默认不降级，allow_downgrade 时按门槛降级
+- 批量写入等级变更事件
+- 按会员ID分块处理
+- 重算后失效会员上下文缓存
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from app.modules.member_system import context_cache
+from app.modules.member_system.context_cache import MemberContextCache
+from app.modules.member_system.models import MemberLevel, MemberLevelChangeEvent, MemberPoint, MemberProfile
+from app.modules.member_system.releveling_job import MemberRelevelingJob
+from app.modules.user_auth.models import User
+
+
+class FakeRedis:
+    """最小化的同步Redis替身"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = str(value)
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    instance = MemberContextCache(redis_client=FakeRedis(), redis_factory=None)
+    monkeypatch.setattr(context_cache, "_member_context_cache", instance)
+    return instance
+
+
+@pytest.fixture
+def members(unit_test_db):
+    """三个会员：累计积分 6000 / 2500 / 无积分账户，当前均为注册会员"""
+    unit_test_db.add_all([
+        MemberLevel(id=1, level_name="注册会员", min_points=0, discount_rate=Decimal("1.000")),
+        MemberLevel(id=2, level_name="金牌会员", min_points=5000, discount_rate=Decimal("0.850")),
+        MemberLevel(id=3, level_name="银牌会员", min_points=2000, discount_rate=Decimal("0.900")),
+    ])
+    profiles = []
+    for index, earned in enumerate([6000, 2500, None]):
+        user = User(username=f"relevel_{index}", email=f"relevel_{index}@example.com", password_hash="hashed")
+        unit_test_db.add(user)
+        unit_test_db.flush()
+        profile = MemberProfile(member_code=f"M20261018{index:04d}", user_id=user.id, level_id=1)
+        unit_test_db.add(profile)
+        if earned is not None:
+            unit_test_db.add(MemberPoint(
+                user_id=user.id, level_id=1, current_points=earned, total_earned=earned, total_used=0
+            ))
+        profiles.append(profile)
+    unit_test_db.commit()
+    return profiles
+
+
+def _levels(db):
+    db.expire_all()
+    return [level_id for (level_id,) in db.query(MemberProfile.level_id).order_by(MemberProfile.id)]
+
+
+class TestMemberRelevelingJob:
+    """会员等级批量重算测试"""
+
+    def test_upgrades_by_thresholds(self, unit_test_db, cache, members):
+        stats = MemberRelevelingJob(unit_test_db).run()
+
+        assert (stats["scanned_members"], stats["upgraded"], stats["downgraded"]) == (3, 2, 0)
+        assert _levels(unit_test_db) == [2, 3, 1]
+
+        events = unit_test_db.query(MemberLevelChangeEvent).order_by(MemberLevelChangeEvent.member_id).all()
+        assert [(e.old_level_id, e.new_level_id, e.change_type, e.trigger, e.points_snapshot) for e in events] == [
+            (1, 2, "upgrade", "batch", 6000),
+            (1, 3, "upgrade", "batch", 2500),
+        ]
+        assert all(e.created_at is not None for e in events)
+
+    def test_rerun_is_noop(self, unit_test_db, cache, members):
+        MemberRelevelingJob(unit_test_db).run()
+        stats = MemberRelevelingJob(unit_test_db).run()
+
+        assert (stats["upgraded"], stats["downgraded"]) == (0, 0)
+        assert unit_test_db.query(MemberLevelChangeEvent).count() == 2
+
+    def test_downgrade_only_when_allowed(self, unit_test_db, cache, members):
+        MemberRelevelingJob(unit_test_db).run()
+        unit_test_db.query(MemberLevel).filter(MemberLevel.id == 2).update({"min_points": 8000})
+        unit_test_db.commit()
+
+        assert MemberRelevelingJob(unit_test_db).run()["downgraded"] == 0
+        assert _levels(unit_test_db)[0] == 2
+
+        stats = MemberRelevelingJob(unit_test_db, allow_downgrade=True).run()
+        assert stats["downgraded"] == 1
+        assert _levels(unit_test_db)[0] == 3
+
+    def test_chunked(self, unit_test_db, cache, members):
+        stats = MemberRelevelingJob(unit_test_db, chunk_size=1).run()
+
+        assert (stats["chunks"], stats["scanned_members"], stats["upgraded"]) == (3, 3, 2)
+
+    def test_invalidates_member_context_cache(self, unit_test_db, cache, members):
+        user_id = members[0].user_id
+        assert cache.get_user_level_id(unit_test_db, user_id) == 1
+
+        MemberRelevelingJob(unit_test_db).run()
+
+        assert cache.get_user_level_id(unit_test_db, user_id) == 2
@@ -0,0 +1,82 @@
+"""
+业务模块注册表单元测试
+
+测试覆盖：
+- ENABLED_MODULES / DISABLED_MODULES 解析与未知模块校验
+- 只注册、只导入启用模块的路由
+- 默认配置注册全部已实现路由的模块
+- -X importtime 输出解析
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi import FastAPI
+
+from app.core import module_registry
+from app.core.module_registry import get_enabled_modules, parse_importtime, register_module_routers
+from app.modules import MODULE_ROUTE_TAGS
+
+
+class TestModuleRegistry:
+    """模块注册表测试"""
+
+    def test_enabled_modules_from_config(self, monkeypatch):
+        monkeypatch.delenv("ENABLED_MODULES", raising=False)
+        monkeypatch.setenv("DISABLED_MODULES", "member_system, quality_control")
+
+        assert get_enabled_modules() == [
+            name for name in MODULE_ROUTE_TAGS if name not in ("member_system", "quality_control")
+        ]
+        # 按注册顺序返回，与配置顺序无关
+        assert get_enabled_modules("payment_service,user_auth", "") == ["user_auth", "payment_service"]
+        # 尚未实现路由的模块可配置但不注册
+        assert get_enabled_modules("user_auth,notification_service", "") == ["user_auth"]
+
+        with pytest.raises(ValueError, match="unknown_module"):
+            get_enabled_modules("user_auth,unknown_module", "")
+
+    def test_register_only_enabled_routers(self):
+        app = FastAPI()
+
+        assert register_module_routers(app, ["user_auth", "member_system"]) == ["user_auth", "member_system"]
+
+        paths = {route.path for route in app.routes}
+        assert "/api/v1/user-auth/login" in paths
+        assert any(path.startswith("/api/v1/member-system/") for path in paths)
+        assert not any("payment" in path for path in paths)
+        assert set(module_registry.ROUTER_IMPORT_SECONDS) >= {"user_auth", "member_system"}
+
+    def test_disabled_modules_not_imported(self):
+        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        script = (
+            "import sys, app.main; "
+            "print(sorted(m for m in sys.modules if m.startswith('app.modules.') and m.count('.') == 2))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True, text=True, check=True, cwd=project_root,
+            env={**os.environ, "ENABLED_MODULES": "user_auth", "DISABLED_MODULES": ""}
+        )
+
+        assert result.stdout.strip().splitlines()[-1] == "['app.modules.user_auth']"
+
+    def test_parse_importtime(self):
+        output = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:      9000 |       9000 | fastapi",
+            "--module-import-start--",
+            "import time:       300 |        300 |     app.shared.base_models",
+            "import time:       200 |        200 |     app.modules.user_auth.models",
+            "import time:      1500 |       2000 |   app.modules.user_auth.router",
+            "import time:       100 |       2100 | app.modules.user_auth",
+            "import time:        50 |         50 | jwt",
+        ])
+
+        profile = parse_importtime(output, "app.modules.user_auth", top=1)
+
+        assert profile.total_ms == pytest.approx(2.15)
+        assert profile.own_ms == pytest.approx(1.8)
+        assert profile.heaviest == [("app.shared.base_models", 0.3)]
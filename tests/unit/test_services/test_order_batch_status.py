@@ -0,0 +1,219 @@
+"""
+订单批量状态更新单元测试
+
+测试覆盖：
+- 批量状态转换验证与逐个订单结果
+- 按SKU汇总的库存扣减/释放
+- 预占库存不足时单个订单失败、其他订单成功
+- 状态历史、订单计数、订单事件批量写入
+- 单个订单取消/支付按SKU汇总库存变更并批量写入库存变动记录
+"""
+
+import asyncio
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.modules.inventory_management.models import InventoryStock, InventoryTransaction, TransactionType
+from app.modules.order_management.models import Order, OrderItem, OrderStatusHistory, OrderOutboxEvent
+from app.modules.order_management.schemas import OrderBatchStatusUpdateRequest
+from app.modules.order_management.service import OrderService
+from app.modules.product_catalog.models import Product, SKU
+from app.modules.user_auth.models import User
+
+
+@pytest.fixture
+def catalog(unit_test_db):
+    user = User(username="batch_user", email="batch@example.com", password_hash="hashed")
+    product = Product(name="高山茶叶", status="active")
+    unit_test_db.add_all([user, product])
+    unit_test_db.flush()
+
+    skus = [
+        SKU(product_id=product.id, sku_code=f"TEA-{index}", name=f"规格{index}", price=Decimal("30.00"))
+        for index in range(2)
+    ]
+    unit_test_db.add_all(skus)
+    unit_test_db.flush()
+
+    # 每个SKU预占5件
+    for sku in skus:
+        unit_test_db.add(InventoryStock(
+            sku_id=sku.id, total_quantity=20, available_quantity=15, reserved_quantity=5
+        ))
+    unit_test_db.commit()
+    return {"user": user, "product": product, "skus": skus}
+
+
+def _create_order(db, catalog, number, status, quantities):
+    order = Order(
+        order_number=number, user_id=catalog["user"].id, status=status,
+        subtotal=Decimal("0.00"), shipping_fee=Decimal("0.00"),
+        discount_amount=Decimal("0.00"), total_amount=Decimal("0.00")
+    )
+    db.add(order)
+    db.flush()
+    for sku, quantity in zip(catalog["skus"], quantities):
+        if quantity:
+            db.add(OrderItem(
+                order_id=order.id, product_id=catalog["product"].id, sku_id=sku.id,
+                sku_code=sku.sku_code, product_name=catalog["product"].name, sku_name=sku.name,
+                quantity=quantity, unit_price=sku.price, total_price=sku.price * quantity
+            ))
+    db.commit()
+    return order
+
+
+def _stock(db, sku):
+    db.expire_all()
+    return db.query(InventoryStock).filter(InventoryStock.sku_id == sku.id).one()
+
+
+class TestBatchStatusUpdate:
+    """批量状态更新测试"""
+
+    def test_batch_ship_reports_per_order_results(self, unit_test_db, catalog):
+        paid_1 = _create_order(unit_test_db, catalog, "ORD_BATCH_1", "paid", [1, 0])
+        paid_2 = _create_order(unit_test_db, catalog, "ORD_BATCH_2", "paid", [0, 1])
+        pending = _create_order(unit_test_db, catalog, "ORD_BATCH_3", "pending", [1, 0])
+        service = OrderService(unit_test_db)
+
+        result = asyncio.run(service.batch_update_order_status(
+            [paid_1.id, paid_2.id, pending.id, 9999], "shipped", operator_id=catalog["user"].id
+        ))
+
+        assert result["total"] == 4
+        assert result["succeeded"] == 2
+        assert result["failed"] == 2
+        assert [r["success"] for r in result["results"]] == [True, True, False, False]
+        assert result["results"][3]["error"] == "订单不存在"
+
+        unit_test_db.expire_all()
+        assert unit_test_db.query(Order).get(paid_1.id).status == "shipped"
+        assert unit_test_db.query(Order).get(pending.id).status == "pending"
+        assert unit_test_db.query(OrderStatusHistory).count() == 2
+        assert unit_test_db.query(OrderOutboxEvent).count() == 2
+        assert service.counter_service.count_user_orders(catalog["user"].id, "shipped") == 2
+
+    def test_batch_pay_deducts_stock_grouped_by_sku(self, unit_test_db, catalog):
+        sku_a, sku_b = catalog["skus"]
+        order_1 = _create_order(unit_test_db, catalog, "ORD_BATCH_4", "pending", [2, 1])
+        order_2 = _create_order(unit_test_db, catalog, "ORD_BATCH_5", "pending", [2, 0])
+        service = OrderService(unit_test_db)
+
+        result = asyncio.run(service.batch_update_order_status(
+            [order_1.id, order_2.id], "paid", operator_id=catalog["user"].id
+        ))
+
+        assert result["succeeded"] == 2
+        stock_a = _stock(unit_test_db, sku_a)
+        assert stock_a.reserved_quantity == 1
+        assert stock_a.total_quantity == 16
+        assert _stock(unit_test_db, sku_b).reserved_quantity == 4
+
+    def test_batch_pay_fails_only_orders_without_reserved_stock(self, unit_test_db, catalog):
+        sku_a = catalog["skus"][0]
+        order_1 = _create_order(unit_test_db, catalog, "ORD_BATCH_6", "pending", [4, 0])
+        order_2 = _create_order(unit_test_db, catalog, "ORD_BATCH_7", "pending", [2, 0])
+        service = OrderService(unit_test_db)
+
+        result = asyncio.run(service.batch_update_order_status(
+            [order_1.id, order_2.id], "paid", operator_id=catalog["user"].id
+        ))
+
+        assert [r["success"] for r in result["results"]] == [True, False]
+        assert "预占库存不足" in result["results"][1]["error"]
+        assert _stock(unit_test_db, sku_a).reserved_quantity == 1
+
+    def test_batch_cancel_releases_stock(self, unit_test_db, catalog):
+        sku_a = catalog["skus"][0]
+        order_1 = _create_order(unit_test_db, catalog, "ORD_BATCH_8", "pending", [2, 0])
+        order_2 = _create_order(unit_test_db, catalog, "ORD_BATCH_9", "pending", [3, 0])
+        service = OrderService(unit_test_db)
+
+        result = asyncio.run(service.batch_update_order_status(
+            [order_1.id, order_2.id], "cancelled", operator_id=catalog["user"].id
+        ))
+
+        assert result["succeeded"] == 2
+        stock_a = _stock(unit_test_db, sku_a)
+        assert stock_a.reserved_quantity == 0
+        assert stock_a.available_quantity == 20
+
+        ledger = unit_test_db.query(InventoryTransaction).order_by(InventoryTransaction.id).all()
+        assert [(entry.reference_id, entry.quantity_change) for entry in ledger] == [
+            ("ORD_BATCH_8", 2), ("ORD_BATCH_9", 3)
+        ]
+        assert ledger[1].quantity_before == 17
+        assert ledger[1].quantity_after == 20
+
+
+class TestOrderStockLedger:
+    """单个订单库存变更测试"""
+
+    def _add_duplicate_item(self, db, catalog, order, quantity):
+        sku = catalog["skus"][0]
+        db.add(OrderItem(
+            order_id=order.id, product_id=catalog["product"].id, sku_id=sku.id,
+            sku_code=sku.sku_code, product_name=catalog["product"].name, sku_name=sku.name,
+            quantity=quantity, unit_price=sku.price, total_price=sku.price * quantity
+        ))
+        db.commit()
+
+    def test_cancel_aggregates_repeated_sku(self, unit_test_db, catalog):
+        sku_a = catalog["skus"][0]
+        order = _create_order(unit_test_db, catalog, "ORD_LEDGER_1", "pending", [2, 1])
+        self._add_duplicate_item(unit_test_db, catalog, order, 1)
+        service = OrderService(unit_test_db)
+
+        asyncio.run(service.update_order_status(order.id, "cancelled", operator_id=catalog["user"].id))
+
+        assert _stock(unit_test_db, sku_a).reserved_quantity == 2
+        ledger = unit_test_db.query(InventoryTransaction).filter(
+            InventoryTransaction.sku_id == sku_a.id
+        ).all()
+        assert len(ledger) == 1
+        assert ledger[0].transaction_type == TransactionType.RELEASE
+        assert ledger[0].quantity_change == 3
+        assert ledger[0].reference_type == "order"
+        assert ledger[0].operator_id == catalog["user"].id
+
+    def test_pay_deducts_and_records_ledger(self, unit_test_db, catalog):
+        sku_a, sku_b = catalog["skus"]
+        order = _create_order(unit_test_db, catalog, "ORD_LEDGER_2", "pending", [2, 3])
+        service = OrderService(unit_test_db)
+
+        asyncio.run(service.update_order_status(order.id, "paid", operator_id=catalog["user"].id))
+
+        assert _stock(unit_test_db, sku_a).total_quantity == 18
+        assert _stock(unit_test_db, sku_b).total_quantity == 17
+        ledger = unit_test_db.query(InventoryTransaction).order_by(InventoryTransaction.sku_id).all()
+        assert [entry.transaction_type for entry in ledger] == [TransactionType.DEDUCT] * 2
+        assert [(entry.quantity_before, entry.quantity_after) for entry in ledger] == [(20, 18), (20, 17)]
+
+    def test_pay_with_reserved_shortage_changes_nothing(self, unit_test_db, catalog):
+        sku_a = catalog["skus"][0]
+        order = _create_order(unit_test_db, catalog, "ORD_LEDGER_3", "pending", [4, 0])
+        self._add_duplicate_item(unit_test_db, catalog, order, 2)
+        service = OrderService(unit_test_db)
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(service.update_order_status(order.id, "paid", operator_id=catalog["user"].id))
+
+        assert "预占库存不足" in exc_info.value.detail
+        assert _stock(unit_test_db, sku_a).reserved_quantity == 5
+        assert unit_test_db.query(InventoryTransaction).count() == 0
+
+
+class TestBatchStatusRequestSchema:
+    """批量请求模式测试"""
+
+    def test_order_ids_are_deduplicated(self):
+        request = OrderBatchStatusUpdateRequest(order_ids=[3, 1, 3], status="shipped")
+
+        assert request.order_ids == [3, 1]
+
+    def test_order_ids_must_be_positive(self):
+        with pytest.raises(ValueError):
+            OrderBatchStatusUpdateRequest(order_ids=[0], status="shipped")
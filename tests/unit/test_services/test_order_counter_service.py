@@ -0,0 +1,173 @@
+"""
+订单计数服务单元测试
+
+测试覆盖：
+- 计数写入：创建、状态变更、计数行首次插入、历史订单变更时计数不为负
+- 计数读取：用户精确计数、全站近似计数缓存
+- 计数重建：从订单表回填
+- OrderService 集成：状态变更与计数在同一事务中提交
+"""
+
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from app.modules.order_management import counter_service as counter_module
+from app.modules.order_management.counter_service import OrderCounterService
+from app.modules.order_management.models import Order, OrderCounter
+from app.modules.order_management.service import OrderService
+from app.modules.user_auth.models import User
+
+
+@pytest.fixture
+def counter_service(unit_test_db):
+    counter_module._approximate_count_cache.clear()
+    return OrderCounterService(unit_test_db)
+
+
+@pytest.fixture
+def test_user(unit_test_db):
+    user = User(username="counter_user", email="counter@example.com", password_hash="hashed")
+    unit_test_db.add(user)
+    unit_test_db.commit()
+    return user
+
+
+def _create_order(db, user_id, order_number, status="pending"):
+    order = Order(
+        order_number=order_number,
+        user_id=user_id,
+        status=status,
+        subtotal=Decimal("10.00"),
+        shipping_fee=Decimal("0.00"),
+        discount_amount=Decimal("0.00"),
+        total_amount=Decimal("10.00"),
+    )
+    db.add(order)
+    db.commit()
+    return order
+
+
+class TestOrderCounterWrites:
+    """计数写入测试"""
+
+    def test_record_created_inserts_then_increments(self, unit_test_db, counter_service):
+        counter_service.record_created(1)
+        counter_service.record_created(1)
+        unit_test_db.commit()
+
+        counters = unit_test_db.query(OrderCounter).all()
+        assert len(counters) == 1
+        assert counters[0].order_count == 2
+
+    def test_record_transition_moves_count(self, unit_test_db, counter_service):
+        counter_service.record_created(1)
+        counter_service.record_transition(1, "pending", "paid")
+        unit_test_db.commit()
+
+        assert counter_service.count_user_orders(1, "pending") == 0
+        assert counter_service.count_user_orders(1, "paid") == 1
+        assert counter_service.count_user_orders(1) == 1
+
+    def test_transition_of_uncounted_order_never_goes_negative(self, unit_test_db, counter_service):
+        # 计数上线前创建的订单：pending 没有计数行，或计数行未计入该订单
+        counter_service.record_transition(1, "pending", "paid")
+        counter_service.record_created(2)
+        counter_service.record_transition(2, "pending", "paid")
+        counter_service.record_transition(2, "pending", "cancelled")
+        unit_test_db.commit()
+
+        assert counter_service.count_user_orders(1, "pending") == 0
+        assert counter_service.count_user_orders(1, "paid") == 1
+        assert counter_service.count_user_orders(2, "pending") == 0
+        assert counter_service.count_user_orders(2) == 2
+
+    def test_same_status_transition_is_noop(self, unit_test_db, counter_service):
+        counter_service.record_created(1)
+        counter_service.record_transition(1, "pending", "pending")
+        unit_test_db.commit()
+
+        assert counter_service.count_user_orders(1, "pending") == 1
+
+
+class TestOrderCounterReads:
+    """计数读取测试"""
+
+    def test_count_user_orders_is_per_user(self, unit_test_db, counter_service):
+        counter_service.record_created(1)
+        counter_service.record_created(2)
+        counter_service.record_created(2)
+        unit_test_db.commit()
+
+        assert counter_service.count_user_orders(1) == 1
+        assert counter_service.count_user_orders(2) == 2
+        assert counter_service.count_user_orders(3) == 0
+
+    def test_count_all_orders_approximate_uses_cache(self, unit_test_db, counter_service):
+        counter_service.record_created(1)
+        unit_test_db.commit()
+        assert counter_service.count_all_orders() == 1
+
+        counter_service.record_created(2)
+        unit_test_db.commit()
+
+        # 近似模式命中缓存，精确模式重新汇总
+        assert counter_service.count_all_orders() == 1
+        assert counter_service.count_all_orders(approximate=False) == 2
+
+    def test_count_accepts_status_enum(self, unit_test_db, counter_service):
+        from app.modules.order_management.schemas import OrderStatus as OrderStatusSchema
+
+        counter_service.record_created(1)
+        unit_test_db.commit()
+
+        assert counter_service.count_user_orders(1, OrderStatusSchema.PENDING) == 1
+
+
+class TestOrderCounterRebuild:
+    """计数重建测试"""
+
+    def test_rebuild_from_orders(self, unit_test_db, counter_service, test_user):
+        _create_order(unit_test_db, test_user.id, "ORD_COUNTER_1")
+        _create_order(unit_test_db, test_user.id, "ORD_COUNTER_2", status="paid")
+        _create_order(unit_test_db, test_user.id, "ORD_COUNTER_3", status="paid")
+
+        written = counter_service.rebuild()
+
+        assert written == 2
+        assert counter_service.count_user_orders(test_user.id) == 3
+        assert counter_service.count_user_orders(test_user.id, "paid") == 2
+
+
+class TestOrderServiceCounterIntegration:
+    """订单服务计数集成测试"""
+
+    def test_update_order_status_updates_counters(self, unit_test_db, test_user):
+        order = _create_order(unit_test_db, test_user.id, "ORD_COUNTER_4", status="paid")
+        service = OrderService(unit_test_db)
+        service.counter_service.rebuild()
+
+        asyncio.run(service.update_order_status(order.id, "shipped", operator_id=test_user.id))
+
+        assert asyncio.run(service.count_orders(user_id=test_user.id, status_filter="paid")) == 0
+        assert asyncio.run(service.count_orders(user_id=test_user.id, status_filter="shipped")) == 1
+
+    def test_payment_status_completion_updates_counters(self, unit_test_db, test_user):
+        from app.modules.payment_service.models import Payment
+        from app.modules.payment_service.service import PaymentService
+
+        order = _create_order(unit_test_db, test_user.id, "ORD_COUNTER_5")
+        OrderCounterService(unit_test_db).rebuild()
+        payment = Payment(
+            order_id=order.id, user_id=test_user.id, payment_no="PAY_COUNTER_5",
+            payment_method="wechat", amount=Decimal("10.00"), status="pending"
+        )
+        unit_test_db.add(payment)
+        unit_test_db.commit()
+
+        PaymentService.update_payment_status(unit_test_db, payment.id, "completed")
+
+        counter_service = OrderCounterService(unit_test_db)
+        assert counter_service.count_user_orders(test_user.id, "pending") == 0
+        assert counter_service.count_user_orders(test_user.id, "paid") == 1
@@ -0,0 +1,122 @@
+"""
+订单导出服务单元测试
+
+测试覆盖：
+- CSV / NDJSON 编码输出
+- 订单状态、日期范围筛选
+- 订单与订单项连接输出（每个订单项一行）
+- 分批输出字节块
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.modules.order_management.export_service import OrderExportService, EXPORT_FIELD_NAMES
+from app.modules.order_management.models import Order, OrderItem
+from app.modules.product_catalog.models import Product, SKU
+from app.modules.user_auth.models import User
+
+
+@pytest.fixture
+def export_data(unit_test_db):
+    """创建两个订单：一个已支付（2个商品），一个待支付（1个商品，创建于10天前）"""
+    user = User(username="export_user", email="export@example.com", password_hash="hashed")
+    product = Product(name="有机大米", status="active")
+    unit_test_db.add_all([user, product])
+    unit_test_db.flush()
+
+    sku_a = SKU(product_id=product.id, sku_code="RICE-5KG", name="5kg装", price=Decimal("59.90"))
+    sku_b = SKU(product_id=product.id, sku_code="RICE-10KG", name="10kg装", price=Decimal("99.00"))
+    unit_test_db.add_all([sku_a, sku_b])
+    unit_test_db.flush()
+
+    paid_order = Order(
+        order_number="ORD_EXPORT_1", user_id=user.id, status="paid",
+        subtotal=Decimal("158.90"), total_amount=Decimal("168.90"), shipping_fee=Decimal("10.00"),
+        discount_amount=Decimal("0.00")
+    )
+    pending_order = Order(
+        order_number="ORD_EXPORT_2", user_id=user.id, status="pending",
+        subtotal=Decimal("59.90"), total_amount=Decimal("69.90"), shipping_fee=Decimal("10.00"),
+        discount_amount=Decimal("0.00"), created_at=datetime.now() - timedelta(days=10)
+    )
+    unit_test_db.add_all([paid_order, pending_order])
+    unit_test_db.flush()
+
+    for order, sku, quantity in ((paid_order, sku_a, 1), (paid_order, sku_b, 1), (pending_order, sku_a, 1)):
+        unit_test_db.add(OrderItem(
+            order_id=order.id, product_id=product.id, sku_id=sku.id, sku_code=sku.sku_code,
+            product_name=product.name, sku_name=sku.name, quantity=quantity,
+            unit_price=sku.price, total_price=sku.price * quantity
+        ))
+    unit_test_db.commit()
+    return {"paid_order": paid_order, "pending_order": pending_order}
+
+
+def _read_csv(chunks):
+    text = b"".join(chunks).decode("utf-8-sig")
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+class TestOrderExportFormats:
+    """导出格式测试"""
+
+    def test_csv_export_one_row_per_item(self, unit_test_db, export_data):
+        service = OrderExportService(unit_test_db)
+
+        rows = _read_csv(service.stream_export("csv"))
+
+        assert len(rows) == 3
+        assert tuple(rows[0].keys()) == EXPORT_FIELD_NAMES
+        assert rows[0]["order_number"] == "ORD_EXPORT_1"
+        assert rows[0]["product_name"] == "有机大米"
+        assert rows[0]["unit_price"] == "59.90"
+
+    def test_ndjson_export(self, unit_test_db, export_data):
+        service = OrderExportService(unit_test_db)
+
+        payload = b"".join(service.stream_export("ndjson")).decode("utf-8")
+        records = [json.loads(line) for line in payload.splitlines()]
+
+        assert len(records) == 3
+        assert records[-1]["order_number"] == "ORD_EXPORT_2"
+        assert records[-1]["status"] == "pending"
+
+    def test_unsupported_format_rejected(self, unit_test_db):
+        service = OrderExportService(unit_test_db)
+
+        with pytest.raises(ValueError):
+            service.stream_export("xml")
+
+    def test_output_is_chunked_by_batch(self, unit_test_db, export_data):
+        service = OrderExportService(unit_test_db, batch_size=1)
+
+        chunks = list(service.stream_export("ndjson"))
+
+        assert len(chunks) == 3
+
+
+class TestOrderExportFilters:
+    """导出筛选测试"""
+
+    def test_status_filter(self, unit_test_db, export_data):
+        service = OrderExportService(unit_test_db)
+
+        rows = _read_csv(service.stream_export("csv", status_filter="paid"))
+
+        assert {row["order_number"] for row in rows} == {"ORD_EXPORT_1"}
+
+    def test_date_range_filter(self, unit_test_db, export_data):
+        service = OrderExportService(unit_test_db)
+        old_day = (datetime.now() - timedelta(days=10)).date()
+
+        rows = _read_csv(service.stream_export("csv", start_date=old_day, end_date=old_day))
+        recent = _read_csv(service.stream_export("csv", start_date=date.today() - timedelta(days=1)))
+
+        assert {row["order_number"] for row in rows} == {"ORD_EXPORT_2"}
+        assert {row["order_number"] for row in recent} == {"ORD_EXPORT_1"}
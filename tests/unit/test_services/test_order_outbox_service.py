@@ -0,0 +1,235 @@
+"""
+订单事件发件箱单元测试
+
+测试覆盖：
+- 状态变更与发件箱事件同事务写入
+- 分发器批量投递、标记已分发
+- 订阅者失败时的退避重试与最大次数
+- 同步/异步订阅者
+- 领取后不持有事务投递，租约过期的事件重新领取
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.modules.order_management.models import Order, OrderOutboxEvent
+from app.modules.order_management.outbox_service import (
+    ORDER_STATUS_CHANGED, OrderEventBus, OrderOutboxDispatcher, record_status_change_event
+)
+from app.modules.order_management.service import OrderService
+from app.modules.user_auth.models import User
+
+
+@pytest.fixture
+def unit_test_engine(tmp_path):
+    """分发器在工作线程中使用独立连接，内存数据库各连接互不可见，改用临时文件数据库"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}", connect_args={"check_same_thread": False})
+    # 通过模型类取元数据，不受其他测试模块替换 app.core.database 的影响
+    Order.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(unit_test_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=unit_test_engine)
+
+
+@pytest.fixture
+def paid_order(unit_test_db):
+    user = User(username="outbox_user", email="outbox@example.com", password_hash="hashed")
+    unit_test_db.add(user)
+    unit_test_db.flush()
+    order = Order(
+        order_number="ORD_OUTBOX_1", user_id=user.id, status="paid",
+        subtotal=Decimal("20.00"), shipping_fee=Decimal("0.00"),
+        discount_amount=Decimal("0.00"), total_amount=Decimal("20.00")
+    )
+    unit_test_db.add(order)
+    unit_test_db.commit()
+    return order
+
+
+class TestOutboxRecording:
+    """事件写入测试"""
+
+    def test_status_update_writes_outbox_event(self, unit_test_db, paid_order):
+        service = OrderService(unit_test_db)
+
+        asyncio.run(service.update_order_status(paid_order.id, "shipped", operator_id=paid_order.user_id))
+
+        events = unit_test_db.query(OrderOutboxEvent).all()
+        assert len(events) == 1
+        assert events[0].event_type == ORDER_STATUS_CHANGED
+        assert events[0].status == "pending"
+        assert events[0].payload["old_status"] == "paid"
+        assert events[0].payload["new_status"] == "shipped"
+        assert events[0].payload["total_amount"] == "20.00"
+
+    def test_payment_completion_writes_outbox_event(self, unit_test_db, paid_order):
+        from app.modules.payment_service.models import Payment
+        from app.modules.payment_service.service import PaymentService
+
+        paid_order.status = "pending"
+        payment = Payment(
+            order_id=paid_order.id, user_id=paid_order.user_id, payment_no="PAY_OUTBOX_1",
+            payment_method="wechat", amount=Decimal("20.00"), status="pending"
+        )
+        unit_test_db.add(payment)
+        unit_test_db.commit()
+
+        PaymentService.update_payment_status(unit_test_db, payment.id, "completed")
+
+        event = unit_test_db.query(OrderOutboxEvent).one()
+        assert event.payload["order_id"] == paid_order.id
+        assert event.payload["old_status"] == "pending"
+        assert event.payload["new_status"] == "paid"
+
+
+class TestOutboxDispatcher:
+    """分发器测试"""
+
+    def test_dispatch_delivers_and_marks_dispatched(self, unit_test_db, paid_order, session_factory):
+        record_status_change_event(unit_test_db, paid_order, "paid", "shipped")
+        unit_test_db.commit()
+
+        bus = OrderEventBus()
+        received = []
+
+        @bus.subscribe(ORDER_STATUS_CHANGED)
+        async def on_changed(event):
+            received.append(event)
+
+        bus.subscribe(ORDER_STATUS_CHANGED, lambda event: received.append(event["id"]))
+
+        dispatcher = OrderOutboxDispatcher(session_factory=session_factory, event_bus=bus)
+        processed = asyncio.run(dispatcher.dispatch_once())
+
+        assert processed == 1
+        assert received[0]["payload"]["new_status"] == "shipped"
+        assert received[1] == received[0]["id"]
+
+        unit_test_db.expire_all()
+        event = unit_test_db.query(OrderOutboxEvent).one()
+        assert event.status == "dispatched"
+        assert event.dispatched_at is not None
+
+        # 已分发事件不会重复投递
+        assert asyncio.run(dispatcher.dispatch_once()) == 0
+
+    def test_failed_delivery_backs_off_then_fails(self, unit_test_db, paid_order, session_factory):
+        record_status_change_event(unit_test_db, paid_order, "paid", "shipped")
+        unit_test_db.commit()
+
+        bus = OrderEventBus()
+
+        @bus.subscribe(ORDER_STATUS_CHANGED)
+        def broken(event):
+            raise RuntimeError("subscriber down")
+
+        dispatcher = OrderOutboxDispatcher(session_factory=session_factory, event_bus=bus, max_attempts=2)
+        asyncio.run(dispatcher.dispatch_once())
+
+        unit_test_db.expire_all()
+        event = unit_test_db.query(OrderOutboxEvent).one()
+        assert event.status == "pending"
+        assert event.attempts == 1
+        assert event.last_error == "subscriber down"
+        assert event.available_at > datetime.now()
+
+        # 退避期间不会被领取
+        assert asyncio.run(dispatcher.dispatch_once()) == 0
+
+        event.available_at = datetime.now() - timedelta(seconds=1)
+        unit_test_db.commit()
+        asyncio.run(dispatcher.dispatch_once())
+
+        unit_test_db.expire_all()
+        event = unit_test_db.query(OrderOutboxEvent).one()
+        assert event.status == "failed"
+        assert event.attempts == 2
+
+    def test_dispatch_respects_batch_size(self, unit_test_db, paid_order, session_factory):
+        for _ in range(3):
+            record_status_change_event(unit_test_db, paid_order, "paid", "shipped")
+        unit_test_db.commit()
+
+        dispatcher = OrderOutboxDispatcher(session_factory=session_factory, event_bus=OrderEventBus(), batch_size=2)
+
+        assert asyncio.run(dispatcher.dispatch_once()) == 2
+        assert asyncio.run(dispatcher.dispatch_once()) == 1
+
+    def test_delivery_runs_outside_claim_transaction(self, unit_test_db, paid_order, session_factory):
+        record_status_change_event(unit_test_db, paid_order, "paid", "shipped")
+        unit_test_db.commit()
+
+        bus = OrderEventBus()
+        dispatcher = OrderOutboxDispatcher(session_factory=session_factory, event_bus=bus)
+        observed = []
+
+        @bus.subscribe(ORDER_STATUS_CHANGED)
+        async def on_changed(event):
+            # 领取已提交：其他会话可见领取状态，且其他分发器领取不到同一事件
+            other = session_factory()
+            try:
+                observed.append(other.query(OrderOutboxEvent).one().status)
+            finally:
+                other.close()
+            observed.append(await asyncio.to_thread(dispatcher._claim_batch))
+
+        assert asyncio.run(dispatcher.dispatch_once()) == 1
+        assert observed == ["dispatching", []]
+
+        unit_test_db.expire_all()
+        assert unit_test_db.query(OrderOutboxEvent).one().status == "dispatched"
+
+    def test_expired_lease_is_reclaimed(self, unit_test_db, paid_order, session_factory):
+        record_status_change_event(unit_test_db, paid_order, "paid", "shipped")
+        unit_test_db.commit()
+
+        delivered = []
+        bus = OrderEventBus()
+        bus.subscribe(ORDER_STATUS_CHANGED, lambda event: delivered.append(event["id"]))
+        dispatcher = OrderOutboxDispatcher(session_factory=session_factory, event_bus=bus, lease_seconds=60)
+
+        # 领取后未写回结果（如进程退出），租约期内不会被重新领取
+        stale_claim = dispatcher._claim_batch()
+        assert asyncio.run(dispatcher.dispatch_once()) == 0
+
+        event = unit_test_db.query(OrderOutboxEvent).one()
+        event.available_at = datetime.now() - timedelta(seconds=1)
+        unit_test_db.commit()
+
+        assert asyncio.run(dispatcher.dispatch_once()) == 1
+        assert delivered == [event.id]
+
+        # 过期租约的结果不覆盖重新领取后的结果
+        dispatcher._record_results(stale_claim, {event.id: "late failure"})
+        unit_test_db.expire_all()
+        event = unit_test_db.query(OrderOutboxEvent).one()
+        assert event.status == "dispatched"
+        assert event.attempts == 2
+        assert event.last_error is None
+
+    def test_start_and_stop(self, unit_test_db, paid_order, session_factory):
+        record_status_change_event(unit_test_db, paid_order, "paid", "shipped")
+        unit_test_db.commit()
+
+        bus = OrderEventBus()
+        delivered = []
+        bus.subscribe(ORDER_STATUS_CHANGED, delivered.append)
+        dispatcher = OrderOutboxDispatcher(session_factory=session_factory, event_bus=bus, poll_interval=0.01)
+
+        async def run_briefly():
+            dispatcher.start()
+            await asyncio.sleep(0.05)
+            await dispatcher.stop()
+
+        asyncio.run(run_briefly())
+
+        assert len(delivered) == 1
@@ -0,0 +1,104 @@
+"""
+密码哈希执行器单元测试
+
+测试覆盖：
+- 哈希/校验在线程池中执行，事件循环保持可调度
+- 准入控制：超过排队上限时返回503，并计入指标
+- 登录成功时按当前成本透明升级旧哈希
+- 异步登录路径的密码错误计数
+"""
+
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.core import password_hasher
+from app.core.auth import authenticate_user_async
+from app.core.login_throttle import get_login_throttle
+from app.core.password_hasher import PasswordHasher, PasswordHasherOverloaded
+from app.modules.user_auth.models import User
+
+# 测试使用最低成本，保持用例快速
+FAST_CONTEXT = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=4)
+UPGRADED_CONTEXT = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5)
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    instance = PasswordHasher(context=UPGRADED_CONTEXT, max_workers=2, max_pending=4)
+    monkeypatch.setattr(password_hasher, "_password_hasher", instance)
+    yield instance
+    instance.shutdown()
+
+
+@pytest.fixture
+def user(unit_test_db):
+    user = User(username="hasher_user", email="hasher@example.com", password_hash=FAST_CONTEXT.hash("secret123"))
+    unit_test_db.add(user)
+    unit_test_db.commit()
+    return user
+
+
+class TestPasswordHasher:
+    """密码哈希执行器测试"""
+
+    def test_hash_and_verify_roundtrip(self, hasher):
+        async def scenario():
+            hashed = await hasher.hash("secret123")
+            return hashed, await hasher.verify("secret123", hashed), await hasher.verify("wrong", hashed)
+
+        hashed, ok, wrong = asyncio.run(scenario())
+
+        assert hashed.startswith("$2b$05$")
+        assert (ok, wrong) == (True, False)
+        assert hasher.metrics()["completed"] == 3
+
+    def test_admission_control_and_metrics(self):
+        hasher = PasswordHasher(context=FAST_CONTEXT, max_workers=1, max_pending=2)
+        release = threading.Event()
+        ticks = []
+
+        async def scenario():
+            blocked = [asyncio.ensure_future(hasher._submit(release.wait)) for _ in range(2)]
+            # 事件循环在哈希执行期间仍可调度其他协程
+            for _ in range(3):
+                ticks.append(hasher.metrics())
+                await asyncio.sleep(0.01)
+            with pytest.raises(PasswordHasherOverloaded) as exc_info:
+                await hasher.hash("secret123")
+            release.set()
+            await asyncio.gather(*blocked)
+            return exc_info.value
+
+        try:
+            error = asyncio.run(scenario())
+        finally:
+            hasher.shutdown()
+
+        assert error.status_code == 503
+        assert error.headers["Retry-After"] == "1"
+        assert len(ticks) == 3
+        assert (ticks[-1]["running"], ticks[-1]["queued"]) == (1, 1)
+        metrics = hasher.metrics()
+        assert (metrics["rejected"], metrics["completed"], metrics["running"], metrics["queued"]) == (1, 2, 0, 0)
+
+    def test_rehash_on_login_when_cost_changes(self, unit_test_db, hasher, user):
+        authenticated = asyncio.run(authenticate_user_async(unit_test_db, "hasher_user", "secret123"))
+
+        assert authenticated.id == user.id
+        unit_test_db.expire_all()
+        stored = unit_test_db.get(User, user.id).password_hash
+        assert stored.startswith("$2b$05$")
+        assert UPGRADED_CONTEXT.verify("secret123", stored)
+        assert hasher.metrics()["rehashed"] == 1
+
+    def test_wrong_password_counts_failure(self, unit_test_db, hasher, user):
+        assert asyncio.run(authenticate_user_async(unit_test_db, "hasher_user", "wrong")) is None
+
+        # 失败计数只进入登录失败窗口，不写 users 表
+        unit_test_db.expire_all()
+        assert unit_test_db.get(User, user.id).failed_login_attempts == 0
+        assert get_login_throttle().record_failure("hasher_user", user_id=user.id) == 2
+        assert hasher.metrics()["rehashed"] == 0
@@ -0,0 +1,187 @@
+"""
+支付回调队列单元测试
+
+测试覆盖：
+- 回调写入收件箱与按交易号、交易状态去重
+- 处理器批量应用回调：支付单、订单状态、订单计数
+- 已处于终态的支付单重复回调幂等；同一交易 PAYERROR 之后的 SUCCESS 正常处理
+- 支付单不存在时退避重试，超过次数标记失败，失败回调可重新入队
+"""
+
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.modules.order_management.counter_service import OrderCounterService
+from app.modules.order_management.models import Order
+from app.modules.payment_service.callback_queue import (
+    PaymentCallbackWorker, enqueue_callback, requeue_failed_callbacks
+)
+from app.modules.payment_service.models import Payment, PaymentCallbackInbox
+from app.modules.user_auth.models import User
+
+
+@pytest.fixture
+def session_factory(unit_test_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=unit_test_engine)
+
+
+@pytest.fixture
+def pending_payments(unit_test_db):
+    """创建两个待支付订单及其支付单"""
+    user = User(username="callback_user", email="callback@example.com", password_hash="hashed")
+    unit_test_db.add(user)
+    unit_test_db.flush()
+
+    payments = []
+    for index in range(2):
+        order = Order(
+            order_number=f"ORD_CALLBACK_{index}", user_id=user.id, status="pending",
+            subtotal=Decimal("50.00"), shipping_fee=Decimal("0.00"),
+            discount_amount=Decimal("0.00"), total_amount=Decimal("50.00")
+        )
+        unit_test_db.add(order)
+        unit_test_db.flush()
+        payment = Payment(
+            order_id=order.id, user_id=user.id, payment_no=f"PAY_CALLBACK_{index}",
+            payment_method="wechat", amount=Decimal("50.00"), status="pending"
+        )
+        unit_test_db.add(payment)
+        payments.append(payment)
+    unit_test_db.commit()
+    OrderCounterService(unit_test_db).rebuild(user.id)
+    return payments
+
+
+def _enqueue(db, transaction_id, out_trade_no, trade_state="SUCCESS"):
+    payload = {"transaction_id": transaction_id, "out_trade_no": out_trade_no, "trade_state": trade_state}
+    return enqueue_callback(db, "wechat", transaction_id, out_trade_no, trade_state, payload)
+
+
+class TestCallbackEnqueue:
+    """回调写入测试"""
+
+    def test_duplicate_transaction_is_deduplicated(self, unit_test_db):
+        assert _enqueue(unit_test_db, "WX_TXN_1", "PAY_CALLBACK_0") is True
+        assert _enqueue(unit_test_db, "WX_TXN_1", "PAY_CALLBACK_0") is False
+
+        entries = unit_test_db.query(PaymentCallbackInbox).all()
+        assert len(entries) == 1
+        assert entries[0].status == "pending"
+        assert json.loads(entries[0].raw_payload)["trade_state"] == "SUCCESS"
+
+    def test_new_trade_state_is_not_deduplicated(self, unit_test_db):
+        assert _enqueue(unit_test_db, "WX_TXN_1", "PAY_CALLBACK_0", trade_state="PAYERROR") is True
+        assert _enqueue(unit_test_db, "WX_TXN_1", "PAY_CALLBACK_0", trade_state="SUCCESS") is True
+        assert _enqueue(unit_test_db, "WX_TXN_1", "PAY_CALLBACK_0", trade_state="SUCCESS") is False
+
+        assert unit_test_db.query(PaymentCallbackInbox).count() == 2
+
+
+class TestCallbackWorker:
+    """回调处理器测试"""
+
+    def test_batch_applies_success_callbacks(self, unit_test_db, pending_payments, session_factory):
+        _enqueue(unit_test_db, "WX_TXN_1", "PAY_CALLBACK_0")
+        _enqueue(unit_test_db, "WX_TXN_2", "PAY_CALLBACK_1", trade_state="PAYERROR")
+        worker = PaymentCallbackWorker(session_factory=session_factory)
+
+        assert worker.process_batch() == 2
+
+        unit_test_db.expire_all()
+        paid, failed = unit_test_db.query(Payment).order_by(Payment.id).all()
+        assert paid.status == "paid"
+        assert paid.external_transaction_id == "WX_TXN_1"
+        assert paid.order.status == "paid"
+        assert failed.status == "failed"
+        assert failed.order.status == "pending"
+        assert {entry.status for entry in unit_test_db.query(PaymentCallbackInbox)} == {"processed"}
+
+        counters = OrderCounterService(unit_test_db)
+        assert counters.count_user_orders(paid.user_id, "paid") == 1
+        assert counters.count_user_orders(paid.user_id, "pending") == 1
+
+        # 已全部处理，下一批为空
+        assert worker.process_batch() == 0
+
+    def test_callback_for_final_payment_is_idempotent(self, unit_test_db, pending_payments, session_factory):
+        worker = PaymentCallbackWorker(session_factory=session_factory)
+        _enqueue(unit_test_db, "WX_TXN_1", "PAY_CALLBACK_0")
+        worker.process_batch()
+
+        # 网关以不同交易号再次推送失败状态，终态支付单不变
+        _enqueue(unit_test_db, "WX_TXN_1_RETRY", "PAY_CALLBACK_0", trade_state="CLOSED")
+        worker.process_batch()
+
+        unit_test_db.expire_all()
+        payment = unit_test_db.query(Payment).filter(Payment.payment_no == "PAY_CALLBACK_0").one()
+        assert payment.status == "paid"
+        assert payment.external_transaction_id == "WX_TXN_1"
+        assert OrderCounterService(unit_test_db).count_user_orders(payment.user_id, "paid") == 1
+
+    def test_success_after_payerror_marks_paid(self, unit_test_db, pending_payments, session_factory):
+        worker = PaymentCallbackWorker(session_factory=session_factory)
+        _enqueue(unit_test_db, "WX_TXN_1", "PAY_CALLBACK_0", trade_state="PAYERROR")
+        worker.process_batch()
+
+        # 用户重新支付成功，网关以同一交易号推送 SUCCESS
+        assert _enqueue(unit_test_db, "WX_TXN_1", "PAY_CALLBACK_0") is True
+        worker.process_batch()
+
+        unit_test_db.expire_all()
+        payment = unit_test_db.query(Payment).filter(Payment.payment_no == "PAY_CALLBACK_0").one()
+        assert payment.status == "paid"
+        assert payment.order.status == "paid"
+
+    def test_unknown_payment_retried_then_failed(self, unit_test_db, session_factory):
+        _enqueue(unit_test_db, "WX_TXN_404", "PAY_MISSING")
+        worker = PaymentCallbackWorker(session_factory=session_factory, max_attempts=2)
+
+        worker.process_batch()
+
+        unit_test_db.expire_all()
+        entry = unit_test_db.query(PaymentCallbackInbox).one()
+        assert entry.status == "pending"
+        assert entry.attempts == 1
+        assert entry.last_error == "支付单不存在"
+        assert entry.next_attempt_at > datetime.utcnow()
+
+        # 退避期间不会被领取
+        assert worker.process_batch() == 0
+
+        entry.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        unit_test_db.commit()
+        worker.process_batch()
+
+        unit_test_db.expire_all()
+        entry = unit_test_db.query(PaymentCallbackInbox).one()
+        assert entry.status == "failed"
+        assert entry.attempts == 2
+
+    def test_failed_callback_can_be_requeued(self, unit_test_db, pending_payments, session_factory):
+        _enqueue(unit_test_db, "WX_TXN_1", "PAY_CALLBACK_0")
+        _enqueue(unit_test_db, "WX_TXN_2", "PAY_CALLBACK_1")
+        for entry in unit_test_db.query(PaymentCallbackInbox):
+            entry.status = "failed"
+            entry.attempts = 5
+        unit_test_db.commit()
+
+        assert requeue_failed_callbacks(unit_test_db, transaction_ids=["WX_TXN_1"]) == 1
+        assert PaymentCallbackWorker(session_factory=session_factory).process_batch() == 1
+
+        unit_test_db.expire_all()
+        statuses = {entry.transaction_id: entry.status for entry in unit_test_db.query(PaymentCallbackInbox)}
+        assert statuses == {"WX_TXN_1": "processed", "WX_TXN_2": "failed"}
+        assert unit_test_db.query(Payment).filter(Payment.payment_no == "PAY_CALLBACK_0").one().status == "paid"
+
+    def test_batch_size_limits_claimed_entries(self, unit_test_db, pending_payments, session_factory):
+        _enqueue(unit_test_db, "WX_TXN_1", "PAY_CALLBACK_0")
+        _enqueue(unit_test_db, "WX_TXN_2", "PAY_CALLBACK_1")
+        worker = PaymentCallbackWorker(session_factory=session_factory, batch_size=1)
+
+        assert worker.process_batch() == 1
+        assert worker.process_batch() == 1
+        assert worker.process_batch() == 0
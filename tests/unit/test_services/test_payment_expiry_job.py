@@ -0,0 +1,114 @@
+"""
+待支付记录过期清理任务单元测试
+
+测试覆盖：
+- 键集分块条件更新超时待支付记录
+- 未超时和非待支付记录不受影响
+- 关联待支付订单批量取消并释放预占库存
+- 订单仍有其他有效支付时不取消
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.modules.inventory_management.models import InventoryStock
+from app.modules.order_management.models import Order, OrderItem
+from app.modules.payment_service.expiry_job import PaymentExpirySweeper
+from app.modules.payment_service.models import Payment
+from app.modules.payment_service.service import PaymentService
+from app.modules.product_catalog.models import Product, SKU
+from app.modules.user_auth.models import User
+
+
+@pytest.fixture
+def expiry_data(unit_test_db):
+    user = User(username="expiry_user", email="expiry@example.com", password_hash="hashed")
+    product = Product(name="新鲜水果", status="active")
+    unit_test_db.add_all([user, product])
+    unit_test_db.flush()
+    sku = SKU(product_id=product.id, sku_code="FRUIT-1", name="一箱", price=Decimal("40.00"))
+    unit_test_db.add(sku)
+    unit_test_db.flush()
+    unit_test_db.add(InventoryStock(sku_id=sku.id, total_quantity=10, available_quantity=5, reserved_quantity=5))
+    unit_test_db.commit()
+    return {"user": user, "product": product, "sku": sku}
+
+
+def _order_with_payment(db, data, index, payment_status="pending", age_minutes=60):
+    order = Order(
+        order_number=f"ORD_EXPIRY_{index}", user_id=data["user"].id, status="pending",
+        subtotal=Decimal("40.00"), shipping_fee=Decimal("0.00"),
+        discount_amount=Decimal("0.00"), total_amount=Decimal("40.00")
+    )
+    db.add(order)
+    db.flush()
+    db.add(OrderItem(
+        order_id=order.id, product_id=data["product"].id, sku_id=data["sku"].id,
+        sku_code=data["sku"].sku_code, product_name=data["product"].name, sku_name=data["sku"].name,
+        quantity=1, unit_price=Decimal("40.00"), total_price=Decimal("40.00")
+    ))
+    payment = Payment(
+        order_id=order.id, user_id=data["user"].id, payment_no=f"PAY_EXPIRY_{index}",
+        payment_method="wechat", amount=Decimal("40.00"), status=payment_status,
+        created_at=datetime.now() - timedelta(minutes=age_minutes)
+    )
+    db.add(payment)
+    db.commit()
+    return order, payment
+
+
+class TestPaymentExpirySweep:
+    """过期清理测试"""
+
+    def test_expires_stale_pending_payments_in_chunks(self, unit_test_db, expiry_data):
+        for index in range(5):
+            _order_with_payment(unit_test_db, expiry_data, index)
+        _, fresh = _order_with_payment(unit_test_db, expiry_data, 5, age_minutes=5)
+        _, paid = _order_with_payment(unit_test_db, expiry_data, 6, payment_status="completed")
+
+        stats = PaymentExpirySweeper.sweep(unit_test_db, timeout_minutes=30, chunk_size=2)
+
+        assert stats["expired_payments"] == 5
+        assert stats["cancelled_orders"] == 5
+        assert stats["chunks"] == 3
+        assert "payments_per_second" in stats
+
+        unit_test_db.expire_all()
+        statuses = {payment.payment_no: payment.status for payment in unit_test_db.query(Payment)}
+        assert [statuses[f"PAY_EXPIRY_{index}"] for index in range(5)] == ["cancelled"] * 5
+        assert statuses[fresh.payment_no] == "pending"
+        assert statuses[paid.payment_no] == "completed"
+
+    def test_releases_reserved_stock_for_cancelled_orders(self, unit_test_db, expiry_data):
+        orders = [_order_with_payment(unit_test_db, expiry_data, index)[0] for index in range(3)]
+
+        PaymentExpirySweeper.sweep(unit_test_db, timeout_minutes=30)
+
+        unit_test_db.expire_all()
+        assert {unit_test_db.query(Order).get(order.id).status for order in orders} == {"cancelled"}
+        stock = unit_test_db.query(InventoryStock).filter(InventoryStock.sku_id == expiry_data["sku"].id).one()
+        assert stock.reserved_quantity == 2
+        assert stock.available_quantity == 8
+
+    def test_order_with_other_active_payment_is_kept(self, unit_test_db, expiry_data):
+        order, _ = _order_with_payment(unit_test_db, expiry_data, 0)
+        unit_test_db.add(Payment(
+            order_id=order.id, user_id=expiry_data["user"].id, payment_no="PAY_EXPIRY_RETRY",
+            payment_method="wechat", amount=Decimal("40.00"), status="processing"
+        ))
+        unit_test_db.commit()
+
+        stats = PaymentExpirySweeper.sweep(unit_test_db, timeout_minutes=30)
+
+        assert stats["expired_payments"] == 1
+        assert stats["cancelled_orders"] == 0
+        unit_test_db.expire_all()
+        assert unit_test_db.query(Order).get(order.id).status == "pending"
+
+    def test_service_entry_point_returns_count(self, unit_test_db, expiry_data):
+        _order_with_payment(unit_test_db, expiry_data, 0)
+
+        assert PaymentService.cancel_expired_payments(unit_test_db, timeout_minutes=30) == 1
+        assert PaymentService.cancel_expired_payments(unit_test_db, timeout_minutes=30) == 0
@@ -0,0 +1,137 @@
+"""
+支付对账服务单元测试
+
+测试覆盖：
+- 样例对账单流式读取
+- 支付/退款按网关交易号匹配
+- 金额差异、状态差异、本地缺失、格式错误行
+- 反向检查本地已成功但对账单缺失的支付
+- 分块处理结果与不分块一致
+"""
+
+import csv
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.modules.order_management.models import Order
+from app.modules.payment_service.models import Payment, Refund
+from app.modules.payment_service.reconciliation import (
+    AMOUNT_MISMATCH, INVALID_ROW, MISSING_IN_STATEMENT, MISSING_LOCAL, SAMPLE_STATEMENT_PATH, STATUS_MISMATCH,
+    PaymentReconciliationService, iter_statement_rows
+)
+from app.modules.user_auth.models import User
+
+
+@pytest.fixture
+def local_payments(unit_test_db):
+    """按样例对账单创建本地支付与退款记录"""
+    user = User(username="reconcile_user", email="reconcile@example.com", password_hash="hashed")
+    unit_test_db.add(user)
+    unit_test_db.flush()
+    order = Order(
+        order_number="ORD_RECONCILE_1", user_id=user.id, status="paid",
+        subtotal=Decimal("0.00"), shipping_fee=Decimal("0.00"),
+        discount_amount=Decimal("0.00"), total_amount=Decimal("0.00")
+    )
+    unit_test_db.add(order)
+    unit_test_db.flush()
+
+    rows = [
+        # (交易号, 支付单号, 金额, 状态, 支付时间)
+        ("4200001001202610170001", "PAY20261017091155A1B2C3D4", "128.00", "refunded", "2026-10-17 09:12:03"),
+        ("4200001001202610170002", "PAY20261017093012E5F6A7B8", "59.00", "paid", "2026-10-17 09:30:41"),
+        ("4200001001202610170003", "PAY20261017100450C9D0E1F2", "299.00", "pending", None),
+        ("4200001001202610170004", "PAY20261017114733A3B4C5D6", "35.50", "failed", None),
+        ("4200001001202610179999", "PAY20261017120000FFFFFFFF", "10.00", "paid", "2026-10-17 12:00:00"),
+    ]
+    payments = []
+    for transaction_id, payment_no, amount, status, paid_at in rows:
+        payment = Payment(
+            order_id=order.id, user_id=user.id, payment_no=payment_no, payment_method="wechat",
+            amount=Decimal(amount), status=status, external_transaction_id=transaction_id,
+            paid_at=datetime.fromisoformat(paid_at) if paid_at else None
+        )
+        unit_test_db.add(payment)
+        payments.append(payment)
+    unit_test_db.flush()
+    unit_test_db.add(Refund(
+        payment_id=payments[0].id, refund_no="REF_RECONCILE_1", amount=Decimal("128.00"),
+        reason="用户申请", status="completed", external_refund_id="5030001001202610170001"
+    ))
+    unit_test_db.commit()
+    return payments
+
+
+def _read_report(path):
+    with open(path, newline="", encoding="utf-8") as report_file:
+        return list(csv.DictReader(report_file))
+
+
+class TestStatementReader:
+    """对账单读取测试"""
+
+    def test_sample_statement_rows(self):
+        rows = list(iter_statement_rows(SAMPLE_STATEMENT_PATH))
+
+        assert len(rows) == 6
+        assert rows[0]["line_no"] == 2
+        assert rows[4]["record_type"] == "REFUND"
+
+    def test_missing_columns_rejected(self, tmp_path):
+        statement = tmp_path / "bad.csv"
+        statement.write_text("transaction_id,amount\nX,1.00\n", encoding="utf-8")
+
+        with pytest.raises(ValueError):
+            list(iter_statement_rows(statement))
+
+
+class TestReconciliation:
+    """对账测试"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 1000])
+    def test_reconcile_sample_statement(self, unit_test_db, local_payments, tmp_path, chunk_size):
+        report_path = tmp_path / "report.csv"
+        service = PaymentReconciliationService(unit_test_db, chunk_size=chunk_size)
+
+        summary = service.reconcile(SAMPLE_STATEMENT_PATH, report_path)
+
+        assert summary["statement_rows"] == 6
+        # 已退款支付、已关闭交易、退款单匹配
+        assert summary["matched"] == 3
+        assert summary["discrepancies"] == {
+            AMOUNT_MISMATCH: 1,
+            STATUS_MISMATCH: 1,
+            MISSING_LOCAL: 1,
+            MISSING_IN_STATEMENT: 1,
+        }
+
+        report = {row["transaction_id"]: row for row in _read_report(report_path)}
+        assert report["4200001001202610170002"]["discrepancy_type"] == AMOUNT_MISMATCH
+        assert report["4200001001202610170002"]["local_amount"] == "59.00"
+        assert report["4200001001202610170003"]["discrepancy_type"] == STATUS_MISMATCH
+        assert report["4200001001202610170005"]["discrepancy_type"] == MISSING_LOCAL
+        assert report["4200001001202610179999"]["discrepancy_type"] == MISSING_IN_STATEMENT
+
+    def test_invalid_rows_reported(self, unit_test_db, tmp_path):
+        statement = tmp_path / "statement.csv"
+        statement.write_text(
+            "trade_time,transaction_id,out_trade_no,record_type,amount,status\n"
+            "2026-10-17 09:00:00,T1,P1,PAYMENT,abc,SUCCESS\n"
+            "not-a-date,T2,P2,PAYMENT,1.00,SUCCESS\n",
+            encoding="utf-8"
+        )
+        report_path = tmp_path / "report.csv"
+
+        summary = PaymentReconciliationService(unit_test_db).reconcile(statement, report_path)
+
+        assert summary["discrepancies"] == {INVALID_ROW: 2}
+        assert summary["period_start"] is None
+
+    def test_reverse_check_can_be_disabled(self, unit_test_db, local_payments, tmp_path):
+        summary = PaymentReconciliationService(unit_test_db).reconcile(
+            SAMPLE_STATEMENT_PATH, tmp_path / "report.csv", check_missing_in_statement=False
+        )
+
+        assert MISSING_IN_STATEMENT not in summary["discrepancies"]
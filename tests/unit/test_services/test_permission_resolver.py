@@ -0,0 +1,209 @@
+"""
+RBAC 权限解析器单元测试
+
+测试覆盖：
+- 有效权限编译为位掩码，缓存命中后权限检查不查询数据库
+- 位序号按权限 id 稠密分配，权限目录变化后缓存掩码重新编译
+- 角色权限变更递增角色版本，持有该角色的用户重新编译
+- 用户角色变更失效该用户缓存
+- Redis 共享层与跨进程角色版本同步
+- require_permission 依赖：403、超级管理员放行
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.core import permission_resolver
+from app.core.auth import require_permission
+from app.core.permission_resolver import PermissionResolver
+from app.core.principal_cache import Principal
+from app.modules.user_auth.models import Permission, Role, User
+from app.modules.user_auth.service import RoleService
+
+
+class FakeRedis:
+    """只实现权限缓存用到命令的同步Redis替身"""
+
+    def __init__(self):
+        self.data = {}
+        self.hashes = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def hincrby(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field] = str(int(values.get(field, 0)) + amount)
+        return int(values[field])
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def resolver(monkeypatch, clock):
+    instance = PermissionResolver(redis_factory=None, clock=clock)
+    monkeypatch.setattr(permission_resolver, "_permission_resolver", instance)
+    return instance
+
+
+@pytest.fixture
+def rbac(unit_test_db):
+    """用户 alice 持有 editor 角色，editor 拥有 product:update"""
+    user = User(username="alice", email="alice@example.com", password_hash="hashed")
+    editor = Role(name="editor", level=10)
+    auditor = Role(name="auditor", level=5)
+    update = Permission(name="product.update", resource="product", action="update")
+    delete = Permission(name="product.delete", resource="product", action="delete")
+    unit_test_db.add_all([user, editor, auditor, update, delete])
+    unit_test_db.commit()
+    RoleService.assign_role(unit_test_db, user.id, editor.id)
+    RoleService.grant_permission(unit_test_db, editor.id, update.id)
+    return user, editor, auditor, update, delete
+
+
+@pytest.fixture
+def statements(unit_test_engine):
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+
+    event.listen(unit_test_engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(unit_test_engine, "before_cursor_execute", record)
+
+
+class TestPermissionResolver:
+    """权限解析器测试"""
+
+    def test_compiled_mask_served_from_cache(self, unit_test_db, resolver, rbac, statements, clock):
+        user, _, _, update, delete = rbac
+
+        assert resolver.has_permission(unit_test_db, user.id, "product", "update")
+        assert resolver.get_permissions(unit_test_db, user.id).mask == 1 << resolver.permission_bit(unit_test_db, "product", "update")
+        statements.clear()
+
+        for _ in range(100):
+            assert resolver.has_permission(unit_test_db, user.id, "product", "update")
+            assert not resolver.has_permission(unit_test_db, user.id, "product", "delete")
+        assert statements == []
+        assert resolver.compiles == 1
+
+        # 未知权限按限频重新加载目录
+        assert not resolver.has_permission(unit_test_db, user.id, "product", "archive")
+        assert statements == []
+        clock.now += 60
+        assert not resolver.has_permission(unit_test_db, user.id, "product", "archive")
+        assert len(statements) == 1
+
+    def test_sparse_permission_ids_get_dense_bits(self, unit_test_db, resolver, clock):
+        user = User(username="bob", email="bob@example.com", password_hash="hashed")
+        role = Role(name="operator", level=10)
+        permissions = [
+            Permission(id=permission_id, name=f"order.{action}", resource="order", action=action)
+            for permission_id, action in ((1, "read"), (5, "ship"), (40, "refund"))
+        ]
+        unit_test_db.add_all([user, role, *permissions])
+        unit_test_db.commit()
+        RoleService.assign_role(unit_test_db, user.id, role.id)
+        for permission in permissions:
+            RoleService.grant_permission(unit_test_db, role.id, permission.id)
+
+        assert resolver.get_permissions(unit_test_db, user.id).mask == 0b111
+        assert resolver.permission_bit(unit_test_db, "order", "refund") == 2
+
+        # 新权限插入 id 空洞后位序号整体变化，已缓存的掩码随目录指纹失效
+        unit_test_db.add(Permission(id=3, name="order.cancel", resource="order", action="cancel"))
+        unit_test_db.commit()
+        clock.now += 60
+        assert not resolver.has_permission(unit_test_db, user.id, "order", "cancel")
+        assert resolver.permission_bit(unit_test_db, "order", "refund") == 3
+        assert resolver.has_permission(unit_test_db, user.id, "order", "refund")
+        assert resolver.get_permissions(unit_test_db, user.id).mask == 0b1101
+        assert resolver.compiles == 2
+
+    def test_role_permission_change_bumps_version(self, unit_test_db, resolver, rbac):
+        user, editor, _, _, _ = rbac
+        assert not resolver.has_permission(unit_test_db, user.id, "product", "delete")
+
+        delete_id = unit_test_db.query(Permission.id).filter(Permission.action == "delete").scalar()
+        RoleService.grant_permission(unit_test_db, editor.id, delete_id)
+        assert resolver.has_permission(unit_test_db, user.id, "product", "delete")
+
+        RoleService.revoke_permission(unit_test_db, editor.id, delete_id)
+        assert not resolver.has_permission(unit_test_db, user.id, "product", "delete")
+        assert resolver.compiles == 3
+
+    def test_user_role_change_invalidates_user(self, unit_test_db, resolver, rbac):
+        user, editor, auditor, _, delete = rbac
+        RoleService.grant_permission(unit_test_db, auditor.id, delete.id)
+        assert not resolver.has_permission(unit_test_db, user.id, "product", "delete")
+
+        assert RoleService.assign_role(unit_test_db, user.id, auditor.id)
+        assert not RoleService.assign_role(unit_test_db, user.id, auditor.id)
+        assert resolver.has_permission(unit_test_db, user.id, "product", "delete")
+
+        assert RoleService.remove_role(unit_test_db, user.id, editor.id)
+        assert not resolver.has_permission(unit_test_db, user.id, "product", "update")
+
+    def test_shared_redis_tier_and_version_sync(self, unit_test_db, rbac, clock, statements):
+        user, editor, _, _, _ = rbac
+        redis = FakeRedis()
+        worker_a = PermissionResolver(redis_client=redis, redis_factory=None, clock=clock)
+        worker_b = PermissionResolver(redis_client=redis, redis_factory=None, clock=clock)
+        worker_a.get_permissions(unit_test_db, user.id)
+        statements.clear()
+
+        assert worker_b.get_permissions(unit_test_db, user.id).mask == worker_a.get_permissions(unit_test_db, user.id).mask
+        assert (statements, worker_b.compiles) == ([], 0)
+
+        # 其他进程的角色版本在同步间隔后生效，缓存条目重新编译
+        worker_a.bump_role(editor.id)
+        assert worker_b.get_permissions(unit_test_db, user.id).role_versions == ((editor.id, 0),)
+        clock.now += 5
+        assert worker_b.get_permissions(unit_test_db, user.id).role_versions == ((editor.id, 1),)
+        assert worker_b.compiles == 1
+
+
+class TestRequirePermission:
+    """require_permission 依赖测试"""
+
+    def test_dependency_allows_and_rejects(self, unit_test_db, resolver, rbac):
+        user = rbac[0]
+        principal = Principal(user.id, "user", True, "active")
+
+        allowed = asyncio.run(require_permission("product", "update")(principal, unit_test_db))
+        assert allowed == principal
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(require_permission("product", "delete")(principal, unit_test_db))
+        assert exc_info.value.status_code == 403
+
+    def test_super_admin_bypasses_permissions(self, unit_test_db, resolver):
+        principal = Principal(999, "super_admin", True, "active")
+
+        assert asyncio.run(require_permission("order", "refund")(principal, unit_test_db)) == principal
+        assert resolver.compiles == 0
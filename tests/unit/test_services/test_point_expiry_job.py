@@ -0,0 +1,105 @@
+"""
+积分过期批处理单元测试
+
+测试覆盖：
+- FIFO：已使用积分先抵扣最早获得的积分，只过期剩余的到期部分
+- 批量写入 expire 流水并扣减余额，重复执行不会重复过期
+- 使用量超过到期获得量时不过期
+- 按用户ID分块、按区间分区处理
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.modules.member_system.expiry_job import PointExpiryEngine
+from app.modules.member_system.ledger import PointLedger
+from app.modules.member_system.models import MemberLevel, MemberPoint, PointTransaction
+from app.modules.user_auth.models import User
+
+CUTOFF = datetime(2024, 10, 1)
+
+
+@pytest.fixture
+def users(unit_test_db):
+    unit_test_db.add(MemberLevel(id=1, level_name="注册会员", min_points=0))
+    users = [
+        User(username=f"expiry_member_{index}", email=f"expiry_member_{index}@example.com", password_hash="hashed")
+        for index in range(3)
+    ]
+    unit_test_db.add_all(users)
+    unit_test_db.commit()
+    return users
+
+
+def _post_at(db, user, transaction_type, points_change, created_at):
+    transaction = PointLedger(db).post(user.id, transaction_type, points_change, reference_type="test")
+    transaction.created_at = created_at
+    db.commit()
+
+
+def _account(db, user):
+    db.expire_all()
+    return db.query(MemberPoint).filter(MemberPoint.user_id == user.id).one()
+
+
+class TestPointExpiryEngine:
+    """积分过期测试"""
+
+    def test_expires_remaining_old_lots_fifo(self, unit_test_db, users):
+        user = users[0]
+        _post_at(unit_test_db, user, "earn", 100, datetime(2023, 5, 1))
+        _post_at(unit_test_db, user, "earn", 50, datetime(2025, 1, 1))
+        _post_at(unit_test_db, user, "use", -30, datetime(2025, 2, 1))
+
+        stats = PointExpiryEngine(unit_test_db).expire(cutoff=CUTOFF)
+
+        assert stats["expired_users"] == 1
+        assert stats["expired_points"] == 70
+        account = _account(unit_test_db, user)
+        assert (account.current_points, account.total_expired) == (50, 70)
+        expire_row = unit_test_db.query(PointTransaction).filter(
+            PointTransaction.transaction_type == "expire"
+        ).one()
+        assert (expire_row.points_change, expire_row.balance_after) == (-70, 50)
+
+    def test_rerun_does_not_expire_twice(self, unit_test_db, users):
+        _post_at(unit_test_db, users[0], "earn", 100, datetime(2023, 5, 1))
+
+        PointExpiryEngine(unit_test_db).expire(cutoff=CUTOFF)
+        stats = PointExpiryEngine(unit_test_db).expire(cutoff=CUTOFF)
+
+        assert stats["expired_points"] == 0
+        assert _account(unit_test_db, users[0]).current_points == 0
+
+    def test_old_lots_already_consumed(self, unit_test_db, users):
+        user = users[0]
+        _post_at(unit_test_db, user, "earn", 100, datetime(2023, 5, 1))
+        _post_at(unit_test_db, user, "earn", 80, datetime(2025, 1, 1))
+        _post_at(unit_test_db, user, "use", -150, datetime(2025, 2, 1))
+
+        stats = PointExpiryEngine(unit_test_db).expire(cutoff=CUTOFF)
+
+        assert stats["expired_points"] == 0
+        assert _account(unit_test_db, user).current_points == 30
+
+    def test_chunked_and_partitioned(self, unit_test_db, users):
+        for user in users:
+            _post_at(unit_test_db, user, "earn", 10, datetime(2023, 5, 1))
+        engine = PointExpiryEngine(unit_test_db, chunk_size=1)
+
+        ranges = engine.partition_ranges(2)
+        assert ranges == [(users[0].id, users[2].id), (users[2].id, users[2].id + 1)]
+
+        first = engine.expire(*ranges[0], cutoff=CUTOFF)
+        assert (first["expired_users"], first["chunks"]) == (2, 2)
+        assert _account(unit_test_db, users[2]).current_points == 10
+
+        second = engine.expire(*ranges[1], cutoff=CUTOFF)
+        assert second["expired_users"] == 1
+        assert _account(unit_test_db, users[2]).current_points == 0
+
+    def test_expiry_cutoff_uses_validity_months(self, unit_test_db):
+        engine = PointExpiryEngine(unit_test_db, validity_months=12)
+
+        assert engine.expiry_cutoff(now=datetime(2026, 10, 18)) == datetime(2025, 10, 1)
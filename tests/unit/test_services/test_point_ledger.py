@@ -0,0 +1,124 @@
+"""
+积分账本单元测试
+
+测试覆盖：
+- 发放/使用积分时余额与流水同时更新，流水记录变动后余额
+- 余额不足时不扣减、不写流水
+- 积分账户不存在时自动创建
+- 汇总读取积分账户预先维护的数据
+- 历史流水按月压缩并删除原始记录，重复压缩累加到已有汇总行
+"""
+
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.modules.member_system.ledger import PointLedger, PointLedgerCompactor
+from app.modules.member_system.models import (
+    MemberLevel, MemberPoint, PointLedgerMonthlySummary, PointTransaction
+)
+from app.modules.member_system.service import PointService
+from app.modules.user_auth.models import User
+
+
+@pytest.fixture
+def member_user(unit_test_db):
+    unit_test_db.add(MemberLevel(id=1, level_name="注册会员", min_points=0))
+    user = User(username="ledger_user", email="ledger@example.com", password_hash="hashed")
+    unit_test_db.add(user)
+    unit_test_db.commit()
+    return user
+
+
+def _post_at(db, user_id, transaction_type, points_change, created_at):
+    transaction = PointLedger(db).post(user_id, transaction_type, points_change, reference_type="test")
+    transaction.created_at = created_at
+    db.commit()
+    return transaction
+
+
+class TestPointLedger:
+    """记账测试"""
+
+    def test_earn_and_use_keep_balance_and_ledger_in_step(self, unit_test_db, member_user):
+        service = PointService(unit_test_db)
+
+        earned = service.earn_points(member_user.id, 120, "order", "ORD1")
+        used = service.use_points(member_user.id, 50, "order", "ORD2")
+
+        assert earned.balance_after == 120
+        assert used.points_change == -50
+        assert used.balance_after == 70
+        assert service.get_point_summary(member_user.id) == {
+            "total_points": 120,
+            "available_points": 70,
+            "total_used": 50,
+            "frozen_points": 0,
+            "expiring_points": 0,
+            "expiring_date": None
+        }
+
+    def test_insufficient_balance_rejected_without_ledger_row(self, unit_test_db, member_user):
+        service = PointService(unit_test_db)
+        service.earn_points(member_user.id, 30, "order", "ORD1")
+
+        with pytest.raises(HTTPException) as exc_info:
+            service.use_points(member_user.id, 31, "order", "ORD2")
+
+        assert exc_info.value.status_code == 400
+        assert unit_test_db.query(PointTransaction).count() == 1
+        assert unit_test_db.query(MemberPoint.current_points).scalar() == 30
+
+    def test_summary_for_user_without_account(self, unit_test_db, member_user):
+        summary = PointLedger(unit_test_db).get_summary(member_user.id)
+
+        assert summary["available_points"] == 0
+        assert unit_test_db.query(MemberPoint).count() == 0
+
+
+class TestPointLedgerCompactor:
+    """流水压缩测试"""
+
+    def test_compacts_old_months_into_summaries(self, unit_test_db, member_user):
+        user_id = member_user.id
+        _post_at(unit_test_db, user_id, "earn", 100, datetime(2024, 1, 5))
+        _post_at(unit_test_db, user_id, "use", -40, datetime(2024, 1, 20))
+        _post_at(unit_test_db, user_id, "earn", 10, datetime(2024, 2, 3))
+        recent = _post_at(unit_test_db, user_id, "earn", 5, datetime(2024, 3, 1))
+
+        stats = PointLedgerCompactor(unit_test_db, chunk_size=2).compact(before=datetime(2024, 3, 15))
+
+        assert stats["compacted_transactions"] == 3
+        assert stats["chunks"] == 2
+        summaries = {
+            row.period: row for row in unit_test_db.query(PointLedgerMonthlySummary).filter(
+                PointLedgerMonthlySummary.user_id == user_id
+            )
+        }
+        assert set(summaries) == {"2024-01", "2024-02"}
+        assert (summaries["2024-01"].earned_points, summaries["2024-01"].used_points) == (100, 40)
+        assert summaries["2024-01"].closing_balance == 60
+        assert summaries["2024-02"].transaction_count == 1
+        # 保留期内的流水和余额不受影响
+        assert [row.id for row in unit_test_db.query(PointTransaction)] == [recent.id]
+        assert PointLedger(unit_test_db).get_summary(user_id)["available_points"] == 75
+
+    def test_recompaction_merges_into_existing_rows(self, unit_test_db, member_user):
+        user_id = member_user.id
+        _post_at(unit_test_db, user_id, "earn", 100, datetime(2024, 1, 5))
+        PointLedgerCompactor(unit_test_db).compact(before=datetime(2024, 2, 1))
+        # 迟到写入的同月流水
+        _post_at(unit_test_db, user_id, "earn", 20, datetime(2024, 1, 28))
+
+        PointLedgerCompactor(unit_test_db).compact(before=datetime(2024, 2, 1))
+
+        summary = unit_test_db.query(PointLedgerMonthlySummary).one()
+        assert summary.earned_points == 120
+        assert summary.transaction_count == 2
+        assert summary.closing_balance == 120
+
+    def test_retention_cutoff_aligns_to_month(self):
+        cutoff = PointLedgerCompactor.retention_cutoff(24, now=datetime(2026, 10, 18, 9, 30))
+
+        assert cutoff == datetime(2024, 10, 1)
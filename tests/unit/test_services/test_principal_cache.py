@@ -0,0 +1,164 @@
+"""
+认证主体缓存单元测试
+
+测试覆盖：
+- get_current_user 命中缓存后不再查询 users 表
+- Redis 共享层在进程内缓存失效后继续生效
+- 账户锁定、用户更新后失效缓存
+- 禁用用户、用户不存在时拒绝认证
+- Redis 异常时降级为数据库查询
+- 依赖认证主体的接口只访问 Principal 字段
+"""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+
+from app.core import principal_cache
+from app.core.auth import AuthenticationError, create_access_token, get_current_user, increment_failed_attempts
+from app.core.principal_cache import Principal, PrincipalCache
+from app.modules.member_system.router import create_activity
+from app.modules.member_system.schemas import MemberActivityCreate
+from app.modules.shopping_cart.dependencies import get_current_active_user, get_user_id_from_token
+from app.modules.user_auth.models import User
+from app.modules.user_auth.service import UserService
+
+
+class FakeRedis:
+    """最小化的同步Redis替身"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+class BrokenRedis:
+    def get(self, key):
+        raise ConnectionError("redis down")
+
+    set = delete = get
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def cache(monkeypatch, fake_redis):
+    instance = PrincipalCache(redis_client=fake_redis, redis_factory=None)
+    monkeypatch.setattr(principal_cache, "_principal_cache", instance)
+    return instance
+
+
+@pytest.fixture
+def user(unit_test_db):
+    user = User(username="principal_user", email="principal@example.com", password_hash="hashed", role="admin")
+    unit_test_db.add(user)
+    unit_test_db.commit()
+    return user
+
+
+@pytest.fixture
+def query_counter(unit_test_engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(unit_test_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(unit_test_engine, "before_cursor_execute", record)
+
+
+def _authenticate(db, user_id):
+    credentials = HTTPAuthorizationCredentials(
+        scheme="Bearer", credentials=create_access_token({"sub": str(user_id)})
+    )
+    return asyncio.run(get_current_user(credentials, db))
+
+
+class TestPrincipalCache:
+    """认证主体缓存测试"""
+
+    def test_current_user_served_from_cache(self, unit_test_db, cache, user, query_counter):
+        user_id = user.id
+        query_counter.clear()
+
+        principal = _authenticate(unit_test_db, user_id)
+        assert principal == Principal(user_id, "admin", True, "active")
+        assert principal.is_admin
+        assert len(query_counter) == 1
+
+        _authenticate(unit_test_db, user_id)
+        assert len(query_counter) == 1
+
+    def test_shared_redis_tier(self, unit_test_db, fake_redis, user, query_counter):
+        user_id = user.id
+        PrincipalCache(redis_client=fake_redis, redis_factory=None).get(unit_test_db, user_id)
+        query_counter.clear()
+
+        other_process = PrincipalCache(redis_client=fake_redis, redis_factory=None)
+        assert other_process.get(unit_test_db, user_id).role == "admin"
+        assert query_counter == []
+
+    def test_lock_invalidates_principal(self, unit_test_db, cache, user, fake_redis):
+        assert _authenticate(unit_test_db, user.id).status == "active"
+
+        for _ in range(5):
+            increment_failed_attempts(unit_test_db, user)
+
+        assert fake_redis.data == {}
+        assert _authenticate(unit_test_db, user.id).status == "locked"
+
+    def test_update_user_invalidates_principal(self, unit_test_db, cache, user):
+        _authenticate(unit_test_db, user.id)
+
+        UserService.update_user(unit_test_db, user.id, is_active=False)
+
+        with pytest.raises(AuthenticationError, match="disabled"):
+            _authenticate(unit_test_db, user.id)
+
+    def test_unknown_user_rejected(self, unit_test_db, cache):
+        with pytest.raises(AuthenticationError, match="User not found"):
+            _authenticate(unit_test_db, 999)
+
+    def test_redis_failure_falls_back_to_database(self, unit_test_db, user):
+        cache = PrincipalCache(redis_client=BrokenRedis(), redis_factory=None)
+
+        assert cache.get(unit_test_db, user.id).role == "admin"
+        assert cache._redis_client() is None
+
+
+class TestPrincipalConsumers:
+    """认证主体消费方测试"""
+
+    def test_shopping_cart_dependencies_accept_principal(self):
+        principal = Principal(42, "user", True, "active")
+
+        assert asyncio.run(get_current_active_user(principal)) is principal
+        assert get_user_id_from_token(principal) == 42
+
+    def test_admin_activity_failure_logged_with_principal(self):
+        event_service = MagicMock()
+        event_service.create_activity.side_effect = RuntimeError("db down")
+        activity = MemberActivityCreate(
+            title="双十一", description="会员专享", activity_type="promotion",
+            start_time=datetime(2026, 11, 1), end_time=datetime(2026, 11, 11)
+        )
+
+        response = asyncio.run(create_activity(activity, Principal(1, "admin", True, "active"), event_service))
+
+        assert response.code == 500
@@ -0,0 +1,72 @@
+"""
+列表接口快速序列化单元测试
+
+测试覆盖：
+- 行元组序列化结果与响应模型 JSON 输出一致（Decimal、datetime、枚举）
+- 未安装 orjson 时回退标准库，输出相同
+- 响应字段没有对应列时定义即报错
+"""
+
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.modules.order_management.models import Order, OrderStatus
+from app.modules.order_management.schemas import OrderDetailResponse, OrderResponse
+from app.shared import serialization
+from app.shared.serialization import FastJSONResponse, RowSerializer
+
+
+def _order_row(order_id):
+    return {
+        "id": order_id,
+        "order_number": f"ORD20261018{order_id:06d}",
+        "user_id": 7,
+        "status": OrderStatus.PAID,
+        "subtotal": Decimal("199.90"),
+        "shipping_fee": Decimal("10.00"),
+        "discount_amount": Decimal("0.00"),
+        "total_amount": Decimal("209.90"),
+        "shipping_address": "上海市浦东新区",
+        "shipping_method": "standard",
+        "notes": None,
+        "created_at": datetime(2026, 10, 18, 9, 30, 15, 123456),
+        "updated_at": datetime(2026, 10, 18, 10, 0, 0),
+    }
+
+
+class TestRowSerializer:
+    """行元组序列化测试"""
+
+    def test_matches_response_model_json(self):
+        rows_serializer = RowSerializer.for_schema(OrderResponse, Order)
+        orders = [_order_row(1), _order_row(2)]
+        rows = [tuple(order[name] for name in rows_serializer.fields) for order in orders]
+
+        body = FastJSONResponse(rows_serializer.serialize(rows)).body
+
+        expected = [json.loads(OrderResponse(**order).model_dump_json()) for order in orders]
+        assert json.loads(body) == expected
+
+    def test_stdlib_fallback_without_orjson(self, monkeypatch):
+        rows_serializer = RowSerializer.for_schema(OrderResponse, Order)
+        row = tuple(_order_row(1)[name] for name in rows_serializer.fields)
+        content = {"items": rows_serializer.serialize([row]), "message": "获取订单列表成功"}
+
+        fast_body = FastJSONResponse(content).body
+        monkeypatch.setattr(serialization, "orjson", None)
+        fallback_body = FastJSONResponse(content).body
+
+        assert json.loads(fallback_body) == json.loads(fast_body)
+        assert "获取订单列表成功".encode() in fallback_body
+
+    def test_relationship_fields_rejected(self):
+        with pytest.raises(ValueError, match="items"):
+            RowSerializer.for_schema(OrderDetailResponse, Order)
+
+        rows_serializer = RowSerializer.for_schema(
+            OrderDetailResponse, Order, exclude=("items", "status_history")
+        )
+        assert rows_serializer.fields == RowSerializer.for_schema(OrderResponse, Order).fields
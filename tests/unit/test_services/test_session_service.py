@@ -0,0 +1,147 @@
+"""
+登录会话管理单元测试
+
+测试覆盖：
+- 会话只保存会话键哈希，按哈希查询活跃会话
+- 认证请求只在内存记录访问时间，批量写入为一条 executemany UPDATE
+- 会话列表按最近访问时间倒序并合并未写入的访问时间
+- 吊销会话后该会话的访问令牌被拒绝，吊销其他会话保留当前会话
+- 写入失败时访问记录保留在缓冲区
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+
+from app.core import session_activity, token_revocation
+from app.core.auth import AuthenticationError, create_access_token, get_current_user
+from app.core.session_activity import SessionActivityBuffer, hash_session_key
+from app.core.token_revocation import TokenRevocationList
+from app.modules.user_auth.models import Session as UserSession, User
+from app.modules.user_auth.session_service import SessionService, new_session_key
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    instance = SessionActivityBuffer(session_factory=None)
+    monkeypatch.setattr(session_activity, "_session_activity_buffer", instance)
+    monkeypatch.setattr(token_revocation, "_token_revocation_list", TokenRevocationList(redis_factory=None))
+    return instance
+
+
+@pytest.fixture
+def user(unit_test_db):
+    user = User(username="session_user", email="session@example.com", password_hash="hashed")
+    unit_test_db.add(user)
+    unit_test_db.commit()
+    return user
+
+
+@pytest.fixture
+def statements(unit_test_engine):
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append((statement, executemany))
+
+    event.listen(unit_test_engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(unit_test_engine, "before_cursor_execute", record)
+
+
+def _login(db, user, user_agent="pytest"):
+    session_key = new_session_key()
+    session = SessionService.create_session(
+        db, user.id, session_key, datetime.utcnow() + timedelta(days=30), "10.0.0.1", user_agent
+    )
+    return session, session_key
+
+
+def _authenticate(db, user, session_key):
+    token = create_access_token({"sub": str(user.id), "sid": session_key})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return asyncio.run(get_current_user(credentials, db))
+
+
+class TestSessionService:
+    """登录会话管理测试"""
+
+    def test_session_stores_only_key_hash(self, unit_test_db, buffer, user):
+        session, session_key = _login(unit_test_db, user)
+
+        assert session.token_hash == hash_session_key(session_key) != session_key
+        assert SessionService.get_active_session(unit_test_db, session_key).id == session.id
+        assert SessionService.get_active_session(unit_test_db, new_session_key()) is None
+
+    def test_touches_coalesced_into_one_batched_update(self, unit_test_db, buffer, user, statements):
+        first, first_key = _login(unit_test_db, user)
+        second, second_key = _login(unit_test_db, user)
+        statements.clear()
+
+        for _ in range(50):
+            _authenticate(unit_test_db, user, first_key)
+            _authenticate(unit_test_db, user, second_key)
+        assert not [sql for sql, _ in statements if sql.startswith("UPDATE sessions")]
+
+        accessed_at = datetime.utcnow() + timedelta(minutes=5)
+        buffer.touch(first.token_hash, accessed_at)
+        assert buffer.flush(unit_test_db) == 2
+
+        updates = [(sql, many) for sql, many in statements if sql.startswith("UPDATE sessions")]
+        assert len(updates) == 1 and updates[0][1]
+        unit_test_db.expire_all()
+        assert unit_test_db.get(UserSession, first.id).last_accessed_at == accessed_at
+        assert buffer.flush(unit_test_db) == 0
+
+    def test_list_sessions_merges_pending_and_excludes_inactive(self, unit_test_db, buffer, user):
+        old, _ = _login(unit_test_db, user, "old-device")
+        recent, _ = _login(unit_test_db, user, "recent-device")
+        revoked, _ = _login(unit_test_db, user, "revoked-device")
+        expired, _ = _login(unit_test_db, user, "expired-device")
+        expired.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        unit_test_db.commit()
+        SessionService.revoke_session(unit_test_db, user.id, revoked.id)
+
+        buffer.touch(recent.token_hash, datetime.utcnow() + timedelta(minutes=1))
+        sessions = SessionService.list_active_sessions(unit_test_db, user.id)
+
+        assert [session.user_agent for session in sessions] == ["recent-device", "old-device"]
+        unit_test_db.expire_all()
+        assert unit_test_db.get(UserSession, recent.id).last_accessed_at < sessions[0].last_accessed_at
+
+    def test_revoked_session_rejects_access_tokens(self, unit_test_db, buffer, user):
+        session, session_key = _login(unit_test_db, user)
+        assert _authenticate(unit_test_db, user, session_key).id == user.id
+
+        assert SessionService.revoke_session(unit_test_db, user.id, session.id)
+        assert not SessionService.revoke_session(unit_test_db, user.id, session.id)
+        assert buffer.pending(session.token_hash) is None
+
+        with pytest.raises(AuthenticationError, match="Session has been revoked"):
+            _authenticate(unit_test_db, user, session_key)
+
+    def test_revoke_other_sessions_keeps_current(self, unit_test_db, buffer, user):
+        current, current_key = _login(unit_test_db, user)
+        for _ in range(3):
+            _login(unit_test_db, user)
+
+        assert SessionService.revoke_other_sessions(unit_test_db, user.id, current_key) == 3
+        assert [session.id for session in SessionService.list_active_sessions(unit_test_db, user.id)] == [current.id]
+        assert _authenticate(unit_test_db, user, current_key).id == user.id
+
+    def test_failed_flush_keeps_pending(self, buffer):
+        class BrokenSession:
+            def execute(self, *args, **kwargs):
+                raise RuntimeError("database down")
+
+            def rollback(self):
+                pass
+
+        buffer.touch("hash-1", datetime(2026, 10, 18, 8, 0))
+        with pytest.raises(RuntimeError):
+            buffer.flush(BrokenSession())
+
+        assert buffer.pending("hash-1") == datetime(2026, 10, 18, 8, 0)
@@ -0,0 +1,217 @@
+"""
+令牌吊销列表单元测试
+
+测试覆盖：
+- 布隆过滤器无漏判、误判率在预期范围内
+- 未吊销令牌由本地布隆过滤器判定，不访问 Redis
+- 吊销记录 TTL 等于令牌剩余有效期
+- 其他进程的吊销在增量同步后生效，全量重建剔除过期记录
+- 写入 Redis 失败的吊销在全量重建后仍然生效，Redis 恢复后补写
+- 登出后访问令牌被拒绝
+"""
+
+import asyncio
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core import token_revocation
+from app.core.auth import AuthenticationError, create_access_token, decode_token, get_current_user, revoke_token
+from app.core.token_revocation import BloomFilter, TokenRevocationList
+from app.modules.user_auth.models import User
+
+
+class FakeRedis:
+    """只实现吊销列表用到命令的同步Redis替身"""
+
+    def __init__(self):
+        self.values = {}
+        self.index = {}
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.values[key] = (value, ex)
+
+    def exists(self, key):
+        self.commands.append("exists")
+        return int(key in self.values)
+
+    def zadd(self, key, mapping):
+        self.index.update(mapping)
+
+    def zrange(self, key, start, stop):
+        return sorted(self.index, key=self.index.get)
+
+    def zrangebyscore(self, key, low, high):
+        return [member for member, score in self.index.items() if score >= low]
+
+    def zrem(self, key, *members):
+        for member in members:
+            self.index.pop(member, None)
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class FlakyRedis(FakeRedis):
+    """写入可按需失败的Redis替身"""
+
+    def __init__(self):
+        super().__init__()
+        self.fail_writes = False
+
+    def set(self, key, value, ex=None):
+        if self.fail_writes:
+            raise ConnectionError("redis write failed")
+        super().set(key, value, ex)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 2_000_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _list(redis, clock):
+    return TokenRevocationList(redis_client=redis, redis_factory=None, sync_interval=5, rebuild_interval=600, clock=clock)
+
+
+class TestBloomFilter:
+    """布隆过滤器测试"""
+
+    def test_no_false_negatives_and_low_false_positive_rate(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.001)
+        for index in range(1000):
+            bloom.add(f"revoked-{index}")
+
+        assert all(f"revoked-{index}" in bloom for index in range(1000))
+        false_positives = sum(f"active-{index}" in bloom for index in range(20000))
+        assert false_positives < 20000 * 0.005
+
+
+class TestTokenRevocationList:
+    """令牌吊销列表测试"""
+
+    def test_not_revoked_answered_locally(self, redis, clock):
+        revocations = _list(redis, clock)
+
+        assert not any(revocations.is_revoked(f"jti-{index}") for index in range(100))
+        assert redis.commands == []
+
+    def test_revoke_sets_ttl_to_remaining_lifetime(self, redis, clock):
+        revocations = _list(redis, clock)
+
+        assert revocations.revoke("jti-1", clock.now + 1800)
+        assert not revocations.revoke("jti-expired", clock.now - 1)
+
+        assert redis.values["auth:revoked:jti-1"] == ("1", 1800)
+        assert revocations.is_revoked("jti-1")
+        assert redis.commands == ["exists"]
+
+    def test_other_process_revocation_visible_after_sync(self, redis, clock):
+        worker_a, worker_b = _list(redis, clock), _list(redis, clock)
+        assert not worker_b.is_revoked("jti-1")
+
+        worker_a.revoke("jti-1", clock.now + 1800)
+        clock.now += 5
+
+        assert worker_b.is_revoked("jti-1")
+
+    def test_full_rebuild_prunes_expired(self, redis, clock):
+        revocations = _list(redis, clock)
+        revocations.revoke("jti-short", clock.now + 60)
+        revocations.revoke("jti-long", clock.now + 3600)
+
+        clock.now += 601
+        revocations.is_revoked("jti-long")
+
+        assert [member.rsplit(":", 1)[0] for member in redis.index] == ["jti-long"]
+
+    def test_bloom_hit_without_redis_treated_as_revoked(self, clock):
+        revocations = TokenRevocationList(redis_client=None, redis_factory=None, clock=clock)
+        revocations.revoke("jti-1", clock.now + 60)
+
+        assert revocations.is_revoked("jti-1")
+        assert not revocations.is_revoked("jti-2")
+
+    def test_failed_write_survives_rebuild_and_is_retried(self, clock):
+        redis = FlakyRedis()
+        revocations = _list(redis, clock)
+        revocations.is_revoked("jti-warmup")
+
+        redis.fail_writes = True
+        assert not revocations.revoke("jti-1", clock.now + 1800)
+        redis.fail_writes = False
+        revocations._redis_down_until = 0.0
+
+        # 全量重建前补写到Redis，重建后的布隆过滤器仍包含该吊销
+        clock.now += 601
+        assert revocations.is_revoked("jti-1")
+        assert redis.values["auth:revoked:jti-1"] == ("1", 1199)
+        assert revocations._pending == {}
+
+        clock.now += 601
+        assert revocations.is_revoked("jti-1")
+
+    def test_pending_revocation_kept_until_expiry(self, clock):
+        redis = FlakyRedis()
+        revocations = _list(redis, clock)
+        redis.fail_writes = True
+        revocations.revoke("jti-1", clock.now + 60)
+        revocations._redis_down_until = 0.0
+
+        # Redis 仍不可写时同步中止，本地吊销继续生效
+        clock.now += 30
+        assert revocations.is_revoked("jti-1")
+        assert "jti-1" in revocations._pending
+
+        revocations._redis_down_until = 0.0
+        clock.now += 31
+        revocations.sync(full=True)
+        assert revocations._pending == {}
+        assert "auth:revoked:jti-1" not in redis.values
+
+
+class TestLogout:
+    """登出吊销测试"""
+
+    def test_revoked_access_token_rejected(self, unit_test_db, redis, monkeypatch):
+        monkeypatch.setattr(token_revocation, "_token_revocation_list", TokenRevocationList(
+            redis_client=redis, redis_factory=None
+        ))
+        user = User(username="logout_user", email="logout@example.com", password_hash="hashed")
+        unit_test_db.add(user)
+        unit_test_db.commit()
+        token = create_access_token({"sub": str(user.id)})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        assert asyncio.run(get_current_user(credentials, unit_test_db)).id == user.id
+        assert revoke_token(token)
+        assert redis.values[f"auth:revoked:{decode_token(token)['jti']}"][1] <= 30 * 60
+
+        with pytest.raises(AuthenticationError, match="revoked"):
+            asyncio.run(get_current_user(credentials, unit_test_db))